@@ -1,11 +1,87 @@
-from typing import Dict, List, Optional, Any
+from typing import AsyncIterator, Dict, Iterator, List, Optional, Any, Sequence, Tuple, Union
+from datetime import datetime
+from utils.errors import LLMError
+from utils.metrics import agent_scope
 from utils.ollama_client import OllamaClient
-from utils.conversation_memory import Session, SessionManager
+from utils.retry import Deadline
+from utils.session_keys import content_session_id
+from utils.conversation_memory import Message, Session, SessionManager
+from utils.summarizer import ConversationSummarizer
+from utils.token_budget import TokenBudget
+from utils.tracing import span, traced
+
+class PreparedConversation:
+    """
+    Een vooraf opgebouwde prompt waar alleen de nieuwe invoer nog aan ontbreekt.
+    
+    Onthoudt de staat van de sessie bij het opbouwen; als er sindsdien een bericht
+    of samenvatting is bijgekomen, is de voorbereiding verouderd en moet de
+    agent de prompt opnieuw opbouwen.
+    """
+    __slots__ = ("session", "prefix", "history", "token_budget", "viewer", "_state")
+    
+    def __init__(
+        self,
+        session: Session,
+        prefix: List[Dict[str, str]],
+        history: Sequence[Message],
+        token_budget: Optional[TokenBudget] = None,
+        viewer: Optional[str] = None
+    ):
+        self.session = session
+        self.prefix = prefix
+        self.history = history
+        self.token_budget = token_budget
+        self.viewer = viewer
+        self._state = self._session_state(session)
+    
+    @staticmethod
+    def _session_state(session: Session) -> tuple:
+        history = session.history
+        return (len(history), id(history[-1]) if history else None, session.summary)
+    
+    def is_stale(self) -> bool:
+        """Geeft True als de sessie na het voorbereiden is gewijzigd."""
+        return self._session_state(self.session) != self._state
+    
+    def complete(self, pending_input: Optional[str] = None) -> List[Dict[str, str]]:
+        """
+        Voeg de nieuwe invoer toe en pas zo nodig het tokenbudget toe.
+        
+        Args:
+            pending_input: Gebruikersinvoer die nog niet in de sessie staat
+            
+        Returns:
+            Het systeemprompt (en eventuele samenvatting) gevolgd door de recente gespreksgeschiedenis
+        """
+        history = self.history
+        if self.token_budget is not None:
+            # Systeemprompt(en) en nieuwste gebruikersbeurt gaan altijd mee; de rest naar budget
+            reserved = sum(self.token_budget.count_text(message["content"]) for message in self.prefix)
+            if pending_input is not None:
+                reserved += self.token_budget.count_text(pending_input)
+            history = self.token_budget.fit(
+                history,
+                reserved_tokens=reserved,
+                keep_last=0 if pending_input is not None else 1
+            )
+        
+        viewer = self.viewer
+        conversation = [message.to_prompt(viewer) for message in history]
+        if pending_input is not None:
+            conversation.append({"role": "user", "content": pending_input})
+        return self.prefix + conversation
+
 
 class BaseAgent:
     """
     Basisklasse voor alle agents met geïntegreerd sessiebeheer.
     """
+    # Rolspecifieke instructies die subklassen aan het systeemprompt toevoegen
+    instructions: str = ""
+    # Vakgebiedwoorden waarmee een AgentRouter vragen zonder LLM-aanroep toewijst
+    keywords: Sequence[str] = ()
+    
     def __init__(
         self, 
         name: str,
@@ -14,7 +90,9 @@ class BaseAgent:
         backstory: str,
         llm: Optional[OllamaClient] = None,
         session_manager: Optional[SessionManager] = None,
-        model: str = "openchat:latest"
+        model: str = "openchat:latest",
+        token_budget: Optional[TokenBudget] = None,
+        summarizer: Optional[ConversationSummarizer] = None
     ):
         """
         Initialiseer de basis agent.
@@ -27,6 +105,9 @@ class BaseAgent:
             llm: Optionele OllamaClient instantie
             session_manager: Optionele SessionManager instantie
             model: Naam van het te gebruiken LLM-model
+            token_budget: Optioneel tokenbudget voor de prompt; bepaalt hoeveel
+                geschiedenis wordt meegestuurd (naast het maximum aantal berichten)
+            summarizer: Optionele samenvatter die lange sessies op de achtergrond compacteert
         """
         self.name = name
         self.role = role
@@ -34,6 +115,8 @@ class BaseAgent:
         self.backstory = backstory
         self.llm = llm or OllamaClient(model=model)
         self.session_manager = session_manager or SessionManager()
+        self.token_budget = token_budget
+        self.summarizer = summarizer
     
     def get_or_create_session(self, session_id: str = None) -> Session:
         """
@@ -45,13 +128,8 @@ class BaseAgent:
         Returns:
             Een bestaande of nieuwe sessie
         """
-        if session_id:
-            session = self.session_manager.get_session(session_id)
-            if session:
-                return session
-        
-        # Maak een nieuwe sessie aan als deze niet bestaat
-        return self.session_manager.create_session(session_id=session_id)
+        # Atomair ophalen-of-aanmaken, zodat gelijktijdige beurten dezelfde sessie delen
+        return self.session_manager.get_or_create_session(session_id)
     
     def add_to_session(
         self, 
@@ -69,14 +147,15 @@ class BaseAgent:
             content: Inhoud van het bericht
             update_context: Optionele context om bij te werken
         """
-        session = self.get_or_create_session(session_id)
-        session.add_message(role, content)
-        
-        if update_context:
-            for key, value in update_context.items():
-                session.update_context(key, value)
+        with span("session.add_message", role=role):
+            session = self.get_or_create_session(session_id)
+            session.add_message(role, content)
+            
+            if update_context:
+                for key, value in update_context.items():
+                    session.update_context(key, value)
     
-    def get_session_history(self, session_id: str, max_messages: Optional[int] = None) -> List[Dict[str, str]]:
+    def get_session_history(self, session_id: str, max_messages: Optional[int] = None) -> Sequence[Message]:
         """
         Haal de gespreksgeschiedenis op voor een sessie.
         
@@ -85,7 +164,7 @@ class BaseAgent:
             max_messages: Maximum aantal berichten om op te halen
             
         Returns:
-            Lijst van berichten in de sessie
+            Read-only reeks van berichten in de sessie
         """
         session = self.get_or_create_session(session_id)
         return session.get_recent_history(max_messages)
@@ -114,69 +193,488 @@ class BaseAgent:
             key: Sleutel van de bij te werken waarde
             value: Nieuwe waarde
         """
+        with span("session.update_context", key=key):
+            session = self.get_or_create_session(session_id)
+            session.update_context(key, value)
+    
+    def build_system_prompt(self, topic: Optional[str] = None) -> str:
+        """
+        Stel het systeemprompt samen voor een beurt over een bepaald onderwerp.
+        
+        Args:
+            topic: Optioneel onderwerp voor context
+            
+        Returns:
+            Het systeemprompt inclusief de rolspecifieke instructies
+        """
+        return (
+            f"Jij bent {self.name}, een {self.role}. {self.backstory}\n"
+            "Je antwoordt altijd in het Nederlands, tenzij anders gevraagd.\n"
+            f"{self.instructions}"
+            f"Huidig onderwerp: {topic if topic else 'niet gespecificeerd'}"
+        )
+    
+    def _resolve_session_id(self, conversation: List[Dict[str, str]], session_id: Optional[str] = None) -> str:
+        """
+        Bepaal het sessie-ID voor een conversatie als er geen is opgegeven.
+        
+        Het afgeleide ID is een stabiele digest van het eerste gebruikersbericht
+        (zie utils.session_keys), gelijk in elk proces en na een herstart.
+        """
+        return session_id or content_session_id(conversation)
+    
+    @staticmethod
+    def _latest_user_message(conversation: List[Dict[str, str]]) -> str:
+        """Haal het laatste gebruikersbericht uit een conversatie."""
+        return next(
+            (msg["content"] for msg in reversed(conversation) if msg.get("role") == "user"),
+            ""
+        )
+    
+    def _sign(self, response: str) -> str:
+        """Onderteken een antwoord met de naam en rol van de agent."""
+        return f"{response}\n\n-- {self.name} ({self.role})"
+    
+    def prepare_conversation(
+        self,
+        session_id: str,
+        system_prompt: Optional[str] = None,
+        max_history: Optional[int] = 10
+    ) -> "PreparedConversation":
+        """
+        Bouw alvast het deel van de prompt dat niet van de nieuwe invoer afhangt.
+        
+        Zo kan een gespreksengine de volgende beurt voorbereiden terwijl een andere
+        agent nog aan het genereren is; complete() voegt daarna alleen de invoer toe.
+        
+        Args:
+            session_id: ID van de sessie
+            system_prompt: Optioneel aangepast systeemprompt
+            max_history: Maximum aantal historische berichten om mee te sturen,
+                inclusief de nog toe te voegen invoer
+            
+        Returns:
+            Een PreparedConversation voor deze sessie
+        """
+        # Voeg een systeemprompt toe als die is opgegeven
+        if system_prompt is None:
+            system_prompt = (
+                f"Jij bent {self.name}, een {self.role}. {self.backstory}\n"
+                "Je antwoordt altijd in het Nederlands, tenzij anders gevraagd.\n"
+                f"Je doel is: {self.goal}"
+            )
+        
+        prefix = [{"role": "system", "content": system_prompt}]
+        
+        # Een lopende samenvatting vervangt de beurten die uit de geschiedenis zijn gevouwen
         session = self.get_or_create_session(session_id)
-        session.update_context(key, value)
+        if session.summary:
+            prefix.append({
+                "role": "system",
+                "content": f"Samenvatting van het eerdere gesprek:\n{session.summary}"
+            })
+        
+        # De nog niet opgeslagen invoer telt mee in het maximum
+        if max_history is not None:
+            max_history -= 1
+        history = session.get_recent_history(max_history)
+        
+        if self.token_budget is not None:
+            # Tokentellingen worden op de berichten gecachet; dit is het dure deel van fit
+            for message in history:
+                self.token_budget.count(message)
+        
+        return PreparedConversation(session, prefix, history, self.token_budget, viewer=self.name)
+    
+    @traced("agent.build_prompt")
+    def _build_conversation(
+        self,
+        session_id: str,
+        system_prompt: Optional[str] = None,
+        max_history: Optional[int] = 10,
+        pending_input: Optional[str] = None
+    ) -> List[Dict[str, str]]:
+        """
+        Stel de berichtenlijst samen die naar de LLM wordt gestuurd.
+        
+        Args:
+            session_id: ID van de sessie
+            system_prompt: Optioneel aangepast systeemprompt
+            max_history: Maximum aantal historische berichten om mee te sturen
+            pending_input: Gebruikersinvoer die nog niet in de sessie staat (bij streaming)
+            
+        Returns:
+            Het systeemprompt (en eventuele samenvatting) gevolgd door de recente gespreksgeschiedenis
+        """
+        if pending_input is None and max_history is not None:
+            # Zonder nieuwe invoer telt het laatste opgeslagen bericht als de nieuwste beurt
+            max_history += 1
+        prepared = self.prepare_conversation(session_id, system_prompt, max_history)
+        return prepared.complete(pending_input)
+    
+    def _resolve_prepared(
+        self,
+        session_id: str,
+        user_input: str,
+        prepared: Optional["PreparedConversation"]
+    ) -> Optional[List[Dict[str, str]]]:
+        """Gebruik een vooraf opgebouwde prompt als de sessie sindsdien niet is veranderd."""
+        if prepared is None or prepared.is_stale():
+            return None
+        if prepared.session is not self.get_or_create_session(session_id):
+            return None
+        return prepared.complete(user_input)
+    
+    def _commit_turn(self, session_id: str, user_input: str, response: str) -> None:
+        """
+        Sla de gebruikersbeurt en het antwoord samen op.
+        
+        Beide berichten worden onder de sessie-lock toegevoegd, zodat gelijktijdige
+        beurten in dezelfde sessie niet tussen vraag en antwoord terechtkomen.
+        """
+        with span("session.commit_turn", session_id=session_id):
+            session = self.get_or_create_session(session_id)
+            with session.lock:
+                session.add_message("user", user_input)
+                session.add_message("assistant", response)
+        self._after_turn(session_id)
+    
+    def _after_turn(self, session_id: str) -> None:
+        """Plan zo nodig een samenvatting in nadat een beurt is opgeslagen."""
+        if self.summarizer is not None:
+            self.summarizer.maybe_schedule(self.get_or_create_session(session_id))
     
     def generate_response(
         self, 
         session_id: str, 
         user_input: str,
         system_prompt: Optional[str] = None,
-        max_history: Optional[int] = 10
+        max_history: Optional[int] = 10,
+        deadline: Union[Deadline, float, None] = None,
+        prepared: Optional["PreparedConversation"] = None
     ) -> str:
         """
         Genereer een antwoord op basis van de gebruikersinvoer en sessiegeschiedenis.
         
+        De gebruikersinvoer en het antwoord worden pas na een geslaagde LLM-aanroep
+        aan de sessie toegevoegd; een mislukte beurt laat de sessie ongemoeid.
+        
         Args:
             session_id: ID van de sessie
             user_input: Invoer van de gebruiker
             system_prompt: Optioneel aangepast systeemprompt
             max_history: Maximum aantal historische berichten om mee te sturen
+            deadline: Deadline (of aantal seconden) voor de LLM-aanroep
+            prepared: Optionele vooraf opgebouwde prompt (zie prepare_conversation);
+                wordt genegeerd als de sessie inmiddels is veranderd
             
         Returns:
             Het gegenereerde antwoord als string
         """
-        # Voeg het gebruikersbericht toe aan de sessie
-        self.add_to_session(session_id, "user", user_input)
-        
-        # Haal de gespreksgeschiedenis op
-        conversation = self.get_session_history(session_id, max_messages=max_history)
+        with span("agent.generate_response", agent=self.name, session_id=session_id):
+            full_conversation = self._resolve_prepared(session_id, user_input, prepared)
+            if full_conversation is None:
+                full_conversation = self._build_conversation(
+                    session_id, system_prompt, max_history, pending_input=user_input
+                )
+            
+            # Genereer een antwoord met de LLM (metingen worden aan deze agent toegeschreven)
+            with agent_scope(self.name):
+                response = self.llm.generate_response(full_conversation, deadline=deadline)
+            
+            # Voeg de beurt pas na een geslaagde aanroep toe aan de sessie
+            self._commit_turn(session_id, user_input, response)
+            
+            return response
+    
+    async def agenerate_response(
+        self, 
+        session_id: str, 
+        user_input: str,
+        system_prompt: Optional[str] = None,
+        max_history: Optional[int] = 10,
+        deadline: Union[Deadline, float, None] = None
+    ) -> str:
+        """
+        Asynchrone variant van generate_response.
         
-        # Voeg een systeemprompt toe als die is opgegeven
-        if system_prompt is None:
-            system_prompt = (
-                f"Jij bent {self.name}, een {self.role}. {self.backstory}\n"
-                "Je antwoordt altijd in het Nederlands, tenzij anders gevraagd.\n"
-                f"Je doel is: {self.goal}"
+        Args:
+            session_id: ID van de sessie
+            user_input: Invoer van de gebruiker
+            system_prompt: Optioneel aangepast systeemprompt
+            max_history: Maximum aantal historische berichten om mee te sturen
+            deadline: Deadline (of aantal seconden) voor de LLM-aanroep
+            
+        Returns:
+            Het gegenereerde antwoord als string
+        """
+        with span("agent.generate_response", agent=self.name, session_id=session_id):
+            full_conversation = self._build_conversation(
+                session_id, system_prompt, max_history, pending_input=user_input
             )
+            
+            with agent_scope(self.name):
+                response = await self.llm.agenerate_response(full_conversation, deadline=deadline)
+            
+            self._commit_turn(session_id, user_input, response)
+            
+            return response
+    
+    def stream_response(
+        self, 
+        session_id: str, 
+        user_input: str,
+        system_prompt: Optional[str] = None,
+        max_history: Optional[int] = 10,
+        deadline: Union[Deadline, float, None] = None
+    ) -> Iterator[str]:
+        """
+        Genereer een antwoord als stroom van tekstfragmenten.
         
-        # Voeg het systeemprompt toe aan de conversatie
-        full_conversation = [{"role": "system", "content": system_prompt}] + conversation
-        
-        # Genereer een antwoord met de LLM
-        response = self.llm.generate_response(full_conversation)
+        De gebruikersinvoer en het volledige antwoord worden pas aan de sessie
+        toegevoegd als de stroom volledig is doorlopen; een afgebroken stroom
+        laat de sessie ongemoeid.
         
-        # Voeg het antwoord toe aan de sessie
-        self.add_to_session(session_id, "assistant", response)
+        Args:
+            session_id: ID van de sessie
+            user_input: Invoer van de gebruiker
+            system_prompt: Optioneel aangepast systeemprompt
+            max_history: Maximum aantal historische berichten om mee te sturen
+            deadline: Deadline (of aantal seconden) voor de LLM-aanroep
+            
+        Yields:
+            Opeenvolgende stukken van het antwoord
+        """
+        with span("agent.stream_response", agent=self.name, session_id=session_id):
+            full_conversation = self._build_conversation(
+                session_id, system_prompt, max_history, pending_input=user_input
+            )
+            
+            parts = []
+            with agent_scope(self.name):
+                for delta in self.llm.stream_response(full_conversation, deadline=deadline):
+                    parts.append(delta)
+                    yield delta
+            
+            self._commit_turn(session_id, user_input, "".join(parts))
+    
+    async def astream_response(
+        self, 
+        session_id: str, 
+        user_input: str,
+        system_prompt: Optional[str] = None,
+        max_history: Optional[int] = 10,
+        deadline: Union[Deadline, float, None] = None
+    ) -> AsyncIterator[str]:
+        """
+        Asynchrone variant van stream_response.
         
-        return response
+        Args:
+            session_id: ID van de sessie
+            user_input: Invoer van de gebruiker
+            system_prompt: Optioneel aangepast systeemprompt
+            max_history: Maximum aantal historische berichten om mee te sturen
+            deadline: Deadline (of aantal seconden) voor de LLM-aanroep
+            
+        Yields:
+            Opeenvolgende stukken van het antwoord
+        """
+        with span("agent.stream_response", agent=self.name, session_id=session_id):
+            full_conversation = self._build_conversation(
+                session_id, system_prompt, max_history, pending_input=user_input
+            )
+            
+            parts = []
+            with agent_scope(self.name):
+                async for delta in self.llm.astream_response(full_conversation, deadline=deadline):
+                    parts.append(delta)
+                    yield delta
+            
+            self._commit_turn(session_id, user_input, "".join(parts))
     
+    def _begin_turn(self, conversation: List[Dict[str, str]], session_id: Optional[str]) -> Tuple[str, str]:
+        """Bepaal sessie-ID en gebruikersbericht van een beurt en noteer de activiteit."""
+        session_id = self._resolve_session_id(conversation, session_id)
+        user_message = self._latest_user_message(conversation)
+        self.update_session_context(session_id, "laatste_activiteit", str(datetime.now()))
+        return session_id, user_message
+    
+    def _finish_turn(self, session_id: str, topic: Optional[str]) -> None:
+        """Werk de context bij met informatie over het gegeven antwoord."""
+        self.update_session_context(
+            session_id,
+            "laatste_antwoord",
+            {"tijdstip": str(datetime.now()), "onderwerp": topic or "algemeen"}
+        )
+    
+    @traced("agent.respond")
     def respond(
         self, 
         conversation: List[Dict[str, str]], 
         topic: Optional[str] = None,
-        session_id: Optional[str] = None
+        session_id: Optional[str] = None,
+        deadline: Union[Deadline, float, None] = None
     ) -> str:
         """
-        Abstracte methode die door subklassen moet worden geïmplementeerd.
         Genereer een antwoord op basis van het gespreksverloop.
         
+        Eén pijplijn voor alle agents: prompt opbouwen, LLM aanroepen en daarna
+        vraag en antwoord samen in de sessie vastleggen. Subklassen configureren
+        de beurt via instructions en build_system_prompt in plaats van deze
+        methode opnieuw te implementeren.
+        
         Args:
             conversation: Lijst van berichten in het formaat [{"role": "user", "content": "..."}, ...]
             topic: Optioneel onderwerp voor context
             session_id: Optioneel sessie-ID voor contextbehoud
+            deadline: Deadline (of aantal seconden) voor de hele beurt
             
         Returns:
             Het gegenereerde antwoord als string
         """
-        raise NotImplementedError("Subklassen moeten deze methode implementeren")
+        deadline = Deadline.coerce(deadline)
+        try:
+            session_id, user_message = self._begin_turn(conversation, session_id)
+            
+            response = self.generate_response(
+                session_id=session_id,
+                user_input=user_message,
+                system_prompt=self.build_system_prompt(topic),
+                max_history=10,
+                deadline=deadline
+            )
+            
+            self._finish_turn(session_id, topic)
+            return self._sign(response)
+            
+        except LLMError:
+            # Getypeerde LLM-fouten gaan naar de aanroeper en komen niet in de geschiedenis
+            raise
+        except Exception as e:
+            return f"Er is een fout opgetreden bij het verwerken van het verzoek: {str(e)}"
+    
+    @traced("agent.respond")
+    async def arespond(
+        self, 
+        conversation: List[Dict[str, str]], 
+        topic: Optional[str] = None,
+        session_id: Optional[str] = None,
+        deadline: Union[Deadline, float, None] = None
+    ) -> str:
+        """
+        Asynchrone variant van respond.
+        
+        Gebruikt build_system_prompt van de subklasse, zodat één event loop vele
+        gesprekken tegelijk kan bedienen zonder per verzoek een thread te bezetten.
+        
+        Args:
+            conversation: Lijst van berichten in het formaat [{"role": "user", "content": "..."}, ...]
+            topic: Optioneel onderwerp voor context
+            session_id: Optioneel sessie-ID voor contextbehoud
+            deadline: Deadline (of aantal seconden) voor de hele beurt
+            
+        Returns:
+            Het gegenereerde antwoord als string
+        """
+        deadline = Deadline.coerce(deadline)
+        try:
+            session_id, user_message = self._begin_turn(conversation, session_id)
+            
+            response = await self.agenerate_response(
+                session_id=session_id,
+                user_input=user_message,
+                system_prompt=self.build_system_prompt(topic),
+                max_history=10,
+                deadline=deadline
+            )
+            
+            self._finish_turn(session_id, topic)
+            return self._sign(response)
+            
+        except LLMError:
+            # Getypeerde LLM-fouten gaan naar de aanroeper en komen niet in de geschiedenis
+            raise
+        except Exception as e:
+            return f"Er is een fout opgetreden bij het verwerken van het verzoek: {str(e)}"
+    
+    def stream_respond(
+        self, 
+        conversation: List[Dict[str, str]], 
+        topic: Optional[str] = None,
+        session_id: Optional[str] = None,
+        deadline: Union[Deadline, float, None] = None
+    ) -> Iterator[str]:
+        """
+        Streamende variant van respond.
+        
+        Aan elkaar geplakt leveren de fragmenten hetzelfde resultaat als respond,
+        inclusief de ondertekening als laatste fragment.
+        
+        Args:
+            conversation: Lijst van berichten in het formaat [{"role": "user", "content": "..."}, ...]
+            topic: Optioneel onderwerp voor context
+            session_id: Optioneel sessie-ID voor contextbehoud
+            deadline: Deadline (of aantal seconden) voor de hele beurt
+            
+        Yields:
+            Opeenvolgende stukken van het antwoord
+        """
+        deadline = Deadline.coerce(deadline)
+        try:
+            session_id, user_message = self._begin_turn(conversation, session_id)
+            
+            yield from self.stream_response(
+                session_id=session_id,
+                user_input=user_message,
+                system_prompt=self.build_system_prompt(topic),
+                max_history=10,
+                deadline=deadline
+            )
+            
+            self._finish_turn(session_id, topic)
+            yield self._sign("")
+            
+        except LLMError:
+            raise
+        except Exception as e:
+            yield f"Er is een fout opgetreden bij het verwerken van het verzoek: {str(e)}"
+    
+    async def astream_respond(
+        self, 
+        conversation: List[Dict[str, str]], 
+        topic: Optional[str] = None,
+        session_id: Optional[str] = None,
+        deadline: Union[Deadline, float, None] = None
+    ) -> AsyncIterator[str]:
+        """
+        Asynchrone variant van stream_respond.
+        
+        Args:
+            conversation: Lijst van berichten in het formaat [{"role": "user", "content": "..."}, ...]
+            topic: Optioneel onderwerp voor context
+            session_id: Optioneel sessie-ID voor contextbehoud
+            deadline: Deadline (of aantal seconden) voor de hele beurt
+            
+        Yields:
+            Opeenvolgende stukken van het antwoord
+        """
+        deadline = Deadline.coerce(deadline)
+        try:
+            session_id, user_message = self._begin_turn(conversation, session_id)
+            
+            async for delta in self.astream_response(
+                session_id=session_id,
+                user_input=user_message,
+                system_prompt=self.build_system_prompt(topic),
+                max_history=10,
+                deadline=deadline
+            ):
+                yield delta
+            
+            self._finish_turn(session_id, topic)
+            yield self._sign("")
+            
+        except LLMError:
+            raise
+        except Exception as e:
+            yield f"Er is een fout opgetreden bij het verwerken van het verzoek: {str(e)}"
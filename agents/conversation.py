@@ -0,0 +1,444 @@
+import contextvars
+import re
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterator, List, Optional, Sequence
+from utils.retry import Deadline
+from .base_agent import BaseAgent, PreparedConversation
+from .router import AgentRouter
+from .scrum_master import ScrumMasterAgent
+
+USER_SPEAKER = "Gebruiker"
+
+
+class Turn:
+    """
+    Eén beurt in een gesprek tussen meerdere agents.
+
+    Attributes:
+        index: Positie van de beurt in het transcript
+        speaker: Naam van de spreker (USER_SPEAKER voor de gebruiker)
+        role: Rol van de spreker
+        content: Inhoud van de beurt
+        duration: Tijd die de agent nodig had (0.0 voor de gebruiker)
+        prepared: Of de prompt al tijdens de vorige beurt was voorbereid
+    """
+    __slots__ = ("index", "speaker", "role", "content", "duration", "prepared")
+
+    def __init__(
+        self,
+        index: int,
+        speaker: str,
+        role: str,
+        content: str,
+        duration: float = 0.0,
+        prepared: bool = False
+    ):
+        self.index = index
+        self.speaker = speaker
+        self.role = role
+        self.content = content
+        self.duration = duration
+        self.prepared = prepared
+
+    @property
+    def is_user(self) -> bool:
+        return self.speaker == USER_SPEAKER
+
+    def format(self) -> str:
+        """De beurt zoals andere agents hem als invoer te zien krijgen."""
+        if self.is_user:
+            return f"{self.speaker}: {self.content}"
+        return f"{self.speaker} ({self.role}): {self.content}"
+
+    def __repr__(self) -> str:
+        return f"Turn({self.index}, {self.speaker!r}, {self.content[:30]!r})"
+
+
+def addressed_agent(
+    agents: Sequence[BaseAgent],
+    text: str,
+    exclude: Optional[str] = None
+) -> Optional[BaseAgent]:
+    """
+    Bepaal welke agent in een tekst wordt aangesproken.
+
+    Een naam telt als aanspreking als hij als los woord voorkomt, met of zonder
+    "@" ervoor; bij meerdere namen wint de eerst genoemde.
+
+    Args:
+        agents: De kandidaten
+        text: De tekst waarin gezocht wordt
+        exclude: Naam van de spreker zelf, die niet zichzelf aanspreekt
+
+    Returns:
+        De eerst aangesproken agent, of None
+    """
+    best, best_position = None, None
+    for agent in agents:
+        if exclude is not None and agent.name.lower() == exclude.lower():
+            continue
+        match = re.search(rf"(?<!\w)@?{re.escape(agent.name)}(?!\w)", text, re.IGNORECASE)
+        if match and (best_position is None or match.start() < best_position):
+            best, best_position = agent, match.start()
+    return best
+
+
+def _last_agent_turn(transcript: Sequence[Turn]) -> Optional[Turn]:
+    return next((turn for turn in reversed(transcript) if not turn.is_user), None)
+
+
+def _after(agents: Sequence[BaseAgent], name: Optional[str]) -> BaseAgent:
+    """De agent die in de teamvolgorde na de agent met de gegeven naam komt."""
+    names = [agent.name for agent in agents]
+    if name not in names:
+        return agents[0]
+    return agents[(names.index(name) + 1) % len(agents)]
+
+
+class TurnPolicy:
+    """
+    Bepaalt wie er na het huidige transcript aan de beurt is.
+
+    Subklassen implementeren next_speaker. predict wordt door de engine gebruikt
+    om de volgende spreker al voor te bereiden terwijl de huidige nog genereert;
+    een verkeerde voorspelling kost alleen het weggegooide voorbereidingswerk.
+    """
+    def next_speaker(self, agents: Sequence[BaseAgent], transcript: Sequence[Turn]) -> Optional[BaseAgent]:
+        """
+        Kies de volgende spreker.
+
+        Args:
+            agents: De agents in teamvolgorde
+            transcript: Alle beurten tot nu toe
+
+        Returns:
+            De volgende spreker, of None om het gesprek te beëindigen
+        """
+        raise NotImplementedError("Subklassen moeten deze methode implementeren")
+
+    def predict(
+        self,
+        agents: Sequence[BaseAgent],
+        transcript: Sequence[Turn],
+        current: BaseAgent
+    ) -> Optional[BaseAgent]:
+        """
+        Voorspel de spreker na current, voordat diens antwoord bekend is.
+
+        Standaard wordt next_speaker aangeroepen alsof current een lege beurt heeft
+        gehad; voor beleid dat niet naar de inhoud kijkt is dat exact.
+
+        Args:
+            agents: De agents in teamvolgorde
+            transcript: Alle beurten tot nu toe (zonder die van current)
+            current: De agent die nu aan het genereren is
+
+        Returns:
+            De verwachte volgende spreker, of None als die niet te voorspellen is
+        """
+        placeholder = Turn(len(transcript), current.name, current.role, "")
+        return self.next_speaker(agents, list(transcript) + [placeholder])
+
+
+class RoundRobinPolicy(TurnPolicy):
+    """De agents spreken om de beurt in teamvolgorde."""
+    def next_speaker(self, agents: Sequence[BaseAgent], transcript: Sequence[Turn]) -> Optional[BaseAgent]:
+        if not agents:
+            return None
+        last = _last_agent_turn(transcript)
+        return _after(agents, last.speaker if last else None)
+
+
+class AddressedPolicy(TurnPolicy):
+    """
+    De agent die in de laatste beurt bij naam wordt aangesproken ("@Mark", "Sarah, ...")
+    is aan de beurt; zonder aanspreking beslist het fallback-beleid.
+    """
+    def __init__(self, fallback: Optional[TurnPolicy] = None):
+        """
+        Args:
+            fallback: Beleid als niemand wordt aangesproken (standaard round-robin)
+        """
+        self.fallback = fallback or RoundRobinPolicy()
+
+    def next_speaker(self, agents: Sequence[BaseAgent], transcript: Sequence[Turn]) -> Optional[BaseAgent]:
+        if transcript:
+            last = transcript[-1]
+            agent = addressed_agent(agents, last.content, exclude=last.speaker)
+            if agent is not None:
+                return agent
+        return self.fallback.next_speaker(agents, transcript)
+
+
+class RoutedPolicy(AddressedPolicy):
+    """
+    Zoals AddressedPolicy, maar een gebruikersbeurt zonder aanspreking gaat naar
+    de agent die een AgentRouter lokaal kiest, in plaats van naar wie toevallig
+    aan de beurt is. Zo gaat er geen LLM-aanroep op aan een doorverwijzing.
+    """
+    def __init__(self, router: Optional[AgentRouter] = None, fallback: Optional[TurnPolicy] = None):
+        """
+        Args:
+            router: De router (standaard een AgentRouter over de agents van het gesprek)
+            fallback: Beleid als niemand wordt aangesproken of gekozen (standaard round-robin)
+        """
+        super().__init__(fallback)
+        self.router = router
+
+    def _router(self, agents: Sequence[BaseAgent]) -> AgentRouter:
+        if self.router is None or self.router.agents != list(agents):
+            self.router = AgentRouter(agents)
+        return self.router
+
+    def next_speaker(self, agents: Sequence[BaseAgent], transcript: Sequence[Turn]) -> Optional[BaseAgent]:
+        if transcript and transcript[-1].is_user:
+            last = transcript[-1]
+            agent = addressed_agent(agents, last.content) or self._router(agents).best(last.content)
+            if agent is not None:
+                return agent
+        return super().next_speaker(agents, transcript)
+
+
+class ModeratorPolicy(TurnPolicy):
+    """
+    Een moderator (standaard de ScrumMasterAgent in het team) opent het gesprek
+    en krijgt na elke experts_per_round expertbeurten opnieuw het woord.
+
+    Na de moderator spreekt de expert die hij bij naam noemt, anders de
+    volgende expert in teamvolgorde.
+    """
+    def __init__(self, moderator: Optional[BaseAgent] = None, experts_per_round: int = 1):
+        """
+        Args:
+            moderator: De moderator (standaard de eerste ScrumMasterAgent in het team)
+            experts_per_round: Aantal expertbeurten tussen twee moderatorbeurten
+        """
+        if experts_per_round < 1:
+            raise ValueError("experts_per_round moet minimaal 1 zijn")
+        self.moderator = moderator
+        self.experts_per_round = experts_per_round
+
+    def _moderator(self, agents: Sequence[BaseAgent]) -> BaseAgent:
+        if self.moderator is not None:
+            return self.moderator
+        moderator = next((agent for agent in agents if isinstance(agent, ScrumMasterAgent)), None)
+        if moderator is None:
+            raise ValueError("ModeratorPolicy vereist een ScrumMasterAgent in het team")
+        return moderator
+
+    def next_speaker(self, agents: Sequence[BaseAgent], transcript: Sequence[Turn]) -> Optional[BaseAgent]:
+        moderator = self._moderator(agents)
+        experts = [agent for agent in agents if agent is not moderator]
+        if not experts:
+            return moderator
+
+        # Een nieuwe gebruikersbeurt gaat naar de aangesproken expert, anders naar de moderator
+        if transcript and transcript[-1].is_user:
+            return addressed_agent(experts, transcript[-1].content) or moderator
+
+        # Tel de expertbeurten sinds de laatste moderatorbeurt
+        expert_turns, last_expert, moderator_turn = 0, None, None
+        for turn in reversed(transcript):
+            if turn.is_user:
+                continue
+            if turn.speaker == moderator.name:
+                moderator_turn = turn
+                break
+            expert_turns += 1
+            last_expert = last_expert or turn.speaker
+
+        if expert_turns >= self.experts_per_round or (moderator_turn is None and expert_turns == 0):
+            return moderator
+
+        source = transcript[-1] if expert_turns else moderator_turn
+        agent = addressed_agent(experts, source.content, exclude=source.speaker)
+        if agent is not None:
+            return agent
+        if last_expert is None:
+            # Direct na de moderator: ga verder na de expert die het laatst sprak
+            previous = next(
+                (turn.speaker for turn in reversed(transcript)
+                 if not turn.is_user and turn.speaker != moderator.name),
+                None
+            )
+            return _after(experts, previous)
+        return _after(experts, last_expert)
+
+
+POLICIES = {
+    "round-robin": RoundRobinPolicy,
+    "addressed": AddressedPolicy,
+    "routed": RoutedPolicy,
+    "moderator": ModeratorPolicy,
+}
+
+
+class ConversationEngine:
+    """
+    Laat een team van agents om beurten met elkaar (en de gebruiker) praten.
+
+    Elke agent houdt een eigen sessie bij en krijgt als invoer de beurten van de
+    anderen sinds zijn vorige beurt. Terwijl de huidige spreker genereert, wordt
+    de prompt van de verwachte volgende spreker al opgebouwd (sessie ophalen,
+    systeemprompt, geschiedenis, tokentellingen), zodat tussen twee beurten
+    alleen nog de nieuwe invoer hoeft te worden toegevoegd.
+
+    Gebruik:
+    ```python
+    engine = ConversationEngine([scrum, frontend, backend], policy=ModeratorPolicy(), topic="login")
+    for turn in engine.run("Hoe bouwen we het inlogscherm?", max_turns=6):
+        print(turn.format())
+    ```
+    """
+    def __init__(
+        self,
+        agents: Sequence[BaseAgent],
+        policy: Optional[TurnPolicy] = None,
+        topic: Optional[str] = None,
+        session_id: Optional[str] = None,
+        max_history: Optional[int] = 10,
+        turn_timeout: Optional[float] = None,
+        pipeline: bool = True
+    ):
+        """
+        Initialiseer de engine.
+
+        Args:
+            agents: De agents in teamvolgorde (namen moeten uniek zijn)
+            policy: Beurtbeleid (standaard round-robin)
+            topic: Optioneel onderwerp voor de systeemprompts
+            session_id: Basis voor de sessie-ID's van de agents (standaard willekeurig)
+            max_history: Maximum aantal historische berichten per agent
+            turn_timeout: Optionele deadline in seconden per beurt
+            pipeline: Bereid de volgende spreker voor tijdens het genereren
+        """
+        if not agents:
+            raise ValueError("Een gesprek vereist minimaal één agent")
+        names = [agent.name.lower() for agent in agents]
+        if len(set(names)) != len(names):
+            raise ValueError("Agentnamen in een gesprek moeten uniek zijn")
+
+        self.agents = list(agents)
+        self.policy = policy or RoundRobinPolicy()
+        self.topic = topic
+        self.session_id = session_id or f"gesprek_{uuid.uuid4().hex[:12]}"
+        self.max_history = max_history
+        self.turn_timeout = turn_timeout
+        self.pipeline = pipeline
+        self.transcript: List[Turn] = []
+        self.stats: Dict[str, int] = {"prepared": 0, "mispredicted": 0}
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        """Eén werkthread voor de LLM-aanroep; de hoofdthread bereidt intussen voor."""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="conversation")
+        return self._executor
+
+    def session_for(self, agent: BaseAgent) -> str:
+        """Het sessie-ID van een agent binnen dit gesprek."""
+        return f"{self.session_id}:{agent.name.lower()}"
+
+    def add_user_message(self, content: str) -> Turn:
+        """Voeg een beurt van de gebruiker toe aan het transcript."""
+        turn = Turn(len(self.transcript), USER_SPEAKER, "gebruiker", content)
+        self.transcript.append(turn)
+        return turn
+
+    def pending_input(self, agent: BaseAgent) -> str:
+        """De beurten van anderen sinds de vorige beurt van agent, als één invoer."""
+        pending = []
+        for turn in reversed(self.transcript):
+            if turn.speaker == agent.name:
+                break
+            pending.append(turn.format())
+        if not pending:
+            return "Er zijn geen nieuwe berichten; ga verder met het gesprek."
+        return "\n\n".join(reversed(pending))
+
+    def _prepare(self, agent: BaseAgent) -> PreparedConversation:
+        return agent.prepare_conversation(
+            self.session_for(agent),
+            agent.build_system_prompt(self.topic),
+            self.max_history
+        )
+
+    def _take_turn(self, agent: BaseAgent, user_input: str, prepared: Optional[PreparedConversation]) -> Turn:
+        start = time.perf_counter()
+        response = agent.generate_response(
+            self.session_for(agent),
+            user_input,
+            system_prompt=agent.build_system_prompt(self.topic),
+            max_history=self.max_history,
+            deadline=Deadline.coerce(self.turn_timeout),
+            prepared=prepared
+        )
+        return Turn(
+            len(self.transcript),
+            agent.name,
+            agent.role,
+            response,
+            duration=time.perf_counter() - start,
+            prepared=prepared is not None
+        )
+
+    def run(self, message: Optional[str] = None, max_turns: int = 6) -> Iterator[Turn]:
+        """
+        Voer het gesprek een aantal agentbeurten verder.
+
+        Args:
+            message: Optionele nieuwe beurt van de gebruiker
+            max_turns: Maximum aantal agentbeurten in deze ronde
+
+        Yields:
+            Elke agentbeurt zodra die klaar is
+        """
+        if message is not None:
+            self.add_user_message(message)
+
+        executor = self._get_executor()
+        speaker = self.policy.next_speaker(self.agents, self.transcript)
+        prepared: Optional[PreparedConversation] = None
+
+        for remaining in range(max_turns, 0, -1):
+            if speaker is None:
+                return
+
+            future = executor.submit(
+                contextvars.copy_context().run,
+                self._take_turn, speaker, self.pending_input(speaker), prepared
+            )
+
+            # Bereid de verwachte volgende spreker voor terwijl de huidige genereert
+            upcoming, upcoming_prepared = None, None
+            if self.pipeline and remaining > 1:
+                upcoming = self.policy.predict(self.agents, self.transcript, speaker)
+                if upcoming is not None and upcoming is not speaker:
+                    upcoming_prepared = self._prepare(upcoming)
+
+            turn = future.result()
+            self.transcript.append(turn)
+            yield turn
+
+            speaker = self.policy.next_speaker(self.agents, self.transcript)
+            if upcoming_prepared is not None and speaker is upcoming:
+                prepared = upcoming_prepared
+                self.stats["prepared"] += 1
+            else:
+                prepared = None
+                if upcoming_prepared is not None:
+                    self.stats["mispredicted"] += 1
+
+    def close(self) -> None:
+        """Stop de werkthread van de engine."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    def __enter__(self) -> "ConversationEngine":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
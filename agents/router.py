@@ -0,0 +1,177 @@
+import math
+import re
+from collections import Counter
+from typing import Dict, List, Optional, Sequence
+from .base_agent import BaseAgent
+
+# Veelvoorkomende Nederlandse woorden die niets over het vakgebied zeggen
+STOPWORDS = frozenset("""
+    de het een en of in op van voor met aan te is zijn was ik je jij u we wij ze zij hij mijn
+    onze ons jouw hoe wat waar wanneer kan kun kunnen moet moeten wil wilt dit dat deze die er
+    naar om bij als niet ook maar dan zo nog al wel graag even eens heb hebt heeft hebben
+    worden wordt word door uit over tot zou zouden
+""".split())
+
+_WORD = re.compile(r"\w+", re.UNICODE)
+
+
+def tokenize(text: str) -> List[str]:
+    """Splits tekst in kleine letters op in woorden, zonder stopwoorden en losse tekens."""
+    return [word for word in _WORD.findall(text.lower()) if len(word) > 1 and word not in STOPWORDS]
+
+
+def _keyword_pattern(keyword: str) -> "re.Pattern[str]":
+    # Korte woorden (ui, api) alleen als los woord; langere ook vooraan in samenstellingen
+    # zoals "databasebeheer" of "formuliervalidatie"
+    suffix = r"\w*" if len(keyword) >= 4 else r"(?!\w)"
+    return re.compile(rf"(?<!\w){re.escape(keyword.lower())}{suffix}")
+
+
+class Route:
+    """
+    Een kandidaat-agent voor een vraag met zijn score.
+
+    Attributes:
+        agent: De agent
+        score: Trefwoordtreffers (maal keyword_weight) plus TF-IDF-cosinusgelijkenis
+        keywords: De trefwoorden van de agent die in de vraag voorkwamen
+    """
+    __slots__ = ("agent", "score", "keywords")
+
+    def __init__(self, agent: BaseAgent, score: float, keywords: Sequence[str] = ()):
+        self.agent = agent
+        self.score = score
+        self.keywords = list(keywords)
+
+    def __repr__(self) -> str:
+        return f"Route({self.agent.name!r}, score={self.score:.3f}, keywords={self.keywords!r})"
+
+
+class AgentRouter:
+    """
+    Kiest lokaal, zonder LLM-aanroep, welke agent(s) een vraag moeten beantwoorden.
+
+    Elke agent krijgt een profiel uit zijn rol, doel, achtergrond, instructies en
+    trefwoorden. Een vraag wordt gescoord met trefwoordregels (treffers in
+    agent.keywords) plus de cosinusgelijkenis van de TF-IDF-vectoren van vraag en
+    profiel. De profielvectoren worden één keer bij het aanmaken berekend, dus
+    routeren kost alleen het tokeniseren van de vraag.
+
+    Namen tellen niet mee: wie iemand bij naam aanspreekt, wordt door het
+    beurtbeleid (AddressedPolicy/RoutedPolicy) afgehandeld.
+
+    Gebruik:
+    ```python
+    router = AgentRouter([frontend, backend, scrum], default=scrum)
+    router.best("Hoe update ik de database?")  # -> backend
+    router.route("Formulier of API?")           # -> [Route(Sarah, ...), Route(Mark, ...)]
+    ```
+    """
+    def __init__(
+        self,
+        agents: Sequence[BaseAgent],
+        keywords: Optional[Dict[str, Sequence[str]]] = None,
+        default: Optional[BaseAgent] = None,
+        min_score: float = 0.1,
+        keyword_weight: float = 1.0
+    ):
+        """
+        Initialiseer de router.
+
+        Args:
+            agents: De agents waartussen gekozen wordt
+            keywords: Extra trefwoorden per agentnaam, bovenop agent.keywords
+            default: Agent voor vragen die bij niemand passen (bijv. de Scrum Master)
+            min_score: Minimale score om als kandidaat mee te tellen
+            keyword_weight: Gewicht van één trefwoordtreffer ten opzichte van de
+                cosinusgelijkenis (die tussen 0 en 1 ligt)
+        """
+        if not agents:
+            raise ValueError("Een router vereist minimaal één agent")
+
+        self.agents = list(agents)
+        self.default = default
+        self.min_score = min_score
+        self.keyword_weight = keyword_weight
+
+        extra = {name.lower(): words for name, words in (keywords or {}).items()}
+        self._keywords = [
+            [(word, _keyword_pattern(word)) for word in (*agent.keywords, *extra.get(agent.name.lower(), ()))]
+            for agent in self.agents
+        ]
+
+        documents = [Counter(tokenize(self._profile(agent, words))) for agent, words in zip(self.agents, self._keywords)]
+        document_frequency = Counter(term for document in documents for term in document)
+        count = len(documents)
+        # Gladgestreken idf: termen die in alle profielen staan wegen het minst
+        self._idf = {
+            term: math.log((1 + count) / (1 + frequency)) + 1.0
+            for term, frequency in document_frequency.items()
+        }
+        self._vectors = [self._normalize(self._weigh(document)) for document in documents]
+
+    @staticmethod
+    def _profile(agent: BaseAgent, keywords: Sequence) -> str:
+        return " ".join([
+            agent.role, agent.goal, agent.backstory, agent.instructions, *(word for word, _ in keywords)
+        ])
+
+    def _weigh(self, counts: Counter) -> Dict[str, float]:
+        return {
+            term: (1.0 + math.log(frequency)) * self._idf[term]
+            for term, frequency in counts.items()
+            if term in self._idf
+        }
+
+    @staticmethod
+    def _normalize(vector: Dict[str, float]) -> Dict[str, float]:
+        norm = math.sqrt(sum(weight * weight for weight in vector.values()))
+        return {term: weight / norm for term, weight in vector.items()} if norm else {}
+
+    def route(self, text: str) -> List[Route]:
+        """
+        Score alle agents voor een vraag.
+
+        Args:
+            text: De vraag van de gebruiker
+
+        Returns:
+            De agents met minstens min_score, van hoogste naar laagste score
+        """
+        lowered = text.lower()
+        query = self._normalize(self._weigh(Counter(tokenize(text))))
+
+        routes = []
+        for agent, keywords, vector in zip(self.agents, self._keywords, self._vectors):
+            hits = [word for word, pattern in keywords if pattern.search(lowered)]
+            similarity = sum(weight * vector.get(term, 0.0) for term, weight in query.items())
+            score = self.keyword_weight * len(hits) + similarity
+            if score >= self.min_score:
+                routes.append(Route(agent, score, hits))
+
+        routes.sort(key=lambda route: route.score, reverse=True)
+        return routes
+
+    def select(self, text: str, top_k: int = 1, relative: float = 0.5) -> List[BaseAgent]:
+        """
+        Kies de agent(s) die een vraag moeten beantwoorden.
+
+        Args:
+            text: De vraag van de gebruiker
+            top_k: Maximum aantal agents
+            relative: Extra agents tellen alleen mee als hun score minstens deze
+                fractie van de beste score is
+
+        Returns:
+            De gekozen agents; [default] of [] als niemand past
+        """
+        routes = self.route(text)
+        if not routes:
+            return [self.default] if self.default is not None else []
+        threshold = routes[0].score * relative
+        return [route.agent for route in routes[:top_k] if route.score >= threshold]
+
+    def best(self, text: str) -> Optional[BaseAgent]:
+        """De best passende agent voor een vraag, of default als niemand past."""
+        selected = self.select(text, top_k=1)
+        return selected[0] if selected else None
@@ -0,0 +1,419 @@
+import asyncio
+import contextvars
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import AsyncIterator, ContextManager, Dict, Iterator, List, Optional, Tuple, Union
+from utils.retry import Deadline
+from utils.session_keys import content_session_id
+from utils.shared_sessions import SharedSessionManager, TeamTurn, team_turn
+from .base_agent import BaseAgent
+from .router import AgentRouter
+
+class AgentTeam:
+    """
+    Een team van agents dat één gebruikersbeurt gelijktijdig beantwoordt.
+
+    In plaats van respond per agent na elkaar aan te roepen (som van alle
+    LLM-latenties), worden de agents parallel bevraagd zodat een beurt ongeveer
+    zo lang duurt als de traagste agent.
+
+    Gebruik:
+    ```python
+    team = AgentTeam([frontend, backend, scrum], max_concurrency=3)
+    antwoorden = team.respond_all(conversation, topic="database")
+    for agent, antwoord in team.iter_responses(conversation):
+        print(agent.name, antwoord)
+
+    # Alleen de passende agent(s) laten antwoorden, gekozen zonder LLM-aanroep
+    for agent, antwoord in team.respond_routed(conversation):
+        print(agent.name, antwoord)
+
+    # Bij het opstarten: laad alle gebruikte modellen vooraf
+    team.warm_up()  # -> {("http://localhost:11434", "llama3"): True}
+    ```
+    """
+    def __init__(
+        self,
+        agents: List[BaseAgent],
+        max_concurrency: Optional[int] = None,
+        router: Optional[AgentRouter] = None,
+        session_manager: Optional[SharedSessionManager] = None
+    ):
+        """
+        Initialiseer het team.
+
+        Args:
+            agents: De agents in vaste volgorde
+            max_concurrency: Maximum aantal agents dat tegelijk een antwoord genereert
+                (standaard: alle agents tegelijk)
+            router: Router voor respond_routed (standaard een AgentRouter over de agents)
+            session_manager: Optionele gedeelde sessiebeheerder; alle agents schrijven
+                dan in één berichtenlog per gesprek en zien elkaars beurten
+        """
+        if max_concurrency is not None and max_concurrency < 1:
+            raise ValueError("max_concurrency moet minimaal 1 zijn")
+
+        self.agents = list(agents)
+        self.max_concurrency = max_concurrency or max(len(self.agents), 1)
+        self.router = router
+        self.session_manager = session_manager
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+        if session_manager is not None:
+            for agent in self.agents:
+                agent.session_manager = session_manager.for_agent(agent.name)
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        """Geef de threadpool van het team terug en maak deze zo nodig aan."""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_concurrency,
+                thread_name_prefix="agent-team"
+            )
+        return self._executor
+
+    @staticmethod
+    def _turn(conversation: List[Dict[str, str]], session_id: Optional[str]) -> ContextManager[TeamTurn]:
+        """Eén teambeurt: in een gedeeld gesprek komt de vraag één keer in het log."""
+        return team_turn(
+            session_id or content_session_id(conversation),
+            BaseAgent._latest_user_message(conversation)
+        )
+
+    def get_agent(self, name: str) -> Optional[BaseAgent]:
+        """Zoek een agent in het team op naam (niet hoofdlettergevoelig)."""
+        name = name.lower()
+        return next((agent for agent in self.agents if agent.name.lower() == name), None)
+
+    def iter_responses(
+        self,
+        conversation: List[Dict[str, str]],
+        topic: Optional[str] = None,
+        session_id: Optional[str] = None,
+        deadline: Union[Deadline, float, None] = None
+    ) -> Iterator[Tuple[BaseAgent, str]]:
+        """
+        Bevraag alle agents gelijktijdig en geef de antwoorden in volgorde van gereedkomen.
+
+        Args:
+            conversation: Lijst van berichten in het formaat [{"role": "user", "content": "..."}, ...]
+            topic: Optioneel onderwerp voor context
+            session_id: Optioneel sessie-ID voor contextbehoud
+            deadline: Gezamenlijke deadline (of aantal seconden) voor alle agents
+
+        Yields:
+            Tuples van (agent, antwoord) zodra een agent klaar is
+        """
+        deadline = Deadline.coerce(deadline)
+        executor = self._get_executor()
+        with self._turn(conversation, session_id):
+            futures = {
+                executor.submit(
+                    contextvars.copy_context().run, agent.respond, conversation, topic, session_id, deadline
+                ): agent
+                for agent in self.agents
+            }
+        for future in as_completed(futures):
+            yield futures[future], future.result()
+
+    def respond_all(
+        self,
+        conversation: List[Dict[str, str]],
+        topic: Optional[str] = None,
+        session_id: Optional[str] = None,
+        deadline: Union[Deadline, float, None] = None
+    ) -> List[str]:
+        """
+        Bevraag alle agents gelijktijdig en geef de antwoorden in teamvolgorde terug.
+
+        Args:
+            conversation: Lijst van berichten in het formaat [{"role": "user", "content": "..."}, ...]
+            topic: Optioneel onderwerp voor context
+            session_id: Optioneel sessie-ID voor contextbehoud
+            deadline: Gezamenlijke deadline (of aantal seconden) voor alle agents
+
+        Returns:
+            De antwoorden in dezelfde volgorde als self.agents
+        """
+        deadline = Deadline.coerce(deadline)
+        executor = self._get_executor()
+        with self._turn(conversation, session_id):
+            futures = [
+                executor.submit(
+                    contextvars.copy_context().run, agent.respond, conversation, topic, session_id, deadline
+                )
+                for agent in self.agents
+            ]
+        return [future.result() for future in futures]
+
+    async def _arespond_limited(
+        self,
+        semaphore: asyncio.Semaphore,
+        agent: BaseAgent,
+        conversation: List[Dict[str, str]],
+        topic: Optional[str],
+        session_id: Optional[str],
+        deadline: Optional[Deadline]
+    ) -> Tuple[BaseAgent, str]:
+        """Laat één agent asynchroon antwoorden binnen de concurrency-limiet."""
+        async with semaphore:
+            return agent, await agent.arespond(conversation, topic, session_id, deadline)
+
+    async def aiter_responses(
+        self,
+        conversation: List[Dict[str, str]],
+        topic: Optional[str] = None,
+        session_id: Optional[str] = None,
+        deadline: Union[Deadline, float, None] = None
+    ) -> AsyncIterator[Tuple[BaseAgent, str]]:
+        """
+        Asynchrone variant van iter_responses.
+
+        Args:
+            conversation: Lijst van berichten in het formaat [{"role": "user", "content": "..."}, ...]
+            topic: Optioneel onderwerp voor context
+            session_id: Optioneel sessie-ID voor contextbehoud
+            deadline: Gezamenlijke deadline (of aantal seconden) voor alle agents
+
+        Yields:
+            Tuples van (agent, antwoord) zodra een agent klaar is
+        """
+        deadline = Deadline.coerce(deadline)
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        # De taken erven de teambeurt bij het aanmaken
+        with self._turn(conversation, session_id):
+            pending = asyncio.as_completed([
+                self._arespond_limited(semaphore, agent, conversation, topic, session_id, deadline)
+                for agent in self.agents
+            ])
+        for next_done in pending:
+            yield await next_done
+
+    async def arespond_all(
+        self,
+        conversation: List[Dict[str, str]],
+        topic: Optional[str] = None,
+        session_id: Optional[str] = None,
+        deadline: Union[Deadline, float, None] = None
+    ) -> List[str]:
+        """
+        Asynchrone variant van respond_all.
+
+        Args:
+            conversation: Lijst van berichten in het formaat [{"role": "user", "content": "..."}, ...]
+            topic: Optioneel onderwerp voor context
+            session_id: Optioneel sessie-ID voor contextbehoud
+            deadline: Gezamenlijke deadline (of aantal seconden) voor alle agents
+
+        Returns:
+            De antwoorden in dezelfde volgorde als self.agents
+        """
+        deadline = Deadline.coerce(deadline)
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        with self._turn(conversation, session_id):
+            results = await asyncio.gather(*(
+                self._arespond_limited(semaphore, agent, conversation, topic, session_id, deadline)
+                for agent in self.agents
+            ))
+        return [response for _, response in results]
+
+    def route(self, conversation: List[Dict[str, str]], top_k: int = 1) -> List[BaseAgent]:
+        """
+        Kies lokaal welke agents het laatste gebruikersbericht moeten beantwoorden.
+
+        Args:
+            conversation: Lijst van berichten in het formaat [{"role": "user", "content": "..."}, ...]
+            top_k: Maximum aantal agents
+
+        Returns:
+            De gekozen agents; alle agents als de router niemand kan kiezen
+        """
+        if self.router is None:
+            self.router = AgentRouter(self.agents)
+        selected = self.router.select(BaseAgent._latest_user_message(conversation), top_k=top_k)
+        return selected or list(self.agents)
+
+    def respond_routed(
+        self,
+        conversation: List[Dict[str, str]],
+        topic: Optional[str] = None,
+        session_id: Optional[str] = None,
+        deadline: Union[Deadline, float, None] = None,
+        top_k: int = 1
+    ) -> List[Tuple[BaseAgent, str]]:
+        """
+        Laat alleen de door de router gekozen agent(s) gelijktijdig antwoorden.
+
+        Bespaart de LLM-aanroepen van agents die alleen zouden doorverwijzen.
+
+        Args:
+            conversation: Lijst van berichten in het formaat [{"role": "user", "content": "..."}, ...]
+            topic: Optioneel onderwerp voor context
+            session_id: Optioneel sessie-ID voor contextbehoud
+            deadline: Gezamenlijke deadline (of aantal seconden) voor de gekozen agents
+            top_k: Maximum aantal agents dat antwoordt
+
+        Returns:
+            Tuples van (agent, antwoord), best passende agent eerst
+        """
+        deadline = Deadline.coerce(deadline)
+        executor = self._get_executor()
+        with self._turn(conversation, session_id):
+            futures = [
+                (agent, executor.submit(
+                    contextvars.copy_context().run, agent.respond, conversation, topic, session_id, deadline
+                ))
+                for agent in self.route(conversation, top_k)
+            ]
+        return [(agent, future.result()) for agent, future in futures]
+
+    async def arespond_routed(
+        self,
+        conversation: List[Dict[str, str]],
+        topic: Optional[str] = None,
+        session_id: Optional[str] = None,
+        deadline: Union[Deadline, float, None] = None,
+        top_k: int = 1
+    ) -> List[Tuple[BaseAgent, str]]:
+        """
+        Asynchrone variant van respond_routed.
+
+        Args:
+            conversation: Lijst van berichten in het formaat [{"role": "user", "content": "..."}, ...]
+            topic: Optioneel onderwerp voor context
+            session_id: Optioneel sessie-ID voor contextbehoud
+            deadline: Gezamenlijke deadline (of aantal seconden) voor de gekozen agents
+            top_k: Maximum aantal agents dat antwoordt
+
+        Returns:
+            Tuples van (agent, antwoord), best passende agent eerst
+        """
+        deadline = Deadline.coerce(deadline)
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        with self._turn(conversation, session_id):
+            return list(await asyncio.gather(*(
+                self._arespond_limited(semaphore, agent, conversation, topic, session_id, deadline)
+                for agent in self.route(conversation, top_k)
+            )))
+
+    def _select(self, conversation: List[Dict[str, str]], agent: Optional[str], top_k: int) -> List[BaseAgent]:
+        """De agent met deze naam, of de door de router gekozen agents."""
+        if agent is None:
+            return self.route(conversation, top_k)
+        selected = self.get_agent(agent)
+        if selected is None:
+            raise ValueError(f"Onbekende agent: {agent}")
+        return [selected]
+
+    async def arespond_turn(
+        self,
+        conversation: List[Dict[str, str]],
+        topic: Optional[str] = None,
+        session_id: Optional[str] = None,
+        deadline: Union[Deadline, float, None] = None,
+        agent: Optional[str] = None,
+        top_k: int = 1
+    ) -> List[Tuple[BaseAgent, str]]:
+        """
+        Beantwoord één beurt door een agent op naam, of door de gerouteerde agent(s).
+
+        Args:
+            conversation: Lijst van berichten in het formaat [{"role": "user", "content": "..."}, ...]
+            topic: Optioneel onderwerp voor context
+            session_id: Optioneel sessie-ID voor contextbehoud
+            deadline: Gezamenlijke deadline (of aantal seconden) voor de beurt
+            agent: Optionele naam van de agent die moet antwoorden
+            top_k: Maximum aantal agents dat antwoordt als de router kiest
+
+        Returns:
+            Tuples van (agent, antwoord), best passende agent eerst
+
+        Raises:
+            ValueError: Als er geen agent met deze naam in het team zit
+        """
+        deadline = Deadline.coerce(deadline)
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        with self._turn(conversation, session_id):
+            return list(await asyncio.gather(*(
+                self._arespond_limited(semaphore, selected, conversation, topic, session_id, deadline)
+                for selected in self._select(conversation, agent, top_k)
+            )))
+
+    async def astream_turn(
+        self,
+        conversation: List[Dict[str, str]],
+        topic: Optional[str] = None,
+        session_id: Optional[str] = None,
+        deadline: Union[Deadline, float, None] = None,
+        agent: Optional[str] = None
+    ) -> AsyncIterator[Tuple[BaseAgent, str]]:
+        """
+        Laat één agent (op naam, anders de best passende) streamend antwoorden.
+
+        Args:
+            conversation: Lijst van berichten in het formaat [{"role": "user", "content": "..."}, ...]
+            topic: Optioneel onderwerp voor context
+            session_id: Optioneel sessie-ID voor contextbehoud
+            deadline: Deadline (of aantal seconden) voor de beurt
+            agent: Optionele naam van de agent
+
+        Yields:
+            Tuples van (agent, fragment)
+
+        Raises:
+            ValueError: Als er geen agent met deze naam in het team zit
+        """
+        [selected] = self._select(conversation, agent, 1)
+        async for chunk in selected.astream_respond(conversation, topic, session_id, deadline):
+            yield selected, chunk
+
+    def _unique_clients(self) -> Dict[Tuple[str, str], object]:
+        """Eén LLM-client per (server, model)-combinatie die de agents gebruiken."""
+        clients = {}
+        for agent in self.agents:
+            clients.setdefault((agent.llm.base_url, agent.llm.model), agent.llm)
+        return clients
+
+    def warm_up(self) -> Dict[Tuple[str, str], bool]:
+        """
+        Laad alle modellen die de agents gebruiken gelijktijdig vooraf in Ollama.
+
+        Agents die hetzelfde model op dezelfde server gebruiken, leiden tot één warm-up.
+
+        Returns:
+            Per (server, model) of het laden gelukt is
+        """
+        executor = self._get_executor()
+        futures = {
+            key: executor.submit(llm.warm_up)
+            for key, llm in self._unique_clients().items()
+        }
+        return {key: future.result() for key, future in futures.items()}
+
+    async def awarm_up(self) -> Dict[Tuple[str, str], bool]:
+        """
+        Asynchrone variant van warm_up.
+
+        Returns:
+            Per (server, model) of het laden gelukt is
+        """
+        clients = self._unique_clients()
+        results = await asyncio.gather(*(llm.awarm_up() for llm in clients.values()))
+        return dict(zip(clients, results))
+
+    async def aclose(self) -> None:
+        """Sluit de asynchrone verbindingen van de LLM-clients en stop de threadpool."""
+        for llm in self._unique_clients().values():
+            await llm.aclose()
+        self.close()
+
+    def close(self) -> None:
+        """Stop de threadpool van het team."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    def __enter__(self) -> "AgentTeam":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
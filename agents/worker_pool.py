@@ -0,0 +1,606 @@
+import asyncio
+import contextlib
+import itertools
+import multiprocessing
+import os
+import pickle
+import queue
+import threading
+import time
+from concurrent.futures import Future, InvalidStateError
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+from utils.ollama_client import OllamaClient
+from utils.retry import Deadline
+from utils.session_keys import content_session_id, session_slot
+from .backend_dev import BackendDeveloperAgent
+from .frontend_dev import FrontendDeveloperAgent
+from .scrum_master import ScrumMasterAgent
+from .team import AgentTeam
+
+# Resultaat van een beurt: (agentnaam, antwoord) per agent die antwoordde
+TurnResult = List[Tuple[str, str]]
+TeamFactory = Callable[[], AgentTeam]
+
+
+class WorkerError(RuntimeError):
+    """Een worker kon niet starten of is gestopt; lopende verzoeken van die worker falen hiermee."""
+
+
+def build_team(model: str = "llama3", base_url: Optional[str] = None) -> AgentTeam:
+    """
+    Standaard teamfabriek voor AgentWorkerPool: Scrum Master, Frontend en Backend.
+
+    Wordt in elke worker aangeroepen, zodat elk proces zijn eigen OllamaClient
+    (en verbindingen) en zijn eigen sessies heeft.
+
+    Args:
+        model: Ollama-model voor alle agents
+        base_url: Ollama-URL (standaard OLLAMA_BASE_URL of localhost)
+
+    Returns:
+        Een nieuw AgentTeam
+    """
+    llm = OllamaClient(model=model, base_url=base_url)
+    return AgentTeam([
+        ScrumMasterAgent(llm=llm, model=model),
+        FrontendDeveloperAgent(llm=llm, model=model),
+        BackendDeveloperAgent(llm=llm, model=model),
+    ])
+
+
+def _picklable(error: BaseException) -> BaseException:
+    """Geef de fout zelf terug als die naar het hoofdproces kan, anders een WorkerError met de tekst."""
+    try:
+        pickle.loads(pickle.dumps(error))
+        return error
+    except Exception:
+        return WorkerError(f"{type(error).__name__}: {error}")
+
+
+def _worker_main(index: int, factory: TeamFactory, inbox, outbox) -> None:
+    """Ingang van een workerproces: bouw het team en verwerk verzoeken tot het stopsignaal."""
+    try:
+        team = factory()
+    except BaseException as e:
+        outbox.put(("failed", index, _picklable(e)))
+        return
+    outbox.put(("ready", index, None))
+    asyncio.run(_Worker(team, inbox, outbox).run())
+
+
+class _Worker:
+    """
+    Verwerkt de verzoeken van één workerproces op één event loop.
+
+    Alle sessies van de worker leven in dit proces en worden alleen vanuit deze
+    loop aangeraakt. Beurten van hetzelfde gesprek lopen in volgorde van
+    binnenkomst; verschillende gesprekken wachten gelijktijdig op de LLM.
+    """
+    def __init__(self, team: AgentTeam, inbox, outbox):
+        self.team = team
+        self.inbox = inbox
+        self.outbox = outbox
+        self.tasks: Dict[int, asyncio.Task] = {}
+        # Per gesprek een lock en het aantal wachtende beurten (opgeruimd zodra het 0 is)
+        self.turns: Dict[str, List[Any]] = {}
+
+    async def run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            message = await loop.run_in_executor(None, self.inbox.get)
+            if message is None:
+                break
+            op, request_id, payload = message
+            if op == "cancel":
+                task = self.tasks.get(request_id)
+                if task is not None:
+                    task.cancel()
+                continue
+            self.tasks[request_id] = loop.create_task(self._handle(op, request_id, payload))
+
+        if self.tasks:
+            await asyncio.gather(*self.tasks.values(), return_exceptions=True)
+        await self.team.aclose()
+
+    def _send(self, kind: str, request_id: int, value: Any) -> None:
+        self.outbox.put((kind, request_id, value))
+
+    @contextlib.asynccontextmanager
+    async def _session_turn(self, session_id: str):
+        entry = self.turns.get(session_id)
+        if entry is None:
+            entry = self.turns[session_id] = [asyncio.Lock(), 0]
+        entry[1] += 1
+        try:
+            async with entry[0]:
+                yield
+        finally:
+            entry[1] -= 1
+            if not entry[1]:
+                del self.turns[session_id]
+
+    async def _handle(self, op: str, request_id: int, payload: Dict[str, Any]) -> None:
+        # De deadline loopt vanaf ontvangst, ook terwijl een eerdere beurt van het gesprek nog loopt
+        payload["deadline"] = Deadline.coerce(payload["deadline"])
+        try:
+            async with self._session_turn(payload["session_id"]):
+                if op == "respond":
+                    self._send("result", request_id, await self._respond(payload))
+                else:
+                    await self._stream(request_id, payload)
+                    self._send("end", request_id, None)
+        except asyncio.CancelledError:
+            # De aanroeper heeft het verzoek al opgegeven; niets terugsturen
+            pass
+        except BaseException as e:
+            self._send("error", request_id, _picklable(e))
+        finally:
+            self.tasks.pop(request_id, None)
+
+    async def _respond(self, payload: Dict[str, Any]) -> TurnResult:
+        results = await self.team.arespond_turn(
+            payload["conversation"], payload["topic"], payload["session_id"], payload["deadline"],
+            payload["agent"], payload["top_k"]
+        )
+        return [(agent.name, response) for agent, response in results]
+
+    async def _stream(self, request_id: int, payload: Dict[str, Any]) -> None:
+        started = False
+        async for agent, chunk in self.team.astream_turn(
+            payload["conversation"], payload["topic"], payload["session_id"], payload["deadline"], payload["agent"]
+        ):
+            if not started:
+                self._send("start", request_id, agent.name)
+                started = True
+            self._send("chunk", request_id, chunk)
+
+
+_NO_CHUNK = object()
+
+
+class PoolStream:
+    """
+    Iterator over de fragmenten van één streamend antwoord uit een worker.
+
+    Is synchroon (for) of, als hij met een event loop is aangemaakt via
+    AgentWorkerPool.astream, asynchroon (async for) te doorlopen. agent bevat de
+    naam van de antwoordende agent zodra het eerste fragment er is. Stop je
+    voortijdig, roep dan close() aan (of gebruik een with-blok); de worker
+    breekt de beurt dan af.
+    """
+    def __init__(self, pool: "AgentWorkerPool", loop: Optional[asyncio.AbstractEventLoop] = None):
+        self._pool = pool
+        self._loop = loop
+        self._queue = asyncio.Queue() if loop is not None else queue.Queue()
+        self._done = False
+        self.request_id: Optional[int] = None
+        self.agent: Optional[str] = None
+
+    def _deliver(self, kind: str, value: Any) -> None:
+        if self._loop is None:
+            self._queue.put((kind, value))
+            return
+        try:
+            self._loop.call_soon_threadsafe(self._queue.put_nowait, (kind, value))
+        except RuntimeError:
+            # De event loop van de lezer is al gesloten
+            pass
+
+    def _accept(self, kind: str, value: Any) -> Any:
+        """Verwerk één bericht van de worker; geeft het fragment of _NO_CHUNK terug."""
+        if kind == "start":
+            self.agent = value
+            return _NO_CHUNK
+        if kind == "chunk":
+            return value
+        self._done = True
+        if kind == "error":
+            raise value
+        return _NO_CHUNK
+
+    def __iter__(self) -> "PoolStream":
+        return self
+
+    def __next__(self) -> str:
+        while not self._done:
+            chunk = self._accept(*self._queue.get())
+            if chunk is not _NO_CHUNK:
+                return chunk
+        raise StopIteration
+
+    def __aiter__(self) -> "PoolStream":
+        return self
+
+    async def __anext__(self) -> str:
+        while not self._done:
+            chunk = self._accept(*await self._queue.get())
+            if chunk is not _NO_CHUNK:
+                return chunk
+        raise StopAsyncIteration
+
+    def close(self) -> None:
+        """Breek de stream af als die nog loopt."""
+        if not self._done:
+            self._done = True
+            self._pool._cancel(self.request_id)
+
+    async def aclose(self) -> None:
+        self.close()
+
+    def __enter__(self) -> "PoolStream":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+class AgentWorkerPool:
+    """
+    Draait het agentteam in een pool van workerprocessen, met vaste toewijzing per gesprek.
+
+    Promptopbouw, JSON-(de)codering en sessieboekhouding delen zo niet langer
+    één GIL: elke worker is een eigen proces met een eigen team. Een gesprek gaat
+    op basis van zijn sessie-ID (session_slot) altijd naar dezelfde worker, zodat
+    de sessie lokaal in die worker blijft en nergens gedeeld of vergrendeld hoeft
+    te worden. Zonder sessie-ID wordt het inhoudsgebaseerde ID van de agents
+    gebruikt (content_session_id).
+
+    De teamfabriek wordt in elke worker aangeroepen en moet daarom picklebaar
+    zijn (een functie op moduleniveau of een functools.partial daarvan). Stopt een
+    worker onverwacht, dan falen zijn lopende verzoeken met WorkerError en wordt
+    hij opnieuw gestart (zijn sessies zijn dan verloren, tenzij de fabriek een
+    store gebruikt).
+
+    Gebruik:
+    ```python
+    with AgentWorkerPool(functools.partial(build_team, model="llama3"), workers=4) as pool:
+        [(naam, antwoord)] = pool.result(conversation, session_id="klant-42")
+        future = pool.submit(conversation, session_id="klant-43", agent="Mark")
+
+        with pool.stream(conversation, session_id="klant-42") as stream:
+            for fragment in stream:
+                print(fragment, end="")
+    ```
+    """
+    # Seconden tussen twee controles of alle workers nog leven
+    CHECK_INTERVAL = 0.5
+
+    def __init__(
+        self,
+        team_factory: TeamFactory = build_team,
+        workers: Optional[int] = None,
+        start_method: str = "spawn",
+        start_timeout: float = 60.0
+    ):
+        """
+        Initialiseer de pool (de workers starten bij start() of het eerste verzoek).
+
+        Args:
+            team_factory: Picklebare functie die in een worker het AgentTeam bouwt
+            workers: Aantal workerprocessen (standaard het aantal CPU's)
+            start_method: Startmethode van multiprocessing; "spawn" is veilig naast
+                threads in het hoofdproces
+            start_timeout: Maximaal aantal seconden om op het starten van de workers te wachten
+        """
+        if workers is not None and workers < 1:
+            raise ValueError("workers moet minimaal 1 zijn")
+
+        self.team_factory = team_factory
+        self.workers = workers or os.cpu_count() or 1
+        self.start_timeout = start_timeout
+        self._context = multiprocessing.get_context(start_method)
+        self._outbox = None
+        self._inboxes: List[Any] = []
+        self._processes: List[Any] = []
+        self._ready: List[threading.Event] = []
+        self._failures: Dict[int, BaseException] = {}
+        self._pending: Dict[int, Tuple[int, Union[Future, PoolStream]]] = {}
+        self._ids = itertools.count()
+        self._lock = threading.Lock()
+        self._collector: Optional[threading.Thread] = None
+        self._started = False
+        self._closed = False
+
+    def _spawn(self, index: int) -> None:
+        """Start (of herstart) worker index met een nieuwe inbox."""
+        inbox = self._context.Queue()
+        process = self._context.Process(
+            target=_worker_main,
+            args=(index, self.team_factory, inbox, self._outbox),
+            name=f"agent-worker-{index}",
+            daemon=True
+        )
+        process.start()
+        self._inboxes[index] = inbox
+        self._processes[index] = process
+
+    def start(self) -> "AgentWorkerPool":
+        """
+        Start de workers en wacht tot elk team gebouwd is.
+
+        Raises:
+            WorkerError: Als een worker niet (op tijd) kon starten
+        """
+        with self._lock:
+            if self._closed:
+                raise WorkerError("De workerpool is gesloten")
+            if self._started:
+                return self
+            self._started = True
+            self._outbox = self._context.Queue()
+            self._inboxes = [None] * self.workers
+            self._processes = [None] * self.workers
+            self._ready = [threading.Event() for _ in range(self.workers)]
+            for index in range(self.workers):
+                self._spawn(index)
+            self._collector = threading.Thread(target=self._collect, name="agent-worker-collector", daemon=True)
+            self._collector.start()
+
+        deadline = Deadline(self.start_timeout)
+        for index, ready in enumerate(self._ready):
+            if not ready.wait(deadline.remaining()) or index in self._failures:
+                error = self._failures.get(index)
+                self.close()
+                raise WorkerError(f"Worker {index} kon niet starten: {error or 'time-out'}") from error
+        return self
+
+    def worker_for(self, session_id: str) -> int:
+        """Index van de worker die het gesprek met dit sessie-ID afhandelt."""
+        return session_slot(session_id, self.workers)
+
+    @staticmethod
+    def _payload(
+        conversation: List[Dict[str, str]],
+        topic: Optional[str],
+        session_id: Optional[str],
+        deadline: Union[Deadline, float, None],
+        agent: Optional[str],
+        top_k: int
+    ) -> Dict[str, Any]:
+        deadline = Deadline.coerce(deadline)
+        return {
+            "conversation": list(conversation),
+            "topic": topic,
+            "session_id": session_id or content_session_id(conversation),
+            # Monotone klokken verschillen per proces: geef de resterende tijd mee
+            "deadline": None if deadline is None else deadline.remaining(),
+            "agent": agent,
+            "top_k": top_k,
+        }
+
+    def _dispatch(self, op: str, payload: Dict[str, Any], target: Union[Future, PoolStream]) -> int:
+        self.start()
+        index = self.worker_for(payload["session_id"])
+        with self._lock:
+            if self._closed:
+                raise WorkerError("De workerpool is gesloten")
+            request_id = next(self._ids)
+            self._pending[request_id] = (index, target)
+            self._inboxes[index].put((op, request_id, payload))
+        return request_id
+
+    def _cancel(self, request_id: Optional[int]) -> None:
+        with self._lock:
+            entry = self._pending.pop(request_id, None)
+            if entry is not None and not self._closed:
+                self._inboxes[entry[0]].put(("cancel", request_id, None))
+
+    def submit(
+        self,
+        conversation: List[Dict[str, str]],
+        topic: Optional[str] = None,
+        session_id: Optional[str] = None,
+        deadline: Union[Deadline, float, None] = None,
+        agent: Optional[str] = None,
+        top_k: int = 1
+    ) -> "Future[TurnResult]":
+        """
+        Laat de worker van dit gesprek een beurt beantwoorden.
+
+        Zonder agent kiest de router van het team de agent(s), zoals
+        AgentTeam.respond_routed. Annuleren van de future breekt de beurt af.
+
+        Args:
+            conversation: Lijst van berichten in het formaat [{"role": "user", "content": "..."}, ...]
+            topic: Optioneel onderwerp voor context
+            session_id: Sessie-ID; bepaalt de worker
+            deadline: Deadline (of aantal seconden) voor de hele beurt
+            agent: Optionele naam van de agent die moet antwoorden
+            top_k: Maximum aantal agents dat antwoordt als de router kiest
+
+        Returns:
+            Een future met een lijst van (agentnaam, antwoord)
+        """
+        future: "Future[TurnResult]" = Future()
+        request_id = self._dispatch("respond", self._payload(conversation, topic, session_id, deadline, agent, top_k), future)
+
+        def cancel_turn(done: Future) -> None:
+            if done.cancelled():
+                self._cancel(request_id)
+
+        future.add_done_callback(cancel_turn)
+        return future
+
+    def result(
+        self,
+        conversation: List[Dict[str, str]],
+        topic: Optional[str] = None,
+        session_id: Optional[str] = None,
+        deadline: Union[Deadline, float, None] = None,
+        agent: Optional[str] = None,
+        top_k: int = 1
+    ) -> TurnResult:
+        """
+        Blokkerende variant van submit.
+
+        Returns:
+            Een lijst van (agentnaam, antwoord), best passende agent eerst
+        """
+        return self.submit(conversation, topic, session_id, deadline, agent, top_k).result()
+
+    async def asubmit(
+        self,
+        conversation: List[Dict[str, str]],
+        topic: Optional[str] = None,
+        session_id: Optional[str] = None,
+        deadline: Union[Deadline, float, None] = None,
+        agent: Optional[str] = None,
+        top_k: int = 1
+    ) -> TurnResult:
+        """
+        Asynchrone variant van result, zonder een thread van de event loop te bezetten.
+
+        Returns:
+            Een lijst van (agentnaam, antwoord), best passende agent eerst
+        """
+        return await asyncio.wrap_future(self.submit(conversation, topic, session_id, deadline, agent, top_k))
+
+    def stream(
+        self,
+        conversation: List[Dict[str, str]],
+        topic: Optional[str] = None,
+        session_id: Optional[str] = None,
+        deadline: Union[Deadline, float, None] = None,
+        agent: Optional[str] = None
+    ) -> PoolStream:
+        """
+        Laat één agent in de worker van dit gesprek streamend antwoorden.
+
+        Args:
+            conversation: Lijst van berichten in het formaat [{"role": "user", "content": "..."}, ...]
+            topic: Optioneel onderwerp voor context
+            session_id: Sessie-ID; bepaalt de worker
+            deadline: Deadline (of aantal seconden) voor de hele beurt
+            agent: Optionele naam van de agent; anders kiest de router
+
+        Returns:
+            Een PoolStream met de fragmenten van het antwoord
+        """
+        stream = PoolStream(self)
+        stream.request_id = self._dispatch("stream", self._payload(conversation, topic, session_id, deadline, agent, 1), stream)
+        return stream
+
+    def astream(
+        self,
+        conversation: List[Dict[str, str]],
+        topic: Optional[str] = None,
+        session_id: Optional[str] = None,
+        deadline: Union[Deadline, float, None] = None,
+        agent: Optional[str] = None
+    ) -> PoolStream:
+        """
+        Variant van stream voor gebruik met async for; moet binnen een draaiende event loop worden aangeroepen.
+
+        Start de pool vooraf (start() of een with-blok), anders blokkeert de
+        eerste aanroep de event loop tot de workers klaar zijn.
+
+        Returns:
+            Een asynchroon te doorlopen PoolStream
+        """
+        stream = PoolStream(self, asyncio.get_running_loop())
+        stream.request_id = self._dispatch("stream", self._payload(conversation, topic, session_id, deadline, agent, 1), stream)
+        return stream
+
+    def _collect(self) -> None:
+        """Verdeel berichten van de workers over futures en streams en bewaak de processen."""
+        next_check = time.monotonic() + self.CHECK_INTERVAL
+        while True:
+            try:
+                message = self._outbox.get(timeout=self.CHECK_INTERVAL)
+            except queue.Empty:
+                message = ()
+            if time.monotonic() >= next_check:
+                self._check_workers()
+                next_check = time.monotonic() + self.CHECK_INTERVAL
+            if message == ():
+                continue
+            if message is None:
+                return
+
+            kind, request_id, value = message
+            if kind in ("ready", "failed"):
+                if kind == "failed":
+                    self._failures[request_id] = value
+                self._ready[request_id].set()
+                continue
+
+            terminal = kind in ("result", "error", "end")
+            with self._lock:
+                entry = self._pending.pop(request_id, None) if terminal else self._pending.get(request_id)
+            if entry is not None:
+                self._deliver(entry[1], kind, value)
+
+    @staticmethod
+    def _deliver(target: Union[Future, PoolStream], kind: str, value: Any) -> None:
+        if isinstance(target, PoolStream):
+            target._deliver(kind, value)
+            return
+        try:
+            if kind == "error":
+                target.set_exception(value)
+            else:
+                target.set_result(value)
+        except InvalidStateError:
+            # Future is intussen geannuleerd
+            pass
+
+    def _check_workers(self) -> None:
+        """Laat verzoeken van gestopte workers falen en start die workers opnieuw (tenzij de fabriek faalde)."""
+        failed = []
+        with self._lock:
+            if self._closed:
+                return
+            for index, process in enumerate(self._processes):
+                if process.is_alive() or not self._ready[index].is_set():
+                    continue
+                error = WorkerError(f"Worker {index} is gestopt (exitcode {process.exitcode})")
+                for request_id, (worker, target) in list(self._pending.items()):
+                    if worker == index:
+                        del self._pending[request_id]
+                        failed.append((target, error))
+                if index not in self._failures:
+                    self._spawn(index)
+        for target, error in failed:
+            self._deliver(target, "error", error)
+
+    def close(self, timeout: float = 10.0) -> None:
+        """
+        Stop de workers nadat ze hun lopende verzoeken hebben afgerond.
+
+        Args:
+            timeout: Maximaal aantal seconden per worker; daarna wordt hij beëindigd
+        """
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            if not self._started:
+                return
+            for inbox in self._inboxes:
+                inbox.put(None)
+
+        for process in self._processes:
+            process.join(timeout)
+            if process.is_alive():
+                process.terminate()
+                process.join()
+
+        self._outbox.put(None)
+        if self._collector is not threading.current_thread():
+            self._collector.join()
+
+        with self._lock:
+            pending = list(self._pending.values())
+            self._pending.clear()
+        for _, target in pending:
+            self._deliver(target, "error", WorkerError("De workerpool is gesloten"))
+        for inbox in self._inboxes:
+            inbox.close()
+        self._outbox.close()
+
+    def __enter__(self) -> "AgentWorkerPool":
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
@@ -0,0 +1,248 @@
+"""
+End-to-end benchmark van de agent-stack tegen een lokale FakeOllamaServer.
+
+Meet per doel (BaseAgent.generate_response en respond van de drie agents) en per
+concurrency-niveau de doorvoer, de p50/p99-latency en het geheugengebruik, zonder
+dat er een echt model nodig is.
+
+Gebruik:
+    python benchmarks/bench_agents.py
+    python benchmarks/bench_agents.py --concurrency 1,8,32 --requests 200 --latency 0.02 --tps 500
+    python benchmarks/bench_agents.py --targets generate,backend --json resultaten.json
+
+De nep-server draait standaard in hetzelfde proces en deelt dus de GIL met de
+agents; start hem voor zuivere cijfers los (python -m utils.fake_ollama) en geef
+--url mee. tracemalloc kost zelf merkbaar doorvoer; --no-tracemalloc schakelt
+de geheugenmeting per combinatie uit.
+"""
+import argparse
+import json
+import math
+import os
+import sys
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+# Voeg de hoofdmap toe aan het Python pad
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from agents.backend_dev import BackendDeveloperAgent
+from agents.base_agent import BaseAgent
+from agents.frontend_dev import FrontendDeveloperAgent
+from agents.scrum_master import ScrumMasterAgent
+from utils.fake_ollama import FakeOllamaServer
+from utils.ollama_client import OllamaClient
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+TARGETS = ("generate", "backend", "frontend", "scrum")
+
+# Foutmelding waarmee respond() een mislukte beurt als tekst teruggeeft
+ERROR_PREFIX = "Er is een fout opgetreden"
+
+
+def percentile(values: Sequence[float], fraction: float) -> float:
+    """Percentiel volgens de nearest-rank methode (0.0 bij een lege lijst)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(fraction * len(ordered)))
+    return ordered[rank - 1]
+
+
+def make_call(target: str, llm: OllamaClient, sessions: int) -> Callable[[int], str]:
+    """
+    Maak de functie die één benchmark-aanroep doet voor een doel.
+
+    Args:
+        target: Een van TARGETS
+        llm: Client die naar de FakeOllamaServer wijst
+        sessions: Aantal verschillende sessies waarover de aanroepen verdeeld worden
+
+    Returns:
+        Functie die voor aanroep i het antwoord teruggeeft
+    """
+    if target == "generate":
+        agent = BaseAgent(name="Bench", role="Benchmark", goal="Meten", backstory="", llm=llm)
+        return lambda i: agent.generate_response(f"bench-{i % sessions}", f"Vraag nummer {i}")
+
+    agent_class = {
+        "backend": BackendDeveloperAgent,
+        "frontend": FrontendDeveloperAgent,
+        "scrum": ScrumMasterAgent,
+    }[target]
+    agent = agent_class(llm=llm)
+    return lambda i: agent.respond(
+        [{"role": "user", "content": f"Vraag nummer {i}"}],
+        session_id=f"bench-{i % sessions}"
+    )
+
+
+def run_case(
+    call: Callable[[int], str],
+    requests: int,
+    concurrency: int,
+    trace_memory: bool = True
+) -> Dict[str, Any]:
+    """
+    Voer requests aanroepen uit met concurrency threads en verzamel de metingen.
+
+    Een aanroep telt als fout als hij een exceptie gooit of de foutmelding van
+    respond() teruggeeft.
+
+    Returns:
+        Dict met requests, errors, seconds, throughput (geslaagde aanroepen per
+        seconde), p50_ms, p99_ms, max_ms en peak_kb (None zonder tracemalloc)
+    """
+    latencies: List[float] = []
+    errors = 0
+
+    def timed(i: int) -> Optional[float]:
+        start = time.perf_counter()
+        try:
+            response = call(i)
+        except Exception:
+            return None
+        if response.startswith(ERROR_PREFIX):
+            return None
+        return time.perf_counter() - start
+
+    if trace_memory:
+        tracemalloc.start()
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        for elapsed in executor.map(timed, range(requests)):
+            if elapsed is None:
+                errors += 1
+            else:
+                latencies.append(elapsed)
+    seconds = time.perf_counter() - start
+    peak_kb = None
+    if trace_memory:
+        peak_kb = tracemalloc.get_traced_memory()[1] / 1024
+        tracemalloc.stop()
+
+    return {
+        "requests": requests,
+        "errors": errors,
+        "seconds": seconds,
+        "throughput": len(latencies) / seconds if seconds > 0 else 0.0,
+        "p50_ms": percentile(latencies, 0.50) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+        "max_ms": max(latencies, default=0.0) * 1000,
+        "peak_kb": peak_kb,
+    }
+
+
+def run_benchmarks(
+    targets: Sequence[str] = TARGETS,
+    concurrency_levels: Sequence[int] = (1, 4, 16),
+    requests: int = 100,
+    sessions: int = 16,
+    trace_memory: bool = True,
+    server_options: Optional[Dict[str, Any]] = None,
+    url: Optional[str] = None,
+    model: str = "bench"
+) -> List[Dict[str, Any]]:
+    """
+    Draai alle combinaties van doel en concurrency.
+
+    Zonder url wordt een FakeOllamaServer met server_options in dit proces gestart.
+    Elk doel krijgt per concurrency-niveau een nieuwe agent (lege sessies) en
+    een nieuwe client met een verbindingspool die groot genoeg is.
+
+    Returns:
+        Lijst met per combinatie de uitkomst van run_case plus target en concurrency
+    """
+    server = None
+    if url is None:
+        server = FakeOllamaServer(**(server_options or {})).start()
+        url = server.url
+
+    results = []
+    try:
+        for target in targets:
+            for concurrency in concurrency_levels:
+                llm = OllamaClient(model=model, base_url=url, pool_size=max(concurrency, 10))
+                try:
+                    call = make_call(target, llm, sessions)
+                    call(-1)  # Opwarmen: verbinding en model laden
+                    result = run_case(call, requests, concurrency, trace_memory)
+                finally:
+                    llm.close()
+                results.append({"target": target, "concurrency": concurrency, **result})
+    finally:
+        if server is not None:
+            server.stop()
+    return results
+
+
+def format_table(results: List[Dict[str, Any]]) -> str:
+    """Zet de resultaten om in een leesbare tabel."""
+    header = f"{'doel':<10}{'conc':>6}{'req':>7}{'fout':>6}{'req/s':>10}{'p50 ms':>10}{'p99 ms':>10}{'piek KB':>10}"
+    lines = [header, "-" * len(header)]
+    for r in results:
+        peak = f"{r['peak_kb']:.0f}" if r["peak_kb"] is not None else "-"
+        lines.append(
+            f"{r['target']:<10}{r['concurrency']:>6}{r['requests']:>7}{r['errors']:>6}"
+            f"{r['throughput']:>10.1f}{r['p50_ms']:>10.1f}{r['p99_ms']:>10.1f}{peak:>10}"
+        )
+    return "\n".join(lines)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark de agent-stack tegen een nep-Ollama.")
+    parser.add_argument("--targets", default=",".join(TARGETS), help="Kommagescheiden doelen")
+    parser.add_argument("--concurrency", default="1,4,16", help="Kommagescheiden concurrency-niveaus")
+    parser.add_argument("--requests", type=int, default=100, help="Aanroepen per combinatie")
+    parser.add_argument("--sessions", type=int, default=16, help="Aantal verschillende sessies")
+    parser.add_argument("--url", default=None, help="Gebruik een draaiende (nep-)Ollama in plaats van een eigen server")
+    parser.add_argument("--model", default="bench", help="Modelnaam in de aanroepen")
+    parser.add_argument("--latency", type=float, default=0.01, help="Seconden tot het eerste token")
+    parser.add_argument("--tps", type=float, default=None, help="Tokens per seconde (standaard onbegrensd)")
+    parser.add_argument("--tokens", type=int, default=32, help="Tokens per antwoord")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="Kans op een geïnjecteerde 500")
+    parser.add_argument("--seed", type=int, default=None, help="Seed voor de foutinjectie")
+    parser.add_argument("--no-tracemalloc", action="store_true", help="Meet geen geheugenpiek (minder overhead)")
+    parser.add_argument("--json", dest="json_path", default=None, help="Schrijf de resultaten ook als JSON")
+    args = parser.parse_args(argv)
+
+    targets = [t.strip() for t in args.targets.split(",") if t.strip()]
+    unknown = set(targets) - set(TARGETS)
+    if unknown:
+        parser.error(f"Onbekende doelen: {', '.join(sorted(unknown))}")
+
+    results = run_benchmarks(
+        targets=targets,
+        concurrency_levels=[int(c) for c in args.concurrency.split(",")],
+        requests=args.requests,
+        sessions=args.sessions,
+        trace_memory=not args.no_tracemalloc,
+        server_options={
+            "latency": args.latency,
+            "tokens_per_second": args.tps,
+            "response_tokens": args.tokens,
+            "failure_rate": args.failure_rate,
+            "seed": args.seed,
+        },
+        url=args.url,
+        model=args.model
+    )
+
+    print(format_table(results))
+    if resource is not None:
+        maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        print(f"\nMaximaal RSS van het proces: {maxrss / 1024:.1f} MB")
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
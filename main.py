@@ -1,11 +1,66 @@
-
+import argparse
+from typing import List, Optional
 from agents.backend_dev import BackendDeveloperAgent
+from agents.conversation import POLICIES, ConversationEngine, Turn
 from agents.frontend_dev import FrontendDeveloperAgent
 from agents.scrum_master import ScrumMasterAgent
-# Minimal main.py voor TDD multi-agent chat
+from utils.ollama_client import OllamaClient
+
+
+def build_engine(args: argparse.Namespace) -> ConversationEngine:
+    """Stel het team en de gespreksengine samen volgens de opdrachtregelopties."""
+    llm = OllamaClient(model=args.model, base_url=args.base_url)
+    agents = [
+        ScrumMasterAgent(llm=llm, model=args.model),
+        FrontendDeveloperAgent(llm=llm, model=args.model),
+        BackendDeveloperAgent(llm=llm, model=args.model),
+    ]
+    return ConversationEngine(
+        agents,
+        policy=POLICIES[args.policy](),
+        topic=args.topic,
+        turn_timeout=args.timeout,
+        pipeline=not args.no_pipeline
+    )
+
+
+def print_turn(turn: Turn) -> None:
+    print(f"\n[{turn.speaker} - {turn.role}] ({turn.duration:.1f}s)")
+    print(turn.content)
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Multi-agent chat met Ollama")
+    parser.add_argument("message", nargs="?", help="Openingsbericht; zonder bericht start een interactieve sessie")
+    parser.add_argument("--policy", choices=sorted(POLICIES), default="moderator", help="Beurtbeleid")
+    parser.add_argument("--turns", type=int, default=4, help="Aantal agentbeurten per gebruikersbericht")
+    parser.add_argument("--topic", help="Onderwerp van het gesprek")
+    parser.add_argument("--model", default="llama3", help="Ollama-model voor alle agents")
+    parser.add_argument("--base-url", help="Ollama-URL (standaard OLLAMA_BASE_URL of localhost)")
+    parser.add_argument("--timeout", type=float, help="Deadline in seconden per beurt")
+    parser.add_argument("--no-pipeline", action="store_true", help="Bereid de volgende spreker niet voor")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    args = parse_args(argv)
+    with build_engine(args) as engine:
+        if args.message:
+            for turn in engine.run(args.message, max_turns=args.turns):
+                print_turn(turn)
+            return
+
+        print("Multi-agent chat. Spreek een agent aan met @naam; een lege regel stopt.")
+        while True:
+            try:
+                message = input("\nJij: ").strip()
+            except EOFError:
+                break
+            if not message:
+                break
+            for turn in engine.run(message, max_turns=args.turns):
+                print_turn(turn)
 
-def main():
-    print("Multi-agent chat entrypoint (TDD). Voeg functionaliteit toe via tests.")
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,308 @@
+import argparse
+import asyncio
+import functools
+import json
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, List, Literal, Optional, Tuple
+
+from fastapi import FastAPI, HTTPException
+from fastapi.responses import JSONResponse, StreamingResponse
+from pydantic import BaseModel, Field
+from starlette.background import BackgroundTask
+
+from agents.team import AgentTeam
+from agents.worker_pool import AgentWorkerPool, TurnResult, WorkerError, build_team
+from utils.admission import AdmissionController, OverloadedError, is_overload
+from utils.errors import DeadlineExceededError, LLMConnectionError, LLMError
+from utils.retry import Deadline
+from utils.session_keys import content_session_id
+
+
+class ChatMessage(BaseModel):
+    role: Literal["system", "user", "assistant"]
+    content: str
+
+
+class ChatRequest(BaseModel):
+    messages: List[ChatMessage] = Field(min_length=1)
+    topic: Optional[str] = None
+    session_id: Optional[str] = Field(None, min_length=1, max_length=256)
+    # Identiteit van de aanroeper; scheidt afgeleide sessie-ID's van verschillende gebruikers
+    user: Optional[str] = Field(None, max_length=256)
+    top_k: int = Field(1, ge=1)
+    timeout: Optional[float] = Field(None, gt=0)
+    stream: bool = False
+
+
+class TeamBackend:
+    """Beantwoordt beurten in het serverproces zelf, op de event loop van de server."""
+    def __init__(self, team: AgentTeam):
+        self.team = team
+        self.agents = [{"name": agent.name, "role": agent.role} for agent in team.agents]
+
+    async def start(self) -> None:
+        pass
+
+    async def respond(self, conversation, topic, session_id, deadline, agent, top_k) -> TurnResult:
+        results = await self.team.arespond_turn(conversation, topic, session_id, deadline, agent, top_k)
+        return [(selected.name, response) for selected, response in results]
+
+    async def stream(self, conversation, topic, session_id, deadline, agent) -> AsyncIterator[Tuple[str, str]]:
+        async for selected, chunk in self.team.astream_turn(conversation, topic, session_id, deadline, agent):
+            yield selected.name, chunk
+
+    async def aclose(self) -> None:
+        await self.team.aclose()
+
+
+class PoolBackend:
+    """Beantwoordt beurten in een AgentWorkerPool; elk gesprek blijft bij één worker."""
+    def __init__(self, pool: AgentWorkerPool):
+        self.pool = pool
+        # Alleen voor de metadata: het team zelf draait in de workers
+        team = pool.team_factory()
+        self.agents = [{"name": agent.name, "role": agent.role} for agent in team.agents]
+        team.close()
+
+    async def start(self) -> None:
+        await asyncio.get_running_loop().run_in_executor(None, self.pool.start)
+
+    async def respond(self, conversation, topic, session_id, deadline, agent, top_k) -> TurnResult:
+        return await self.pool.asubmit(conversation, topic, session_id, deadline, agent, top_k)
+
+    async def stream(self, conversation, topic, session_id, deadline, agent) -> AsyncIterator[Tuple[str, str]]:
+        stream = self.pool.astream(conversation, topic, session_id, deadline, agent)
+        try:
+            async for chunk in stream:
+                yield stream.agent, chunk
+        finally:
+            stream.close()
+
+    async def aclose(self) -> None:
+        await asyncio.get_running_loop().run_in_executor(None, self.pool.close)
+
+
+def error_status(error: BaseException) -> Tuple[int, Dict[str, str]]:
+    """
+    HTTP-status en extra headers voor een fout tijdens een beurt.
+
+    Returns:
+        Tuple van (status, headers)
+    """
+    if isinstance(error, OverloadedError):
+        return 503, {"Retry-After": str(int(error.retry_after + 0.5))}
+    if isinstance(error, (DeadlineExceededError, asyncio.TimeoutError)):
+        return 504, {}
+    if is_overload(error):
+        return 503, {"Retry-After": "1"}
+    if isinstance(error, (LLMConnectionError, WorkerError)):
+        return 503, {}
+    if isinstance(error, LLMError):
+        return 502, {}
+    return 500, {}
+
+
+def sse_event(event: str, data: Dict[str, Any]) -> bytes:
+    """Eén Server-Sent Event met JSON-data."""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n".encode("utf-8")
+
+
+class _Slot:
+    """Een plaats bij de AdmissionController die precies één keer wordt vrijgegeven."""
+    __slots__ = ("admission", "released")
+
+    def __init__(self, admission: AdmissionController):
+        self.admission = admission
+        self.released = False
+
+    def release(self, error: Optional[BaseException] = None, succeeded: bool = False) -> None:
+        if not self.released:
+            self.released = True
+            self.admission.release(
+                overloaded=error is not None and is_overload(error),
+                succeeded=succeeded and error is None
+            )
+
+
+def create_app(
+    backend=None,
+    max_in_flight: int = 16,
+    max_queue: int = 64,
+    default_timeout: float = 120.0,
+    max_timeout: float = 600.0
+) -> FastAPI:
+    """
+    Bouw de HTTP-API voor het agentteam.
+
+    Endpoints:
+        GET  /health                  Status en belasting
+        GET  /agents                  Namen en rollen van de agents
+        POST /chat                    Teambeurt: de router kiest de agent(s)
+        POST /agents/{naam}/chat      Beurt van één agent
+
+    Met "stream": true antwoordt een chat-endpoint met Server-Sent Events:
+    "agent" (wie antwoordt), "chunk" per fragment, en tot slot "done" of "error".
+    Elk verzoek krijgt een deadline (timeout, begrensd door max_timeout) die ook
+    de tijd in de wachtrij omvat. Zitten de agents of Ollama vol, dan volgt 503
+    met Retry-After in plaats van een steeds langere wachtrij. Het sessie-ID
+    staat in elk antwoord (en in de header X-Session-ID); zonder sessie-ID wordt
+    het afgeleid uit de eerste vraag en het optionele user-veld.
+
+    Args:
+        backend: TeamBackend of PoolBackend (standaard een TeamBackend met build_team())
+        max_in_flight: Maximum aantal gelijktijdige beurten
+        max_queue: Maximum aantal wachtende beurten
+        default_timeout: Deadline in seconden als het verzoek er geen opgeeft
+        max_timeout: Bovengrens voor de deadline van een verzoek
+
+    Returns:
+        De FastAPI-applicatie
+    """
+    backend = backend or TeamBackend(build_team())
+    admission = AdmissionController(max_in_flight=max_in_flight, max_queue=max_queue)
+    agent_names = {agent["name"].lower(): agent["name"] for agent in backend.agents}
+
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        await backend.start()
+        try:
+            yield
+        finally:
+            await backend.aclose()
+
+    app = FastAPI(title="Multi-agent chat", lifespan=lifespan)
+    app.state.backend = backend
+    app.state.admission = admission
+
+    def error_response(error: BaseException, session_id: Optional[str] = None) -> JSONResponse:
+        status, headers = error_status(error)
+        if session_id is not None:
+            headers["X-Session-ID"] = session_id
+        return JSONResponse({"error": str(error) or type(error).__name__}, status_code=status, headers=headers)
+
+    async def chat(body: ChatRequest, agent: Optional[str]):
+        deadline = Deadline(min(body.timeout or default_timeout, max_timeout))
+        conversation = [message.model_dump() for message in body.messages]
+        session_id = body.session_id or content_session_id(conversation, scope=body.user)
+        headers = {"X-Session-ID": session_id}
+
+        try:
+            await admission.acquire(deadline)
+        except (OverloadedError, DeadlineExceededError) as e:
+            return error_response(e, session_id)
+        slot = _Slot(admission)
+
+        if body.stream:
+            return StreamingResponse(
+                stream_events(slot, conversation, body.topic, session_id, deadline, agent),
+                media_type="text/event-stream",
+                headers={**headers, "Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+                # Vangnet als de client verdwijnt voordat de stream begonnen is
+                background=BackgroundTask(slot.release)
+            )
+
+        error = None
+        succeeded = False
+        try:
+            results = await asyncio.wait_for(
+                backend.respond(conversation, body.topic, session_id, deadline, agent, body.top_k),
+                deadline.remaining()
+            )
+            succeeded = True
+        except Exception as e:
+            error = e
+            return error_response(e, session_id)
+        finally:
+            # Een verbroken verbinding (CancelledError) telt niet als geslaagde beurt
+            slot.release(error, succeeded)
+
+        return JSONResponse({
+            "session_id": session_id,
+            "responses": [{"agent": name, "content": content} for name, content in results],
+        }, headers=headers)
+
+    async def stream_events(slot, conversation, topic, session_id, deadline, agent) -> AsyncIterator[bytes]:
+        # De deadline gaat mee tot in de LLM-client, die hem per fragment bewaakt
+        error = None
+        succeeded = False
+        current = None
+        chunks = backend.stream(conversation, topic, session_id, deadline, agent)
+        try:
+            async for name, chunk in chunks:
+                if name != current:
+                    current = name
+                    yield sse_event("agent", {"agent": name, "session_id": session_id})
+                yield sse_event("chunk", {"content": chunk})
+            succeeded = True
+            yield sse_event("done", {"agent": current, "session_id": session_id})
+        except Exception as e:
+            error = e
+            status, _ = error_status(e)
+            yield sse_event("error", {"error": str(e) or type(e).__name__, "status": status})
+        finally:
+            # Bij een verbroken verbinding ook de beurt (en in een pool de worker) afbreken
+            await chunks.aclose()
+            slot.release(error, succeeded)
+
+    @app.get("/health")
+    async def health():
+        return {
+            "status": "ok",
+            "in_flight": admission.in_flight,
+            "queued": admission.queued,
+            "limit": int(admission.limit),
+            "rejected": admission.rejected,
+        }
+
+    @app.get("/agents")
+    async def list_agents():
+        return backend.agents
+
+    @app.post("/chat")
+    async def team_chat(body: ChatRequest):
+        return await chat(body, None)
+
+    @app.post("/agents/{name}/chat")
+    async def agent_chat(name: str, body: ChatRequest):
+        agent = agent_names.get(name.lower())
+        if agent is None:
+            raise HTTPException(status_code=404, detail=f"Onbekende agent: {name}")
+        return await chat(body, agent)
+
+    return app
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="HTTP-API voor het agentteam")
+    parser.add_argument("--host", default="127.0.0.1", help="Adres waarop de server luistert")
+    parser.add_argument("--port", type=int, default=8000, help="Poort")
+    parser.add_argument("--model", default="llama3", help="Ollama-model voor alle agents")
+    parser.add_argument("--base-url", help="Ollama-URL (standaard OLLAMA_BASE_URL of localhost)")
+    parser.add_argument("--workers", type=int, default=0,
+                        help="Aantal workerprocessen voor de agents (0 = in het serverproces)")
+    parser.add_argument("--max-in-flight", type=int, default=16, help="Maximum aantal gelijktijdige beurten")
+    parser.add_argument("--max-queue", type=int, default=64, help="Maximum aantal wachtende beurten")
+    parser.add_argument("--timeout", type=float, default=120.0, help="Standaarddeadline per verzoek in seconden")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    import uvicorn
+
+    args = parse_args(argv)
+    factory = functools.partial(build_team, model=args.model, base_url=args.base_url)
+    if args.workers:
+        backend = PoolBackend(AgentWorkerPool(factory, workers=args.workers))
+    else:
+        backend = TeamBackend(factory())
+    app = create_app(
+        backend,
+        max_in_flight=args.max_in_flight,
+        max_queue=args.max_queue,
+        default_timeout=args.timeout
+    )
+    uvicorn.run(app, host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+import asyncio
+import unittest
+
+# Voeg de root van het project toe aan het Python pad
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils.admission import AdmissionController, OverloadedError, is_overload
+from utils.errors import DeadlineExceededError, LLMConnectionError
+from utils.retry import Deadline
+
+
+class TestAdmissionController(unittest.TestCase):
+    def test_wachtrij_en_weigering(self):
+        async def scenario():
+            admission = AdmissionController(max_in_flight=1, max_queue=1)
+            await admission.acquire()
+            wachtend = asyncio.ensure_future(admission.acquire())
+            await asyncio.sleep(0)
+            self.assertEqual(admission.queued, 1)
+            with self.assertRaises(OverloadedError):
+                await admission.acquire()
+
+            # Vrijgeven geeft de plaats door aan de wachtende
+            admission.release()
+            await wachtend
+            self.assertEqual((admission.in_flight, admission.queued, admission.rejected), (1, 0, 1))
+
+        asyncio.run(scenario())
+
+    def test_deadline_in_de_wachtrij(self):
+        async def scenario():
+            admission = AdmissionController(max_in_flight=1, max_queue=4)
+            await admission.acquire()
+            with self.assertRaises(DeadlineExceededError):
+                await admission.acquire(Deadline(0.05))
+            self.assertEqual(admission.queued, 0)
+            admission.release()
+            self.assertEqual(admission.in_flight, 0)
+
+        asyncio.run(scenario())
+
+    def test_limiet_past_zich_aan(self):
+        """Overbelasting halveert de limiet; geslaagde beurten verhogen hem weer geleidelijk."""
+        async def scenario():
+            admission = AdmissionController(max_in_flight=8, min_in_flight=2)
+            for _ in range(3):
+                await admission.acquire()
+                admission.release(overloaded=True)
+            self.assertEqual(admission.limit, 2)
+
+            for _ in range(20):
+                await admission.acquire()
+                admission.release()
+            self.assertTrue(6 < admission.limit <= 8)
+
+        asyncio.run(scenario())
+
+    def test_fouten_laten_de_limiet_ongemoeid(self):
+        """Alleen geslaagde beurten verhogen de limiet; andere fouten wijzigen hem niet."""
+        async def scenario():
+            admission = AdmissionController(max_in_flight=8)
+            await admission.acquire()
+            admission.release(overloaded=True)
+            self.assertEqual(admission.limit, 4)
+
+            for _ in range(10):
+                await admission.acquire()
+                admission.release(succeeded=False)
+            self.assertEqual((admission.limit, admission.in_flight), (4, 0))
+
+            await admission.acquire()
+            admission.release()
+            self.assertEqual(admission.limit, 4.25)
+
+        asyncio.run(scenario())
+
+    def test_herkent_verzadiging(self):
+        self.assertTrue(is_overload(LLMConnectionError("vol", status=503)))
+        self.assertTrue(is_overload(LLMConnectionError("te veel", status=429)))
+        self.assertFalse(is_overload(LLMConnectionError("weg")))
+        self.assertFalse(is_overload(ValueError()))
+
+
+if __name__ == "__main__":
+    unittest.main()
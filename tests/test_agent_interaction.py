@@ -1,8 +1,11 @@
+import asyncio
 import pytest
-from unittest.mock import MagicMock
+from unittest.mock import AsyncMock, MagicMock
 from agents.frontend_dev import FrontendDeveloperAgent
 from agents.backend_dev import BackendDeveloperAgent
 from agents.scrum_master import ScrumMasterAgent
+from agents.team import AgentTeam
+from utils.shared_sessions import SharedSessionManager, team_turn
 
 @pytest.fixture
 def agents():
@@ -54,8 +57,60 @@ def test_scrum_master_rolbewaking(agents):
     expected_response = "Laten we de juiste persoon inschakelen voor deze vraag."
     assert expected_response in antwoord
 
-@pytest.mark.skip(reason="Integratiegeheugen vereist sessie-implementatie")
+def test_agents_antwoorden_asynchroon_tegelijk(agents):
+    # Laat elke agent asynchroon antwoorden via dezelfde event loop
+    for agent in agents.values():
+        agent.llm.agenerate_response = AsyncMock(return_value=agent.llm.generate_response.return_value)
+
+    conversation = [{"role": "user", "content": "Wie pakt deze bug op?"}]
+
+    async def alle_antwoorden():
+        return await asyncio.gather(*(
+            agent.arespond(conversation, topic="bug", session_id=f"async_{naam}")
+            for naam, agent in agents.items()
+        ))
+
+    antwoorden = asyncio.run(alle_antwoorden())
+
+    assert "Sarah (Frontend Developer)" in antwoorden[0]
+    assert "Mark (Backend Developer)" in antwoorden[1]
+    assert "Erik (Scrum Master)" in antwoorden[2]
+    for agent in agents.values():
+        agent.llm.agenerate_response.assert_awaited_once()
+        agent.llm.generate_response.assert_not_called()
+
+@pytest.mark.parametrize("naam", ["frontend", "backend", "scrum"])
+def test_een_beurt_wordt_een_keer_opgeslagen(agents, naam):
+    """Elke agent legt per beurt precies één vraag en één antwoord vast."""
+    agent = agents[naam]
+    agent.respond([{"role": "user", "content": "Wat is de status?"}], session_id="enkel")
+
+    history = agent.get_session_history("enkel")
+    assert [m["role"] for m in history] == ["user", "assistant"]
+    prompt = agent.llm.generate_response.call_args.args[0]
+    assert sum(m["content"] == "Wat is de status?" for m in prompt) == 1
+
+
 def test_agents_delen_context(agents):
     """Test dat agents context kunnen delen in een sessie."""
-    # Deze test wordt overgeslagen totdat sessiebeheer is geïmplementeerd
-    pass
+    gedeeld = SharedSessionManager()
+    AgentTeam(list(agents.values()), session_manager=gedeeld)
+
+    conversation = [{"role": "user", "content": "Hoe update ik de database?"}]
+    with team_turn("gedeeld", conversation[0]["content"]):
+        agents["frontend"].respond(conversation, topic="database", session_id="gedeeld")
+        agents["scrum"].respond(conversation, topic="database", session_id="gedeeld")
+
+    # De Scrum Master ziet het antwoord van Sarah in zijn prompt
+    prompt = agents["scrum"].llm.generate_response.call_args.args[0]
+    assert {"role": "user", "content": "Sarah: Dat is een vraag voor Mark, onze backend developer."} in prompt
+
+    # Eén canoniek log: de vraag van de teambeurt staat er maar één keer in
+    sessie = gedeeld.get_session("gedeeld")
+    assert [(m.speaker, m.role) for m in sessie.history] == [
+        (None, "user"), ("Sarah", "assistant"), ("Erik", "assistant")
+    ]
+    # Context blijft per agent
+    agents["frontend"].update_session_context("gedeeld", "formulier", "login")
+    assert agents["frontend"].get_session_context("gedeeld", "formulier") == "login"
+    assert agents["scrum"].get_session_context("gedeeld", "formulier") is None
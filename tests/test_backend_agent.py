@@ -4,6 +4,7 @@ from datetime import datetime
 from unittest.mock import MagicMock, patch, ANY
 from agents.backend_dev import BackendDeveloperAgent
 from utils.conversation_memory import SessionManager
+from utils.session_keys import content_session_id
 
 @pytest.fixture
 def agent():
@@ -32,7 +33,7 @@ def test_blijft_binnen_backend_domein(agent):
     assert "Mark (Backend Developer)" in antwoord
     
     # Controleer of de sessie is bijgewerkt
-    session = agent.get_or_create_session("user_" + str(hash("Hoe valideer ik een formulier?") % 10000))
+    session = agent.get_or_create_session(content_session_id(conversation))
     assert len(session.history) == 2  # Gebruikersvraag + antwoord
 
 def test_api_response_handling(agent):
@@ -139,9 +140,9 @@ def test_context_onthouden(agent):
     ]
     
     # Stel in dat de LLM een antwoord geeft met de naam uit de context
-    def mock_generate_response(*args, **kwargs):
+    def mock_generate_response(messages, **kwargs):
         # Controleer of de juiste context wordt doorgegeven
-        if "Mijn naam is Jan" in str(kwargs.get("full_conversation", [])):
+        if "Mijn naam is Jan" in str(messages):
             return "Natuurlijk, je naam is Jan. Hoe kan ik je vandaag helpen?"
         return "Ik weet niet meer hoe je heet."
     
@@ -1,5 +1,7 @@
+import asyncio
 import unittest
-from unittest.mock import MagicMock, patch
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import AsyncMock, MagicMock, patch
 from datetime import datetime, timedelta
 
 # Voeg de root van het project toe aan het Python pad
@@ -9,6 +11,8 @@ sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')
 
 from agents.base_agent import BaseAgent
 from utils.conversation_memory import SessionManager, Session
+from utils.errors import DeadlineExceededError, LLMConnectionError
+from utils.retry import Deadline, RetryPolicy
 
 class TestBaseAgent(unittest.TestCase):
     def setUp(self):
@@ -124,5 +128,125 @@ class TestBaseAgent(unittest.TestCase):
         system_prompt_found = any("testassistent" in str(msg.get("content", "")).lower() for msg in full_conversation)
         self.assertTrue(system_prompt_found, "Systeemprompt niet gevonden in de conversatie")
 
+    def test_agenerate_response(self):
+        """Test de asynchrone variant van generate_response."""
+        self.agent.llm.agenerate_response = AsyncMock(return_value="Async antwoord.")
+        
+        response = asyncio.run(self.agent.agenerate_response(
+            session_id="async_session",
+            user_input="Hallo?",
+            system_prompt="Jij bent een testassistent."
+        ))
+        
+        self.assertEqual(response, "Async antwoord.")
+        session = self.agent.get_or_create_session("async_session")
+        self.assertEqual(len(session.history), 2)
+        
+        args, _ = self.agent.llm.agenerate_response.call_args
+        self.assertEqual(args[0][0]["role"], "system")
+        self.assertEqual(args[0][-1]["content"], "Hallo?")
+
+    def test_stream_response(self):
+        """Test dat streaming fragmenten doorgeeft en pas na afloop opslaat."""
+        self.agent.llm.stream_response.return_value = iter(["Dit is ", "gestreamd."])
+        
+        stream = self.agent.stream_response(
+            session_id="stream_session",
+            user_input="Vertel iets.",
+            system_prompt="Jij bent een testassistent."
+        )
+        
+        # Nog niets opgeslagen zolang de stroom niet is afgerond
+        self.assertEqual(next(stream), "Dit is ")
+        self.assertEqual(len(self.agent.get_session_history("stream_session")), 0)
+        
+        self.assertEqual(list(stream), ["gestreamd."])
+        history = self.agent.get_session_history("stream_session")
+        self.assertEqual([m["content"] for m in history], ["Vertel iets.", "Dit is gestreamd."])
+        
+        # Het systeemprompt en de nieuwe invoer zijn naar de LLM gestuurd
+        args, _ = self.agent.llm.stream_response.call_args
+        self.assertEqual(args[0][0]["content"], "Jij bent een testassistent.")
+        self.assertEqual(args[0][-1], {"role": "user", "content": "Vertel iets."})
+
+class TestFoutafhandeling(unittest.TestCase):
+    def setUp(self):
+        self.mock_llm = MagicMock()
+        self.agent = BaseAgent(
+            name="Test Agent",
+            role="Test Role",
+            goal="Test Goal",
+            backstory="Test Backstory",
+            llm=self.mock_llm
+        )
+
+    def test_mislukte_beurt_komt_niet_in_geschiedenis(self):
+        """Een LLM-fout wordt doorgegeven en laat de sessie leeg."""
+        self.mock_llm.generate_response.side_effect = LLMConnectionError("Ollama onbereikbaar")
+
+        with self.assertRaises(LLMConnectionError):
+            self.agent.generate_response("s1", "Hallo?")
+
+        self.assertEqual(len(self.agent.get_or_create_session("s1").history), 0)
+
+    def test_gelijktijdige_beurten_blijven_paren(self):
+        """Vraag en antwoord van een beurt staan altijd direct na elkaar in de sessie."""
+        self.mock_llm.generate_response.side_effect = lambda messages, **kwargs: f"antwoord op {messages[-1]['content']}"
+        self.agent.session_manager = SessionManager()
+        self.agent.get_or_create_session("s1").max_history = 100
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            list(executor.map(lambda i: self.agent.generate_response("s1", f"vraag {i}"), range(40)))
+
+        history = list(self.agent.get_session_history("s1"))
+        for vraag, antwoord in zip(history[::2], history[1::2]):
+            self.assertEqual(antwoord["content"], f"antwoord op {vraag['content']}")
+
+    def test_deadline_wordt_doorgegeven(self):
+        """Een deadline in seconden wordt één Deadline tot aan de LLM-aanroep."""
+        self.mock_llm.agenerate_response = AsyncMock(return_value="Op tijd")
+        self.agent.build_system_prompt = lambda topic: "Systeem"
+
+        antwoord = asyncio.run(self.agent.arespond(
+            [{"role": "user", "content": "Snel graag"}], session_id="s1", deadline=5.0
+        ))
+
+        self.assertIn("Op tijd", antwoord)
+        deadline = self.mock_llm.agenerate_response.call_args.kwargs["deadline"]
+        self.assertIsInstance(deadline, Deadline)
+        self.assertLessEqual(deadline.remaining(), 5.0)
+
+    def test_verstreken_deadline_bij_respond(self):
+        """arespond geeft DeadlineExceededError door in plaats van een foutstring."""
+        self.mock_llm.agenerate_response = AsyncMock(side_effect=DeadlineExceededError("te laat"))
+        self.agent.build_system_prompt = lambda topic: "Systeem"
+
+        with self.assertRaises(DeadlineExceededError):
+            asyncio.run(self.agent.arespond([{"role": "user", "content": "Hoi"}], session_id="s1"))
+        self.assertEqual(len(self.agent.get_or_create_session("s1").history), 0)
+
+
+class TestRetryPolicy(unittest.TestCase):
+    def test_backoff_groeit_en_is_begrensd(self):
+        """Zonder jitter verdubbelt de wachttijd tot max_delay."""
+        policy = RetryPolicy(base_delay=0.5, max_delay=2.0, jitter=False)
+        self.assertEqual([policy.backoff(n) for n in range(1, 5)], [0.5, 1.0, 2.0, 2.0])
+
+    def test_jitter_blijft_onder_de_grens(self):
+        """Met jitter ligt de wachttijd tussen 0 en de exponentiële grens."""
+        policy = RetryPolicy(base_delay=0.5, max_delay=2.0)
+        for _ in range(50):
+            self.assertTrue(0 <= policy.backoff(3) <= 2.0)
+
+    def test_deadline(self):
+        """Een deadline begrenst de time-out van een aanroep."""
+        deadline = Deadline(0.5)
+        self.assertLessEqual(deadline.timeout(60), 0.5)
+        self.assertEqual(Deadline(10).timeout(1.0), 1.0)
+        self.assertIs(Deadline.coerce(deadline), deadline)
+        self.assertIsNone(Deadline.coerce(None))
+        self.assertTrue(Deadline(0).expired)
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,178 @@
+import time
+import pytest
+from unittest.mock import MagicMock
+from agents.backend_dev import BackendDeveloperAgent
+from agents.base_agent import BaseAgent
+from agents.conversation import (
+    USER_SPEAKER, AddressedPolicy, ConversationEngine, ModeratorPolicy, RoundRobinPolicy, Turn,
+    addressed_agent
+)
+from agents.frontend_dev import FrontendDeveloperAgent
+from agents.scrum_master import ScrumMasterAgent
+from main import main
+from utils.fake_ollama import FakeOllamaServer
+
+
+def echo_llm(vertraging=0.0, antwoorden=None):
+    """Mock-LLM die (na een vertraging) per aanroep een volgend antwoord geeft."""
+    llm = MagicMock()
+    antwoorden = list(antwoorden or [])
+
+    def generate_response(messages, **kwargs):
+        time.sleep(vertraging)
+        return antwoorden.pop(0) if antwoorden else f"antwoord {llm.generate_response.call_count}"
+
+    llm.generate_response.side_effect = generate_response
+    return llm
+
+
+def team(llm):
+    return [
+        ScrumMasterAgent(llm=llm),
+        FrontendDeveloperAgent(llm=llm),
+        BackendDeveloperAgent(llm=llm),
+    ]
+
+
+def beurt(speaker, content=""):
+    return Turn(0, speaker, "", content)
+
+
+def test_aanspreken_op_naam():
+    agents = team(MagicMock())
+    assert addressed_agent(agents, "@mark, wat vind jij?").name == "Mark"
+    assert addressed_agent(agents, "Sarah en Mark, graag jullie mening").name == "Sarah"
+    assert addressed_agent(agents, "Marktonderzoek") is None
+    assert addressed_agent(agents, "Zoals Erik zei", exclude="Erik") is None
+
+
+def test_round_robin_beleid():
+    agents = team(MagicMock())
+    beleid = RoundRobinPolicy()
+    assert beleid.next_speaker(agents, [beurt(USER_SPEAKER)]).name == "Erik"
+    assert beleid.next_speaker(agents, [beurt("Erik"), beurt(USER_SPEAKER)]).name == "Sarah"
+    assert beleid.next_speaker(agents, [beurt("Mark")]).name == "Erik"
+
+
+def test_aangesproken_beleid_valt_terug():
+    agents = team(MagicMock())
+    beleid = AddressedPolicy()
+    assert beleid.next_speaker(agents, [beurt(USER_SPEAKER, "@Mark hoe zit de API?")]).name == "Mark"
+    assert beleid.next_speaker(agents, [beurt("Erik", "Wie wil er iets zeggen?")]).name == "Sarah"
+    # Voorspellen kan alleen via het fallback-beleid
+    assert beleid.predict(agents, [beurt(USER_SPEAKER)], agents[0]).name == "Sarah"
+
+
+def test_moderator_beleid():
+    agents = team(MagicMock())
+    beleid = ModeratorPolicy()
+    assert beleid.next_speaker(agents, [beurt(USER_SPEAKER, "Hallo")]).name == "Erik"
+    assert beleid.next_speaker(agents, [beurt(USER_SPEAKER, "Mark, een vraag")]).name == "Mark"
+    assert beleid.next_speaker(agents, [beurt("Erik", "Mark, wat denk jij?")]).name == "Mark"
+    assert beleid.next_speaker(agents, [beurt("Erik", "Wat denken jullie?")]).name == "Sarah"
+    assert beleid.next_speaker(agents, [beurt("Erik"), beurt("Sarah"), beurt("Erik")]).name == "Mark"
+    assert beleid.next_speaker(agents, [beurt("Erik"), beurt("Mark")]).name == "Erik"
+
+
+def test_moderator_vereist_scrum_master():
+    agents = [FrontendDeveloperAgent(llm=MagicMock()), BackendDeveloperAgent(llm=MagicMock())]
+    with pytest.raises(ValueError):
+        ModeratorPolicy().next_speaker(agents, [beurt(USER_SPEAKER)])
+
+
+def test_agents_krijgen_beurten_van_anderen():
+    llm = echo_llm(antwoorden=["Welkom", "Formulier", "Endpoint", "Samenvatting"])
+    with ConversationEngine(team(llm), topic="login", session_id="g1") as engine:
+        beurten = list(engine.run("Hoe bouwen we het inlogscherm?", max_turns=4))
+
+    assert [b.speaker for b in beurten] == ["Erik", "Sarah", "Mark", "Erik"]
+    assert [b.content for b in beurten] == ["Welkom", "Formulier", "Endpoint", "Samenvatting"]
+
+    # Erik krijgt bij zijn tweede beurt alleen wat Sarah en Mark sindsdien zeiden
+    laatste_prompt = llm.generate_response.call_args_list[-1].args[0]
+    assert laatste_prompt[-1]["content"] == (
+        "Sarah (Frontend Developer): Formulier\n\nMark (Backend Developer): Endpoint"
+    )
+    # Elke agent heeft een eigen sessie met zijn eigen beurten
+    erik = engine.agents[0]
+    geschiedenis = erik.get_session_history(engine.session_for(erik))
+    assert [m["content"] for m in geschiedenis if m["role"] == "assistant"] == ["Welkom", "Samenvatting"]
+
+
+def test_pipelining_verandert_de_prompt_niet():
+    prompts = {}
+    for pipeline in (True, False):
+        llm = echo_llm()
+        with ConversationEngine(team(llm), session_id="g", pipeline=pipeline) as engine:
+            list(engine.run("Start", max_turns=5))
+        prompts[pipeline] = [c.args[0] for c in llm.generate_response.call_args_list]
+        if pipeline:
+            assert engine.stats == {"prepared": 4, "mispredicted": 0}
+            assert [b.prepared for b in engine.transcript[1:]] == [False, True, True, True, True]
+    assert prompts[True] == prompts[False]
+
+
+def test_voorbereiding_overlapt_met_genereren():
+    bezig = []
+    llm = MagicMock()
+
+    def generate_response(messages, **kwargs):
+        bezig.append(True)
+        time.sleep(0.1)
+        bezig.pop()
+        return "antwoord"
+
+    llm.generate_response.side_effect = generate_response
+    voorbereid = []
+    with ConversationEngine(team(llm), session_id="g") as engine:
+        origineel = engine._prepare
+
+        def prepare(agent):
+            # Wacht tot de LLM-aanroep van de huidige spreker loopt
+            while not bezig:
+                time.sleep(0.001)
+            voorbereid.append((agent.name, llm.generate_response.call_count))
+            return origineel(agent)
+
+        engine._prepare = prepare
+        list(engine.run("Start", max_turns=3))
+
+    # Elke voorbereiding viel binnen de aanroep van de vorige spreker
+    assert voorbereid == [("Sarah", 1), ("Mark", 2)]
+    assert engine.stats["prepared"] == 2
+
+
+def test_verkeerde_voorspelling_wordt_weggegooid():
+    llm = echo_llm(antwoorden=["Mark, jij eerst", "Backend", "Frontend"])
+    with ConversationEngine(team(llm), policy=AddressedPolicy(), session_id="g") as engine:
+        beurten = list(engine.run("Start", max_turns=3))
+
+    assert [b.speaker for b in beurten] == ["Erik", "Mark", "Erik"]
+    assert engine.stats["mispredicted"] == 1
+    assert not beurten[1].prepared
+
+
+def test_verouderde_voorbereiding_wordt_opnieuw_opgebouwd():
+    llm = echo_llm()
+    agent = BaseAgent(name="Basis", role="Test", goal="Test", backstory="", llm=llm)
+    voorbereid = agent.prepare_conversation("s1")
+    agent.add_to_session("s1", "user", "Tussendoor")
+    assert voorbereid.is_stale()
+
+    agent.generate_response("s1", "Vraag", prepared=voorbereid)
+    prompt = llm.generate_response.call_args.args[0]
+    assert [m["content"] for m in prompt[1:]] == ["Tussendoor", "Vraag"]
+
+
+def test_engine_vereist_unieke_namen():
+    with pytest.raises(ValueError):
+        ConversationEngine([ScrumMasterAgent(llm=MagicMock()), ScrumMasterAgent(llm=MagicMock())])
+
+
+def test_cli_met_nep_ollama(capsys):
+    with FakeOllamaServer(response_tokens=2) as server:
+        main(["Hallo team", "--turns", "2", "--base-url", server.url, "--policy", "round-robin"])
+
+    uitvoer = capsys.readouterr().out
+    assert "[Erik - Scrum Master]" in uitvoer
+    assert "[Sarah - Frontend Developer]" in uitvoer
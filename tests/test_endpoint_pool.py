@@ -0,0 +1,116 @@
+import os
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+# Voeg de root van het project toe aan het Python pad
+import sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils.endpoint_pool import EndpointPool
+
+
+class TestEndpointPool(unittest.TestCase):
+    def setUp(self):
+        self.pool = EndpointPool(["http://a:11434", "http://b:11434/"], failure_threshold=2, reset_timeout=60)
+        self.a, self.b = self.pool.endpoints
+
+    def test_lege_pool_is_ongeldig(self):
+        """Een pool zonder URL's kan niets routeren."""
+        with self.assertRaises(ValueError):
+            EndpointPool([])
+
+    def test_minste_lopende_aanroepen(self):
+        """Elke nieuwe aanroep gaat naar de minst drukke host."""
+        eerste = self.pool.choose("llama3")
+        tweede = self.pool.choose("llama3")
+        self.assertIsNot(eerste, tweede)
+        self.assertEqual(self.b.url, "http://b:11434")
+
+        self.pool.release(eerste, "llama3")
+        self.assertIs(self.pool.choose("llama3"), eerste)
+
+    def test_residentie_geeft_voorsprong(self):
+        """Een host met het model geladen wint, tot hij duidelijk drukker is."""
+        self.pool.update_residency(self.b, ["llama3:latest"])
+
+        gekozen = [self.pool.choose("llama3") for _ in range(3)]
+        self.assertEqual(gekozen, [self.b, self.b, self.a])
+        # Voor een ander model telt alleen de drukte
+        self.assertIs(self.pool.choose("openchat"), self.a)
+
+    def test_circuit_breaker(self):
+        """Na herhaalde fouten wordt een host overgeslagen tot de timeout verloopt."""
+        for _ in range(2):
+            self.pool.release(self.pool.choose(exclude=[self.b]), ok=False)
+
+        self.assertFalse(self.a.is_available())
+        self.assertEqual([self.pool.choose() for _ in range(3)], [self.b] * 3)
+
+        # Na de timeout krijgt de host weer een kans; succes sluit de breaker
+        self.a.open_until = time.monotonic() - 1
+        self.pool.release(self.pool.choose(exclude=[self.b]), ok=True)
+        self.assertEqual(self.a.failures, 0)
+        self.assertTrue(self.a.is_available())
+
+    def test_half_open_laat_een_proef_door(self):
+        """Na de timeout krijgt een herstellende host één aanroep, niet de hele golf."""
+        for _ in range(2):
+            self.pool.release(self.pool.choose(exclude=[self.b]), ok=False)
+        self.a.open_until = time.monotonic() - 1
+
+        with ThreadPoolExecutor(max_workers=5) as executor:
+            gekozen = list(executor.map(lambda _: self.pool.choose(), range(5)))
+        self.assertEqual(gekozen.count(self.a), 1)
+        self.assertEqual(gekozen.count(self.b), 4)
+        self.assertTrue(self.a.probing)
+
+        # Mislukte proef: de breaker gaat weer open
+        self.pool.release(self.a, ok=False)
+        self.assertFalse(self.a.is_available())
+        self.assertFalse(self.a.probing)
+
+        # Afgebroken proef telt niet: er mag direct een nieuwe proef
+        self.a.open_until = time.monotonic() - 1
+        self.assertIs(self.pool.choose(exclude=[self.b]), self.a)
+        self.pool.release(self.a, ok=None)
+        self.assertIs(self.pool.choose(exclude=[self.b]), self.a)
+
+    def test_alle_breakers_open(self):
+        """Staan alle breakers open, dan wordt niemand gekozen: de aanroep faalt direct."""
+        self.a.open_until = time.monotonic() + 10
+        self.b.open_until = time.monotonic() + 5
+        self.assertIsNone(self.pool.choose())
+        self.assertIsNone(self.pool.choose(exclude=[self.a, self.b]))
+
+    def test_een_host_krijgt_een_proef(self):
+        """Ook met één host laat een open breaker alleen de ene proefaanroep door."""
+        pool = EndpointPool(["http://a:11434"], failure_threshold=1, reset_timeout=60)
+        pool.release(pool.choose(), ok=False)
+        self.assertIsNone(pool.choose())
+
+        pool.endpoints[0].open_until = time.monotonic() - 1
+        with ThreadPoolExecutor(max_workers=5) as executor:
+            gekozen = list(executor.map(lambda _: pool.choose(), range(5)))
+        self.assertEqual(gekozen.count(None), 4)
+        self.assertTrue(pool.endpoints[0].probing)
+
+    def test_afgebroken_aanroep_telt_niet_mee(self):
+        """Een geannuleerde hedge verandert de gezondheid niet."""
+        endpoint = self.pool.choose()
+        self.pool.release(endpoint, "llama3", ok=None)
+        self.assertEqual(endpoint.outstanding, 0)
+        self.assertEqual(endpoint.failures, 0)
+        self.assertEqual(endpoint.resident, set())
+
+    def test_stats(self):
+        """De momentopname bevat per host de routeringstoestand."""
+        self.pool.release(self.pool.choose("llama3"), "llama3", elapsed=0.5)
+        stats = self.pool.stats()
+        self.assertEqual(stats[0]["requests"], 1)
+        self.assertEqual(stats[0]["latency"], 0.5)
+        self.assertEqual(stats[0]["resident"], ["llama3:latest"])
+
+
+if __name__ == "__main__":
+    unittest.main()
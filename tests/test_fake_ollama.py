@@ -0,0 +1,140 @@
+import asyncio
+import time
+import pytest
+import requests
+from benchmarks.bench_agents import percentile, run_benchmarks
+from utils.errors import LLMConnectionError
+from utils.fake_ollama import FakeOllamaServer
+from utils.ollama_client import OllamaClient
+from utils.retry import RetryPolicy
+
+VRAAG = [{"role": "user", "content": "Hallo daar"}]
+
+
+@pytest.fixture
+def nep_ollama():
+    with FakeOllamaServer(response_tokens=4) as server:
+        yield server
+
+
+def test_niet_streamend_antwoord(nep_ollama):
+    llm = OllamaClient(model="nep", base_url=nep_ollama.url)
+    assert llm.generate_response(VRAAG) == "Hallo daar Hallo daar "
+    assert nep_ollama.received[0]["stream"] is False
+    llm.close()
+
+
+def test_streamend_antwoord(nep_ollama):
+    llm = OllamaClient(model="nep", base_url=nep_ollama.url)
+    assert list(llm.stream_response(VRAAG)) == ["Hallo ", "daar ", "Hallo ", "daar "]
+    llm.close()
+
+
+def test_asynchroon_antwoord(nep_ollama):
+    async def scenario():
+        async with OllamaClient(model="nep", base_url=nep_ollama.url) as llm:
+            return await llm.agenerate_response(VRAAG)
+
+    assert asyncio.run(scenario()) == "Hallo daar Hallo daar "
+
+
+def test_duurvelden_in_laatste_chunk(nep_ollama):
+    data = requests.post(
+        f"{nep_ollama.url}/api/chat",
+        json={"model": "nep", "messages": VRAAG, "stream": False}
+    ).json()
+    assert data["done"] is True
+    assert data["eval_count"] == 4
+    assert data["prompt_eval_count"] == 2
+    for veld in ("total_duration", "load_duration", "prompt_eval_duration", "eval_duration"):
+        assert isinstance(data[veld], int)
+
+
+def test_latency_en_tokens_per_seconde():
+    with FakeOllamaServer(latency=0.05, tokens_per_second=100, response_tokens=5) as server:
+        llm = OllamaClient(model="nep", base_url=server.url)
+        start = time.perf_counter()
+        llm.generate_response(VRAAG)
+        # 0.05 s tot het eerste token + 5 tokens van 0.01 s
+        assert time.perf_counter() - start >= 0.1
+        llm.close()
+
+
+def test_foutinjectie_wordt_getypeerde_fout():
+    with FakeOllamaServer(failure_rate=1.0, failure_status=503) as server:
+        llm = OllamaClient(
+            model="nep",
+            base_url=server.url,
+            retry=RetryPolicy(max_attempts=2, base_delay=0.0)
+        )
+        with pytest.raises(LLMConnectionError) as info:
+            llm.generate_response(VRAAG)
+        assert info.value.status == 503
+        assert server.requests == 2
+        assert server.failures == 2
+        llm.close()
+
+
+def test_afgebroken_stream():
+    with FakeOllamaServer(stream_failure_rate=1.0, response_tokens=4) as server:
+        llm = OllamaClient(model="nep", base_url=server.url)
+        ontvangen = []
+        with pytest.raises(LLMConnectionError):
+            for delta in llm.stream_response(VRAAG):
+                ontvangen.append(delta)
+        assert ontvangen == ["Hallo "]
+        llm.close()
+
+
+def test_warm_up_en_residentie():
+    with FakeOllamaServer(load_latency=0.3) as server:
+        llm = OllamaClient(model="nep", base_url=server.url)
+        assert not llm.is_resident()
+
+        assert llm.warm_up() is True
+        assert server.loaded_models() == ["nep:latest"]
+        assert llm.is_resident()
+
+        # Een geladen model kost geen laadtijd meer
+        start = time.perf_counter()
+        llm.generate_response(VRAAG)
+        assert time.perf_counter() - start < 0.3
+
+        assert llm.unload() is True
+        assert not llm.is_resident()
+        llm.close()
+
+
+def test_ongeldige_configuratie():
+    with pytest.raises(ValueError):
+        FakeOllamaServer(failure_rate=1.5)
+    with pytest.raises(ValueError):
+        FakeOllamaServer(tokens_per_second=0)
+
+
+def test_percentiel():
+    waarden = list(range(1, 101))
+    assert percentile(waarden, 0.5) == 50
+    assert percentile(waarden, 0.99) == 99
+    assert percentile([], 0.5) == 0.0
+
+
+def test_benchmark_meet_alle_doelen():
+    resultaten = run_benchmarks(
+        targets=["generate", "backend", "frontend", "scrum"],
+        concurrency_levels=[1, 4],
+        requests=8,
+        sessions=2,
+        server_options={"response_tokens": 4}
+    )
+    assert [(r["target"], r["concurrency"]) for r in resultaten] == [
+        ("generate", 1), ("generate", 4),
+        ("backend", 1), ("backend", 4),
+        ("frontend", 1), ("frontend", 4),
+        ("scrum", 1), ("scrum", 4),
+    ]
+    for r in resultaten:
+        assert r["errors"] == 0
+        assert r["throughput"] > 0
+        assert r["p50_ms"] <= r["p99_ms"]
+        assert r["peak_kb"] > 0
@@ -0,0 +1,189 @@
+import asyncio
+import json
+import os
+import unittest
+
+# Voeg de root van het project toe aan het Python pad
+import sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from agents.base_agent import BaseAgent
+from agents.frontend_dev import FrontendDeveloperAgent
+from utils.errors import LLMConnectionError
+from utils.fake_ollama import FakeOllamaServer
+from utils.metrics import CallMetrics, MetricsRegistry, agent_scope, current_agent
+from utils.ollama_client import OllamaClient
+from utils.retry import RetryPolicy
+
+VRAAG = [{"role": "user", "content": "Hallo daar"}]
+
+OLLAMA_ANTWOORD = {
+    "message": {"role": "assistant", "content": "Hoi"},
+    "done": True,
+    "total_duration": 2_000_000_000,
+    "load_duration": 500_000_000,
+    "prompt_eval_count": 20,
+    "prompt_eval_duration": 250_000_000,
+    "eval_count": 40,
+    "eval_duration": 1_000_000_000,
+}
+
+
+class TestCallMetrics(unittest.TestCase):
+    def test_duurvelden_in_seconden(self):
+        """Nanoseconden van Ollama worden seconden, met afgeleide snelheden."""
+        m = CallMetrics.from_response(OLLAMA_ANTWOORD, model="llama3", wall_time=2.1)
+        self.assertEqual(m.load_duration, 0.5)
+        self.assertEqual(m.prompt_eval_duration, 0.25)
+        self.assertEqual(m.eval_duration, 1.0)
+        self.assertEqual(m.total_duration, 2.0)
+        self.assertEqual(m.prompt_tokens_per_second, 80.0)
+        self.assertEqual(m.eval_tokens_per_second, 40.0)
+        self.assertEqual(m.to_dict()["eval_count"], 40)
+
+    def test_zonder_antwoord(self):
+        """Een mislukte aanroep heeft geen duurvelden."""
+        m = CallMetrics.from_response(None, model="llama3", ok=False, wall_time=0.1)
+        self.assertIsNone(m.eval_duration)
+        self.assertIsNone(m.eval_tokens_per_second)
+
+    def test_agent_scope_herstelt(self):
+        """agent_scope zet de agent en herstelt de vorige waarde."""
+        with agent_scope("Sarah"):
+            with agent_scope("Mark"):
+                self.assertEqual(current_agent.get(), "Mark")
+            self.assertEqual(current_agent.get(), "Sarah")
+        self.assertEqual(current_agent.get(), "")
+
+
+class TestMetricsRegistry(unittest.TestCase):
+    def setUp(self):
+        self.registry = MetricsRegistry(history=2)
+        for agent in ("Sarah", "Sarah", "Mark"):
+            self.registry.record(CallMetrics.from_response(
+                OLLAMA_ANTWOORD, model="llama3", agent=agent, wall_time=2.0
+            ))
+        self.registry.record(CallMetrics("llama3", agent="Mark", ok=False, wall_time=0.2))
+
+    def test_per_model_en_agent(self):
+        """Aanroepen worden per model/agent, per model en per agent opgeteld."""
+        snapshot = {row["agent"]: row for row in self.registry.snapshot()}
+        self.assertEqual(snapshot["Sarah"]["calls"], 2)
+        self.assertEqual(snapshot["Sarah"]["eval_tokens"], 80)
+        self.assertEqual(snapshot["Sarah"]["eval_duration_avg"], 1.0)
+        self.assertEqual(snapshot["Mark"]["errors"], 1)
+        # Het gemiddelde telt alleen geslaagde aanroepen mee
+        self.assertEqual(snapshot["Mark"]["load_duration_avg"], 0.5)
+
+        self.assertEqual(self.registry.by_model()["llama3"]["calls"], 4)
+        self.assertEqual(self.registry.by_model()["llama3"]["eval_tokens_per_second"], 40.0)
+        self.assertEqual(self.registry.by_agent()["Mark"]["calls"], 2)
+
+    def test_recente_metingen_begrensd(self):
+        """Alleen de laatste history metingen blijven bewaard."""
+        recent = self.registry.recent()
+        self.assertEqual(len(recent), 2)
+        self.assertFalse(recent[-1].ok)
+
+    def test_json_export(self):
+        """De JSON-export bevat alle drie de aggregaties."""
+        data = json.loads(self.registry.to_json())
+        self.assertEqual(set(data), {"calls", "models", "agents"})
+        self.assertEqual(data["models"]["llama3"]["errors"], 1)
+
+    def test_prometheus_export(self):
+        """De tekstexport volgt het Prometheus-formaat."""
+        tekst = self.registry.to_prometheus()
+        self.assertIn('llm_calls_total{model="llama3",agent="Sarah",status="ok"} 2', tekst)
+        self.assertIn('llm_calls_total{model="llama3",agent="Mark",status="error"} 1', tekst)
+        self.assertIn('llm_eval_tokens_total{model="llama3",agent="Sarah"} 80', tekst)
+        self.assertIn('llm_wall_seconds_bucket{model="llama3",agent="Sarah",le="2.5"} 2', tekst)
+        self.assertIn('llm_wall_seconds_bucket{model="llama3",agent="Mark",le="0.25"} 1', tekst)
+        self.assertIn('llm_wall_seconds_count{model="llama3",agent="Mark"} 2', tekst)
+        self.assertIn("# TYPE llm_ttft_seconds histogram", tekst)
+
+    def test_label_escaping(self):
+        """Aanhalingstekens in labels worden ge-escapet."""
+        registry = MetricsRegistry()
+        registry.record(CallMetrics('a"b', wall_time=0.1))
+        self.assertIn('model="a\\"b"', registry.to_prometheus())
+
+    def test_abonnee(self):
+        """Abonnees krijgen elke meting; een fout in een abonnee breekt niets."""
+        ontvangen = []
+        self.registry.subscribe(ontvangen.append)
+        self.registry.subscribe(lambda m: 1 / 0)
+        self.registry.record(CallMetrics("llama3", wall_time=0.1))
+        self.assertEqual(len(ontvangen), 1)
+
+
+class TestClientMetingen(unittest.TestCase):
+    def setUp(self):
+        self.server = FakeOllamaServer(latency=0.02, response_tokens=4).start()
+        self.metrics = MetricsRegistry()
+        self.llm = OllamaClient(model="nep", base_url=self.server.url, metrics=self.metrics)
+
+    def tearDown(self):
+        self.llm.close()
+        self.server.stop()
+
+    def test_niet_streamend(self):
+        """Een gewone aanroep legt de duurvelden van Ollama en de wandkloktijd vast."""
+        self.llm.generate_response(VRAAG)
+        [m] = self.metrics.recent()
+        self.assertTrue(m.ok)
+        self.assertFalse(m.stream)
+        self.assertEqual(m.model, "nep")
+        self.assertEqual(m.endpoint, self.server.url)
+        self.assertEqual(m.eval_count, 4)
+        self.assertGreaterEqual(m.prompt_eval_duration, 0.02)
+        self.assertGreaterEqual(m.wall_time, m.total_duration)
+        self.assertIsNone(m.ttft)
+
+    def test_streamend_met_ttft(self):
+        """Bij streaming komt ook de time-to-first-token mee."""
+        list(self.llm.stream_response(VRAAG))
+        [m] = self.metrics.recent()
+        self.assertTrue(m.stream)
+        self.assertEqual(m.eval_count, 4)
+        self.assertGreaterEqual(m.ttft, 0.02)
+        self.assertLessEqual(m.ttft, m.wall_time)
+
+    def test_asynchroon(self):
+        """De asynchrone paden leggen dezelfde metingen vast."""
+        async def scenario():
+            await self.llm.agenerate_response(VRAAG)
+            async for _ in self.llm.astream_response([{"role": "user", "content": "Anders"}]):
+                pass
+            await self.llm.aclose()
+
+        asyncio.run(scenario())
+        niet_streamend, streamend = self.metrics.recent()
+        self.assertFalse(niet_streamend.stream)
+        self.assertEqual(niet_streamend.eval_count, 4)
+        self.assertTrue(streamend.stream)
+        self.assertIsNotNone(streamend.ttft)
+
+    def test_mislukte_pogingen_tellen_mee(self):
+        """Elke mislukte HTTP-poging wordt als fout geregistreerd."""
+        self.server.failure_rate = 1.0
+        self.llm.retry = RetryPolicy(max_attempts=2, base_delay=0.0)
+        with self.assertRaises(LLMConnectionError):
+            self.llm.generate_response(VRAAG)
+        self.assertEqual(self.metrics.by_model()["nep"]["errors"], 2)
+
+    def test_toegeschreven_aan_agent(self):
+        """Aanroepen via een agent krijgen de naam van die agent als label."""
+        frontend = FrontendDeveloperAgent(llm=self.llm)
+        frontend.respond([{"role": "user", "content": "Hoe maak ik een formulier?"}], session_id="s1")
+        basis = BaseAgent(name="Basis", role="Test", goal="Test", backstory="", llm=self.llm)
+        list(basis.stream_response("s2", "Stroom"))
+
+        per_agent = self.metrics.by_agent()
+        self.assertEqual(per_agent["Sarah"]["calls"], 1)
+        self.assertEqual(per_agent["Basis"]["calls"], 1)
+        self.assertEqual(current_agent.get(), "")
+
+
+if __name__ == "__main__":
+    unittest.main()
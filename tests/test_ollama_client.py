@@ -0,0 +1,539 @@
+import asyncio
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+from aiohttp import web
+from utils.endpoint_pool import EndpointPool
+from utils.errors import DeadlineExceededError, LLMConnectionError, LLMResponseError
+from utils.ollama_client import OllamaClient
+from utils.response_cache import ResponseCache
+from utils.retry import RetryPolicy
+
+
+async def _start_server(handler):
+    """Start een lokale /api/chat server en geef (runner, base_url) terug."""
+    app = web.Application()
+    app.router.add_post("/api/chat", handler)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    return runner, f"http://127.0.0.1:{port}"
+
+
+STREAM_CHUNKS = [
+    {"message": {"role": "assistant", "content": "Hal"}, "done": False},
+    {"message": {"role": "assistant", "content": "lo"}, "done": False},
+    {"message": {"role": "assistant", "content": ""}, "done": True},
+]
+
+
+@pytest.fixture
+def sync_server():
+    """Lokale /api/chat server voor de synchrone client (stream en niet-stream)."""
+    ontvangen = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            payload = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+            ontvangen.append(payload)
+            self.send_response(200)
+            self.send_header("Content-Type", "application/x-ndjson")
+            self.end_headers()
+            if payload.get("stream"):
+                for chunk in STREAM_CHUNKS:
+                    self.wfile.write(json.dumps(chunk).encode() + b"\n")
+                    self.wfile.flush()
+            else:
+                self.wfile.write(json.dumps({"message": {"content": "Hallo"}, "done": True}).encode())
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}", ontvangen
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def ollama_beheer():
+    """Lokale server die model laden (lege /api/chat) en /api/ps nabootst."""
+    geladen = {}
+
+    class Handler(BaseHTTPRequestHandler):
+        def _json(self, data):
+            body = json.dumps(data).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_POST(self):
+            payload = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+            if payload.get("keep_alive") == 0:
+                geladen.pop(payload["model"], None)
+            else:
+                geladen[payload["model"]] = payload.get("keep_alive")
+            self._json({"model": payload["model"], "done": True, "done_reason": "load"})
+
+        def do_GET(self):
+            self._json({"models": [{"name": naam, "model": naam} for naam in geladen]})
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}", geladen
+    server.shutdown()
+    server.server_close()
+
+
+def test_keep_alive_wordt_meegestuurd(sync_server):
+    base_url, ontvangen = sync_server
+    llm = OllamaClient(base_url=base_url, keep_alive="30m")
+
+    llm.generate_response([{"role": "user", "content": "Hoi"}])
+    list(llm.stream_response([{"role": "user", "content": "Hoi"}]))
+
+    assert [payload["keep_alive"] for payload in ontvangen] == ["30m", "30m"]
+    assert "keep_alive" not in OllamaClient()._build_payload([], 0.7, 10, {})
+
+
+def test_warm_up_en_residentie(ollama_beheer):
+    base_url, geladen = ollama_beheer
+    llm = OllamaClient(model="llama3", base_url=base_url, keep_alive=-1)
+
+    assert not llm.is_resident()
+    assert llm.warm_up()
+    assert geladen == {"llama3": -1}
+    # Een naam zonder tag is gelijk aan ":latest"
+    assert llm.is_resident()
+    assert llm.is_resident("llama3:latest")
+    assert not llm.is_resident("openchat")
+
+    assert llm.unload()
+    assert not llm.is_resident()
+
+
+def test_awarm_up_laadt_model(ollama_beheer):
+    base_url, geladen = ollama_beheer
+
+    async def scenario():
+        async with OllamaClient(model="openchat:latest", base_url=base_url) as llm:
+            return await llm.awarm_up(keep_alive="1h")
+
+    assert asyncio.run(scenario())
+    assert geladen == {"openchat:latest": "1h"}
+
+
+def test_warm_up_onbereikbare_server():
+    llm = OllamaClient(base_url="http://127.0.0.1:9")
+
+    assert llm.warm_up() is False
+    assert llm.running_models() == []
+    assert llm.is_resident() is False
+
+
+def test_generate_response_vraagt_geen_stream_aan(sync_server):
+    base_url, ontvangen = sync_server
+    llm = OllamaClient(base_url=base_url)
+
+    assert llm.generate_response([{"role": "user", "content": "Hoi"}]) == "Hallo"
+    assert ontvangen[0]["stream"] is False
+    assert "stream" not in ontvangen[0]["options"]
+
+
+def test_stream_response_geeft_fragmenten_door(sync_server):
+    base_url, ontvangen = sync_server
+    llm = OllamaClient(base_url=base_url)
+
+    fragmenten = list(llm.stream_response([{"role": "user", "content": "Hoi"}]))
+
+    assert fragmenten == ["Hal", "lo"]
+    assert ontvangen[0]["stream"] is True
+
+
+def test_generate_response_gebruikt_cache(sync_server):
+    base_url, ontvangen = sync_server
+    cache = ResponseCache()
+    llm = OllamaClient(base_url=base_url, cache=cache)
+    vraag = [{"role": "user", "content": "Hoi"}]
+
+    assert llm.generate_response(vraag, temperature=0.0) == "Hallo"
+    assert llm.generate_response(vraag, temperature=0.0) == "Hallo"
+    assert len(ontvangen) == 1
+
+    # Niet-deterministische temperature (standaard) en expliciete bypass gaan naar Ollama
+    llm.generate_response(vraag)
+    llm.generate_response(vraag)
+    llm.generate_response(vraag, temperature=0.0, use_cache=False)
+    assert len(ontvangen) == 4
+    assert cache.stats()["hits"] == 1
+
+    # use_cache=True cachet ook een gesampled antwoord
+    llm.generate_response(vraag, use_cache=True)
+    llm.generate_response(vraag, use_cache=True)
+    assert len(ontvangen) == 5
+
+
+def test_stream_response_vult_cache(sync_server):
+    base_url, ontvangen = sync_server
+    llm = OllamaClient(base_url=base_url, cache=ResponseCache())
+    vraag = [{"role": "user", "content": "Hoi"}]
+
+    assert list(llm.stream_response(vraag, temperature=0.0)) == ["Hal", "lo"]
+    assert list(llm.stream_response(vraag, temperature=0.0)) == ["Hallo"]
+    assert len(ontvangen) == 1
+
+
+def test_astream_response_geeft_fragmenten_door():
+    async def handler(request):
+        response = web.StreamResponse(headers={"Content-Type": "application/x-ndjson"})
+        await response.prepare(request)
+        for chunk in STREAM_CHUNKS:
+            await response.write(json.dumps(chunk).encode() + b"\n")
+        await response.write_eof()
+        return response
+
+    async def scenario():
+        runner, base_url = await _start_server(handler)
+        try:
+            async with OllamaClient(base_url=base_url) as llm:
+                return [delta async for delta in llm.astream_response([{"role": "user", "content": "Hoi"}])]
+        finally:
+            await runner.cleanup()
+
+    assert asyncio.run(scenario()) == ["Hal", "lo"]
+
+
+def test_agenerate_response_stuurt_niet_streaming_payload():
+    ontvangen = []
+
+    async def handler(request):
+        ontvangen.append(await request.json())
+        return web.json_response({"message": {"role": "assistant", "content": "Hallo!"}})
+
+    async def scenario():
+        runner, base_url = await _start_server(handler)
+        try:
+            async with OllamaClient(model="testmodel", base_url=base_url) as llm:
+                return await llm.agenerate_response([{"role": "user", "content": "Hoi"}])
+        finally:
+            await runner.cleanup()
+
+    antwoord = asyncio.run(scenario())
+
+    assert antwoord == "Hallo!"
+    assert ontvangen[0]["model"] == "testmodel"
+    assert ontvangen[0]["stream"] is False
+    assert ontvangen[0]["messages"] == [{"role": "user", "content": "Hoi"}]
+
+
+def test_agenerate_response_houdt_meerdere_verzoeken_tegelijk_open():
+    actief = {"nu": 0, "max": 0}
+
+    async def handler(request):
+        actief["nu"] += 1
+        actief["max"] = max(actief["max"], actief["nu"])
+        await asyncio.sleep(0.05)
+        actief["nu"] -= 1
+        return web.json_response({"message": {"content": "ok"}})
+
+    async def scenario():
+        runner, base_url = await _start_server(handler)
+        try:
+            async with OllamaClient(base_url=base_url, pool_size=8) as llm:
+                return await asyncio.gather(*(
+                    llm.agenerate_response([{"role": "user", "content": str(i)}])
+                    for i in range(8)
+                ))
+        finally:
+            await runner.cleanup()
+
+    antwoorden = asyncio.run(scenario())
+
+    assert antwoorden == ["ok"] * 8
+    assert actief["max"] > 1
+
+
+def test_identieke_gelijktijdige_verzoeken_worden_samengevoegd():
+    aanroepen = []
+
+    async def handler(request):
+        aanroepen.append(await request.json())
+        await asyncio.sleep(0.05)
+        return web.json_response({"message": {"content": "ok"}})
+
+    async def scenario(coalesce):
+        runner, base_url = await _start_server(handler)
+        try:
+            async with OllamaClient(base_url=base_url, coalesce=coalesce) as llm:
+                vraag = [{"role": "user", "content": "Zelfde vraag"}]
+                return await asyncio.gather(*(llm.agenerate_response(vraag) for _ in range(5)))
+        finally:
+            await runner.cleanup()
+
+    assert asyncio.run(scenario(True)) == ["ok"] * 5
+    assert len(aanroepen) == 1
+
+    aanroepen.clear()
+    asyncio.run(scenario(False))
+    assert len(aanroepen) == 5
+
+
+def test_cache_omzeilen_slaat_ook_samenvoegen_over():
+    """Wie om een verse generatie vraagt, deelt geen lopende aanroep met anderen."""
+    aanroepen = []
+
+    async def handler(request):
+        aanroepen.append(await request.json())
+        await asyncio.sleep(0.05)
+        return web.json_response({"message": {"content": "ok"}})
+
+    async def scenario(cache, **kwargs):
+        runner, base_url = await _start_server(handler)
+        try:
+            async with OllamaClient(base_url=base_url, cache=cache) as llm:
+                vraag = [{"role": "user", "content": "Zelfde vraag"}]
+                await asyncio.gather(*(llm.agenerate_response(vraag, **kwargs) for _ in range(3)))
+        finally:
+            await runner.cleanup()
+
+    for cache, kwargs in (
+        (None, {"use_cache": False}),
+        (ResponseCache(max_temperature=0.0), {"temperature": 0.7}),
+        (ResponseCache(max_temperature=0.0), {"temperature": 0.0, "use_cache": False}),
+    ):
+        aanroepen.clear()
+        asyncio.run(scenario(cache, **kwargs))
+        assert len(aanroepen) == 3
+
+    aanroepen.clear()
+    asyncio.run(scenario(ResponseCache(max_temperature=0.0), temperature=0.0))
+    assert len(aanroepen) == 1
+
+
+def test_gelijktijdige_streams_delen_een_generatie(sync_server):
+    base_url, ontvangen = sync_server
+    llm = OllamaClient(base_url=base_url)
+    vraag = [{"role": "user", "content": "Hoi"}]
+
+    eerste = llm.stream_response(vraag)
+    assert next(eerste) == "Hal"
+    tweede = llm.stream_response(vraag)
+
+    assert list(tweede) == ["Hal", "lo"]
+    assert list(eerste) == ["lo"]
+    assert len(ontvangen) == 1
+
+
+def test_failover_naar_gezonde_host(sync_server):
+    base_url, ontvangen = sync_server
+    pool = EndpointPool(["http://127.0.0.1:9", base_url], failure_threshold=1)
+    llm = OllamaClient(endpoints=pool, coalesce=False)
+    dood, gezond = pool.endpoints
+
+    assert list(llm.stream_response([{"role": "user", "content": "Hoi"}])) == ["Hal", "lo"]
+    # De eerste fout opent de breaker van de dode host; daarna wordt hij overgeslagen
+    assert not dood.is_available()
+
+    for _ in range(3):
+        assert llm.generate_response([{"role": "user", "content": "Hoi"}]) == "Hallo"
+
+    assert dood.failures == 1
+    assert len(ontvangen) == 4
+    assert dood.outstanding == gezond.outstanding == 0
+
+
+def test_open_breakers_geven_direct_een_verbindingsfout(sync_server):
+    """Staan alle breakers open, dan volgt meteen een LLMConnectionError zonder verzoek."""
+    base_url, ontvangen = sync_server
+    pool = EndpointPool([base_url], failure_threshold=1, reset_timeout=60)
+    pool.endpoints[0].failures = 1
+    pool.endpoints[0].open_until = time.monotonic() + 60
+    vraag = [{"role": "user", "content": "Hoi"}]
+
+    for hedge_after in (None, 0.5):
+        llm = OllamaClient(endpoints=pool, hedge_after=hedge_after, retry=RetryPolicy(max_attempts=1))
+        with pytest.raises(LLMConnectionError, match="Geen beschikbare host"):
+            llm.generate_response(vraag)
+        with pytest.raises(LLMConnectionError, match="Geen beschikbare host"):
+            asyncio.run(llm.agenerate_response(vraag))
+        llm.close()
+    assert ontvangen == []
+
+
+def test_base_url_uit_kommagescheiden_omgevingsvariabele(monkeypatch):
+    monkeypatch.setenv("OLLAMA_BASE_URL", "http://a:11434, http://b:11434")
+    llm = OllamaClient()
+
+    assert [e.url for e in llm.endpoints] == ["http://a:11434", "http://b:11434"]
+    assert llm.base_url == "http://a:11434"
+
+
+def test_hedge_naar_tweede_host_bij_trage_aanroep():
+    async def traag(request):
+        await asyncio.sleep(1.0)
+        return web.json_response({"message": {"content": "traag"}})
+
+    async def snel(request):
+        return web.json_response({"message": {"content": "snel"}})
+
+    async def scenario():
+        traag_runner, traag_url = await _start_server(traag)
+        snel_runner, snel_url = await _start_server(snel)
+        try:
+            async with OllamaClient(base_url=[traag_url, snel_url], hedge_after=0.05) as llm:
+                start = asyncio.get_running_loop().time()
+                antwoord = await llm.agenerate_response([{"role": "user", "content": "Hoi"}])
+                duur = asyncio.get_running_loop().time() - start
+                stats = llm.endpoints.stats()
+            return antwoord, duur, stats
+        finally:
+            await traag_runner.cleanup()
+            await snel_runner.cleanup()
+
+    antwoord, duur, stats = asyncio.run(scenario())
+
+    assert antwoord == "snel"
+    assert duur < 0.5
+    # De geannuleerde aanroep telt niet als fout
+    assert [s["errors"] for s in stats] == [0, 0]
+    assert [s["outstanding"] for s in stats] == [0, 0]
+
+
+def test_agenerate_response_gooit_getypeerde_fout_na_herhaalde_serverfout():
+    aanroepen = []
+
+    async def handler(request):
+        aanroepen.append(1)
+        return web.Response(status=500, text="kapot")
+
+    async def scenario():
+        runner, base_url = await _start_server(handler)
+        try:
+            retry = RetryPolicy(max_attempts=3, base_delay=0.01)
+            async with OllamaClient(base_url=base_url, retry=retry) as llm:
+                return await llm.agenerate_response([{"role": "user", "content": "Hoi"}])
+        finally:
+            await runner.cleanup()
+
+    with pytest.raises(LLMConnectionError) as excinfo:
+        asyncio.run(scenario())
+    assert excinfo.value.status == 500
+    assert len(aanroepen) == 3
+
+
+def test_agenerate_response_herstelt_na_tijdelijke_fout():
+    aanroepen = []
+
+    async def handler(request):
+        aanroepen.append(1)
+        if len(aanroepen) < 3:
+            return web.Response(status=503, text="bezet")
+        return web.json_response({"message": {"content": "ok"}})
+
+    async def scenario():
+        runner, base_url = await _start_server(handler)
+        try:
+            async with OllamaClient(base_url=base_url, retry=RetryPolicy(base_delay=0.01)) as llm:
+                return await llm.agenerate_response([{"role": "user", "content": "Hoi"}])
+        finally:
+            await runner.cleanup()
+
+    assert asyncio.run(scenario()) == "ok"
+    assert len(aanroepen) == 3
+
+
+def test_agenerate_response_deadline():
+    async def handler(request):
+        await asyncio.sleep(1.0)
+        return web.json_response({"message": {"content": "te laat"}})
+
+    async def scenario():
+        runner, base_url = await _start_server(handler)
+        try:
+            async with OllamaClient(base_url=base_url) as llm:
+                start = asyncio.get_running_loop().time()
+                with pytest.raises(DeadlineExceededError):
+                    await llm.agenerate_response([{"role": "user", "content": "Hoi"}], deadline=0.1)
+                return asyncio.get_running_loop().time() - start
+        finally:
+            await runner.cleanup()
+
+    assert asyncio.run(scenario()) < 0.5
+
+
+@pytest.fixture
+def status_server():
+    """Lokale server die een vaste reeks statuscodes teruggeeft (daarna 200)."""
+    statussen = []
+    ontvangen = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            payload = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+            ontvangen.append(payload)
+            status = statussen.pop(0) if statussen else 200
+            body = json.dumps({"message": {"content": "Hallo"}} if status == 200 else {"error": "fout"}).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}", statussen, ontvangen
+    server.shutdown()
+    server.server_close()
+
+
+def test_generate_response_probeert_tijdelijke_fouten_opnieuw(status_server):
+    base_url, statussen, ontvangen = status_server
+    statussen.extend([503, 429])
+    llm = OllamaClient(base_url=base_url, retry=RetryPolicy(base_delay=0.01))
+
+    assert llm.generate_response([{"role": "user", "content": "Hoi"}]) == "Hallo"
+    assert len(ontvangen) == 3
+
+
+def test_generate_response_herhaalt_geen_clientfout(status_server):
+    base_url, statussen, ontvangen = status_server
+    statussen.append(404)
+    llm = OllamaClient(base_url=base_url, retry=RetryPolicy(base_delay=0.01))
+
+    with pytest.raises(LLMResponseError) as excinfo:
+        llm.generate_response([{"role": "user", "content": "Hoi"}])
+    assert excinfo.value.status == 404
+    assert not excinfo.value.transient
+    assert len(ontvangen) == 1
+
+
+def test_stream_response_gooit_fout_bij_onbereikbare_server():
+    llm = OllamaClient(base_url="http://127.0.0.1:9", retry=RetryPolicy(max_attempts=2, base_delay=0.01))
+
+    with pytest.raises(LLMConnectionError):
+        list(llm.stream_response([{"role": "user", "content": "Hoi"}]))
+
+
+def test_generate_response_stopt_bij_verstreken_deadline():
+    llm = OllamaClient(base_url="http://127.0.0.1:9", retry=RetryPolicy(max_attempts=10, base_delay=1.0, jitter=False))
+
+    start = time.monotonic()
+    with pytest.raises(DeadlineExceededError):
+        llm.generate_response([{"role": "user", "content": "Hoi"}], deadline=0.2)
+    assert time.monotonic() - start < 0.5
@@ -0,0 +1,87 @@
+import os
+import tempfile
+import time
+import unittest
+
+# Voeg de root van het project toe aan het Python pad
+import sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils.response_cache import ResponseCache, make_cache_key
+
+
+class TestMakeCacheKey(unittest.TestCase):
+    def test_tijdstempels_tellen_niet_mee(self):
+        """Metadata naast rol en inhoud mag de sleutel niet veranderen."""
+        a = [{"role": "user", "content": "Hoi", "timestamp": "2025-01-01T10:00:00"}]
+        b = [{"role": "user", "content": "Hoi", "timestamp": "2025-06-01T12:00:00"}]
+        self.assertEqual(
+            make_cache_key("llama3", a, {"temperature": 0}),
+            make_cache_key("llama3", b, {"temperature": 0})
+        )
+
+    def test_model_en_opties_tellen_mee(self):
+        messages = [{"role": "user", "content": "Hoi"}]
+        basis = make_cache_key("llama3", messages, {"temperature": 0})
+        self.assertNotEqual(basis, make_cache_key("openchat", messages, {"temperature": 0}))
+        self.assertNotEqual(basis, make_cache_key("llama3", messages, {"temperature": 0.5}))
+
+
+class TestResponseCache(unittest.TestCase):
+    def test_hit_en_miss_tellers(self):
+        cache = ResponseCache()
+        self.assertIsNone(cache.get("a"))
+        cache.set("a", "antwoord")
+        self.assertEqual(cache.get("a"), "antwoord")
+
+        stats = cache.stats()
+        self.assertEqual(stats["hits"], 1)
+        self.assertEqual(stats["misses"], 1)
+        self.assertEqual(stats["hit_rate"], 0.5)
+
+    def test_lru_verwijdering(self):
+        cache = ResponseCache(max_entries=2)
+        cache.set("a", "1")
+        cache.set("b", "2")
+        cache.get("a")  # a is nu recenter gebruikt dan b
+        cache.set("c", "3")
+
+        self.assertEqual(len(cache), 2)
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("a"), "1")
+        self.assertEqual(cache.get("c"), "3")
+
+    def test_ttl_verloopt(self):
+        cache = ResponseCache(ttl_seconds=0.05)
+        cache.set("a", "1")
+        time.sleep(0.1)
+        self.assertIsNone(cache.get("a"))
+
+    def test_temperature_drempel(self):
+        cache = ResponseCache(max_temperature=0.5)
+        self.assertTrue(cache.accepts(0.5))
+        self.assertFalse(cache.accepts(0.7))
+        self.assertTrue(ResponseCache(max_temperature=None).accepts(1.0))
+
+    def test_standaard_alleen_deterministische_aanroepen(self):
+        """Zonder drempel worden gesamplede antwoorden (zoals de 0.7 van de agents) niet bevroren."""
+        cache = ResponseCache()
+        self.assertTrue(cache.accepts(0.0))
+        self.assertFalse(cache.accepts(0.7))
+        self.assertFalse(cache.accepts(0.01))
+
+    def test_schijfniveau_overleeft_herstart(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            pad = os.path.join(tmp, "cache.db")
+            cache = ResponseCache(disk_path=pad)
+            cache.set("a", "bewaard")
+            cache.close()
+
+            nieuwe_cache = ResponseCache(disk_path=pad)
+            self.assertEqual(nieuwe_cache.get("a"), "bewaard")
+            self.assertEqual(nieuwe_cache.stats()["size"], 1)
+            nieuwe_cache.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,100 @@
+import asyncio
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+from agents.backend_dev import BackendDeveloperAgent
+from agents.conversation import ConversationEngine, RoutedPolicy
+from agents.frontend_dev import FrontendDeveloperAgent
+from agents.router import AgentRouter, tokenize
+from agents.scrum_master import ScrumMasterAgent
+from agents.team import AgentTeam
+
+
+@pytest.fixture
+def agents():
+    agents = []
+    for klasse, antwoord in (
+        (FrontendDeveloperAgent, "Frontend antwoord"),
+        (BackendDeveloperAgent, "Backend antwoord"),
+        (ScrumMasterAgent, "Scrum antwoord"),
+    ):
+        llm = MagicMock()
+        llm.generate_response.return_value = antwoord
+        llm.agenerate_response = AsyncMock(return_value=antwoord)
+        agents.append(klasse(llm=llm))
+    return agents
+
+
+@pytest.fixture
+def router(agents):
+    return AgentRouter(agents, default=agents[2])
+
+
+def test_tokenize_zonder_stopwoorden():
+    assert tokenize("Hoe update ik de Database?") == ["update", "database"]
+
+
+@pytest.mark.parametrize("vraag, naam", [
+    ("Hoe update ik de database?", "Mark"),
+    ("Het databasebeheer is traag", "Mark"),
+    ("Hoe verbeter ik de gebruikerservaring?", "Sarah"),
+    ("Hoe maak ik een formulier met validatie?", "Sarah"),
+    ("Wanneer is de volgende sprint planning?", "Erik"),
+])
+def test_kiest_juiste_agent(router, vraag, naam):
+    assert router.best(vraag).name == naam
+
+
+def test_geen_treffer_gaat_naar_default(router, agents):
+    assert router.route("Het weer is mooi vandaag") == []
+    assert router.best("Het weer is mooi vandaag") is agents[2]
+    assert AgentRouter(agents).select("Het weer is mooi vandaag") == []
+
+
+def test_meerdere_agents_en_trefwoorden(router):
+    routes = router.route("De knop moet de API aanroepen")
+    assert [r.agent.name for r in routes[:2]] == ["Mark", "Sarah"]
+    assert routes[0].keywords == ["api"]
+    assert [a.name for a in router.select("De knop moet de API aanroepen", top_k=2)] == ["Mark", "Sarah"]
+    # Korte trefwoorden tellen alleen als los woord
+    assert all("api" not in r.keywords for r in router.route("Een capital letter"))
+
+
+def test_extra_trefwoorden(agents):
+    router = AgentRouter(agents, keywords={"mark": ["kubernetes"]})
+    assert router.best("Draait dit op kubernetes?").name == "Mark"
+
+
+def test_team_laat_alleen_gekozen_agent_antwoorden(agents):
+    with AgentTeam(agents) as team:
+        conversation = [{"role": "user", "content": "Hoe update ik de database?"}]
+        [(agent, antwoord)] = team.respond_routed(conversation, topic="database", session_id="r1")
+
+    assert agent.name == "Mark"
+    assert "Backend antwoord" in antwoord
+    agents[0].llm.generate_response.assert_not_called()
+    agents[2].llm.generate_response.assert_not_called()
+
+
+def test_team_zonder_keuze_vraagt_iedereen(agents):
+    with AgentTeam(agents) as team:
+        resultaat = team.respond_routed([{"role": "user", "content": "Het weer is mooi"}])
+    assert [agent.name for agent, _ in resultaat] == ["Sarah", "Mark", "Erik"]
+
+
+def test_team_asynchroon_gerouteerd(agents):
+    team = AgentTeam(agents)
+    conversation = [{"role": "user", "content": "Hoe verbeter ik de gebruikerservaring?"}]
+    [(agent, antwoord)] = asyncio.run(team.arespond_routed(conversation, session_id="r2"))
+
+    assert agent.name == "Sarah"
+    assert "Frontend antwoord" in antwoord
+    agents[1].llm.agenerate_response.assert_not_awaited()
+
+
+def test_gerouteerd_beurtbeleid(agents):
+    with ConversationEngine(agents, policy=RoutedPolicy(), session_id="g") as engine:
+        [beurt] = list(engine.run("Hoe update ik de database?", max_turns=1))
+        assert beurt.speaker == "Mark"
+        # Aanspreken op naam gaat voor
+        [beurt] = list(engine.run("@Sarah wat vind jij?", max_turns=1))
+        assert beurt.speaker == "Sarah"
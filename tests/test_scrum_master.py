@@ -80,6 +80,19 @@ def test_vat_besluiten_samen(agent):
     agent.llm.generate_response.assert_called_once()
     assert expected_response in antwoord
 
+def test_stream_respond_levert_zelfde_antwoord(agent):
+    # Arrange
+    agent.llm.stream_response.return_value = iter(["Laten we ", "beginnen."])
+    
+    # Act
+    conversation = [{"role": "user", "content": "Start de standup."}]
+    fragmenten = list(agent.stream_respond(conversation, topic="standup", session_id="stream"))
+    
+    # Assert
+    assert "".join(fragmenten) == "Laten we beginnen.\n\n-- Erik (Scrum Master)"
+    assert len(agent.get_session_history("stream")) == 2
+    assert agent.get_session_context("stream", "laatste_antwoord")["onderwerp"] == "standup"
+
 @pytest.mark.skip(reason="Geheugen/context vereist sessie-implementatie")
 def test_context_onthouden(agent):
     # TODO: Test dat Erik procescontext onthoudt tussen meerdere interacties
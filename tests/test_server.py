@@ -0,0 +1,154 @@
+import asyncio
+import json
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+from agents.backend_dev import BackendDeveloperAgent
+from agents.frontend_dev import FrontendDeveloperAgent
+from agents.team import AgentTeam
+from agents.worker_pool import AgentWorkerPool
+from server import PoolBackend, TeamBackend, create_app
+from utils.errors import LLMConnectionError
+from utils.session_keys import content_session_id
+from tests.test_worker_pool import tel_team
+
+
+class ServerLLM:
+    """Async nep-LLM: 'slaap x' wacht x seconden, 'vol' speelt een verzadigde Ollama na."""
+    model = "nep"
+    base_url = "lokaal"
+
+    async def agenerate_response(self, messages, **kwargs):
+        vraag = messages[-1]["content"]
+        if vraag.startswith("slaap"):
+            await asyncio.sleep(float(vraag.split()[1]))
+        if vraag == "vol":
+            raise LLMConnectionError("Ollama zit vol", status=503)
+        return f"berichten={len(messages)}"
+
+    async def astream_response(self, messages, **kwargs):
+        for woord in messages[-1]["content"].split():
+            yield woord + " "
+
+    async def aclose(self):
+        pass
+
+
+def maak_app(**kwargs):
+    llm = ServerLLM()
+    team = AgentTeam([FrontendDeveloperAgent(llm=llm), BackendDeveloperAgent(llm=llm)])
+    return create_app(TeamBackend(team), **kwargs)
+
+
+def vraag(tekst, **extra):
+    return {"messages": [{"role": "user", "content": tekst}], **extra}
+
+
+def sse(tekst):
+    """Zet een SSE-body om in een lijst van (event, data)."""
+    events = []
+    for blok in tekst.strip().split("\n\n"):
+        regels = dict(regel.split(": ", 1) for regel in blok.split("\n"))
+        events.append((regels["event"], json.loads(regels["data"])))
+    return events
+
+
+async def gelijktijdig(app, *verzoeken):
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        return await asyncio.gather(*(client.post(pad, json=body) for pad, body in verzoeken))
+
+
+@pytest.fixture
+def client():
+    with TestClient(maak_app()) as client:
+        yield client
+
+
+def test_agents_en_health(client):
+    assert client.get("/agents").json() == [
+        {"name": "Sarah", "role": "Frontend Developer"},
+        {"name": "Mark", "role": "Backend Developer"},
+    ]
+    assert client.get("/health").json()["in_flight"] == 0
+
+
+def test_teambeurt_met_sessie(client):
+    antwoord = client.post("/chat", json=vraag("Hoe update ik de database?", session_id="s1"))
+    assert antwoord.status_code == 200
+    assert antwoord.headers["X-Session-ID"] == "s1"
+    [reactie] = antwoord.json()["responses"]
+    assert reactie["agent"] == "Mark"
+    assert "berichten=2" in reactie["content"]
+
+    # Zelfde sessie: de geschiedenis van de eerste beurt gaat mee
+    tweede = client.post("/chat", json=vraag("En de migratie van de database?", session_id="s1"))
+    assert "berichten=4" in tweede.json()["responses"][0]["content"]
+
+
+def test_sessie_id_wordt_afgeleid(client):
+    body = vraag("Hallo", user="anna")
+    antwoord = client.post("/agents/mark/chat", json=body)
+    assert antwoord.json()["session_id"] == content_session_id(body["messages"], scope="anna")
+    assert antwoord.json()["session_id"] != client.post("/agents/mark/chat", json=vraag("Hallo", user="bram")).json()["session_id"]
+
+
+def test_sse_stream(client):
+    antwoord = client.post("/agents/Sarah/chat", json=vraag("Dit wordt gestreamd", session_id="s2", stream=True))
+    assert antwoord.headers["content-type"].startswith("text/event-stream")
+    events = sse(antwoord.text)
+    assert events[0] == ("agent", {"agent": "Sarah", "session_id": "s2"})
+    assert [data["content"] for event, data in events[1:4]] == ["Dit ", "wordt ", "gestreamd "]
+    assert events[-1] == ("done", {"agent": "Sarah", "session_id": "s2"})
+    assert client.get("/health").json()["in_flight"] == 0
+
+
+def test_onbekende_agent_en_ongeldig_verzoek(client):
+    assert client.post("/agents/niemand/chat", json=vraag("Hallo")).status_code == 404
+    assert client.post("/chat", json={"messages": []}).status_code == 422
+
+
+def test_deadline_geeft_504(client):
+    antwoord = client.post("/agents/mark/chat", json=vraag("slaap 1", timeout=0.1))
+    assert antwoord.status_code == 504
+
+
+def test_volle_wachtrij_geeft_503():
+    """Boven max_in_flight + max_queue volgt direct 503 met Retry-After."""
+    app = maak_app(max_in_flight=1, max_queue=1)
+    antwoorden = asyncio.run(gelijktijdig(app, *[("/agents/mark/chat", vraag("slaap 0.2"))] * 3))
+
+    statussen = sorted(a.status_code for a in antwoorden)
+    assert statussen == [200, 200, 503]
+    [geweigerd] = [a for a in antwoorden if a.status_code == 503]
+    assert int(geweigerd.headers["Retry-After"]) >= 1
+
+
+def test_verzadigde_ollama_verlaagt_de_limiet():
+    app = maak_app(max_in_flight=8)
+    [antwoord] = asyncio.run(gelijktijdig(app, ("/agents/mark/chat", vraag("vol"))))
+    assert antwoord.status_code == 503
+    assert "Retry-After" in antwoord.headers
+    assert app.state.admission.limit == 4
+
+
+def test_fouten_verhogen_de_limiet_niet():
+    """Een time-out of kapotte beurt is geen teken dat Ollama ruimte heeft."""
+    app = maak_app(max_in_flight=8)
+    asyncio.run(gelijktijdig(app, ("/agents/mark/chat", vraag("vol"))))
+    antwoorden = asyncio.run(gelijktijdig(app, ("/agents/mark/chat", vraag("slaap 1", timeout=0.05))))
+    assert antwoorden[0].status_code == 504
+    assert app.state.admission.limit == 4
+
+    asyncio.run(gelijktijdig(app, ("/agents/mark/chat", vraag("Hallo"))))
+    assert app.state.admission.limit == 4.25
+
+
+def test_workerpool_als_backend():
+    with TestClient(create_app(PoolBackend(AgentWorkerPool(tel_team, workers=2)))) as client:
+        antwoord = client.post("/agents/mark/chat", json=vraag("Hallo", session_id="p1"))
+        assert antwoord.json()["responses"][0]["content"].startswith("pid=")
+
+        events = sse(client.post("/chat", json=vraag("Hoe update ik de database?", stream=True)).text)
+        assert events[0][1]["agent"] == "Mark"
+        assert events[-1][0] == "done"
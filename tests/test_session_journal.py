@@ -0,0 +1,89 @@
+import json
+import os
+import tempfile
+import time
+import unittest
+
+# Voeg de root van het project toe aan het Python pad
+import sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils.conversation_memory import SessionManager
+from utils.session_journal import SessionJournal
+
+
+class TestSessionJournal(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "sessions.journal")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _regels(self):
+        with open(self.path, encoding="utf-8") as f:
+            return [json.loads(line) for line in f if line.strip()]
+
+    def test_wijzigingen_worden_als_records_toegevoegd(self):
+        """Elke wijziging levert precies één compact record op."""
+        manager = SessionManager(store=SessionJournal(self.path, compact_every=None))
+        session = manager.create_session(session_id="s1")
+        session.add_message("user", "Hallo")
+        session.update_context("naam", "Jan")
+        manager.close()
+
+        self.assertEqual([r["op"] for r in self._regels()], ["create", "msg", "ctx"])
+
+    def test_herstel_door_afspelen(self):
+        """Een nieuwe manager herstelt sessies uit het journal."""
+        manager = SessionManager(store=SessionJournal(self.path, compact_every=None))
+        session = manager.create_session(session_id="s1", max_history=3)
+        for i in range(5):
+            session.add_message("user", f"Bericht {i}")
+        session.update_context("naam", "Jan")
+        manager.close()
+
+        hersteld = SessionManager(store=SessionJournal(self.path))
+        session = hersteld.get_session("s1")
+        self.assertIsNotNone(session)
+        self.assertEqual([m["content"] for m in session.history], ["Bericht 2", "Bericht 3", "Bericht 4"])
+        self.assertEqual(session.get_context("naam"), "Jan")
+
+        # Nieuwe wijzigingen worden weer gelogd
+        session.add_message("assistant", "Welkom terug")
+        hersteld.close()
+        self.assertEqual(self._regels()[-1]["c"], "Welkom terug")
+
+    def test_verlopen_sessie_wordt_niet_hersteld(self):
+        """Verlopen en verwijderde sessies komen niet terug na herstel."""
+        manager = SessionManager(store=SessionJournal(self.path, compact_every=None))
+        manager.create_session(session_id="kort", ttl_hours=0.05/3600)
+        manager.create_session(session_id="lang")
+        time.sleep(0.1)
+        self.assertEqual(manager.cleanup_expired(), 1)
+        manager.close()
+
+        self.assertEqual(self._regels()[-1], {"op": "del", "id": "kort"})
+        hersteld = SessionManager(store=SessionJournal(self.path))
+        self.assertEqual(list(hersteld.sessions), ["lang"])
+        hersteld.close()
+
+    def test_compactie_naar_snapshot(self):
+        """Na compact_every records staat alles in de snapshot en is het journal leeg."""
+        journal = SessionJournal(self.path, compact_every=4)
+        manager = SessionManager(store=journal)
+        session = manager.create_session(session_id="s1")
+        for i in range(4):
+            session.add_message("user", f"Bericht {i}")
+        manager.close()
+
+        self.assertTrue(os.path.exists(journal.snapshot_path))
+        self.assertEqual(len(self._regels()), 1)
+
+        hersteld = SessionManager(store=SessionJournal(self.path))
+        self.assertEqual(len(hersteld.get_session("s1").history), 4)
+        hersteld.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,75 @@
+import os
+import subprocess
+import unittest
+
+# Voeg de root van het project toe aan het Python pad
+import sys
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+
+from agents.base_agent import BaseAgent
+from utils.session_keys import caller_session_id, content_session_id, session_slot, stable_digest
+
+
+class TestSessionKeys(unittest.TestCase):
+    def test_volle_breedte(self):
+        """Sleutels gebruiken de volledige 128-bits digest, niet hash() % 10000."""
+        sleutel = content_session_id([{"role": "user", "content": "Hallo"}])
+        self.assertTrue(sleutel.startswith("user_"))
+        self.assertEqual(len(sleutel), len("user_") + 32)
+
+    def test_stabiel_over_processen(self):
+        """Een ander proces met een andere hash-seed leidt hetzelfde ID af."""
+        code = (
+            "import sys; sys.path.insert(0, sys.argv[1]);"
+            "from utils.session_keys import content_session_id, session_slot;"
+            "s = content_session_id([{'role': 'user', 'content': 'Hallo'}]);"
+            "print(s, session_slot(s, 7))"
+        )
+        uitvoer = subprocess.run(
+            [sys.executable, "-c", code, ROOT],
+            env={**os.environ, "PYTHONHASHSEED": "12345"},
+            capture_output=True, text=True, check=True,
+        ).stdout.split()
+
+        sleutel = content_session_id([{"role": "user", "content": "Hallo"}])
+        self.assertEqual(uitvoer, [sleutel, str(session_slot(sleutel, 7))])
+
+    def test_eerste_gebruikersbericht_bepaalt_sleutel(self):
+        begin = [{"role": "system", "content": "Systeem"}, {"role": "user", "content": "Vraag"}]
+        verder = begin + [{"role": "assistant", "content": "Antwoord"}, {"role": "user", "content": "Nog iets"}]
+        self.assertEqual(content_session_id(begin), content_session_id(verder))
+        self.assertNotEqual(content_session_id(begin), content_session_id([{"role": "user", "content": "Andere vraag"}]))
+
+    def test_zonder_gebruikersbericht(self):
+        sleutel = content_session_id([{"role": "system", "content": "Systeem"}])
+        self.assertTrue(sleutel.startswith("session_"))
+        self.assertEqual(sleutel, content_session_id([{"role": "system", "content": "Systeem"}]))
+
+    def test_scope_scheidt_gelijke_openingsvragen(self):
+        gesprek = [{"role": "user", "content": "Hallo"}]
+        self.assertNotEqual(content_session_id(gesprek, scope="anna"), content_session_id(gesprek, scope="bram"))
+        self.assertNotEqual(caller_session_id("anna", "1"), caller_session_id("anna", "2"))
+        self.assertEqual(caller_session_id("anna", "1"), caller_session_id("anna", "1"))
+
+    def test_delen_zijn_eenduidig(self):
+        """("ab", "c") en ("a", "bc") geven verschillende digests."""
+        self.assertNotEqual(stable_digest("ab", "c"), stable_digest("a", "bc"))
+
+    def test_slots_zijn_gespreid(self):
+        tellingen = [0] * 4
+        for i in range(400):
+            tellingen[session_slot(caller_session_id(f"gebruiker{i}"), 4)] += 1
+        self.assertTrue(all(60 < n < 140 for n in tellingen), tellingen)
+        with self.assertRaises(ValueError):
+            session_slot("s", 0)
+
+    def test_agent_gebruikt_stabiele_sleutel(self):
+        agent = BaseAgent(name="Test", role="", goal="", backstory="", llm=None)
+        gesprek = [{"role": "user", "content": "Hallo"}]
+        self.assertEqual(agent._resolve_session_id(gesprek), content_session_id(gesprek))
+        self.assertEqual(agent._resolve_session_id(gesprek, "eigen"), "eigen")
+
+
+if __name__ == "__main__":
+    unittest.main()
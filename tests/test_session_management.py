@@ -1,7 +1,9 @@
 import unittest
 import os
 import tempfile
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from unittest.mock import patch, MagicMock
 
@@ -9,7 +11,7 @@ from unittest.mock import patch, MagicMock
 import sys
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-from utils.conversation_memory import Session, SessionManager
+from utils.conversation_memory import Message, Session, SessionManager
 
 class TestSession(unittest.TestCase):
     def setUp(self):
@@ -39,6 +41,31 @@ class TestSession(unittest.TestCase):
         self.assertEqual(self.session.history[0]["content"], "Bericht 5")  # Oudste bericht
         self.assertEqual(self.session.history[-1]["content"], "Bericht 9")  # Nieuwste bericht
     
+    def test_berichten_zijn_compacte_records(self):
+        """Test dat berichten als compacte records worden opgeslagen met een lui tijdstempel."""
+        self.session.add_message("user", "Hallo")
+        message = self.session.history[0]
+        
+        self.assertIsInstance(message, Message)
+        self.assertFalse(hasattr(message, "__dict__"))
+        self.assertIsInstance(message.created, float)
+        self.assertAlmostEqual(
+            datetime.fromisoformat(message["timestamp"]).timestamp(), message.created, places=5
+        )
+        self.assertEqual(message.to_prompt(), {"role": "user", "content": "Hallo"})
+    
+    def test_recente_geschiedenis_is_read_only(self):
+        """Test dat get_recent_history een read-only reeks van de nieuwste berichten geeft."""
+        for i in range(4):
+            self.session.add_message("user", f"Bericht {i}")
+        
+        recent = self.session.get_recent_history(2)
+        self.assertIsInstance(recent, tuple)
+        self.assertEqual([m["content"] for m in recent], ["Bericht 2", "Bericht 3"])
+        self.assertIs(recent[0], self.session.history[2])
+        self.assertEqual(len(self.session.get_recent_history(0)), 0)
+        self.assertEqual(len(self.session.get_recent_history()), 4)
+    
     def test_context_management(self):
         """Test het toevoegen en ophalen van context."""
         self.session.update_context("gebruiker_naam", "Jan")
@@ -102,6 +129,86 @@ class TestSessionManager(unittest.TestCase):
         self.assertIsNone(self.manager.get_session("expired"))
         self.assertIsNotNone(self.manager.get_session("active"))
     
+    def test_cleanup_bekijkt_alleen_verlopen_deadlines(self):
+        """Test dat cleanup via de expiry-index geen actieve sessies controleert."""
+        for i in range(100):
+            self.manager.create_session(session_id=f"actief_{i}")
+        
+        with patch.object(Session, "is_expired", autospec=True, side_effect=lambda *a: False) as is_expired:
+            self.assertEqual(self.manager.cleanup_expired(), 0)
+        
+        is_expired.assert_not_called()
+    
+    def test_gebruikte_sessie_wordt_opnieuw_ingepland(self):
+        """Test dat een sessie die na het inplannen is gebruikt niet wordt opgeruimd."""
+        session = self.manager.create_session(session_id="verlengd", ttl_hours=0.3/3600)
+        
+        time.sleep(0.2)
+        session.add_message("user", "Nog actief")
+        time.sleep(0.15)
+        
+        # De oorspronkelijke deadline is verstreken, maar de sessie is nog geldig
+        self.assertEqual(self.manager.cleanup_expired(), 0)
+        self.assertIs(self.manager.get_session("verlengd"), session)
+        
+        time.sleep(0.2)
+        self.assertEqual(self.manager.cleanup_expired(), 1)
+    
+    def test_reaper_ruimt_op_de_achtergrond_op(self):
+        """Test dat de achtergrondthread verlopen sessies verwijdert."""
+        manager = SessionManager(reap_interval=0.05)
+        try:
+            manager.create_session(session_id="kortlevend", ttl_hours=0.05/3600)
+            time.sleep(0.3)
+            self.assertNotIn("kortlevend", manager.sessions)
+        finally:
+            manager.stop_reaper()
+    
+    def test_get_or_create_is_atomair(self):
+        """Test dat gelijktijdige aanroepen voor hetzelfde ID één sessie opleveren."""
+        manager = SessionManager(shards=4)
+        barrier = threading.Barrier(16)
+        
+        def ophalen(_):
+            barrier.wait()
+            return manager.get_or_create_session("gedeeld")
+        
+        with ThreadPoolExecutor(max_workers=16) as pool:
+            sessies = list(pool.map(ophalen, range(16)))
+        
+        self.assertTrue(all(s is sessies[0] for s in sessies))
+        self.assertEqual(len(manager), 1)
+    
+    def test_gelijktijdige_schrijvers_en_cleanup(self):
+        """Test parallelle schrijfacties op verschillende en gedeelde sessies naast cleanup."""
+        manager = SessionManager(shards=8)
+        gedeeld = manager.create_session(session_id="gedeeld", max_history=10000)
+        stop = threading.Event()
+        
+        def opruimen():
+            while not stop.is_set():
+                manager.cleanup_expired()
+        
+        def werk(i):
+            eigen = manager.get_or_create_session(f"sessie_{i}")
+            for j in range(200):
+                eigen.add_message("user", f"{i}-{j}")
+                gedeeld.add_message("user", f"{i}-{j}")
+                eigen.update_context("teller", j)
+        
+        cleaner = threading.Thread(target=opruimen)
+        cleaner.start()
+        try:
+            with ThreadPoolExecutor(max_workers=8) as pool:
+                list(pool.map(werk, range(8)))
+        finally:
+            stop.set()
+            cleaner.join()
+        
+        self.assertEqual(len(gedeeld.history), 8 * 200)
+        self.assertEqual(len(manager), 9)
+        self.assertEqual(manager.get_session("sessie_3").get_context("teller"), 199)
+    
     def test_save_and_load_sessions(self):
         """Test het opslaan en laden van sessies naar een bestand."""
         # Maak een tijdelijk bestand
@@ -124,6 +231,10 @@ class TestSessionManager(unittest.TestCase):
             self.assertIsNotNone(loaded_session)
             self.assertEqual(len(loaded_session.history), 1)
             self.assertEqual(loaded_session.history[0]["content"], "Hallo")
+            self.assertEqual(
+                loaded_session.history[0]["timestamp"],
+                self.session1.history[0]["timestamp"]
+            )
             self.assertEqual(loaded_session.get_context("naam"), "Testgebruiker")
             
         finally:
@@ -0,0 +1,89 @@
+import os
+import tempfile
+import time
+import unittest
+
+# Voeg de root van het project toe aan het Python pad
+import sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils.conversation_memory import SessionManager
+from utils.session_store import SessionStore, SQLiteSessionStore
+
+
+class TestSQLiteSessionStore(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "sessions.db")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_sessies_worden_lazy_geladen(self):
+        """Na een herstart staat niets in het geheugen tot een sessie wordt opgevraagd."""
+        manager = SessionManager(store=SQLiteSessionStore(self.path))
+        session = manager.create_session(session_id="s1", max_history=3)
+        for i in range(5):
+            session.add_message("user", f"Bericht {i}")
+        session.update_context("naam", "Jan")
+        manager.create_session(session_id="s2")
+        manager.close()
+
+        hersteld = SessionManager(store=SQLiteSessionStore(self.path))
+        self.assertEqual(len(hersteld.sessions), 0)
+
+        session = hersteld.get_session("s1")
+        self.assertEqual([m["content"] for m in session.history], ["Bericht 2", "Bericht 3", "Bericht 4"])
+        self.assertEqual(session.get_context("naam"), "Jan")
+        self.assertEqual(list(hersteld.sessions), ["s1"])
+        self.assertIsNone(hersteld.get_session("onbekend"))
+        hersteld.close()
+
+    def test_schrijfacties_worden_gebundeld(self):
+        """Wijzigingen blijven gebufferd tot batch_size of flush."""
+        store = SQLiteSessionStore(self.path, batch_size=1000)
+        manager = SessionManager(store=store)
+        session = manager.create_session(session_id="s1")
+        session.add_message("user", "Hallo")
+
+        extern = SQLiteSessionStore(self.path)
+        self.assertEqual(extern.count(), 0)
+
+        manager.flush()
+        self.assertEqual(extern.count(), 1)
+        self.assertEqual(len(extern.load_session("s1").history), 1)
+        extern.close()
+        manager.close()
+
+    def test_verlopen_sessies_via_sql_delete(self):
+        """Ook niet-geladen verlopen sessies worden uit de database verwijderd."""
+        manager = SessionManager(store=SQLiteSessionStore(self.path))
+        manager.create_session(session_id="kort", ttl_hours=0.05/3600)
+        manager.create_session(session_id="lang")
+        manager.close()
+
+        time.sleep(0.1)
+        store = SQLiteSessionStore(self.path)
+        hersteld = SessionManager(store=store)
+        self.assertEqual(hersteld.cleanup_expired(), 1)
+        self.assertEqual(store.count(), 1)
+        hersteld.close()
+
+    def test_max_resident_begrenst_geheugen(self):
+        """Alleen de werkset blijft in het geheugen; uitgezette sessies komen terug uit SQLite."""
+        manager = SessionManager(store=SQLiteSessionStore(self.path), max_resident=2, shards=1)
+        for i in range(3):
+            manager.create_session(session_id=f"s{i}").add_message("user", f"Hallo {i}")
+
+        self.assertEqual(list(manager.sessions), ["s1", "s2"])
+        self.assertEqual(manager.get_session("s0").history[0]["content"], "Hallo 0")
+        self.assertEqual(list(manager.sessions), ["s2", "s0"])
+        manager.close()
+
+    def test_max_resident_vereist_lazy_store(self):
+        with self.assertRaises(ValueError):
+            SessionManager(store=SessionStore(), max_resident=10)
+
+
+if __name__ == "__main__":
+    unittest.main()
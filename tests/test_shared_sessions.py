@@ -0,0 +1,200 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import MagicMock
+
+# Voeg de root van het project toe aan het Python pad
+import sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from agents.base_agent import BaseAgent
+from utils.session_journal import SessionJournal
+from utils.session_store import SQLiteSessionStore
+from utils.shared_sessions import SharedMessage, SharedSession, SharedSessionManager, team_turn
+
+
+class TestSharedMessage(unittest.TestCase):
+    def test_weergave_per_agent(self):
+        """Eén opgeslagen bericht wordt per agent anders weergegeven."""
+        bericht = SharedMessage("assistant", "Gebruik een formulier", speaker="Sarah")
+        self.assertEqual(bericht.to_prompt("Sarah"), {"role": "assistant", "content": "Gebruik een formulier"})
+        self.assertEqual(bericht.to_prompt("Mark"), {"role": "user", "content": "Sarah: Gebruik een formulier"})
+        self.assertEqual(bericht.to_prompt(), {"role": "assistant", "content": "Gebruik een formulier"})
+
+        vraag = SharedMessage("user", "Hallo")
+        self.assertEqual(vraag.to_prompt("Mark"), {"role": "user", "content": "Hallo"})
+
+    def test_serialisatie_met_spreker(self):
+        bericht = SharedMessage.from_dict(SharedMessage("assistant", "Hoi", speaker="Erik").to_dict())
+        self.assertEqual(bericht.speaker, "Erik")
+        self.assertEqual(bericht.content, "Hoi")
+
+
+class TestSessionView(unittest.TestCase):
+    def setUp(self):
+        self.manager = SharedSessionManager()
+        self.sarah = self.manager.for_agent("Sarah")
+        self.mark = self.manager.for_agent("Mark")
+
+    def test_een_log_voor_alle_agents(self):
+        """Agents delen één log; de vraag van een teambeurt wordt één keer opgeslagen."""
+        with team_turn("s1", "Vraag"):
+            for manager, antwoord in ((self.sarah, "Frontend"), (self.mark, "Backend")):
+                view = manager.get_or_create_session("s1")
+                view.add_message("user", "Vraag")
+                view.add_message("assistant", antwoord)
+
+        gedeeld = self.manager.get_session("s1")
+        self.assertIsInstance(gedeeld, SharedSession)
+        self.assertEqual([(m.speaker, m.content) for m in gedeeld.history], [
+            (None, "Vraag"), ("Sarah", "Frontend"), ("Mark", "Backend")
+        ])
+        # Views kopiëren niets: ze zien hetzelfde log
+        self.assertIs(self.mark.get_session("s1").history, gedeeld.history)
+
+    def test_herhaalde_vraag_na_eigen_beurt_telt_wel(self):
+        """Een gebruiker die na een antwoord hetzelfde vraagt, krijgt een nieuwe beurt."""
+        view = self.sarah.get_or_create_session("s1")
+        for _ in range(2):
+            view.add_message("user", "Ja")
+            view.add_message("assistant", "Oké")
+        self.assertEqual(len(view.history), 4)
+
+    def test_zelfde_vraag_aan_twee_agents_na_elkaar(self):
+        """Buiten een teambeurt is elke vraag een eigen beurt, ook met dezelfde tekst."""
+        for manager, antwoord in ((self.sarah, "Ja"), (self.mark, "Nee")):
+            view = manager.get_or_create_session("s1")
+            view.add_message("user", "Wat vind jij?")
+            view.add_message("assistant", antwoord)
+
+        gedeeld = self.manager.get_session("s1")
+        self.assertEqual([(m.speaker, m.content) for m in gedeeld.history], [
+            (None, "Wat vind jij?"), ("Sarah", "Ja"), (None, "Wat vind jij?"), ("Mark", "Nee")
+        ])
+
+    def test_teambeurt_geldt_alleen_voor_haar_eigen_vraag(self):
+        """Een teambeurt slaat alleen haar eigen vraag over, niet die van een ander gesprek."""
+        with team_turn("s1", "Vraag") as beurt:
+            self.sarah.get_or_create_session("s1").add_message("user", "Vraag")
+            self.mark.get_or_create_session("s1").add_message("user", "Vraag")
+            self.mark.get_or_create_session("s2").add_message("user", "Vraag")
+        self.assertEqual(beurt.index, 1)
+        self.assertEqual(len(self.manager.get_session("s1").history), 1)
+        self.assertEqual(len(self.manager.get_session("s2").history), 1)
+
+    def test_views_worden_hergebruikt(self):
+        self.assertIs(self.sarah.get_or_create_session("s1"), self.sarah.get_session("s1"))
+        self.assertIsNot(self.sarah.get_session("s1"), self.mark.get_or_create_session("s1"))
+        self.assertIsNone(self.sarah.get_session("onbekend"))
+
+    def test_context_per_agent_met_gedeelde_terugval(self):
+        gedeeld = self.manager.get_or_create_session("s1")
+        gedeeld.update_context("project", "webshop")
+        sarah = self.sarah.get_session("s1")
+        sarah.update_context("project", "eigen")
+        sarah.update_context("taak", "formulier")
+
+        mark = self.mark.get_session("s1")
+        self.assertEqual(sarah.get_context("project"), "eigen")
+        self.assertEqual(mark.get_context("project"), "webshop")
+        self.assertIsNone(mark.get_context("taak"))
+
+    def test_agents_zien_elkaars_beurten(self):
+        """Een agent met een gedeelde sessie ziet de beurten van de anderen in zijn prompt."""
+        llm = MagicMock()
+        llm.generate_response.side_effect = ["Formulier met validatie", "Endpoint /login"]
+        sarah = BaseAgent(name="Sarah", role="Frontend", goal="", backstory="", llm=llm,
+                          session_manager=self.sarah)
+        mark = BaseAgent(name="Mark", role="Backend", goal="", backstory="", llm=llm,
+                         session_manager=self.mark)
+
+        with team_turn("s1", "Hoe bouwen we login?"):
+            sarah.generate_response("s1", "Hoe bouwen we login?")
+            mark.generate_response("s1", "Hoe bouwen we login?")
+
+        prompt = llm.generate_response.call_args.args[0]
+        self.assertEqual(prompt[1:], [
+            {"role": "user", "content": "Hoe bouwen we login?"},
+            {"role": "user", "content": "Sarah: Formulier met validatie"},
+            {"role": "user", "content": "Hoe bouwen we login?"},
+        ])
+        self.assertEqual(len(self.manager.get_session("s1").history), 3)
+
+    def test_herstel_uit_store(self):
+        """Een gedeeld gesprek overleeft een herstart via de store."""
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "sessions.journal")
+            manager = SharedSessionManager(store=SessionJournal(path, compact_every=None))
+            view = manager.for_agent("Sarah").get_or_create_session("s1")
+            view.add_message("user", "Vraag")
+            view.add_message("assistant", "Antwoord")
+            manager.close()
+
+            hersteld = SharedSessionManager(store=SessionJournal(path))
+            view = hersteld.for_agent("Mark").get_session("s1")
+            self.assertEqual([m["content"] for m in view.history], ["Vraag", "Antwoord"])
+            view.add_message("assistant", "Aanvulling")
+            self.assertIsInstance(hersteld.get_session("s1"), SharedSession)
+            self.assertEqual(len(hersteld.get_session("s1").history), 3)
+            hersteld.close()
+
+    def test_sprekers_overleven_de_store(self):
+        """Na een herstart ziet een agent de beurten van anderen niet als zijn eigen beurten."""
+        stores = {
+            "sqlite": lambda path: SQLiteSessionStore(path),
+            "journal": lambda path: SessionJournal(path, compact_every=None),
+        }
+        for naam, maak_store in stores.items():
+            for compacteren in (False, True):
+                with self.subTest(store=naam, compacteren=compacteren), tempfile.TemporaryDirectory() as tmp:
+                    path = os.path.join(tmp, "sessions")
+                    manager = SharedSessionManager(store=maak_store(path))
+                    with team_turn("s1", "Vraag"):
+                        for agent, antwoord in (("Sarah", "Frontend"), ("Mark", "Backend")):
+                            view = manager.for_agent(agent).get_or_create_session("s1")
+                            view.add_message("user", "Vraag")
+                            view.add_message("assistant", antwoord)
+                    if compacteren:
+                        manager.store.compact()
+                    manager.close()
+
+                    hersteld = SharedSessionManager(store=maak_store(path))
+                    gedeeld = hersteld.get_session("s1")
+                    self.assertEqual([(m.speaker, m.content) for m in gedeeld.history], [
+                        (None, "Vraag"), ("Sarah", "Frontend"), ("Mark", "Backend")
+                    ])
+                    self.assertEqual(gedeeld.history[1].to_prompt("Mark"),
+                                     {"role": "user", "content": "Sarah: Frontend"})
+                    # Een nieuwe view na de herstart slaat een herhaalde vraag gewoon op
+                    hersteld.for_agent("Erik").get_session("s1").add_message("user", "Vraag")
+                    self.assertEqual(len(gedeeld.history), 4)
+                    hersteld.close()
+
+    def test_context_per_agent_overleeft_de_store(self):
+        """De eigen context van een agent gaat via de store mee, na eviction of herstart."""
+        stores = {
+            "sqlite": lambda path: SQLiteSessionStore(path),
+            "journal": lambda path: SessionJournal(path, compact_every=None),
+        }
+        for naam, maak_store in stores.items():
+            with self.subTest(store=naam), tempfile.TemporaryDirectory() as tmp:
+                path = os.path.join(tmp, "sessions")
+                manager = SharedSessionManager(store=maak_store(path))
+                manager.get_or_create_session("s1").update_context("project", "webshop")
+                sarah = manager.for_agent("Sarah").get_session("s1")
+                sarah.update_context("project", "eigen")
+                sarah.update_context("taak", "formulier")
+                manager.close()
+
+                hersteld = SharedSessionManager(store=maak_store(path))
+                sarah = hersteld.for_agent("Sarah").get_session("s1")
+                mark = hersteld.for_agent("Mark").get_session("s1")
+                self.assertEqual(sarah.context, {"project": "eigen", "taak": "formulier"})
+                self.assertEqual(sarah.get_context("project"), "eigen")
+                self.assertEqual(mark.get_context("project"), "webshop")
+                self.assertIsNone(mark.get_context("taak"))
+                hersteld.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
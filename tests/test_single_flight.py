@@ -0,0 +1,194 @@
+import asyncio
+import os
+import threading
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+# Voeg de root van het project toe aan het Python pad
+import sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils.errors import DeadlineExceededError
+from utils.single_flight import AsyncSingleFlight, AsyncStreamSingleFlight, SingleFlight, StreamSingleFlight
+
+
+class TestSingleFlight(unittest.TestCase):
+    def test_gelijktijdige_aanroepen_delen_resultaat(self):
+        """Identieke gelijktijdige aanroepen leiden tot één uitvoering."""
+        flight = SingleFlight()
+        aanroepen = []
+        start = threading.Barrier(5)
+
+        def werk():
+            aanroepen.append(1)
+            time.sleep(0.1)
+            return "antwoord"
+
+        def aanroeper():
+            start.wait()
+            return flight.do("k", werk)
+
+        with ThreadPoolExecutor(5) as pool:
+            resultaten = list(pool.map(lambda _: aanroeper(), range(5)))
+
+        self.assertEqual([r for r, _ in resultaten], ["antwoord"] * 5)
+        self.assertEqual(len(aanroepen), 1)
+        self.assertEqual(sum(gedeeld for _, gedeeld in resultaten), 4)
+        self.assertEqual(flight.in_flight(), 0)
+
+    def test_exceptie_wordt_gedeeld_en_sleutel_vrijgegeven(self):
+        """Een fout bereikt alle wachtenden; daarna start een nieuwe aanroep."""
+        flight = SingleFlight()
+
+        def fout():
+            raise ValueError("kapot")
+
+        with self.assertRaises(ValueError):
+            flight.do("k", fout)
+        self.assertEqual(flight.do("k", lambda: "herstel"), ("herstel", False))
+
+    def test_wachtende_met_tijd_over_probeert_opnieuw(self):
+        """De verstreken deadline van de uitvoerder wordt niet gedeeld met wie nog tijd heeft."""
+        flight = SingleFlight()
+        gestart = threading.Event()
+
+        def krappe_deadline():
+            gestart.set()
+            time.sleep(0.05)
+            raise DeadlineExceededError("Deadline verstreken")
+
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            uitvoerder = executor.submit(flight.do, "k", krappe_deadline)
+            gestart.wait()
+            self.assertEqual(flight.do("k", lambda: "vers", timeout=5.0), ("vers", False))
+            with self.assertRaises(DeadlineExceededError):
+                uitvoerder.result()
+        self.assertEqual(flight.in_flight(), 0)
+
+    def test_verschillende_sleutels_lopen_los(self):
+        """Alleen identieke sleutels worden samengevoegd."""
+        flight = SingleFlight()
+        self.assertEqual(flight.do("a", lambda: 1), (1, False))
+        self.assertEqual(flight.do("b", lambda: 2), (2, False))
+
+
+class TestStreamSingleFlight(unittest.TestCase):
+    def test_abonnees_krijgen_alle_fragmenten(self):
+        """Wie halverwege aansluit, krijgt de stroom alsnog vanaf het begin."""
+        flight = StreamSingleFlight()
+        gestart = []
+
+        def upstream():
+            gestart.append(1)
+            yield from ["a", "b", "c"]
+
+        eerste = flight.subscribe("k", upstream)
+        self.assertEqual(next(eerste), "a")
+        tweede = flight.subscribe("k", upstream)
+
+        self.assertEqual(list(tweede), ["a", "b", "c"])
+        self.assertEqual(list(eerste), ["b", "c"])
+        self.assertEqual(len(gestart), 1)
+        self.assertEqual(flight.shared, 1)
+        self.assertEqual(flight.in_flight(), 0)
+
+    def test_upstream_sluit_als_iedereen_afhaakt(self):
+        """Zonder lezers wordt de upstream-stroom gesloten."""
+        flight = StreamSingleFlight()
+        gesloten = []
+
+        def upstream():
+            try:
+                yield from ["a", "b", "c"]
+            finally:
+                gesloten.append(1)
+
+        stroom = flight.subscribe("k", upstream)
+        next(stroom)
+        stroom.close()
+
+        self.assertEqual(gesloten, [1])
+        self.assertEqual(flight.in_flight(), 0)
+
+
+class TestAsyncSingleFlight(unittest.TestCase):
+    def test_gelijktijdige_coroutines_delen_resultaat(self):
+        """Gelijktijdige coroutines wachten op dezelfde taak."""
+        flight = AsyncSingleFlight()
+        aanroepen = []
+
+        async def werk():
+            aanroepen.append(1)
+            await asyncio.sleep(0.05)
+            return "antwoord"
+
+        async def scenario():
+            return await asyncio.gather(*(flight.do("k", werk) for _ in range(4)))
+
+        resultaten = asyncio.run(scenario())
+        self.assertEqual([r for r, _ in resultaten], ["antwoord"] * 4)
+        self.assertEqual(len(aanroepen), 1)
+        self.assertEqual(flight.in_flight(), 0)
+
+    def test_annuleren_van_een_wachtende_raakt_anderen_niet(self):
+        """De gedeelde taak loopt door als één wachtende wordt geannuleerd."""
+        flight = AsyncSingleFlight()
+
+        async def werk():
+            await asyncio.sleep(0.05)
+            return "klaar"
+
+        async def scenario():
+            eerste = asyncio.ensure_future(flight.do("k", werk))
+            tweede = asyncio.ensure_future(flight.do("k", werk))
+            await asyncio.sleep(0)
+            eerste.cancel()
+            return await tweede
+
+        self.assertEqual(asyncio.run(scenario()), ("klaar", True))
+
+    def test_wachtende_met_tijd_over_probeert_opnieuw(self):
+        flight = AsyncSingleFlight()
+
+        async def krappe_deadline():
+            await asyncio.sleep(0.05)
+            raise DeadlineExceededError("Deadline verstreken")
+
+        async def vers():
+            return "vers"
+
+        async def scenario():
+            uitvoerder = asyncio.ensure_future(flight.do("k", krappe_deadline))
+            await asyncio.sleep(0)
+            wachtende = await flight.do("k", vers, timeout=5.0)
+            with self.assertRaises(DeadlineExceededError):
+                await uitvoerder
+            return wachtende
+
+        self.assertEqual(asyncio.run(scenario()), ("vers", False))
+        self.assertEqual(flight.in_flight(), 0)
+
+    def test_gedeelde_asynchrone_stroom(self):
+        """Asynchrone abonnees lezen één gedeelde stroom."""
+        flight = AsyncStreamSingleFlight()
+        gestart = []
+
+        async def upstream():
+            gestart.append(1)
+            for delta in ["a", "b"]:
+                await asyncio.sleep(0.01)
+                yield delta
+
+        async def lees():
+            return [delta async for delta in flight.subscribe("k", upstream)]
+
+        async def scenario():
+            return await asyncio.gather(lees(), lees(), lees())
+
+        self.assertEqual(asyncio.run(scenario()), [["a", "b"]] * 3)
+        self.assertEqual(len(gestart), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
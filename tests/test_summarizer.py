@@ -0,0 +1,151 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import MagicMock
+
+# Voeg de root van het project toe aan het Python pad
+import sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from agents.base_agent import BaseAgent
+from utils.conversation_memory import Session, SessionManager
+from utils.errors import LLMConnectionError
+from utils.session_journal import SessionJournal
+from utils.session_store import SQLiteSessionStore
+from utils.summarizer import ConversationSummarizer
+
+
+def _vul(session, aantal):
+    for i in range(aantal):
+        session.add_message("user" if i % 2 == 0 else "assistant", f"Bericht {i}")
+
+
+class TestConversationSummarizer(unittest.TestCase):
+    def setUp(self):
+        self.llm = MagicMock()
+        self.llm.generate_response.return_value = "Samenvatting A"
+
+    def test_ongeldige_configuratie(self):
+        """keep_recent moet kleiner zijn dan threshold."""
+        with self.assertRaises(ValueError):
+            ConversationSummarizer(self.llm, threshold=4, keep_recent=4)
+
+    def test_onder_drempel_niets_doen(self):
+        """Onder de drempel wordt de LLM niet aangeroepen."""
+        summarizer = ConversationSummarizer(self.llm, threshold=6, keep_recent=2, background=False)
+        session = Session(session_id="s1")
+        _vul(session, 5)
+
+        self.assertFalse(summarizer.maybe_schedule(session))
+        self.llm.generate_response.assert_not_called()
+        self.assertEqual(len(session.history), 5)
+
+    def test_synchroon_samenvatten(self):
+        """Oudere berichten worden gevouwen, de recente blijven letterlijk staan."""
+        summarizer = ConversationSummarizer(self.llm, threshold=6, keep_recent=2, background=False)
+        session = Session(session_id="s1")
+        _vul(session, 6)
+
+        self.assertTrue(summarizer.maybe_schedule(session))
+        self.assertEqual(session.summary, "Samenvatting A")
+        self.assertEqual([m.content for m in session.history], ["Bericht 4", "Bericht 5"])
+
+        prompt = self.llm.generate_response.call_args[0][0]
+        self.assertIn("Bericht 0", prompt[1]["content"])
+        self.assertNotIn("Bericht 4", prompt[1]["content"])
+
+    def test_bestaande_samenvatting_gaat_mee(self):
+        """Een volgende ronde bouwt voort op de eerdere samenvatting."""
+        summarizer = ConversationSummarizer(self.llm, threshold=4, keep_recent=1, background=False)
+        session = Session(session_id="s1")
+        session.summary = "Eerdere samenvatting"
+        _vul(session, 4)
+
+        summarizer.summarize(session)
+        prompt = self.llm.generate_response.call_args[0][0]
+        self.assertIn("Eerdere samenvatting", prompt[1]["content"])
+
+    def test_foutantwoord_laat_sessie_ongemoeid(self):
+        """Een fout van de LLM mag geen geschiedenis weggooien."""
+        self.llm.generate_response.side_effect = LLMConnectionError("verbinding mislukt")
+        summarizer = ConversationSummarizer(self.llm, threshold=4, keep_recent=1, background=False)
+        session = Session(session_id="s1")
+        _vul(session, 4)
+
+        self.assertFalse(summarizer.summarize(session))
+        self.assertEqual(session.summary, "")
+        self.assertEqual(len(session.history), 4)
+
+    def test_achtergrond(self):
+        """In achtergrondmodus wordt de samenvatting na join() toegepast."""
+        summarizer = ConversationSummarizer(self.llm, threshold=4, keep_recent=2)
+        session = Session(session_id="s1")
+        _vul(session, 4)
+
+        self.assertTrue(summarizer.maybe_schedule(session))
+        summarizer.join()
+        summarizer.close()
+
+        self.assertEqual(session.summary, "Samenvatting A")
+        self.assertEqual(len(session.history), 2)
+
+    def test_agent_stuurt_samenvatting_mee(self):
+        """De agent plant samenvattingen in en zet ze in de prompt."""
+        agent_llm = MagicMock()
+        agent_llm.generate_response.return_value = "Antwoord"
+        summarizer = ConversationSummarizer(self.llm, threshold=4, keep_recent=2, background=False)
+        agent = BaseAgent(
+            name="Test Agent",
+            role="Test Role",
+            goal="Test Goal",
+            backstory="Test Backstory",
+            llm=agent_llm,
+            summarizer=summarizer
+        )
+
+        agent.generate_response("s1", "Vraag 1")
+        agent.generate_response("s1", "Vraag 2")
+        self.assertEqual(agent.get_or_create_session("s1").summary, "Samenvatting A")
+
+        agent.generate_response("s1", "Vraag 3")
+        conversation = agent_llm.generate_response.call_args[0][0]
+        self.assertEqual(conversation[1]["role"], "system")
+        self.assertIn("Samenvatting A", conversation[1]["content"])
+        self.assertNotIn("Vraag 1", [m["content"] for m in conversation])
+
+
+class TestSamenvattingPersistentie(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.llm = MagicMock()
+        self.llm.generate_response.return_value = "Samenvatting A"
+        self.summarizer = ConversationSummarizer(self.llm, threshold=4, keep_recent=1, background=False)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _controleer(self, maak_store):
+        manager = SessionManager(store=maak_store())
+        session = manager.create_session(session_id="s1")
+        _vul(session, 4)
+        self.summarizer.summarize(session)
+        session.add_message("user", "Na samenvatting")
+        manager.close()
+
+        herladen = SessionManager(store=maak_store()).get_session("s1")
+        self.assertEqual(herladen.summary, "Samenvatting A")
+        self.assertEqual([m.content for m in herladen.history], ["Bericht 3", "Na samenvatting"])
+
+    def test_journal(self):
+        """Het journal speelt samenvatting en gevouwen berichten correct af."""
+        path = os.path.join(self.tmp.name, "sessions.journal")
+        self._controleer(lambda: SessionJournal(path, compact_every=None))
+
+    def test_sqlite(self):
+        """De SQLite-store bewaart de samenvatting en verwijdert gevouwen berichten."""
+        path = os.path.join(self.tmp.name, "sessions.db")
+        self._controleer(lambda: SQLiteSessionStore(path))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,156 @@
+import asyncio
+import time
+import pytest
+from unittest.mock import MagicMock
+from agents.frontend_dev import FrontendDeveloperAgent
+from agents.backend_dev import BackendDeveloperAgent
+from agents.scrum_master import ScrumMasterAgent
+from agents.team import AgentTeam
+from utils.shared_sessions import SharedSessionManager
+
+
+def trage_llm(antwoord, vertraging):
+    """Mock-LLM die pas na een vertraging antwoordt (sync en async)."""
+    llm = MagicMock()
+
+    def generate_response(*args, **kwargs):
+        time.sleep(vertraging)
+        return antwoord
+
+    async def agenerate_response(*args, **kwargs):
+        await asyncio.sleep(vertraging)
+        return antwoord
+
+    llm.generate_response.side_effect = generate_response
+    llm.agenerate_response = agenerate_response
+    return llm
+
+
+@pytest.fixture
+def team():
+    team = AgentTeam([
+        FrontendDeveloperAgent(llm=trage_llm("Frontend antwoord", 0.3)),
+        BackendDeveloperAgent(llm=trage_llm("Backend antwoord", 0.2)),
+        ScrumMasterAgent(llm=trage_llm("Scrum antwoord", 0.1)),
+    ])
+    yield team
+    team.close()
+
+
+CONVERSATION = [{"role": "user", "content": "Hoe pakken we deze feature aan?"}]
+
+
+def test_respond_all_kost_ongeveer_traagste_agent(team):
+    start = time.perf_counter()
+    antwoorden = team.respond_all(CONVERSATION, topic="feature", session_id="team")
+    duur = time.perf_counter() - start
+
+    assert duur < 0.55
+    assert "Frontend antwoord" in antwoorden[0]
+    assert "Backend antwoord" in antwoorden[1]
+    assert "Scrum antwoord" in antwoorden[2]
+
+
+def test_iter_responses_in_volgorde_van_gereedkomen(team):
+    namen = [agent.name for agent, _ in team.iter_responses(CONVERSATION, session_id="team")]
+
+    assert namen == ["Erik", "Mark", "Sarah"]
+
+
+def test_max_concurrency_beperkt_parallelisme():
+    team = AgentTeam([
+        ScrumMasterAgent(llm=trage_llm("a", 0.1)),
+        ScrumMasterAgent(llm=trage_llm("b", 0.1)),
+    ], max_concurrency=1)
+
+    start = time.perf_counter()
+    team.respond_all(CONVERSATION)
+    team.close()
+
+    assert time.perf_counter() - start >= 0.2
+
+
+def test_arespond_all_en_aiter_responses(team):
+    async def scenario():
+        start = time.perf_counter()
+        antwoorden = await team.arespond_all(CONVERSATION, session_id="async_team")
+        duur = time.perf_counter() - start
+        volgorde = [agent.name async for agent, _ in team.aiter_responses(CONVERSATION)]
+        return antwoorden, duur, volgorde
+
+    antwoorden, duur, volgorde = asyncio.run(scenario())
+
+    assert duur < 0.55
+    assert "Frontend antwoord" in antwoorden[0]
+    assert volgorde == ["Erik", "Mark", "Sarah"]
+
+
+def test_gedeeld_gesprek_bevat_de_vraag_een_keer():
+    """Bij een fan-out komt de vraag één keer in het gedeelde log, ook over threads heen."""
+    gedeeld = SharedSessionManager()
+    team = AgentTeam([
+        FrontendDeveloperAgent(llm=trage_llm("Frontend antwoord", 0.05)),
+        BackendDeveloperAgent(llm=trage_llm("Backend antwoord", 0.05)),
+    ], session_manager=gedeeld)
+
+    team.respond_all(CONVERSATION, session_id="sync")
+    asyncio.run(team.arespond_all(CONVERSATION, session_id="async"))
+    team.close()
+
+    for session_id in ("sync", "async"):
+        rollen = sorted((m.role, m.speaker) for m in gedeeld.get_session(session_id).history)
+        assert rollen == [("assistant", "Mark"), ("assistant", "Sarah"), ("user", None)]
+
+    # Een tweede teambeurt met dezelfde vraag is een nieuwe beurt
+    team.respond_all(CONVERSATION, session_id="sync")
+    assert [m.role for m in gedeeld.get_session("sync").history].count("user") == 2
+
+
+def test_get_agent_op_naam(team):
+    assert team.get_agent("mark").role == "Backend Developer"
+    assert team.get_agent("onbekend") is None
+    with pytest.raises(ValueError):
+        AgentTeam([], max_concurrency=0)
+
+
+def test_warm_up_laadt_elk_model_een_keer():
+    from utils.ollama_client import OllamaClient
+
+    gedeeld = OllamaClient(model="llama3", base_url="http://ollama:11434")
+    gedeeld.warm_up = MagicMock(return_value=True)
+    ander = OllamaClient(model="openchat:latest", base_url="http://ollama:11434")
+    ander.warm_up = MagicMock(return_value=False)
+
+    team = AgentTeam([
+        FrontendDeveloperAgent(llm=gedeeld),
+        BackendDeveloperAgent(llm=gedeeld),
+        ScrumMasterAgent(llm=ander),
+    ])
+    try:
+        assert team.warm_up() == {
+            ("http://ollama:11434", "llama3"): True,
+            ("http://ollama:11434", "openchat:latest"): False,
+        }
+    finally:
+        team.close()
+
+    gedeeld.warm_up.assert_called_once()
+    ander.warm_up.assert_called_once()
+
+
+def test_warm_up_per_server():
+    """Hetzelfde model op twee servers geeft twee uitkomsten; een mislukte warm-up blijft zichtbaar."""
+    from unittest.mock import AsyncMock
+    from utils.ollama_client import OllamaClient
+
+    eerste = OllamaClient(model="llama3", base_url="http://gpu1:11434")
+    eerste.warm_up = MagicMock(return_value=False)
+    eerste.awarm_up = AsyncMock(return_value=False)
+    tweede = OllamaClient(model="llama3", base_url="http://gpu2:11434")
+    tweede.warm_up = MagicMock(return_value=True)
+    tweede.awarm_up = AsyncMock(return_value=True)
+
+    verwacht = {("http://gpu1:11434", "llama3"): False, ("http://gpu2:11434", "llama3"): True}
+    with AgentTeam([FrontendDeveloperAgent(llm=eerste), BackendDeveloperAgent(llm=tweede)]) as team:
+        assert team.warm_up() == verwacht
+        assert asyncio.run(team.awarm_up()) == verwacht
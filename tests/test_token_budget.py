@@ -0,0 +1,76 @@
+import os
+import unittest
+from unittest.mock import MagicMock
+
+# Voeg de root van het project toe aan het Python pad
+import sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from agents.base_agent import BaseAgent
+from utils.conversation_memory import Message
+from utils.token_budget import TokenBudget, estimate_tokens
+
+
+def woorden(text):
+    """Eenvoudige estimator voor de tests: één token per woord."""
+    return len(text.split())
+
+
+class TestTokenBudget(unittest.TestCase):
+    def test_schatting(self):
+        self.assertEqual(estimate_tokens(""), 1)
+        self.assertEqual(estimate_tokens("a" * 40), 10)
+
+    def test_fit_vult_van_nieuw_naar_oud(self):
+        budget = TokenBudget(8, estimator=woorden, per_message_overhead=0)
+        messages = [Message("user", "een twee drie vier"), Message("assistant", "vijf zes"),
+                    Message("user", "zeven acht negen")]
+
+        gekozen = budget.fit(messages)
+        self.assertEqual([m.content for m in gekozen], ["vijf zes", "zeven acht negen"])
+
+        gekozen = budget.fit(messages, reserved_tokens=4)
+        self.assertEqual([m.content for m in gekozen], ["zeven acht negen"])
+
+    def test_laatste_bericht_gaat_altijd_mee(self):
+        budget = TokenBudget(2, estimator=woorden, per_message_overhead=0)
+        messages = [Message("user", "kort"), Message("user", "een heel lang bericht")]
+
+        self.assertEqual([m.content for m in budget.fit(messages)], ["een heel lang bericht"])
+        self.assertEqual(budget.fit(messages, keep_last=0), [])
+
+    def test_tokenaantal_wordt_gecachet(self):
+        estimator = MagicMock(side_effect=woorden)
+        budget = TokenBudget(100, estimator=estimator)
+        message = Message("user", "een twee drie")
+
+        budget.count(message)
+        budget.count(message)
+        estimator.assert_called_once_with("een twee drie")
+
+
+class TestAgentTokenBudget(unittest.TestCase):
+    def test_prompt_blijft_binnen_budget(self):
+        """Lange oude antwoorden vallen weg; systeemprompt en nieuwe vraag blijven."""
+        llm = MagicMock()
+        llm.generate_response.return_value = "ok"
+        agent = BaseAgent(
+            name="Test", role="Rol", goal="Doel", backstory="Achtergrond", llm=llm,
+            token_budget=TokenBudget(30, estimator=woorden, per_message_overhead=0)
+        )
+        agent.add_to_session("s", "user", "vraag een")
+        agent.add_to_session("s", "assistant", " ".join(["code"] * 50))
+        agent.add_to_session("s", "user", "vraag twee")
+        agent.add_to_session("s", "assistant", "kort antwoord")
+
+        agent.generate_response("s", "nieuwe vraag", system_prompt="systeem prompt")
+
+        prompt = llm.generate_response.call_args[0][0]
+        self.assertEqual(
+            [m["content"] for m in prompt],
+            ["systeem prompt", "vraag twee", "kort antwoord", "nieuwe vraag"]
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
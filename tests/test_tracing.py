@@ -0,0 +1,200 @@
+import asyncio
+import json
+import os
+import tempfile
+import unittest
+
+# Voeg de root van het project toe aan het Python pad
+import sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from agents.base_agent import BaseAgent
+from agents.frontend_dev import FrontendDeveloperAgent
+from utils.fake_ollama import FakeOllamaServer
+from utils.ollama_client import OllamaClient
+from utils.tracing import (
+    NOOP_SPAN, JsonLinesExporter, RingBufferExporter, Tracer, current_span, set_tracer, span, traced
+)
+
+
+class TracingTestCase(unittest.TestCase):
+    """Installeert per test een tracer met een ring buffer en zet de oude terug."""
+    sample_rate = 1.0
+
+    def setUp(self):
+        self.ring = RingBufferExporter()
+        self.vorige = set_tracer(Tracer(sample_rate=self.sample_rate, exporters=[self.ring]))
+
+    def tearDown(self):
+        set_tracer(self.vorige)
+
+
+class TestTracer(TracingTestCase):
+    def test_geneste_spans(self):
+        """Kindspans delen de trace en verwijzen naar hun ouder."""
+        with span("buiten", sessie="s1") as buiten:
+            with span("binnen") as binnen:
+                binnen.set_attribute("aantal", 3)
+
+        binnen_span, buiten_span = self.ring.spans()
+        self.assertEqual(binnen_span.trace_id, buiten_span.trace_id)
+        self.assertEqual(binnen_span.parent_id, buiten_span.span_id)
+        self.assertIsNone(buiten_span.parent_id)
+        self.assertEqual(buiten_span.attributes, {"sessie": "s1"})
+        self.assertEqual(binnen_span.attributes, {"aantal": 3})
+        self.assertGreaterEqual(buiten_span.duration, binnen_span.duration)
+        self.assertIs(current_span(), NOOP_SPAN)
+
+    def test_fout_wordt_vastgelegd(self):
+        """Een exceptie komt in de span terecht en wordt doorgegeven."""
+        with self.assertRaises(KeyError):
+            with span("stap"):
+                raise KeyError("weg")
+        self.assertEqual(self.ring.spans()[0].error, "KeyError: 'weg'")
+
+    def test_decorator_sync_en_async(self):
+        """traced werkt voor gewone functies en coroutines."""
+        @traced("sync")
+        def sync():
+            return 1
+
+        @traced("async")
+        async def asynchroon():
+            with span("kind"):
+                return 2
+
+        self.assertEqual(sync(), 1)
+        self.assertEqual(asyncio.run(asynchroon()), 2)
+        namen = [s.name for s in self.ring.spans()]
+        self.assertEqual(namen, ["sync", "kind", "async"])
+        self.assertEqual(self.ring.spans("kind")[0].parent_id, self.ring.spans("async")[0].span_id)
+
+    def test_ring_buffer_begrensd(self):
+        """De ring buffer bewaart alleen de laatste spans."""
+        ring = RingBufferExporter(capacity=2)
+        set_tracer(Tracer(exporters=[ring]))
+        for i in range(5):
+            with span(f"stap-{i}"):
+                pass
+        self.assertEqual([s.name for s in ring.spans()], ["stap-3", "stap-4"])
+
+    def test_json_lines_exporter(self):
+        """Elke span wordt één JSON-regel."""
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "traces.jsonl")
+            exporter = JsonLinesExporter(path)
+            set_tracer(Tracer(exporters=[exporter]))
+            with span("buiten"):
+                with span("binnen", sessie="s1"):
+                    pass
+            exporter.close()
+
+            with open(path, encoding="utf-8") as f:
+                regels = [json.loads(regel) for regel in f]
+        self.assertEqual([r["name"] for r in regels], ["binnen", "buiten"])
+        self.assertEqual(regels[0]["parent_id"], regels[1]["span_id"])
+        self.assertEqual(regels[0]["attributes"], {"sessie": "s1"})
+
+    def test_ongeldige_sample_rate(self):
+        with self.assertRaises(ValueError):
+            Tracer(sample_rate=2.0)
+
+
+class TestSampling(TracingTestCase):
+    sample_rate = 0.0
+
+    def test_niet_gesampled_legt_niets_vast(self):
+        """Een niet-gesamplede trace levert alleen no-op spans op, ook voor kinderen."""
+        with span("buiten") as buiten:
+            with span("binnen") as binnen:
+                binnen.set_attribute("genegeerd", True)
+        self.assertIs(buiten, NOOP_SPAN)
+        self.assertIs(binnen, NOOP_SPAN)
+        self.assertEqual(self.ring.spans(), [])
+        self.assertIs(current_span(), NOOP_SPAN)
+
+    def test_kinderen_volgen_de_wortel(self):
+        """Kinderen van een gesamplede wortel worden altijd vastgelegd."""
+        tracer = Tracer(sample_rate=0.5, exporters=[self.ring])
+        set_tracer(tracer)
+        for _ in range(50):
+            with span("wortel"):
+                with span("kind"):
+                    pass
+        self.assertEqual(len(self.ring.spans("wortel")), len(self.ring.spans("kind")))
+        self.assertTrue(0 < len(self.ring.spans("wortel")) < 50)
+
+
+class TestAgentTrace(TracingTestCase):
+    def setUp(self):
+        super().setUp()
+        self.server = FakeOllamaServer(response_tokens=3).start()
+        self.llm = OllamaClient(model="nep", base_url=self.server.url)
+
+    def tearDown(self):
+        self.llm.close()
+        self.server.stop()
+        super().tearDown()
+
+    def _boom(self):
+        """Zet de spans van de enige trace om naar {naam: [spans]}."""
+        [spans] = self.ring.traces().values()
+        per_naam = {}
+        for s in spans:
+            per_naam.setdefault(s.name, []).append(s)
+        return per_naam
+
+    def test_respond_heeft_volledige_uitsplitsing(self):
+        """respond levert één trace met agent-, sessie- en LLM-spans."""
+        agent = FrontendDeveloperAgent(llm=self.llm)
+        agent.respond([{"role": "user", "content": "Hallo"}], session_id="s1")
+
+        spans = self._boom()
+        for naam in (
+            "agent.respond", "agent.generate_response", "agent.build_prompt",
+            "session.get_or_create", "session.commit_turn", "session.update_context",
+            "llm.generate", "llm.http", "llm.decode"
+        ):
+            self.assertIn(naam, spans)
+
+        [wortel] = spans["agent.respond"]
+        self.assertIsNone(wortel.parent_id)
+        [generate] = spans["agent.generate_response"]
+        self.assertEqual(generate.parent_id, wortel.span_id)
+        self.assertEqual(generate.attributes["agent"], "Sarah")
+        # Vraag en antwoord worden in één keer vastgelegd
+        [commit] = spans["session.commit_turn"]
+        self.assertEqual(commit.parent_id, generate.span_id)
+        [llm] = spans["llm.generate"]
+        self.assertEqual(llm.parent_id, generate.span_id)
+        [http] = spans["llm.http"]
+        self.assertEqual(http.parent_id, llm.span_id)
+        self.assertEqual(http.attributes, {"endpoint": self.server.url, "status": 200})
+
+    def test_stream_met_ttft(self):
+        """Een gestreamde beurt krijgt een llm.stream-span met time-to-first-token."""
+        agent = BaseAgent(name="Basis", role="Test", goal="Test", backstory="", llm=self.llm)
+        list(agent.stream_response("s1", "Hallo"))
+
+        spans = self._boom()
+        [stream] = spans["llm.stream"]
+        self.assertIn("ttft", stream.attributes)
+        self.assertEqual(stream.parent_id, spans["agent.stream_response"][0].span_id)
+        self.assertEqual(spans["llm.http"][0].attributes["stream"], True)
+
+    def test_asynchrone_beurt(self):
+        """Ook arespond levert één samenhangende trace op."""
+        agent = FrontendDeveloperAgent(llm=self.llm)
+
+        async def scenario():
+            await agent.arespond([{"role": "user", "content": "Hallo"}], session_id="s1")
+            await self.llm.aclose()
+
+        asyncio.run(scenario())
+        spans = self._boom()
+        self.assertEqual(spans["llm.http"][0].attributes["status"], 200)
+        self.assertIn("llm.decode", spans)
+
+
+if __name__ == "__main__":
+    unittest.main()
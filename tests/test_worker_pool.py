@@ -0,0 +1,135 @@
+import asyncio
+import os
+import pytest
+from agents.backend_dev import BackendDeveloperAgent
+from agents.frontend_dev import FrontendDeveloperAgent
+from agents.team import AgentTeam
+from agents.worker_pool import AgentWorkerPool, WorkerError
+from utils.session_keys import content_session_id, session_slot
+
+
+class TelLLM:
+    """
+    LLM voor in een worker: antwoordt met het proces-ID en het aantal berichten in de prompt.
+
+    Wordt in het workerproces zelf gebouwd, dus hoeft niet picklebaar te zijn.
+    """
+    model = "tel"
+    base_url = "lokaal"
+
+    async def agenerate_response(self, messages, **kwargs):
+        vraag = messages[-1]["content"]
+        if vraag == "crash":
+            os._exit(3)
+        if vraag.startswith("slaap"):
+            await asyncio.sleep(float(vraag.split()[1]))
+        return f"pid={os.getpid()} berichten={len(messages)}"
+
+    async def astream_response(self, messages, **kwargs):
+        for woord in messages[-1]["content"].split():
+            yield woord + " "
+
+    async def aclose(self):
+        pass
+
+
+def tel_team():
+    llm = TelLLM()
+    return AgentTeam([FrontendDeveloperAgent(llm=llm), BackendDeveloperAgent(llm=llm)])
+
+
+def kapot_team():
+    raise RuntimeError("geen model")
+
+
+def vraag(tekst):
+    return [{"role": "user", "content": tekst}]
+
+
+@pytest.fixture(scope="module")
+def pool():
+    with AgentWorkerPool(tel_team, workers=2) as pool:
+        yield pool
+
+
+def test_gerouteerde_beurt(pool):
+    [(naam, antwoord)] = pool.result(vraag("Hoe update ik de database?"), session_id="r1")
+    assert naam == "Mark"
+    assert "Mark (Backend Developer)" in antwoord
+
+
+def test_gesprek_blijft_bij_een_worker(pool):
+    """Een gesprek gaat steeds naar dezelfde worker, die de sessie lokaal bewaart."""
+    antwoorden = [pool.result(vraag(f"Vraag {i}"), session_id="vast", agent="Sarah")[0][1] for i in range(3)]
+    pids = {antwoord.split()[0] for antwoord in antwoorden}
+    assert len(pids) == 1
+    # Systeemprompt + 1, 3 en 5 berichten: de geschiedenis groeit in die ene worker
+    assert [antwoord.split()[1] for antwoord in antwoorden] == ["berichten=2", "berichten=4", "berichten=6"]
+    assert pool.worker_for("vast") == session_slot("vast", 2)
+
+
+def test_gesprekken_worden_verdeeld(pool):
+    futures = [pool.submit(vraag("Hallo"), session_id=f"klant-{i}", agent="Mark") for i in range(16)]
+    pids = {future.result(timeout=10)[0][1].split()[0] for future in futures}
+    assert len(pids) == 2
+
+
+def test_zonder_sessie_id_telt_de_inhoud(pool):
+    eerste = pool.result(vraag("Zelfde opening"), agent="Mark")[0][1]
+    tweede = pool.result(vraag("Zelfde opening") + [{"role": "user", "content": "Verder"}], agent="Mark")[0][1]
+    assert pool.worker_for(content_session_id(vraag("Zelfde opening"))) in (0, 1)
+    assert eerste.split()[0] == tweede.split()[0]
+    assert "berichten=4" in tweede
+
+
+def test_streamen(pool):
+    with pool.stream(vraag("Dit wordt gestreamd"), session_id="s1", agent="Sarah") as stream:
+        fragmenten = list(stream)
+    assert stream.agent == "Sarah"
+    assert fragmenten[:3] == ["Dit ", "wordt ", "gestreamd "]
+    assert "Sarah (Frontend Developer)" in fragmenten[-1]
+
+
+def test_fouten_komen_terug(pool):
+    with pytest.raises(ValueError, match="Onbekende agent"):
+        pool.result(vraag("Hallo"), session_id="f1", agent="Niemand")
+    with pytest.raises(ValueError):
+        list(pool.stream(vraag("Hallo"), session_id="f1", agent="Niemand"))
+
+
+def test_beurten_van_een_gesprek_lopen_op_volgorde(pool):
+    """Een tweede beurt wacht op de eerste, ook als die lang duurt."""
+    eerste = pool.submit(vraag("slaap 0.3"), session_id="volgorde", agent="Mark")
+    tweede = pool.submit(vraag("Daarna"), session_id="volgorde", agent="Mark")
+    assert "berichten=4" in tweede.result(timeout=10)[0][1]
+    assert eerste.done()
+
+
+def test_mislukte_fabriek():
+    with pytest.raises(WorkerError, match="geen model"):
+        AgentWorkerPool(kapot_team, workers=1).start()
+
+
+def test_gestopte_worker_wordt_vervangen():
+    with AgentWorkerPool(tel_team, workers=1) as pool:
+        with pytest.raises(WorkerError, match="gestopt"):
+            pool.result(vraag("crash"), session_id="c1", agent="Mark")
+        [(_, antwoord)] = pool.result(vraag("Weer daar?"), session_id="c1", agent="Mark")
+        assert antwoord.startswith("pid=")
+
+
+def test_gesloten_pool_weigert_verzoeken():
+    pool = AgentWorkerPool(tel_team, workers=1)
+    pool.close()
+    with pytest.raises(WorkerError, match="gesloten"):
+        pool.submit(vraag("Hallo"))
+
+
+def test_asynchroon_streamen(pool):
+    async def lees():
+        stream = pool.astream(vraag("Asynchroon gestreamd"), session_id="as1", agent="Mark")
+        return stream.agent, [fragment async for fragment in stream], stream.agent
+
+    voor, fragmenten, na = asyncio.run(lees())
+    assert voor is None and na == "Mark"
+    assert fragmenten[:2] == ["Asynchroon ", "gestreamd "]
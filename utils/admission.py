@@ -0,0 +1,141 @@
+import asyncio
+from collections import deque
+from typing import Deque, Optional
+
+from utils.errors import DeadlineExceededError, LLMConnectionError
+from utils.retry import Deadline
+
+# HTTP-statussen waarmee Ollama (of een proxy ervoor) aangeeft dat hij vol zit
+OVERLOAD_STATUSES = (429, 503)
+
+
+class OverloadedError(Exception):
+    """
+    Er is geen plaats meer in de wachtrij; de aanroeper moet het later opnieuw proberen.
+
+    Attributes:
+        retry_after: Voorgestelde wachttijd in seconden
+    """
+    def __init__(self, message: str, retry_after: float = 1.0):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def is_overload(error: BaseException) -> bool:
+    """Controleer of een fout betekent dat Ollama verzadigd is (429/503 na alle pogingen)."""
+    return isinstance(error, LLMConnectionError) and error.status in OVERLOAD_STATUSES
+
+
+class AdmissionController:
+    """
+    Begrenst het aantal gelijktijdige beurten en zet de rest in een begrensde wachtrij.
+
+    De limiet past zich aan Ollama aan (AIMD): meldt Ollama dat hij vol zit,
+    dan halveert de limiet; elke geslaagde beurt verhoogt hem met 1/limiet, dus
+    met ongeveer één per volle ronde. Andere fouten (en afgebroken beurten)
+    laten de limiet ongemoeid: ze zeggen niets over de ruimte bij Ollama. Zo ontstaat de wachtrij hier, waar hij
+    begrensd is en verzoeken met Retry-After worden geweigerd, in plaats van
+    bij Ollama, waar elk verzoek alleen maar op zijn time-out wacht.
+
+    Niet thread-safe: gebruik één controller per event loop.
+
+    Gebruik:
+    ```python
+    admission = AdmissionController(max_in_flight=16, max_queue=64)
+    await admission.acquire(deadline)
+    try:
+        antwoord = await agent.arespond(conversation, deadline=deadline)
+    except Exception as e:
+        admission.release(overloaded=is_overload(e), succeeded=False)
+        raise
+    else:
+        admission.release()
+    ```
+    """
+    def __init__(self, max_in_flight: int = 16, max_queue: int = 64, min_in_flight: int = 1):
+        """
+        Initialiseer de controller.
+
+        Args:
+            max_in_flight: Bovengrens voor het aantal gelijktijdige beurten
+            max_queue: Maximum aantal wachtende beurten; daarna volgt OverloadedError
+            min_in_flight: Ondergrens waar de limiet bij overbelasting niet onder zakt
+        """
+        if not 1 <= min_in_flight <= max_in_flight:
+            raise ValueError("Vereist 1 <= min_in_flight <= max_in_flight")
+        if max_queue < 0:
+            raise ValueError("max_queue mag niet negatief zijn")
+
+        self.max_in_flight = max_in_flight
+        self.min_in_flight = min_in_flight
+        self.max_queue = max_queue
+        self.limit = float(max_in_flight)
+        self.in_flight = 0
+        self.rejected = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+
+    @property
+    def queued(self) -> int:
+        return len(self._waiters)
+
+    def retry_after(self) -> float:
+        """Grove schatting van de wachttijd in seconden tot er weer plaats is."""
+        return max(1.0, len(self._waiters) / max(self.limit, 1.0))
+
+    async def acquire(self, deadline: Optional[Deadline] = None) -> None:
+        """
+        Wacht op een plaats voor een beurt.
+
+        Args:
+            deadline: Deadline van het verzoek; ook het wachten telt mee
+
+        Raises:
+            OverloadedError: Als de wachtrij vol is
+            DeadlineExceededError: Als de deadline verstrijkt voordat er plaats is
+        """
+        if self.in_flight < int(self.limit) and not self._waiters:
+            self.in_flight += 1
+            return
+        if len(self._waiters) >= self.max_queue:
+            self.rejected += 1
+            raise OverloadedError("Te veel gelijktijdige verzoeken", retry_after=self.retry_after())
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), None if deadline is None else deadline.remaining())
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            if waiter.done() and not waiter.cancelled():
+                # De plaats was net toegekend: geef hem door aan de volgende
+                self._release_slot()
+            else:
+                waiter.cancel()
+                self._waiters.remove(waiter)
+            if isinstance(e, asyncio.TimeoutError):
+                raise DeadlineExceededError("Deadline verstreken in de wachtrij") from None
+            raise
+
+    def release(self, overloaded: bool = False, succeeded: bool = True) -> None:
+        """
+        Geef een plaats vrij en pas de limiet aan.
+
+        Alleen een geslaagde beurt verhoogt de limiet en alleen overbelasting
+        verlaagt hem; bij elke andere fout blijft hij gelijk.
+
+        Args:
+            overloaded: True als Ollama de beurt weigerde omdat hij vol zat
+            succeeded: False als de beurt mislukte of werd afgebroken
+        """
+        if overloaded:
+            self.limit = max(float(self.min_in_flight), self.limit / 2)
+        elif succeeded:
+            self.limit = min(float(self.max_in_flight), self.limit + 1 / self.limit)
+        self._release_slot()
+
+    def _release_slot(self) -> None:
+        self.in_flight -= 1
+        while self._waiters and self.in_flight < int(self.limit):
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                self.in_flight += 1
+                waiter.set_result(None)
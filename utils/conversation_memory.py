@@ -1,12 +1,95 @@
-from typing import Dict, List, Optional, Any
+from typing import Any, Deque, Dict, Iterator, List, Optional, Tuple
+from collections import OrderedDict, deque
+from collections.abc import Mapping
 from datetime import datetime, timedelta
+from itertools import islice
+import heapq
 import json
+import threading
+import time
 import uuid
 
+from utils.tracing import span, traced
+
+class Message(Mapping):
+    """
+    Compact bericht in de sessiegeschiedenis.
+    
+    Gebruikt __slots__ en een float-tijdstempel (epoch) in plaats van een dict met
+    een ISO-string per bericht. Leest als een read-only mapping met de sleutels
+    "role", "content" en "timestamp"; de ISO-notatie wordt pas bij opvragen gemaakt.
+    """
+    __slots__ = ("role", "content", "created", "_tokens")
+    
+    _KEYS = ("role", "content", "timestamp")
+    
+    def __init__(self, role: str, content: str, created: Optional[float] = None):
+        self.role = role
+        self.content = content
+        self.created = time.time() if created is None else created
+        self._tokens = None
+    
+    def token_count(self, estimator) -> int:
+        """Aantal tokens volgens de gegeven estimator; per estimator gecachet."""
+        cached = self._tokens
+        if cached is not None and cached[0] is estimator:
+            return cached[1]
+        count = estimator(self.content)
+        self._tokens = (estimator, count)
+        return count
+    
+    @property
+    def timestamp(self) -> str:
+        """Tijdstip van het bericht in ISO-formaat."""
+        return datetime.fromtimestamp(self.created).isoformat()
+    
+    def __getitem__(self, key: str) -> Any:
+        if key == "role":
+            return self.role
+        if key == "content":
+            return self.content
+        if key == "timestamp":
+            return self.timestamp
+        raise KeyError(key)
+    
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._KEYS)
+    
+    def __len__(self) -> int:
+        return len(self._KEYS)
+    
+    def __repr__(self) -> str:
+        return f"Message(role={self.role!r}, content={self.content!r})"
+    
+    def to_prompt(self, viewer: Optional[str] = None) -> Dict[str, str]:
+        """
+        Converteer naar het berichtformaat dat naar de LLM gaat.
+        
+        Args:
+            viewer: Naam van de agent voor wie de prompt is (alleen relevant voor
+                gedeelde gesprekken, zie utils.shared_sessions)
+        """
+        return {"role": self.role, "content": self.content}
+    
+    def to_dict(self) -> Dict[str, str]:
+        """Converteer het bericht naar een dictionary voor serialisatie."""
+        return {"role": self.role, "content": self.content, "timestamp": self.timestamp}
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'Message':
+        """Maak een Message van een (geserialiseerde) dictionary."""
+        timestamp = data.get("timestamp")
+        created = datetime.fromisoformat(timestamp).timestamp() if timestamp else None
+        return cls(data["role"], data["content"], created)
+
+
 class Session:
     """
     Klasse om een sessie bij te houden met bijbehorende conversatiegeschiedenis en context.
     """
+    # Berichttype waarmee from_dict de geschiedenis terugbouwt
+    message_class = Message
+    
     def __init__(self, session_id: str = None, max_history: int = 20, ttl_hours: int = 24):
         """
         Initialiseer een nieuwe sessie.
@@ -18,58 +101,115 @@ class Session:
         """
         self.session_id = session_id or str(uuid.uuid4())
         self.created_at = datetime.now()
-        self.last_accessed = self.created_at
-        self.max_history = max_history
+        # Laatste toegang als epoch-float: goedkoop bij te werken en te vergelijken
+        self._touched = self.created_at.timestamp()
         self.ttl = timedelta(hours=ttl_hours)
-        self.history: List[Dict[str, str]] = []
+        # Ringbuffer: bij een volle geschiedenis valt het oudste bericht er in O(1) af
+        self.history: Deque[Message] = deque(maxlen=max_history)
         self.context: Dict[str, Any] = {}
+        # Lopende samenvatting van beurten die uit de geschiedenis zijn gevouwen
+        self.summary = ""
+        # Optionele waarnemer (bijv. een SessionJournal) die elke wijziging vastlegt
+        self._observer = None
+        # Serialiseert schrijfacties op deze sessie; ook bruikbaar om meerdere wijzigingen te bundelen
+        self.lock = threading.RLock()
+    
+    @property
+    def last_accessed(self) -> datetime:
+        """Tijdstip waarop de sessie voor het laatst is gebruikt."""
+        return datetime.fromtimestamp(self._touched)
+    
+    @last_accessed.setter
+    def last_accessed(self, value: datetime) -> None:
+        self._touched = value.timestamp()
+    
+    @property
+    def expires_at(self) -> float:
+        """Epoch-tijdstip waarop de sessie verloopt als ze niet meer wordt gebruikt."""
+        return self._touched + self.ttl.total_seconds()
+    
+    @property
+    def max_history(self) -> int:
+        """Maximum aantal berichten dat wordt bijgehouden in de geschiedenis."""
+        return self.history.maxlen
+    
+    @max_history.setter
+    def max_history(self, value: int) -> None:
+        self.history = deque(self.history, maxlen=value)
         
     def add_message(self, role: str, content: str) -> None:
         """Voeg een bericht toe aan de sessiegeschiedenis."""
-        self.history.append({
-            "role": role,
-            "content": content,
-            "timestamp": datetime.now().isoformat()
-        })
-        # Beperk de geschiedenis tot max_history berichten
-        if len(self.history) > self.max_history:
-            self.history = self.history[-self.max_history:]
-        self.last_accessed = datetime.now()
-    
-    def get_recent_history(self, max_messages: Optional[int] = None) -> List[Dict[str, str]]:
-        """Haal de meest recente berichten op uit de geschiedenis."""
+        with self.lock:
+            now = time.time()
+            message = Message(role, content, now)
+            self.history.append(message)
+            self._touched = now
+            if self._observer is not None:
+                self._observer.record_message(self, message)
+    
+    def get_recent_history(self, max_messages: Optional[int] = None) -> Tuple[Message, ...]:
+        """Haal de meest recente berichten op als read-only reeks (zonder de berichten te kopiëren)."""
         if max_messages is None:
-            return self.history
-        return self.history[-max_messages:]
+            return tuple(self.history)
+        start = max(len(self.history) - max_messages, 0)
+        return tuple(islice(self.history, start, None))
     
     def update_context(self, key: str, value: Any) -> None:
         """Werk de context van de sessie bij."""
-        self.context[key] = value
-        self.last_accessed = datetime.now()
+        with self.lock:
+            self.context[key] = value
+            self._touched = time.time()
+            if self._observer is not None:
+                self._observer.record_context(self, key, value)
+    
+    def apply_summary(self, summary: str, folded: List[Message]) -> None:
+        """
+        Vervang de oudste berichten door een bijgewerkte samenvatting.
+        
+        Alleen berichten die nog vooraan in de geschiedenis staan en in folded
+        voorkomen worden verwijderd; berichten die intussen zijn toegevoegd blijven staan.
+        
+        Args:
+            summary: De nieuwe lopende samenvatting (inclusief eerdere samenvatting)
+            folded: De berichten die in de samenvatting zijn verwerkt, van oud naar nieuw
+        """
+        if not folded:
+            return
+        
+        folded_ids = {id(message) for message in folded}
+        with self.lock:
+            while self.history and id(self.history[0]) in folded_ids:
+                self.history.popleft()
+            self.summary = summary
+            if self._observer is not None:
+                self._observer.record_summary(self, folded[-1].created)
     
     def get_context(self, key: str, default: Any = None) -> Any:
         """Haal een waarde op uit de context."""
         return self.context.get(key, default)
     
-    def is_expired(self) -> bool:
-        """Controleer of de sessie is verlopen."""
-        return datetime.now() > (self.last_accessed + self.ttl)
+    def is_expired(self, now: Optional[float] = None) -> bool:
+        """Controleer of de sessie is verlopen (optioneel ten opzichte van een epoch-tijdstip)."""
+        return (time.time() if now is None else now) > self.expires_at
     
     def to_dict(self) -> Dict[str, Any]:
         """Converteer de sessie naar een dictionary voor serialisatie."""
+        # list()/dict() kopiëren atomair, zodat gelijktijdige schrijvers de iteratie niet verstoren
+        history = list(self.history)
         return {
             "session_id": self.session_id,
             "created_at": self.created_at.isoformat(),
             "last_accessed": self.last_accessed.isoformat(),
             "max_history": self.max_history,
             "ttl_hours": self.ttl.total_seconds() / 3600,
-            "history": self.history,
-            "context": self.context
+            "history": [message.to_dict() for message in history],
+            "context": dict(self.context),
+            "summary": self.summary
         }
     
     @classmethod
     def from_dict(cls, data: Dict[str, Any]) -> 'Session':
-        """Maak een Session object van een dictionary."""
+        """Maak een Session object van een dictionary (de subklasse bepaalt het berichttype)."""
         session = cls(
             session_id=data["session_id"],
             max_history=data["max_history"],
@@ -77,55 +217,298 @@ class Session:
         )
         session.created_at = datetime.fromisoformat(data["created_at"])
         session.last_accessed = datetime.fromisoformat(data["last_accessed"])
-        session.history = data["history"]
+        session.history.extend(cls.message_class.from_dict(message) for message in data["history"])
         session.context = data["context"]
+        session.summary = data.get("summary", "")
         return session
 
 
+class _SessionShard:
+    """Eén lock-stripe van de SessionManager: een deel van de sessies met eigen expiry-index."""
+    __slots__ = ("lock", "sessions", "expiry_heap", "scheduled", "max_resident")
+    
+    def __init__(self, max_resident: Optional[int] = None):
+        self.lock = threading.RLock()
+        self.sessions: "OrderedDict[str, Session]" = OrderedDict()
+        self.expiry_heap: List[Tuple[float, str]] = []
+        self.scheduled: Dict[str, float] = {}
+        self.max_resident = max_resident
+
+
 class SessionManager:
     """
     Beheert meerdere sessies en zorgt voor opschoning van verlopen sessies.
+    
+    De sessies zijn verdeeld over een aantal shards, elk met een eigen lock, zodat
+    threads die verschillende sessies bedienen elkaar niet blokkeren. Schrijfacties
+    binnen één sessie worden geserialiseerd via Session.lock.
+    
+    Verloopmomenten staan per shard in een min-heap, zodat cleanup_expired alleen
+    sessies bekijkt waarvan de deadline verstreken is. Omdat een sessie haar
+    deadline zelf opschuift bij gebruik, worden verouderde heap-items lui
+    gecorrigeerd: een sessie die bij controle nog actief blijkt, wordt opnieuw ingepland.
+    
+    Via een optionele store (zie utils.session_store) wordt elke wijziging
+    vastgelegd, bijvoorbeeld als journal of in SQLite. Een store die sessies
+    lazy kan laden maakt het mogelijk om met max_resident alleen de werkset
+    in het geheugen te houden.
     """
-    def __init__(self):
-        self.sessions: Dict[str, Session] = {}
+    # Klasse van nieuw aangemaakte sessies; subklassen kunnen een eigen Session-variant kiezen
+    session_class = Session
+    
+    def __init__(
+        self,
+        reap_interval: Optional[float] = None,
+        store=None,
+        max_resident: Optional[int] = None,
+        shards: int = 16
+    ):
+        """
+        Initialiseer de sessiebeheerder.
+        
+        Args:
+            reap_interval: Optioneel interval in seconden voor een achtergrondthread
+                die verlopen sessies opruimt
+            store: Optionele SessionStore; bestaande sessies worden daaruit hersteld
+            max_resident: Maximum aantal sessies in het geheugen, evenredig verdeeld over
+                de shards; de minst recent gebruikte sessie van een shard wordt uit het
+                geheugen verwijderd (niet uit de store)
+            shards: Aantal lock-stripes waarover de sessies worden verdeeld
+        """
+        if shards < 1:
+            raise ValueError("shards moet minimaal 1 zijn")
+        if max_resident is not None and not getattr(store, "lazy", False):
+            raise ValueError("max_resident vereist een store die sessies lazy kan laden")
+        
+        per_shard = None if max_resident is None else max(1, -(-max_resident // shards))
+        self._shards = [_SessionShard(per_shard) for _ in range(shards)]
+        self._reaper: Optional[threading.Thread] = None
+        self._reaper_stop = threading.Event()
+        self.store = store
+        self.max_resident = max_resident
+        
+        if store is not None:
+            store.attach(self)
+        
+        if reap_interval:
+            self.start_reaper(reap_interval)
     
+    def _shard(self, session_id: str) -> _SessionShard:
+        return self._shards[hash(session_id) % len(self._shards)]
+    
+    @property
+    def sessions(self) -> Dict[str, Session]:
+        """Momentopname van alle sessies die in het geheugen staan."""
+        snapshot: Dict[str, Session] = {}
+        for shard in self._shards:
+            with shard.lock:
+                snapshot.update(shard.sessions)
+        return snapshot
+    
+    def __len__(self) -> int:
+        return sum(len(shard.sessions) for shard in self._shards)
+    
+    def _register(self, session: Session) -> None:
+        """Voeg een sessie toe en plan haar verloopmoment in."""
+        shard = self._shard(session.session_id)
+        with shard.lock:
+            session._observer = self.store
+            shard.sessions[session.session_id] = session
+            shard.sessions.move_to_end(session.session_id)
+            self._schedule(shard, session.session_id, session.expires_at)
+            
+            if shard.max_resident is not None:
+                while len(shard.sessions) > shard.max_resident:
+                    self._evict_oldest(shard)
+    
+    @staticmethod
+    def _schedule(shard: _SessionShard, session_id: str, deadline: float) -> None:
+        """Plaats een verloopmoment in de heap; eerdere items voor deze sessie worden ongeldig."""
+        shard.scheduled[session_id] = deadline
+        heapq.heappush(shard.expiry_heap, (deadline, session_id))
+    
+    def _evict_oldest(self, shard: _SessionShard) -> None:
+        """
+        Haal de minst recent gebruikte sessie uit het geheugen (shard-lock moet vastgehouden worden).
+        
+        De sessie blijft in de store bestaan en wordt bij het volgende gebruik opnieuw geladen.
+        """
+        session_id, _ = shard.sessions.popitem(last=False)
+        shard.scheduled.pop(session_id, None)
+        if self.store is not None:
+            self.store.flush()
+    
+    def _forget(self, shard: _SessionShard, session_id: str) -> None:
+        """Verwijder een sessie uit de manager (shard-lock moet vastgehouden worden)."""
+        session = shard.sessions.pop(session_id)
+        session._observer = None
+        shard.scheduled.pop(session_id, None)
+        if self.store is not None:
+            self.store.record_delete(session_id)
+    
+    def _create_locked(self, shard: _SessionShard, **kwargs) -> Session:
+        """Maak een sessie aan in een shard (shard-lock moet vastgehouden worden)."""
+        session = self.session_class(**kwargs)
+        # De sessie-lock zorgt dat het create-record altijd vóór berichten in de store komt
+        with session.lock:
+            self._register(session)
+            if self.store is not None:
+                self.store.record_create(session)
+        return session
+    
+    @traced("session.create")
     def create_session(self, **kwargs) -> Session:
         """Maak een nieuwe sessie aan en voeg deze toe aan de manager."""
-        session = Session(**kwargs)
-        self.sessions[session.session_id] = session
-        return session
+        session_id = kwargs.get("session_id") or str(uuid.uuid4())
+        kwargs["session_id"] = session_id
+        shard = self._shard(session_id)
+        with shard.lock:
+            return self._create_locked(shard, **kwargs)
     
-    def get_session(self, session_id: str) -> Optional[Session]:
-        """Haal een sessie op bij ID. Retourneert None als de sessie niet bestaat of verlopen is."""
-        session = self.sessions.get(session_id)
+    def _get_locked(self, shard: _SessionShard, session_id: str) -> Optional[Session]:
+        """Zoek of laad een geldige sessie (shard-lock moet vastgehouden worden)."""
+        session = shard.sessions.get(session_id)
         if session is None:
-            return None
+            if self.store is None:
+                return None
+            with span("session.load", session_id=session_id):
+                session = self.store.load_session(session_id)
+            if session is None:
+                return None
+            self._register(session)
+        elif shard.max_resident is not None:
+            shard.sessions.move_to_end(session_id)
         
         if session.is_expired():
-            del self.sessions[session_id]
+            self._forget(shard, session_id)
             return None
-            
+        
         return session
     
+    @traced("session.get")
+    def get_session(self, session_id: str) -> Optional[Session]:
+        """Haal een sessie op bij ID. Retourneert None als de sessie niet bestaat of verlopen is."""
+        shard = self._shard(session_id)
+        
+        # Snelle leesroute zonder lock voor een geldige sessie die al in het geheugen staat
+        session = shard.sessions.get(session_id)
+        if session is not None and shard.max_resident is None and not session.is_expired():
+            return session
+        
+        with shard.lock:
+            return self._get_locked(shard, session_id)
+    
+    def get_or_create_session(self, session_id: Optional[str] = None, **kwargs) -> Session:
+        """
+        Haal een sessie op of maak haar aan, atomair binnen de shard van het sessie-ID.
+        
+        Twee threads die gelijktijdig hetzelfde sessie-ID opvragen krijgen zo altijd
+        hetzelfde Session-object.
+        
+        Args:
+            session_id: Optioneel sessie-ID. Wordt automatisch gegenereerd indien niet opgegeven.
+            **kwargs: Extra argumenten voor een nieuwe Session
+            
+        Returns:
+            Een bestaande of nieuwe sessie
+        """
+        if not session_id:
+            return self.create_session(**kwargs)
+        
+        with span("session.get_or_create") as current:
+            shard = self._shard(session_id)
+            with shard.lock:
+                session = self._get_locked(shard, session_id)
+                current.set_attribute("created", session is None)
+                if session is None:
+                    session = self._create_locked(shard, session_id=session_id, **kwargs)
+                return session
+    
     def cleanup_expired(self) -> int:
         """Verwijder alle verlopen sessies en retourneer het aantal verwijderde sessies."""
-        expired_ids = [
-            session_id 
-            for session_id, session in self.sessions.items()
-            if session.is_expired()
-        ]
+        now = time.time()
+        removed = 0
+        
+        for shard in self._shards:
+            with shard.lock:
+                heap = shard.expiry_heap
+                while heap and heap[0][0] <= now:
+                    deadline, session_id = heapq.heappop(heap)
+                    
+                    # Verouderd item: de sessie is verwijderd of opnieuw ingepland
+                    if shard.scheduled.get(session_id) != deadline:
+                        continue
+                    
+                    session = shard.sessions[session_id]
+                    if session.is_expired(now):
+                        self._forget(shard, session_id)
+                        removed += 1
+                    else:
+                        # Sessie is sinds het inplannen gebruikt: plan het nieuwe verloopmoment in
+                        self._schedule(shard, session_id, session.expires_at)
         
-        for session_id in expired_ids:
-            del self.sessions[session_id]
+        # Verlopen sessies die alleen nog in de store staan
+        if self.store is not None:
+            removed += self.store.delete_expired(now)
             
-        return len(expired_ids)
+        return removed
+    
+    def start_reaper(self, interval: float = 60.0) -> None:
+        """
+        Start een achtergrondthread die periodiek verlopen sessies opruimt.
+        
+        Args:
+            interval: Aantal seconden tussen twee opruimrondes
+        """
+        if self._reaper is not None and self._reaper.is_alive():
+            return
+        
+        self._reaper_stop.clear()
+        
+        def reap() -> None:
+            while not self._reaper_stop.wait(interval):
+                self.cleanup_expired()
+        
+        self._reaper = threading.Thread(target=reap, name="session-reaper", daemon=True)
+        self._reaper.start()
+    
+    def stop_reaper(self) -> None:
+        """Stop de achtergrondthread voor opruimen, indien actief."""
+        if self._reaper is None:
+            return
+        self._reaper_stop.set()
+        self._reaper.join()
+        self._reaper = None
+    
+    def flush(self) -> None:
+        """Schrijf openstaande wijzigingen naar de store."""
+        if self.store is not None:
+            self.store.flush()
+    
+    def compact(self) -> None:
+        """Comprimeer de store (bijv. journal naar snapshot)."""
+        if self.store is not None:
+            self.store.compact()
+    
+    def close(self) -> None:
+        """Stop de reaper en sluit de store."""
+        self.stop_reaper()
+        if self.store is not None:
+            self.store.close()
     
     def save_to_file(self, filepath: str) -> None:
         """Sla alle sessies op in een bestand."""
+        # Bewust zonder shard-locks: een store kan dit aanroepen terwijl een andere
+        # thread een shard-lock vasthoudt en op die store wacht. list() kopieert atomair.
+        sessions = [
+            session
+            for shard in self._shards
+            for session in list(shard.sessions.values())
+        ]
         data = {
             "sessions": {
-                session_id: session.to_dict()
-                for session_id, session in self.sessions.items()
+                session.session_id: session.to_dict()
+                for session in sessions
             }
         }
         with open(filepath, 'w', encoding='utf-8') as f:
@@ -140,9 +523,9 @@ class SessionManager:
                 data = json.load(f)
             
             for session_data in data.get("sessions", {}).values():
-                session = Session.from_dict(session_data)
+                session = cls.session_class.from_dict(session_data)
                 if not session.is_expired():
-                    manager.sessions[session.session_id] = session
+                    manager._register(session)
                     
         except (FileNotFoundError, json.JSONDecodeError):
             # Bestand bestaat niet of is ongeldig, start met lege manager
@@ -0,0 +1,214 @@
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set
+
+
+def normalize_model_name(name: str) -> str:
+    """Vul een modelnaam zonder tag aan met ":latest", zoals Ollama zelf doet."""
+    return name if ":" in name else f"{name}:latest"
+
+
+class Endpoint:
+    """
+    Eén Ollama-host in een EndpointPool, met de toestand die voor routering nodig is.
+
+    Attributes:
+        url: Basis URL van de host
+        outstanding: Aantal aanroepen dat op dit moment naar deze host loopt
+        failures: Aantal opeenvolgende mislukte aanroepen
+        open_until: Monotone tijd tot wanneer de circuit breaker open staat
+        resident: Modellen waarvan bekend is dat ze op deze host geladen zijn
+        latency: Exponentieel gewogen gemiddelde duur van geslaagde aanroepen (seconden)
+        probing: True zolang de ene proefaanroep van een half-open breaker loopt
+    """
+    def __init__(self, url: str):
+        self.url = url.rstrip("/")
+        self.outstanding = 0
+        self.failures = 0
+        self.open_until = 0.0
+        self.resident: Set[str] = set()
+        self.latency: Optional[float] = None
+        self.probing = False
+        self.requests = 0
+        self.errors = 0
+
+    def is_available(self, now: Optional[float] = None) -> bool:
+        """Controleer of de circuit breaker van deze host gesloten (of half-open) is."""
+        return (now if now is not None else time.monotonic()) >= self.open_until
+
+    def __repr__(self) -> str:
+        return f"Endpoint({self.url!r}, outstanding={self.outstanding}, failures={self.failures})"
+
+
+class EndpointPool:
+    """
+    Verdeelt aanroepen over meerdere Ollama-hosts.
+
+    Elke aanroep gaat naar de beschikbare host met de minste lopende aanroepen,
+    waarbij hosts die het gevraagde model al geladen hebben een voorsprong van
+    residency_bonus krijgen: een koude host wordt pas gekozen als de warme host
+    duidelijk drukker is. Bij gelijke stand wint de host met de laagste latency.
+
+    Gezondheid wordt passief bijgehouden: na failure_threshold opeenvolgende fouten
+    gaat de circuit breaker van een host reset_timeout seconden open. Daarna krijgt
+    de host precies één proefaanroep (half-open); zolang die loopt, slaan andere
+    aanroepen de host over. Slaagt de proef, dan sluit de breaker, anders gaat
+    hij direct weer open. Staan alle breakers open (of loopt overal een proef),
+    dan kiest choose niets: aanroepen falen direct in plaats van een herstellende
+    host te overspoelen, ook in een pool met één host.
+
+    Gebruik:
+    ```python
+    pool = EndpointPool(["http://gpu1:11434", "http://gpu2:11434"])
+    llm = OllamaClient(model="llama3", endpoints=pool, hedge_after=2.0)
+    ```
+    """
+    def __init__(
+        self,
+        urls: Sequence[str],
+        failure_threshold: int = 3,
+        reset_timeout: float = 30.0,
+        residency_bonus: int = 2,
+        latency_alpha: float = 0.2
+    ):
+        """
+        Initialiseer de pool.
+
+        Args:
+            urls: Basis URL's van de Ollama-hosts
+            failure_threshold: Aantal opeenvolgende fouten waarna een host wordt uitgeschakeld
+            reset_timeout: Aantal seconden dat een uitgeschakelde host wordt overgeslagen
+            residency_bonus: Voorsprong (in lopende aanroepen) van hosts met het model geladen
+            latency_alpha: Gewicht van de nieuwste meting in de gemiddelde latency
+        """
+        if not urls:
+            raise ValueError("Een EndpointPool heeft minimaal één URL nodig")
+        if failure_threshold < 1:
+            raise ValueError("failure_threshold moet minimaal 1 zijn")
+
+        self.endpoints = [Endpoint(url) for url in urls]
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.residency_bonus = residency_bonus
+        self.latency_alpha = latency_alpha
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.endpoints)
+
+    def __iter__(self):
+        return iter(self.endpoints)
+
+    def _score(self, endpoint: Endpoint, model: Optional[str]) -> tuple:
+        """Sorteersleutel: lopende aanroepen (min bonus bij residentie), daarna latency."""
+        load = endpoint.outstanding
+        if model is not None and normalize_model_name(model) in endpoint.resident:
+            load -= self.residency_bonus
+        return (load, endpoint.latency or 0.0)
+
+    def choose(self, model: Optional[str] = None, exclude: Iterable[Endpoint] = ()) -> Optional[Endpoint]:
+        """
+        Kies een host voor een aanroep en tel die aanroep als lopend.
+
+        Elke gekozen host moet met release worden vrijgegeven.
+
+        Args:
+            model: Het model dat de aanroep gebruikt
+            exclude: Hosts die voor deze aanroep al geprobeerd zijn
+
+        Returns:
+            De gekozen host, of None als alle hosts zijn uitgesloten of hun breaker open staat
+        """
+        excluded = {id(endpoint) for endpoint in exclude}
+        now = time.monotonic()
+
+        with self._lock:
+            candidates = [e for e in self.endpoints if id(e) not in excluded]
+            if not candidates:
+                return None
+
+            available = [e for e in candidates if e.is_available(now)]
+            if not available:
+                return None
+            endpoint = min(available, key=lambda e: self._score(e, model))
+            if endpoint.failures >= self.failure_threshold:
+                # Half-open: dit is de proefaanroep; de rest faalt direct tot die klaar is
+                endpoint.probing = True
+                endpoint.open_until = now + self.reset_timeout
+
+            endpoint.outstanding += 1
+            endpoint.requests += 1
+            return endpoint
+
+    def release(
+        self,
+        endpoint: Endpoint,
+        model: Optional[str] = None,
+        ok: Optional[bool] = True,
+        elapsed: Optional[float] = None
+    ) -> None:
+        """
+        Geef een host vrij na een aanroep en werk zijn gezondheid bij.
+
+        Args:
+            endpoint: De host die met choose is gekozen
+            model: Het model dat de aanroep gebruikte
+            ok: True bij succes, False bij een fout, None als de aanroep is afgebroken
+                (bijv. de verliezer van een hedge) en niet meetelt
+            elapsed: Duur van de aanroep in seconden
+        """
+        with self._lock:
+            endpoint.outstanding -= 1
+            probing, endpoint.probing = endpoint.probing, False
+            if ok is None:
+                if probing:
+                    # Afgebroken proef: de volgende aanroep mag opnieuw proberen
+                    endpoint.open_until = time.monotonic()
+                return
+
+            if ok:
+                endpoint.failures = 0
+                endpoint.open_until = 0.0
+                if model is not None:
+                    endpoint.resident.add(normalize_model_name(model))
+                if elapsed is not None:
+                    if endpoint.latency is None:
+                        endpoint.latency = elapsed
+                    else:
+                        endpoint.latency += self.latency_alpha * (elapsed - endpoint.latency)
+            else:
+                endpoint.failures += 1
+                endpoint.errors += 1
+                if endpoint.failures >= self.failure_threshold:
+                    endpoint.open_until = time.monotonic() + self.reset_timeout
+
+    def update_residency(self, endpoint: Endpoint, models: Iterable[str]) -> None:
+        """Vervang de bekende geladen modellen van een host (bijv. na /api/ps)."""
+        with self._lock:
+            endpoint.resident = {normalize_model_name(model) for model in models}
+
+    def mark_resident(self, endpoint: Endpoint, model: str, resident: bool = True) -> None:
+        """Markeer een model als geladen (of ontladen) op een host."""
+        with self._lock:
+            if resident:
+                endpoint.resident.add(normalize_model_name(model))
+            else:
+                endpoint.resident.discard(normalize_model_name(model))
+
+    def stats(self) -> List[Dict[str, Any]]:
+        """Momentopname van de toestand van alle hosts."""
+        now = time.monotonic()
+        with self._lock:
+            return [
+                {
+                    "url": e.url,
+                    "available": e.is_available(now),
+                    "outstanding": e.outstanding,
+                    "failures": e.failures,
+                    "requests": e.requests,
+                    "errors": e.errors,
+                    "latency": e.latency,
+                    "resident": sorted(e.resident),
+                }
+                for e in self.endpoints
+            ]
@@ -0,0 +1,32 @@
+from typing import Optional
+
+
+class LLMError(Exception):
+    """
+    Basisklasse voor fouten bij het genereren van een LLM-antwoord.
+
+    Attributes:
+        transient: True als een nieuwe poging zinvol is (verbindingsfout, 5xx, 429)
+    """
+    transient = False
+
+
+class LLMConnectionError(LLMError):
+    """Ollama is (tijdelijk) niet bereikbaar: verbindingsfout, time-out, 5xx of 429."""
+    transient = True
+
+    def __init__(self, message: str, status: Optional[int] = None):
+        super().__init__(message)
+        self.status = status
+
+
+class LLMResponseError(LLMError):
+    """Ollama weigert het verzoek (4xx) of geeft een onbruikbaar antwoord terug."""
+
+    def __init__(self, message: str, status: Optional[int] = None):
+        super().__init__(message)
+        self.status = status
+
+
+class DeadlineExceededError(LLMError, TimeoutError):
+    """De deadline van een aanroep is verstreken voordat er een antwoord was."""
@@ -0,0 +1,387 @@
+import argparse
+import json
+import random
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
+
+from utils.endpoint_pool import normalize_model_name
+
+
+class FakeOllamaServer:
+    """
+    Lokale nabootsing van de Ollama API voor tests en benchmarks, zonder model.
+
+    Spreekt het /api/chat-protocol (NDJSON-streaming en niet-streaming, inclusief de
+    duurvelden die Ollama meestuurt) en /api/ps. Het gedrag is instelbaar:
+
+    - latency: wachttijd vóór het eerste token (prompt-verwerking)
+    - tokens_per_second: generatiesnelheid; None = alle tokens direct
+    - load_latency: extra wachttijd bij de eerste aanroep van een niet-geladen model
+    - failure_rate / failure_status: kans op een HTTP-fout in plaats van een antwoord
+    - stream_failure_rate: kans dat een stream na het eerste token wordt afgebroken
+
+    Gebruik:
+    ```python
+    with FakeOllamaServer(latency=0.05, tokens_per_second=200) as server:
+        llm = OllamaClient(model="llama3", base_url=server.url)
+        llm.generate_response([{"role": "user", "content": "Hallo"}])
+    ```
+
+    Of als los proces, zodat de server de GIL niet deelt met de client:
+    `python -m utils.fake_ollama --port 11435 --latency 0.05 --tps 200`
+    """
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        latency: float = 0.0,
+        tokens_per_second: Optional[float] = None,
+        response_tokens: int = 32,
+        load_latency: float = 0.0,
+        failure_rate: float = 0.0,
+        failure_status: int = 500,
+        stream_failure_rate: float = 0.0,
+        seed: Optional[int] = None
+    ):
+        """
+        Initialiseer de server (nog niet gestart).
+
+        Args:
+            host: Adres waarop de server luistert
+            port: Poort (0 = een vrije poort kiezen)
+            latency: Seconden vóór het eerste token
+            tokens_per_second: Aantal tokens per seconde tijdens het genereren (None = onbegrensd)
+            response_tokens: Aantal tokens per antwoord
+            load_latency: Seconden om een niet-geladen model te laden
+            failure_rate: Kans (0..1) dat een /api/chat-aanroep met failure_status faalt
+            failure_status: HTTP-status van een geïnjecteerde fout
+            stream_failure_rate: Kans (0..1) dat een stream halverwege wordt afgebroken
+            seed: Seed voor de foutinjectie, voor reproduceerbare runs
+        """
+        if not 0.0 <= failure_rate <= 1.0 or not 0.0 <= stream_failure_rate <= 1.0:
+            raise ValueError("failure_rate en stream_failure_rate moeten tussen 0 en 1 liggen")
+        if tokens_per_second is not None and tokens_per_second <= 0:
+            raise ValueError("tokens_per_second moet groter dan 0 zijn")
+
+        self.host = host
+        self.port = port
+        self.latency = latency
+        self.tokens_per_second = tokens_per_second
+        self.response_tokens = response_tokens
+        self.load_latency = load_latency
+        self.failure_rate = failure_rate
+        self.failure_status = failure_status
+        self.stream_failure_rate = stream_failure_rate
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._loaded: Dict[str, float] = {}
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._thread: Optional[threading.Thread] = None
+        self.requests = 0
+        self.failures = 0
+        self.active = 0
+        self.max_active = 0
+        self.received: List[Dict[str, Any]] = []
+
+    @property
+    def url(self) -> str:
+        """Basis URL van de draaiende server."""
+        if self._server is None:
+            raise RuntimeError("FakeOllamaServer is niet gestart")
+        return f"http://{self.host}:{self._server.server_address[1]}"
+
+    def start(self) -> "FakeOllamaServer":
+        """Start de server in een achtergrondthread."""
+        if self._server is not None:
+            return self
+        self._server = ThreadingHTTPServer((self.host, self.port), _make_handler(self))
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Stop de server en geef de poort vrij."""
+        if self._server is None:
+            return
+        self._server.shutdown()
+        self._server.server_close()
+        self._thread.join()
+        self._server = None
+        self._thread = None
+
+    def __enter__(self) -> "FakeOllamaServer":
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+    def reset_stats(self) -> None:
+        """Zet de tellers en ontvangen payloads terug op nul."""
+        with self._lock:
+            self.requests = 0
+            self.failures = 0
+            self.max_active = self.active
+            self.received = []
+
+    def loaded_models(self) -> List[str]:
+        """Namen van de modellen die op dit moment 'geladen' zijn."""
+        now = time.monotonic()
+        with self._lock:
+            return [name for name, until in self._loaded.items() if until > now]
+
+    def _begin(self, payload: Dict[str, Any]) -> bool:
+        """Registreer een /api/chat-aanroep; geeft aan of er een fout geïnjecteerd wordt."""
+        with self._lock:
+            self.requests += 1
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+            self.received.append(payload)
+            fail = self._random.random() < self.failure_rate
+            if fail:
+                self.failures += 1
+            return fail
+
+    def _end(self) -> None:
+        with self._lock:
+            self.active -= 1
+
+    def _should_break_stream(self) -> bool:
+        with self._lock:
+            broken = self._random.random() < self.stream_failure_rate
+            if broken:
+                self.failures += 1
+            return broken
+
+    def _load(self, model: str, keep_alive: Union[str, float, None]) -> float:
+        """
+        Laad een model (of ontlaad het bij keep_alive 0) en geef de laadtijd terug.
+        """
+        seconds = _parse_keep_alive(keep_alive)
+        now = time.monotonic()
+        with self._lock:
+            resident = self._loaded.get(model, 0.0) > now
+            if seconds == 0:
+                self._loaded.pop(model, None)
+                return 0.0
+            self._loaded[model] = now + seconds
+        if resident or self.load_latency <= 0:
+            return 0.0
+        time.sleep(self.load_latency)
+        return self.load_latency
+
+    def _ps(self) -> Dict[str, Any]:
+        """Antwoord op /api/ps in het formaat van Ollama."""
+        now = time.monotonic()
+        with self._lock:
+            loaded = [(name, until) for name, until in self._loaded.items() if until > now]
+        models = []
+        for name, until in loaded:
+            expires = datetime.now(timezone.utc) + timedelta(seconds=min(until - now, 10 ** 9))
+            models.append({
+                "name": name,
+                "model": name,
+                "size": 0,
+                "size_vram": 0,
+                "expires_at": expires.isoformat()
+            })
+        return {"models": models}
+
+    def _tokens(self, messages: List[Dict[str, Any]]) -> List[str]:
+        """Deterministisch antwoord van response_tokens tokens, afgeleid van de laatste vraag."""
+        question = next(
+            (m.get("content", "") for m in reversed(messages) if m.get("role") == "user"), ""
+        )
+        words = question.split() or ["antwoord"]
+        return [words[i % len(words)] + " " for i in range(self.response_tokens)]
+
+    def _chat(self, payload: Dict[str, Any]) -> Iterator[Tuple[Dict[str, Any], bool]]:
+        """
+        Genereer de chunks van een /api/chat-antwoord, met de ingestelde vertragingen.
+
+        Yields:
+            Tuples van (chunk, of het de afsluitende chunk is)
+        """
+        start = time.perf_counter()
+        model = normalize_model_name(payload.get("model", ""))
+        messages = payload.get("messages", [])
+        load_seconds = self._load(model, payload.get("keep_alive"))
+
+        if not messages:
+            # Lege aanroep: alleen het model laden, zoals Ollama doet
+            yield {
+                "model": payload.get("model"),
+                "created_at": _now(),
+                "message": {"role": "assistant", "content": ""},
+                "done_reason": "unload" if _parse_keep_alive(payload.get("keep_alive")) == 0 else "load",
+                "done": True
+            }, True
+            return
+
+        time.sleep(self.latency)
+        prompt_done = time.perf_counter()
+        prompt_tokens = sum(len(str(m.get("content", "")).split()) for m in messages)
+
+        tokens = self._tokens(messages)
+        delay = 0.0 if self.tokens_per_second is None else 1.0 / self.tokens_per_second
+        for token in tokens:
+            if delay:
+                time.sleep(delay)
+            yield {
+                "model": payload.get("model"),
+                "created_at": _now(),
+                "message": {"role": "assistant", "content": token},
+                "done": False
+            }, False
+
+        end = time.perf_counter()
+        yield {
+            "model": payload.get("model"),
+            "created_at": _now(),
+            "message": {"role": "assistant", "content": ""},
+            "done_reason": "stop",
+            "done": True,
+            "total_duration": int((end - start) * 1e9),
+            "load_duration": int(load_seconds * 1e9),
+            "prompt_eval_count": prompt_tokens,
+            "prompt_eval_duration": int((prompt_done - start - load_seconds) * 1e9),
+            "eval_count": len(tokens),
+            "eval_duration": int((end - prompt_done) * 1e9)
+        }, True
+
+
+def _now() -> str:
+    """Tijdstempel in het formaat van het created_at-veld van Ollama."""
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _parse_keep_alive(value: Union[str, float, None]) -> float:
+    """Vertaal een keep_alive-waarde ("30m", 300, -1, None) naar seconden."""
+    if value is None:
+        return 300.0
+    if isinstance(value, str):
+        units = {"s": 1, "m": 60, "h": 3600}
+        if value and value[-1] in units:
+            return float(value[:-1]) * units[value[-1]]
+        value = float(value)
+    return float("inf") if value < 0 else float(value)
+
+
+def _make_handler(fake: FakeOllamaServer):
+    """Maak een request handler die aan één FakeOllamaServer is gekoppeld."""
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        # Zonder dit kost elke aanroep ~40 ms door Nagle en delayed ACK
+        disable_nagle_algorithm = True
+
+        def _json(self, status: int, data: Dict[str, Any]) -> None:
+            body = json.dumps(data).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            if self.path == "/api/ps":
+                self._json(200, fake._ps())
+            else:
+                self._json(404, {"error": f"onbekend pad {self.path}"})
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length", 0))
+            try:
+                payload = json.loads(self.rfile.read(length) or b"{}")
+            except ValueError:
+                self._json(400, {"error": "ongeldige JSON"})
+                return
+            if self.path != "/api/chat":
+                self._json(404, {"error": f"onbekend pad {self.path}"})
+                return
+
+            if fake._begin(payload):
+                try:
+                    self._json(fake.failure_status, {"error": "geïnjecteerde fout"})
+                finally:
+                    fake._end()
+                return
+
+            try:
+                if payload.get("stream", True):
+                    self._stream(payload)
+                else:
+                    final = {}
+                    parts = []
+                    for chunk, done in fake._chat(payload):
+                        parts.append(chunk["message"]["content"])
+                        if done:
+                            final = chunk
+                    final["message"] = {"role": "assistant", "content": "".join(parts)}
+                    self._json(200, final)
+            except (BrokenPipeError, ConnectionResetError):
+                pass
+            finally:
+                fake._end()
+
+        def _stream(self, payload: Dict[str, Any]) -> None:
+            """Stuur het antwoord als NDJSON met chunked transfer encoding."""
+            self.send_response(200)
+            self.send_header("Content-Type", "application/x-ndjson")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            first = True
+            for chunk, done in fake._chat(payload):
+                if not first and not done and fake._should_break_stream():
+                    # Verbinding halverwege verbreken, zonder afsluitende chunk
+                    self.close_connection = True
+                    self.wfile.flush()
+                    return
+                first = False
+                line = json.dumps(chunk).encode() + b"\n"
+                self.wfile.write(f"{len(line):x}\r\n".encode() + line + b"\r\n")
+                self.wfile.flush()
+            self.wfile.write(b"0\r\n\r\n")
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Start een nep-Ollama server.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11435)
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconden tot het eerste token")
+    parser.add_argument("--tps", type=float, default=None, help="Tokens per seconde (standaard onbegrensd)")
+    parser.add_argument("--tokens", type=int, default=32, help="Tokens per antwoord")
+    parser.add_argument("--load-latency", type=float, default=0.0, help="Seconden om een model te laden")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="Kans op een geïnjecteerde fout")
+    parser.add_argument("--failure-status", type=int, default=500, help="HTTP-status van een geïnjecteerde fout")
+    parser.add_argument("--seed", type=int, default=None, help="Seed voor de foutinjectie")
+    args = parser.parse_args(argv)
+
+    server = FakeOllamaServer(
+        host=args.host,
+        port=args.port,
+        latency=args.latency,
+        tokens_per_second=args.tps,
+        response_tokens=args.tokens,
+        load_latency=args.load_latency,
+        failure_rate=args.failure_rate,
+        failure_status=args.failure_status,
+        seed=args.seed
+    ).start()
+    print(f"Nep-Ollama luistert op {server.url}")
+    try:
+        server._thread.join()
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
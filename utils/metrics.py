@@ -0,0 +1,387 @@
+import contextvars
+import json
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Callable, Deque, Dict, Iterator, List, Optional, Tuple
+
+# Naam van de agent namens wie de huidige LLM-aanroep loopt (leeg = onbekend)
+current_agent: contextvars.ContextVar[str] = contextvars.ContextVar("current_agent", default="")
+
+# Grenzen (seconden) van de histogrammen voor wandkloktijd en time-to-first-token
+DEFAULT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+_NANOS = 1e9
+
+
+@contextmanager
+def agent_scope(name: str) -> Iterator[None]:
+    """
+    Schrijf LLM-aanroepen binnen dit blok toe aan een agent.
+
+    Herstelt bij het verlaten de vorige waarde in plaats van een token te
+    resetten, zodat het blok ook veilig is rond generators die in een andere
+    context worden afgesloten.
+    """
+    previous = current_agent.get()
+    current_agent.set(name)
+    try:
+        yield
+    finally:
+        current_agent.set(previous)
+
+
+class CallMetrics:
+    """
+    Metingen van één aanroep naar Ollama.
+
+    De duurvelden komen uit het (laatste) antwoord van /api/chat en zijn omgerekend
+    van nanoseconden naar seconden; ze ontbreken (None) bij een mislukte aanroep.
+    wall_time en ttft zijn aan de kant van de client gemeten.
+
+    Attributes:
+        model: Het gebruikte model
+        agent: De agent namens wie de aanroep liep ("" als onbekend)
+        endpoint: De Ollama-host
+        stream: Of het een streaming aanroep was
+        ok: Of de aanroep slaagde
+        wall_time: Duur van verzenden tot het laatste byte
+        ttft: Tijd tot het eerste token (alleen bij streaming)
+        load_duration: Tijd die Ollama nodig had om het model te laden
+        prompt_eval_count: Aantal prompt-tokens dat Ollama heeft verwerkt (prefill)
+        prompt_eval_duration: Duur van de prefill
+        eval_count: Aantal gegenereerde tokens
+        eval_duration: Duur van het genereren (decode)
+        total_duration: Totale duur volgens Ollama
+    """
+    __slots__ = (
+        "model", "agent", "endpoint", "stream", "ok", "wall_time", "ttft",
+        "load_duration", "prompt_eval_count", "prompt_eval_duration",
+        "eval_count", "eval_duration", "total_duration", "timestamp"
+    )
+
+    def __init__(
+        self,
+        model: str,
+        agent: str = "",
+        endpoint: str = "",
+        stream: bool = False,
+        ok: bool = True,
+        wall_time: float = 0.0,
+        ttft: Optional[float] = None,
+        load_duration: Optional[float] = None,
+        prompt_eval_count: Optional[int] = None,
+        prompt_eval_duration: Optional[float] = None,
+        eval_count: Optional[int] = None,
+        eval_duration: Optional[float] = None,
+        total_duration: Optional[float] = None
+    ):
+        self.model = model
+        self.agent = agent
+        self.endpoint = endpoint
+        self.stream = stream
+        self.ok = ok
+        self.wall_time = wall_time
+        self.ttft = ttft
+        self.load_duration = load_duration
+        self.prompt_eval_count = prompt_eval_count
+        self.prompt_eval_duration = prompt_eval_duration
+        self.eval_count = eval_count
+        self.eval_duration = eval_duration
+        self.total_duration = total_duration
+        self.timestamp = time.time()
+
+    @classmethod
+    def from_response(cls, data: Optional[Dict[str, Any]], **kwargs) -> "CallMetrics":
+        """
+        Maak metingen uit een /api/chat-antwoord (of de afsluitende stream-chunk).
+
+        Args:
+            data: Het JSON-antwoord van Ollama, of None als er geen is
+            **kwargs: Velden die aan de kant van de client zijn gemeten (model, wall_time, ...)
+        """
+        data = data or {}
+
+        def seconds(key: str) -> Optional[float]:
+            value = data.get(key)
+            return value / _NANOS if isinstance(value, (int, float)) else None
+
+        return cls(
+            load_duration=seconds("load_duration"),
+            prompt_eval_count=data.get("prompt_eval_count"),
+            prompt_eval_duration=seconds("prompt_eval_duration"),
+            eval_count=data.get("eval_count"),
+            eval_duration=seconds("eval_duration"),
+            total_duration=seconds("total_duration"),
+            **kwargs
+        )
+
+    @property
+    def prompt_tokens_per_second(self) -> Optional[float]:
+        """Prefill-snelheid volgens Ollama."""
+        if not self.prompt_eval_count or not self.prompt_eval_duration:
+            return None
+        return self.prompt_eval_count / self.prompt_eval_duration
+
+    @property
+    def eval_tokens_per_second(self) -> Optional[float]:
+        """Decode-snelheid volgens Ollama."""
+        if not self.eval_count or not self.eval_duration:
+            return None
+        return self.eval_count / self.eval_duration
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Alle velden plus de afgeleide snelheden als dict."""
+        data = {name: getattr(self, name) for name in self.__slots__}
+        data["prompt_tokens_per_second"] = self.prompt_tokens_per_second
+        data["eval_tokens_per_second"] = self.eval_tokens_per_second
+        return data
+
+    def __repr__(self) -> str:
+        return (
+            f"CallMetrics(model={self.model!r}, agent={self.agent!r}, ok={self.ok}, "
+            f"wall_time={self.wall_time:.3f})"
+        )
+
+
+class _Histogram:
+    """Cumulatief histogram in de stijl van Prometheus."""
+    __slots__ = ("buckets", "counts", "total", "count")
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+        self.total += value
+        self.count += 1
+
+
+class _Aggregate:
+    """Opgetelde metingen voor één combinatie van model en agent."""
+    # Velden die als som (en daarmee als gemiddelde) worden bijgehouden
+    SUMMED = (
+        "load_duration", "prompt_eval_count", "prompt_eval_duration",
+        "eval_count", "eval_duration", "total_duration"
+    )
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.calls = 0
+        self.errors = 0
+        self.sums = {name: 0.0 for name in self.SUMMED}
+        self.wall = _Histogram(buckets)
+        self.ttft = _Histogram(buckets)
+
+    def add(self, metrics: CallMetrics) -> None:
+        self.calls += 1
+        if not metrics.ok:
+            self.errors += 1
+        self.wall.observe(metrics.wall_time)
+        if metrics.ttft is not None:
+            self.ttft.observe(metrics.ttft)
+        for name in self.SUMMED:
+            value = getattr(metrics, name)
+            if value is not None:
+                self.sums[name] += value
+
+    def summary(self) -> Dict[str, Any]:
+        ok = self.calls - self.errors
+
+        def average(total: float, n: float) -> Optional[float]:
+            return total / n if n else None
+
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "wall_time_avg": average(self.wall.total, self.wall.count),
+            "ttft_avg": average(self.ttft.total, self.ttft.count),
+            "load_duration_avg": average(self.sums["load_duration"], ok),
+            "prompt_eval_duration_avg": average(self.sums["prompt_eval_duration"], ok),
+            "eval_duration_avg": average(self.sums["eval_duration"], ok),
+            "prompt_tokens": int(self.sums["prompt_eval_count"]),
+            "eval_tokens": int(self.sums["eval_count"]),
+            "prompt_tokens_per_second": average(
+                self.sums["prompt_eval_count"], self.sums["prompt_eval_duration"]
+            ),
+            "eval_tokens_per_second": average(self.sums["eval_count"], self.sums["eval_duration"]),
+        }
+
+
+class MetricsRegistry:
+    """
+    Verzamelt CallMetrics van OllamaClient en telt ze op per model en per agent.
+
+    De opgetelde cijfers laten zien waar de tijd heen gaat: model laden
+    (load_duration), prompt verwerken (prompt_eval_duration) of tokens genereren
+    (eval_duration). Ze zijn te exporteren als Prometheus-tekstformaat of als JSON.
+
+    Gebruik:
+    ```python
+    metrics = MetricsRegistry()
+    llm = OllamaClient(model="llama3", metrics=metrics)
+    agent = FrontendDeveloperAgent(llm=llm)
+    agent.respond([{"role": "user", "content": "Hallo"}])
+
+    metrics.snapshot()        # per model/agent: aanroepen, gemiddelden, tokens/s
+    metrics.to_prometheus()   # voor een /metrics-endpoint
+    metrics.subscribe(lambda m: print(m.to_dict()))   # elke aanroep direct zien
+    ```
+    """
+    def __init__(self, history: int = 256, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        """
+        Initialiseer het register.
+
+        Args:
+            history: Aantal recente CallMetrics dat bewaard blijft
+            buckets: Bovengrenzen (seconden) van de latency-histogrammen
+        """
+        self.buckets = tuple(sorted(buckets))
+        self._lock = threading.Lock()
+        self._aggregates: Dict[Tuple[str, str], _Aggregate] = {}
+        self._recent: Deque[CallMetrics] = deque(maxlen=history)
+        self._listeners: List[Callable[[CallMetrics], None]] = []
+
+    def record(self, metrics: CallMetrics) -> None:
+        """Voeg de metingen van één aanroep toe en meld ze aan de abonnees."""
+        with self._lock:
+            key = (metrics.model, metrics.agent)
+            aggregate = self._aggregates.get(key)
+            if aggregate is None:
+                aggregate = self._aggregates[key] = _Aggregate(self.buckets)
+            aggregate.add(metrics)
+            self._recent.append(metrics)
+            listeners = list(self._listeners)
+
+        for listener in listeners:
+            try:
+                listener(metrics)
+            except Exception as e:
+                print(f"Fout in metrics-abonnee: {e}")
+
+    def subscribe(self, listener: Callable[[CallMetrics], None]) -> None:
+        """Laat listener voor elke geregistreerde aanroep aanroepen."""
+        with self._lock:
+            self._listeners.append(listener)
+
+    def recent(self, limit: Optional[int] = None) -> List[CallMetrics]:
+        """De meest recente metingen, oudste eerst."""
+        with self._lock:
+            items = list(self._recent)
+        return items if limit is None else items[-limit:]
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        """Opgetelde cijfers per combinatie van model en agent."""
+        with self._lock:
+            return [
+                {"model": model, "agent": agent, **aggregate.summary()}
+                for (model, agent), aggregate in sorted(self._aggregates.items())
+            ]
+
+    def by_model(self) -> Dict[str, Dict[str, Any]]:
+        """Cijfers per model, opgeteld over alle agents."""
+        return self._rollup(0)
+
+    def by_agent(self) -> Dict[str, Dict[str, Any]]:
+        """Cijfers per agent, opgeteld over alle modellen."""
+        return self._rollup(1)
+
+    def _rollup(self, index: int) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            merged: Dict[str, _Aggregate] = {}
+            for key, aggregate in self._aggregates.items():
+                target = merged.setdefault(key[index], _Aggregate(self.buckets))
+                _merge(target, aggregate)
+        return {name: aggregate.summary() for name, aggregate in sorted(merged.items())}
+
+    def reset(self) -> None:
+        """Verwijder alle metingen."""
+        with self._lock:
+            self._aggregates.clear()
+            self._recent.clear()
+
+    def to_json(self, indent: Optional[int] = None) -> str:
+        """Exporteer de cijfers per model/agent, per model en per agent als JSON."""
+        return json.dumps(
+            {"calls": self.snapshot(), "models": self.by_model(), "agents": self.by_agent()},
+            indent=indent
+        )
+
+    def to_prometheus(self, prefix: str = "llm") -> str:
+        """
+        Exporteer de cijfers in het tekstformaat van Prometheus.
+
+        Args:
+            prefix: Voorvoegsel van de metricnamen
+
+        Returns:
+            Tekst voor een /metrics-endpoint
+        """
+        with self._lock:
+            items = sorted(self._aggregates.items())
+            lines: List[str] = []
+
+            lines += [f"# HELP {prefix}_calls_total Aanroepen naar Ollama.", f"# TYPE {prefix}_calls_total counter"]
+            for (model, agent), a in items:
+                lines.append(f"{prefix}_calls_total{_labels(model=model, agent=agent, status='ok')} {a.calls - a.errors}")
+                lines.append(f"{prefix}_calls_total{_labels(model=model, agent=agent, status='error')} {a.errors}")
+
+            counters = (
+                ("load_seconds_total", "load_duration", "Tijd besteed aan model laden."),
+                ("prompt_eval_seconds_total", "prompt_eval_duration", "Tijd besteed aan prompt verwerken (prefill)."),
+                ("eval_seconds_total", "eval_duration", "Tijd besteed aan tokens genereren (decode)."),
+                ("prompt_tokens_total", "prompt_eval_count", "Verwerkte prompt-tokens."),
+                ("eval_tokens_total", "eval_count", "Gegenereerde tokens."),
+            )
+            for name, field, help_text in counters:
+                lines += [f"# HELP {prefix}_{name} {help_text}", f"# TYPE {prefix}_{name} counter"]
+                for (model, agent), a in items:
+                    lines.append(f"{prefix}_{name}{_labels(model=model, agent=agent)} {_number(a.sums[field])}")
+
+            for name, attr, help_text in (
+                ("wall_seconds", "wall", "Duur van een aanroep gemeten door de client."),
+                ("ttft_seconds", "ttft", "Tijd tot het eerste token bij streaming."),
+            ):
+                lines += [f"# HELP {prefix}_{name} {help_text}", f"# TYPE {prefix}_{name} histogram"]
+                for (model, agent), a in items:
+                    histogram = getattr(a, attr)
+                    for bound, count in zip(histogram.buckets, histogram.counts):
+                        lines.append(
+                            f"{prefix}_{name}_bucket{_labels(model=model, agent=agent, le=_number(bound))} {count}"
+                        )
+                    lines.append(f"{prefix}_{name}_bucket{_labels(model=model, agent=agent, le='+Inf')} {histogram.count}")
+                    lines.append(f"{prefix}_{name}_sum{_labels(model=model, agent=agent)} {_number(histogram.total)}")
+                    lines.append(f"{prefix}_{name}_count{_labels(model=model, agent=agent)} {histogram.count}")
+
+        return "\n".join(lines) + "\n"
+
+
+def _merge(target: _Aggregate, source: _Aggregate) -> None:
+    """Tel de cijfers van source op bij target."""
+    target.calls += source.calls
+    target.errors += source.errors
+    for name in _Aggregate.SUMMED:
+        target.sums[name] += source.sums[name]
+    for attr in ("wall", "ttft"):
+        mine, theirs = getattr(target, attr), getattr(source, attr)
+        mine.counts = [a + b for a, b in zip(mine.counts, theirs.counts)]
+        mine.total += theirs.total
+        mine.count += theirs.count
+
+
+def _labels(**labels: str) -> str:
+    """Zet labels om naar de Prometheus-notatie, met escaping van de waarden."""
+    def escape(value: str) -> str:
+        return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+    return "{" + ",".join(f'{key}="{escape(value)}"' for key, value in labels.items()) + "}"
+
+
+def _number(value: float) -> str:
+    """Getal zonder overbodige decimalen, zoals Prometheus het verwacht."""
+    return repr(int(value)) if float(value).is_integer() else repr(float(value))
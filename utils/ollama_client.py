@@ -1,7 +1,58 @@
+import asyncio
+import contextvars
 import json
 import requests
 import os
-from typing import List, Dict, Optional
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError, as_completed, wait
+from typing import Any, AsyncIterator, Awaitable, Callable, Iterable, Iterator, List, Dict, Optional, Sequence, Tuple, TypeVar, Union
+
+import aiohttp
+from requests.adapters import HTTPAdapter
+
+from utils.endpoint_pool import Endpoint, EndpointPool, normalize_model_name
+from utils.errors import DeadlineExceededError, LLMConnectionError, LLMError, LLMResponseError
+from utils.metrics import CallMetrics, MetricsRegistry, current_agent
+from utils.response_cache import ResponseCache, make_cache_key
+from utils.retry import Deadline, RetryPolicy
+from utils.single_flight import AsyncSingleFlight, AsyncStreamSingleFlight, SingleFlight, StreamSingleFlight
+from utils.tracing import span
+
+T = TypeVar("T")
+
+
+def classify_error(error: Exception) -> LLMError:
+    """
+    Vertaal een fout van requests of aiohttp naar een getypeerde LLMError.
+    
+    Verbindingsfouten, time-outs, 5xx en 429 zijn tijdelijk (LLMConnectionError);
+    overige HTTP-fouten en onleesbare antwoorden niet (LLMResponseError).
+    """
+    if isinstance(error, LLMError):
+        return error
+    
+    status = None
+    if isinstance(error, requests.exceptions.HTTPError) and error.response is not None:
+        status = error.response.status_code
+    elif isinstance(error, aiohttp.ClientResponseError):
+        status = error.status
+    if status is not None:
+        if status >= 500 or status == 429:
+            return LLMConnectionError(str(error), status)
+        return LLMResponseError(str(error), status)
+    
+    if isinstance(error, (
+        requests.exceptions.ConnectionError,
+        requests.exceptions.Timeout,
+        aiohttp.ClientConnectionError,
+        aiohttp.ClientPayloadError,
+        asyncio.TimeoutError
+    )):
+        return LLMConnectionError(str(error) or type(error).__name__)
+    if isinstance(error, ValueError):
+        return LLMResponseError(str(error))
+    return LLMConnectionError(str(error) or type(error).__name__)
+
 
 class OllamaClient:
     """
@@ -11,81 +62,1053 @@ class OllamaClient:
     ```python
     llm = OllamaClient(model="openchat:latest")
     response = llm.generate_response("Hoe gaat het?")
+
+    # Token voor token, zodra Ollama ze uitzendt
+    for delta in llm.stream_response([{"role": "user", "content": "Hoe gaat het?"}]):
+        print(delta, end="", flush=True)
+
+    # Asynchroon, via dezelfde client (gedeelde keep-alive pool)
+    response = await llm.agenerate_response([{"role": "user", "content": "Hoe gaat het?"}])
+    await llm.aclose()
+
+    # Model vooraf laden en 30 minuten in het geheugen houden
+    llm = OllamaClient(model="llama3", keep_alive="30m")
+    llm.warm_up()
+    llm.is_resident()  # -> True
+
+    # Meerdere Ollama-hosts; trage aanroepen na 2 seconden ook naar een tweede host
+    llm = OllamaClient(model="llama3", base_url=["http://gpu1:11434", "http://gpu2:11434"], hedge_after=2.0)
+
+    # Prefill-, laad- en decodetijden per aanroep vastleggen
+    llm = OllamaClient(model="llama3", metrics=MetricsRegistry())
     ```
     """
     
-    def __init__(self, model: str = "openchat:latest", base_url: str = None, api_key: str = None):
+    def __init__(
+        self,
+        model: str = "openchat:latest",
+        base_url: Union[str, Sequence[str], None] = None,
+        api_key: str = None,
+        pool_size: int = 10,
+        keepalive_timeout: float = 30.0,
+        cache: Optional[ResponseCache] = None,
+        keep_alive: Optional[Union[str, float]] = None,
+        coalesce: bool = True,
+        endpoints: Optional[EndpointPool] = None,
+        hedge_after: Optional[float] = None,
+        timeout: float = 60.0,
+        retry: Optional[RetryPolicy] = None,
+        metrics: Optional[MetricsRegistry] = None
+    ):
         """
         Initialiseer de Ollama client.
         
         Args:
             model: Naam van het te gebruiken LLM model (bijv. "openchat:latest")
-            base_url: Basis URL van de Ollama API (optioneel, haalt uit env OLLAMA_BASE_URL of gebruikt default)
+            base_url: Basis URL van de Ollama API, of een lijst van URL's voor meerdere hosts
+                (optioneel, haalt uit env OLLAMA_BASE_URL (kommagescheiden) of gebruikt default)
             api_key: API key voor authenticatie (optioneel, haalt uit env OLLAMA_API_KEY)
+            pool_size: Maximum aantal gelijktijdige (keep-alive) verbindingen naar Ollama
+            keepalive_timeout: Aantal seconden dat een ongebruikte asynchrone verbinding open blijft
+            cache: Optionele ResponseCache voor identieke aanroepen
+            keep_alive: Hoe lang Ollama het model na een aanroep geladen houdt
+                (bijv. "30m", seconden als getal, -1 = altijd; None = serverstandaard)
+            coalesce: Laat gelijktijdige, identieke aanroepen één generatie bij Ollama delen;
+                aanroepen die de cache omzeilen (use_cache=False of een temperature die
+                de cache weigert) krijgen altijd een eigen generatie
+            endpoints: Zelf geconfigureerde EndpointPool (heeft voorrang op base_url)
+            hedge_after: Stuur een niet-streaming aanroep die na dit aantal seconden nog
+                loopt ook naar een tweede host en gebruik het eerste antwoord (None = uit)
+            timeout: Maximale duur van één HTTP-aanroep in seconden (bij streaming: tussen twee fragmenten)
+            retry: Beleid voor nieuwe pogingen bij tijdelijke fouten (standaard 3 pogingen)
+            metrics: Optioneel register dat per aanroep de duurvelden van Ollama, de
+                time-to-first-token en de wandkloktijd vastlegt
         """
-        self.base_url = base_url or os.getenv("OLLAMA_BASE_URL", "http://localhost:11434")
+        if endpoints is None:
+            urls = base_url or os.getenv("OLLAMA_BASE_URL", "http://localhost:11434")
+            if isinstance(urls, str):
+                urls = [url.strip() for url in urls.split(",") if url.strip()]
+            endpoints = EndpointPool(urls)
+        self.endpoints = endpoints
+        self.base_url = endpoints.endpoints[0].url
+        self.hedge_after = hedge_after
+        self.timeout = timeout
+        self.retry = retry or RetryPolicy()
+        self.metrics = metrics
+        self._hedge_executor: Optional[ThreadPoolExecutor] = None
         self.api_key = api_key or os.getenv("OLLAMA_API_KEY")
         self.model = model
+        self.pool_size = pool_size
+        self.keepalive_timeout = keepalive_timeout
+        self.cache = cache
+        self.keep_alive = keep_alive
+        self.coalesce = coalesce
+        self._flight = SingleFlight()
+        self._stream_flight = StreamSingleFlight()
+        self._async_flight = AsyncSingleFlight()
+        self._async_stream_flight = AsyncStreamSingleFlight()
         self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
         
         if self.api_key:
             self.session.headers.update({"Authorization": f"Bearer {self.api_key}"})
+        
+        # De asynchrone sessie wordt lui aangemaakt, omdat aiohttp een draaiende event loop vereist
+        self._async_session: Optional[aiohttp.ClientSession] = None
+        self._async_loop: Optional[asyncio.AbstractEventLoop] = None
+    
+    def _build_payload(
+        self,
+        messages: List[Dict[str, str]],
+        temperature: float,
+        max_tokens: int,
+        options: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """Stel de request body voor /api/chat samen."""
+        payload = {
+            "model": self.model,
+            "messages": messages,
+            "options": {
+                "temperature": temperature,
+                "num_predict": max_tokens,
+                **options
+            }
+        }
+        if self.keep_alive is not None:
+            payload["keep_alive"] = self.keep_alive
+        return payload
+    
+    def _warm_up_payload(
+        self,
+        model: Optional[str],
+        keep_alive: Optional[Union[str, float]]
+    ) -> Dict[str, Any]:
+        """Request body die een model laadt zonder iets te genereren (lege berichtenlijst)."""
+        payload = {"model": model or self.model, "messages": [], "stream": False}
+        keep_alive = self.keep_alive if keep_alive is None else keep_alive
+        if keep_alive is not None:
+            payload["keep_alive"] = keep_alive
+        return payload
+    
+    def _cache_key(
+        self,
+        payload: Dict[str, Any],
+        temperature: float,
+        use_cache: Optional[bool]
+    ) -> Optional[str]:
+        """
+        Bepaal de cachesleutel voor een aanroep, of None als de cache wordt overgeslagen.
+        
+        Zonder expliciete use_cache beslist de cache op basis van de temperature.
+        """
+        if self.cache is None or use_cache is False:
+            return None
+        if use_cache is None and not self.cache.accepts(temperature):
+            return None
+        return make_cache_key(payload["model"], payload["messages"], payload["options"])
+    
+    def _flight_key(
+        self,
+        payload: Dict[str, Any],
+        cache_key: Optional[str],
+        use_cache: Optional[bool]
+    ) -> Optional[str]:
+        """
+        Sleutel waaronder identieke lopende aanroepen worden samengevoegd, of None.
+        
+        Wie de cache omzeilt (use_cache=False, of een temperature die de cache
+        weigert) vraagt om een verse generatie en deelt dus ook geen lopende
+        aanroep. Zonder cache beslissen alleen coalesce en use_cache=False.
+        """
+        if not self.coalesce or use_cache is False:
+            return None
+        if self.cache is not None:
+            return cache_key
+        return make_cache_key(payload["model"], payload["messages"], payload["options"])
+    
+    @staticmethod
+    def _extract_content(data: Dict[str, Any]) -> str:
+        """Haal de antwoordtekst uit een (niet-streaming) /api/chat response."""
+        if "error" in data:
+            raise ValueError(data["error"])
+        return data.get("message", {}).get("content", "[GEEN ANTWOORD]")
+    
+    @staticmethod
+    def _parse_chunk(line: bytes) -> Tuple[str, bool, Dict[str, Any]]:
+        """
+        Verwerk één NDJSON-regel uit een streaming /api/chat response.
+        
+        Returns:
+            Tuple van (nieuwe tekst, of dit het laatste fragment is, het volledige fragment)
+        """
+        chunk = json.loads(line.decode("utf-8"))
+        if "error" in chunk:
+            raise ValueError(chunk["error"])
+        delta = chunk.get("message", {}).get("content", "")
+        return delta, bool(chunk.get("done", False)), chunk
+    
+    def _record(
+        self,
+        endpoint: Endpoint,
+        payload: Dict[str, Any],
+        start: float,
+        ok: bool,
+        data: Optional[Dict[str, Any]] = None,
+        ttft: Optional[float] = None
+    ) -> None:
+        """Leg de metingen van één aanroep vast als er een MetricsRegistry is ingesteld."""
+        if self.metrics is None:
+            return
+        self.metrics.record(CallMetrics.from_response(
+            data,
+            model=payload["model"],
+            agent=current_agent.get(),
+            endpoint=endpoint.url,
+            stream=bool(payload.get("stream")),
+            ok=ok,
+            wall_time=time.monotonic() - start,
+            ttft=ttft
+        ))
+    
+    def _timeout(self, deadline: Optional[Deadline]) -> float:
+        """Time-out voor één HTTP-aanroep: de client-time-out, begrensd door de deadline."""
+        return self.timeout if deadline is None else deadline.timeout(self.timeout)
+    
+    @staticmethod
+    def _check_deadline(deadline: Optional[Deadline]) -> None:
+        """Gooi DeadlineExceededError als de deadline al verstreken is."""
+        if deadline is not None and deadline.expired:
+            raise DeadlineExceededError("Deadline verstreken voordat Ollama antwoordde")
     
     def generate_response(
         self, 
         messages: List[Dict[str, str]],
         temperature: float = 0.7,
         max_tokens: int = 1000,
+        use_cache: Optional[bool] = None,
+        deadline: Union[Deadline, float, None] = None,
         **kwargs
     ) -> str:
         """
         Genereer een antwoord op basis van het gespreksverloop.
         
+        Tijdelijke fouten (verbindingsfouten, time-outs, 5xx, 429) worden volgens het
+        RetryPolicy van de client opnieuw geprobeerd, zolang de deadline dat toelaat.
+        
         Args:
             messages: Lijst van berichten in het formaat [{"role": "user", "content": "..."}, ...]
             temperature: Creativiteit (0.0-1.0, hoger = creatiever)
             max_tokens: Maximale lengte van het antwoord in tokens
+            use_cache: Forceer (True) of omzeil (False) de response cache (en het samenvoegen) voor deze aanroep
+            deadline: Deadline (of aantal seconden) waarbinnen het antwoord er moet zijn
             **kwargs: Extra parameters voor de API-aanroep
             
         Returns:
             Het gegenereerde antwoord als string
+            
+        Raises:
+            DeadlineExceededError: Als de deadline verstrijkt
+            LLMConnectionError: Als Ollama na alle pogingen niet bereikbaar is
+            LLMResponseError: Als Ollama het verzoek weigert
         """
-        url = f"{self.base_url}/api/chat"
+        deadline = Deadline.coerce(deadline)
+        payload = self._build_payload(messages, temperature, max_tokens, kwargs)
+        payload["stream"] = False
         
-        payload = {
-            "model": self.model,
-            "messages": messages,
-            "options": {
-                "temperature": temperature,
-                "num_predict": max_tokens,
-                **kwargs
-            }
-        }
+        with span("llm.generate", model=payload["model"]) as current:
+            cache_key = self._cache_key(payload, temperature, use_cache)
+            if cache_key is not None:
+                cached = self.cache.get(cache_key)
+                if cached is not None:
+                    current.set_attribute("cached", True)
+                    return cached
+            
+            flight_key = self._flight_key(payload, cache_key, use_cache)
+            if flight_key is None:
+                return self._chat(payload, cache_key, deadline)
+            
+            # Gelijktijdige identieke aanroepen delen één generatie bij Ollama
+            try:
+                content, shared = self._flight.do(
+                    flight_key,
+                    lambda: self._chat(payload, cache_key, deadline),
+                    timeout=None if deadline is None else deadline.remaining()
+                )
+            except FutureTimeoutError:
+                raise DeadlineExceededError("Deadline verstreken tijdens het wachten op een gedeelde aanroep")
+            current.set_attribute("shared", shared)
+            return content
+    
+    def _with_retry(self, call: Callable[[], T], deadline: Optional[Deadline]) -> T:
+        """
+        Voer een aanroep uit en herhaal die bij tijdelijke fouten met jittered backoff.
+        
+        Er wordt niet opnieuw geprobeerd als de wachttijd de deadline zou overschrijden.
+        """
+        attempt = 1
+        while True:
+            try:
+                return call()
+            except DeadlineExceededError:
+                raise
+            except LLMError as e:
+                if deadline is not None and deadline.expired:
+                    raise DeadlineExceededError(f"Deadline verstreken na {attempt} poging(en): {e}") from e
+                if not e.transient or attempt >= self.retry.max_attempts:
+                    raise
+                delay = self.retry.backoff(attempt)
+                if deadline is not None and delay >= deadline.remaining():
+                    raise DeadlineExceededError(f"Geen tijd meer voor een nieuwe poging: {e}") from e
+                time.sleep(delay)
+                attempt += 1
+    
+    def _with_failover(
+        self,
+        model: str,
+        attempt: Callable[[Endpoint], T],
+        deadline: Optional[Deadline],
+        exclude: Iterable[Endpoint] = (),
+        error: Optional[LLMError] = None
+    ) -> T:
+        """
+        Probeer een aanroep op de beste host en val bij een fout terug op de volgende.
+        
+        Args:
+            model: Het model van de aanroep (voor routering op residentie)
+            attempt: Voert de aanroep uit op een gekozen host en geeft die host zelf vrij
+            deadline: Optionele deadline van de aanroep
+            exclude: Hosts die al geprobeerd zijn
+            error: De laatste fout van een eerdere poging
+            
+        Returns:
+            Het resultaat van de eerste geslaagde poging
+            
+        Raises:
+            LLMConnectionError: Als geen host (meer) beschikbaar is; de laatste fout
+                als er al een poging was, anders omdat alle circuit breakers open staan
+        """
+        tried = list(exclude)
+        while True:
+            self._check_deadline(deadline)
+            endpoint = self.endpoints.choose(model, exclude=tried)
+            if endpoint is None:
+                raise error or LLMConnectionError("Geen beschikbare host: alle circuit breakers staan open")
+            try:
+                return attempt(endpoint)
+            except DeadlineExceededError:
+                raise
+            except LLMError as e:
+                tried.append(endpoint)
+                error = e
+    
+    def _chat_on(self, endpoint: Endpoint, payload: Dict[str, Any], deadline: Optional[Deadline]) -> str:
+        """Voer één niet-streaming /api/chat-aanroep uit op een gekozen host."""
+        outcome = None
+        start = time.monotonic()
+        try:
+            with span("llm.http", endpoint=endpoint.url) as current:
+                response = self.session.post(
+                    f"{endpoint.url}/api/chat", 
+                    json=payload,
+                    headers={"Content-Type": "application/json"},
+                    timeout=self._timeout(deadline)
+                )
+                current.set_attribute("status", response.status_code)
+                response.raise_for_status()
+            with span("llm.decode"):
+                data = response.json()
+                content = self._extract_content(data)
+            outcome = True
+            self._record(endpoint, payload, start, True, data)
+            return content
+        except (requests.exceptions.RequestException, ValueError) as e:
+            error = classify_error(e)
+            outcome = False if error.transient else None
+            self._record(endpoint, payload, start, False)
+            raise error from e
+        finally:
+            self.endpoints.release(endpoint, payload["model"], outcome, time.monotonic() - start)
+    
+    def _get_hedge_executor(self) -> ThreadPoolExecutor:
+        """Geef de threadpool voor gehedgede aanroepen terug en maak deze zo nodig aan."""
+        if self._hedge_executor is None:
+            self._hedge_executor = ThreadPoolExecutor(
+                max_workers=self.pool_size,
+                thread_name_prefix="ollama-hedge"
+            )
+        return self._hedge_executor
+    
+    def _hedged_chat(self, payload: Dict[str, Any], deadline: Optional[Deadline]) -> str:
+        """
+        Start een aanroep op de beste host en, als die na hedge_after nog loopt, ook op een tweede.
+        
+        Het eerste geslaagde antwoord wint; de andere aanroep loopt op de achtergrond uit.
+        Mislukken beide, dan worden de overige hosts na elkaar geprobeerd.
+        """
+        model = payload["model"]
+        executor = self._get_hedge_executor()
+        primary = self.endpoints.choose(model)
+        if primary is None:
+            # Geen host beschikbaar: _with_failover meldt dat met een LLMConnectionError
+            return self._with_failover(model, lambda e: self._chat_on(e, payload, deadline), deadline)
+        tried = [primary]
+        # De context gaat mee, zodat metingen aan de juiste agent worden toegeschreven
+        futures = [executor.submit(contextvars.copy_context().run, self._chat_on, primary, payload, deadline)]
+        
+        done, _ = wait(futures, timeout=self.hedge_after)
+        if not done:
+            secondary = self.endpoints.choose(model, exclude=tried)
+            if secondary is not None:
+                tried.append(secondary)
+                futures.append(
+                    executor.submit(contextvars.copy_context().run, self._chat_on, secondary, payload, deadline)
+                )
+        
+        error = None
+        for future in as_completed(futures):
+            try:
+                return future.result()
+            except LLMError as e:
+                error = e
+        
+        return self._with_failover(model, lambda e: self._chat_on(e, payload, deadline), deadline, tried, error)
+    
+    def _chat(self, payload: Dict[str, Any], cache_key: Optional[str], deadline: Optional[Deadline]) -> str:
+        """Voer een niet-streaming /api/chat-aanroep uit via de pool en vul zo nodig de cache."""
+        if self.hedge_after is not None and len(self.endpoints) > 1:
+            call = lambda: self._hedged_chat(payload, deadline)
+        else:
+            call = lambda: self._with_failover(
+                payload["model"], lambda e: self._chat_on(e, payload, deadline), deadline
+            )
+        
+        content = self._with_retry(call, deadline)
+        if cache_key is not None:
+            self.cache.set(cache_key, content)
+        return content
+    
+    def stream_response(
+        self, 
+        messages: List[Dict[str, str]],
+        temperature: float = 0.7,
+        max_tokens: int = 1000,
+        use_cache: Optional[bool] = None,
+        deadline: Union[Deadline, float, None] = None,
+        **kwargs
+    ) -> Iterator[str]:
+        """
+        Genereer een antwoord en geef de tekstfragmenten terug zodra Ollama ze uitzendt.
+        
+        Een cachetreffer wordt als één fragment teruggegeven; een volledig
+        doorlopen stroom wordt na afloop in de cache opgeslagen. Gelijktijdige
+        identieke aanroepen lezen mee met één gedeelde stroom (en dus met de
+        deadline van de aanroep die de stroom startte). Alleen het openen van de
+        stroom wordt bij tijdelijke fouten opnieuw geprobeerd; een fout halverwege
+        wordt als LLMError doorgegeven.
+        
+        Args:
+            messages: Lijst van berichten in het formaat [{"role": "user", "content": "..."}, ...]
+            temperature: Creativiteit (0.0-1.0, hoger = creatiever)
+            max_tokens: Maximale lengte van het antwoord in tokens
+            use_cache: Forceer (True) of omzeil (False) de response cache (en het samenvoegen) voor deze aanroep
+            deadline: Deadline (of aantal seconden) waarbinnen de stroom klaar moet zijn
+            **kwargs: Extra parameters voor de API-aanroep
+            
+        Yields:
+            Opeenvolgende stukken van het antwoord
+        """
+        deadline = Deadline.coerce(deadline)
+        payload = self._build_payload(messages, temperature, max_tokens, kwargs)
+        payload["stream"] = True
+        
+        cache_key = self._cache_key(payload, temperature, use_cache)
+        if cache_key is not None:
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                yield cached
+                return
         
+        flight_key = self._flight_key(payload, cache_key, use_cache)
+        if flight_key is None:
+            yield from self._stream_chat(payload, cache_key, deadline)
+        else:
+            yield from self._stream_flight.subscribe(
+                flight_key, lambda: self._stream_chat(payload, cache_key, deadline)
+            )
+    
+    def _open_stream(
+        self,
+        endpoint: Endpoint,
+        payload: Dict[str, Any],
+        deadline: Optional[Deadline]
+    ) -> Tuple[Endpoint, requests.Response]:
+        """Open een streaming /api/chat-aanroep op een gekozen host; geeft de host vrij bij een fout."""
+        start = time.monotonic()
+        try:
+            with span("llm.http", endpoint=endpoint.url, stream=True) as current:
+                response = self.session.post(
+                    f"{endpoint.url}/api/chat",
+                    json=payload,
+                    headers={"Content-Type": "application/json"},
+                    timeout=self._timeout(deadline),
+                    stream=True
+                )
+                current.set_attribute("status", response.status_code)
+            try:
+                response.raise_for_status()
+            except requests.exceptions.RequestException:
+                response.close()
+                raise
+            return endpoint, response
+        except requests.exceptions.RequestException as e:
+            error = classify_error(e)
+            self.endpoints.release(endpoint, payload["model"], False if error.transient else None)
+            self._record(endpoint, payload, start, False)
+            raise error from e
+    
+    def _stream_chat(
+        self,
+        payload: Dict[str, Any],
+        cache_key: Optional[str],
+        deadline: Optional[Deadline]
+    ) -> Iterator[str]:
+        """
+        Voer een streaming /api/chat-aanroep uit via de pool en vul na afloop zo nodig de cache.
+        
+        Tot het eerste fragment binnen is, wordt bij een fout een andere host geprobeerd.
+        De time-to-first-token in de metingen telt vanaf de eerste poging.
+        """
+        with span("llm.stream", model=payload["model"]) as current:
+            call_start = time.monotonic()
+            endpoint, response = self._with_retry(
+                lambda: self._with_failover(
+                    payload["model"], lambda e: self._open_stream(e, payload, deadline), deadline
+                ),
+                deadline
+            )
+            
+            parts = []
+            outcome = None
+            final = None
+            ttft = None
+            start = time.monotonic()
+            try:
+                with response:
+                    for line in response.iter_lines():
+                        self._check_deadline(deadline)
+                        if not line:
+                            continue
+                        delta, done, chunk = self._parse_chunk(line)
+                        if delta:
+                            if ttft is None:
+                                ttft = time.monotonic() - call_start
+                                current.set_attribute("ttft", ttft)
+                            parts.append(delta)
+                            yield delta
+                        if done:
+                            final = chunk
+                            break
+                outcome = True
+                self._record(endpoint, payload, call_start, True, final, ttft)
+                            
+            except (requests.exceptions.RequestException, ValueError) as e:
+                error = classify_error(e)
+                if deadline is not None and deadline.expired:
+                    error = DeadlineExceededError("Deadline verstreken tijdens het streamen")
+                outcome = False if error.transient else None
+                self._record(endpoint, payload, call_start, False, ttft=ttft)
+                raise error from e
+            finally:
+                self.endpoints.release(endpoint, payload["model"], outcome, time.monotonic() - start)
+            
+            if cache_key is not None:
+                self.cache.set(cache_key, "".join(parts))
+    
+    def _get_async_session(self) -> aiohttp.ClientSession:
+        """
+        Geef de gedeelde aiohttp-sessie terug en maak deze zo nodig aan.
+        
+        Alle coroutines die via deze client lopen delen één begrensde connection pool,
+        zodat verbindingen naar Ollama hergebruikt worden in plaats van per verzoek opgezet.
+        Een sessie is gebonden aan de event loop waarin hij is aangemaakt; bij een andere
+        loop (bijv. opeenvolgende asyncio.run-aanroepen) wordt een nieuwe sessie gestart.
+        """
+        loop = asyncio.get_running_loop()
+        if (
+            self._async_session is None
+            or self._async_session.closed
+            or self._async_loop is not loop
+        ):
+            headers = {"Content-Type": "application/json"}
+            if self.api_key:
+                headers["Authorization"] = f"Bearer {self.api_key}"
+            
+            connector = aiohttp.TCPConnector(
+                limit=self.pool_size,
+                keepalive_timeout=self.keepalive_timeout
+            )
+            self._async_session = aiohttp.ClientSession(
+                connector=connector,
+                headers=headers,
+                timeout=aiohttp.ClientTimeout(total=self.timeout)
+            )
+            self._async_loop = loop
+        return self._async_session
+    
+    async def agenerate_response(
+        self,
+        messages: List[Dict[str, str]],
+        temperature: float = 0.7,
+        max_tokens: int = 1000,
+        use_cache: Optional[bool] = None,
+        deadline: Union[Deadline, float, None] = None,
+        **kwargs
+    ) -> str:
+        """
+        Asynchrone variant van generate_response.
+        
+        Args:
+            messages: Lijst van berichten in het formaat [{"role": "user", "content": "..."}, ...]
+            temperature: Creativiteit (0.0-1.0, hoger = creatiever)
+            max_tokens: Maximale lengte van het antwoord in tokens
+            use_cache: Forceer (True) of omzeil (False) de response cache (en het samenvoegen) voor deze aanroep
+            deadline: Deadline (of aantal seconden) waarbinnen het antwoord er moet zijn
+            **kwargs: Extra parameters voor de API-aanroep
+            
+        Returns:
+            Het gegenereerde antwoord als string
+            
+        Raises:
+            DeadlineExceededError: Als de deadline verstrijkt
+            LLMConnectionError: Als Ollama na alle pogingen niet bereikbaar is
+            LLMResponseError: Als Ollama het verzoek weigert
+        """
+        deadline = Deadline.coerce(deadline)
+        payload = self._build_payload(messages, temperature, max_tokens, kwargs)
+        payload["stream"] = False
+        
+        with span("llm.generate", model=payload["model"]) as current:
+            cache_key = self._cache_key(payload, temperature, use_cache)
+            if cache_key is not None:
+                cached = self.cache.get(cache_key)
+                if cached is not None:
+                    current.set_attribute("cached", True)
+                    return cached
+            
+            flight_key = self._flight_key(payload, cache_key, use_cache)
+            if flight_key is None:
+                return await self._achat(payload, cache_key, deadline)
+            
+            try:
+                content, shared = await self._async_flight.do(
+                    flight_key,
+                    lambda: self._achat(payload, cache_key, deadline),
+                    timeout=None if deadline is None else deadline.remaining()
+                )
+            except asyncio.TimeoutError:
+                raise DeadlineExceededError("Deadline verstreken tijdens het wachten op een gedeelde aanroep")
+            current.set_attribute("shared", shared)
+            return content
+    
+    async def _awith_retry(self, call: Callable[[], Awaitable[T]], deadline: Optional[Deadline]) -> T:
+        """Asynchrone variant van _with_retry."""
+        attempt = 1
+        while True:
+            try:
+                return await call()
+            except DeadlineExceededError:
+                raise
+            except LLMError as e:
+                if deadline is not None and deadline.expired:
+                    raise DeadlineExceededError(f"Deadline verstreken na {attempt} poging(en): {e}") from e
+                if not e.transient or attempt >= self.retry.max_attempts:
+                    raise
+                delay = self.retry.backoff(attempt)
+                if deadline is not None and delay >= deadline.remaining():
+                    raise DeadlineExceededError(f"Geen tijd meer voor een nieuwe poging: {e}") from e
+                await asyncio.sleep(delay)
+                attempt += 1
+    
+    async def _awith_failover(
+        self,
+        model: str,
+        attempt: Callable[[Endpoint], Awaitable[T]],
+        deadline: Optional[Deadline],
+        exclude: Iterable[Endpoint] = (),
+        error: Optional[LLMError] = None
+    ) -> T:
+        """Asynchrone variant van _with_failover."""
+        tried = list(exclude)
+        while True:
+            self._check_deadline(deadline)
+            endpoint = self.endpoints.choose(model, exclude=tried)
+            if endpoint is None:
+                raise error or LLMConnectionError("Geen beschikbare host: alle circuit breakers staan open")
+            try:
+                return await attempt(endpoint)
+            except DeadlineExceededError:
+                raise
+            except LLMError as e:
+                tried.append(endpoint)
+                error = e
+    
+    async def _achat_on(self, endpoint: Endpoint, payload: Dict[str, Any], deadline: Optional[Deadline]) -> str:
+        """Asynchrone variant van _chat_on; een geannuleerde aanroep telt niet als fout."""
+        outcome = None
+        start = time.monotonic()
+        try:
+            session = self._get_async_session()
+            with span("llm.http", endpoint=endpoint.url) as current:
+                async with session.post(
+                    f"{endpoint.url}/api/chat",
+                    json=payload,
+                    timeout=aiohttp.ClientTimeout(total=self._timeout(deadline))
+                ) as response:
+                    current.set_attribute("status", response.status)
+                    response.raise_for_status()
+                    body = await response.read()
+            with span("llm.decode"):
+                data = json.loads(body)
+                content = self._extract_content(data)
+            outcome = True
+            self._record(endpoint, payload, start, True, data)
+            return content
+        except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+            error = classify_error(e)
+            outcome = False if error.transient else None
+            self._record(endpoint, payload, start, False)
+            raise error from e
+        finally:
+            self.endpoints.release(endpoint, payload["model"], outcome, time.monotonic() - start)
+    
+    async def _ahedged_chat(self, payload: Dict[str, Any], deadline: Optional[Deadline]) -> str:
+        """Asynchrone variant van _hedged_chat; de verliezende aanroep wordt geannuleerd."""
+        model = payload["model"]
+        primary = self.endpoints.choose(model)
+        if primary is None:
+            return await self._awith_failover(model, lambda e: self._achat_on(e, payload, deadline), deadline)
+        tried = [primary]
+        tasks = [asyncio.ensure_future(self._achat_on(primary, payload, deadline))]
+        
+        done, _ = await asyncio.wait(tasks, timeout=self.hedge_after)
+        if not done:
+            secondary = self.endpoints.choose(model, exclude=tried)
+            if secondary is not None:
+                tried.append(secondary)
+                tasks.append(asyncio.ensure_future(self._achat_on(secondary, payload, deadline)))
+        
+        error = None
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                try:
+                    return await next_done
+                except LLMError as e:
+                    error = e
+        finally:
+            for task in tasks:
+                task.cancel()
+        
+        return await self._awith_failover(
+            model, lambda e: self._achat_on(e, payload, deadline), deadline, tried, error
+        )
+    
+    async def _achat(self, payload: Dict[str, Any], cache_key: Optional[str], deadline: Optional[Deadline]) -> str:
+        """Asynchrone variant van _chat."""
+        if self.hedge_after is not None and len(self.endpoints) > 1:
+            call = lambda: self._ahedged_chat(payload, deadline)
+        else:
+            call = lambda: self._awith_failover(
+                payload["model"], lambda e: self._achat_on(e, payload, deadline), deadline
+            )
+        
+        content = await self._awith_retry(call, deadline)
+        if cache_key is not None:
+            self.cache.set(cache_key, content)
+        return content
+    
+    async def astream_response(
+        self,
+        messages: List[Dict[str, str]],
+        temperature: float = 0.7,
+        max_tokens: int = 1000,
+        use_cache: Optional[bool] = None,
+        deadline: Union[Deadline, float, None] = None,
+        **kwargs
+    ) -> AsyncIterator[str]:
+        """
+        Asynchrone variant van stream_response.
+        
+        Args:
+            messages: Lijst van berichten in het formaat [{"role": "user", "content": "..."}, ...]
+            temperature: Creativiteit (0.0-1.0, hoger = creatiever)
+            max_tokens: Maximale lengte van het antwoord in tokens
+            use_cache: Forceer (True) of omzeil (False) de response cache (en het samenvoegen) voor deze aanroep
+            deadline: Deadline (of aantal seconden) waarbinnen de stroom klaar moet zijn
+            **kwargs: Extra parameters voor de API-aanroep
+            
+        Yields:
+            Opeenvolgende stukken van het antwoord
+        """
+        deadline = Deadline.coerce(deadline)
+        payload = self._build_payload(messages, temperature, max_tokens, kwargs)
+        payload["stream"] = True
+        
+        cache_key = self._cache_key(payload, temperature, use_cache)
+        if cache_key is not None:
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                yield cached
+                return
+        
+        flight_key = self._flight_key(payload, cache_key, use_cache)
+        if flight_key is None:
+            upstream = self._astream_chat(payload, cache_key, deadline)
+        else:
+            upstream = self._async_stream_flight.subscribe(
+                flight_key, lambda: self._astream_chat(payload, cache_key, deadline)
+            )
+        async for delta in upstream:
+            yield delta
+    
+    async def _aopen_stream(
+        self,
+        endpoint: Endpoint,
+        payload: Dict[str, Any],
+        deadline: Optional[Deadline]
+    ) -> Tuple[Endpoint, aiohttp.ClientResponse]:
+        """Asynchrone variant van _open_stream."""
+        start = time.monotonic()
+        try:
+            session = self._get_async_session()
+            with span("llm.http", endpoint=endpoint.url, stream=True) as current:
+                response = await session.post(
+                    f"{endpoint.url}/api/chat",
+                    json=payload,
+                    timeout=aiohttp.ClientTimeout(
+                        total=None if deadline is None else deadline.remaining(),
+                        sock_read=self._timeout(deadline)
+                    )
+                )
+                current.set_attribute("status", response.status)
+            try:
+                response.raise_for_status()
+            except aiohttp.ClientError:
+                response.release()
+                raise
+            return endpoint, response
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            error = classify_error(e)
+            self.endpoints.release(endpoint, payload["model"], False if error.transient else None)
+            self._record(endpoint, payload, start, False)
+            raise error from e
+    
+    async def _astream_chat(
+        self,
+        payload: Dict[str, Any],
+        cache_key: Optional[str],
+        deadline: Optional[Deadline]
+    ) -> AsyncIterator[str]:
+        """Asynchrone variant van _stream_chat."""
+        with span("llm.stream", model=payload["model"]) as current:
+            call_start = time.monotonic()
+            endpoint, response = await self._awith_retry(
+                lambda: self._awith_failover(
+                    payload["model"], lambda e: self._aopen_stream(e, payload, deadline), deadline
+                ),
+                deadline
+            )
+            
+            parts = []
+            outcome = None
+            final = None
+            ttft = None
+            start = time.monotonic()
+            try:
+                async with response:
+                    async for line in response.content:
+                        line = line.strip()
+                        if not line:
+                            continue
+                        delta, done, chunk = self._parse_chunk(line)
+                        if delta:
+                            if ttft is None:
+                                ttft = time.monotonic() - call_start
+                                current.set_attribute("ttft", ttft)
+                            parts.append(delta)
+                            yield delta
+                        if done:
+                            final = chunk
+                            break
+                outcome = True
+                self._record(endpoint, payload, call_start, True, final, ttft)
+                            
+            except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+                error = classify_error(e)
+                if deadline is not None and deadline.expired:
+                    error = DeadlineExceededError("Deadline verstreken tijdens het streamen")
+                outcome = False if error.transient else None
+                self._record(endpoint, payload, call_start, False, ttft=ttft)
+                raise error from e
+            finally:
+                self.endpoints.release(endpoint, payload["model"], outcome, time.monotonic() - start)
+            
+            if cache_key is not None:
+                self.cache.set(cache_key, "".join(parts))
+    
+    def warm_up(
+        self,
+        model: Optional[str] = None,
+        keep_alive: Optional[Union[str, float]] = None
+    ) -> bool:
+        """
+        Laad een model vooraf in het geheugen van Ollama.
+        
+        Ollama laadt een model bij een /api/chat-aanroep met een lege berichtenlijst
+        zonder een antwoord te genereren. Zo betaalt de eerste gebruikersbeurt niet
+        de volledige laadtijd van het model. Bij meerdere hosts wordt elke host geladen.
+        
+        Args:
+            model: Te laden model (standaard het model van deze client)
+            keep_alive: Hoe lang het model geladen blijft (standaard die van de client)
+            
+        Returns:
+            True als het model op alle hosts geladen is
+        """
+        payload = self._warm_up_payload(model, keep_alive)
+        return all([self._warm_up_on(endpoint, payload) for endpoint in self.endpoints])
+    
+    def _warm_up_on(self, endpoint: Endpoint, payload: Dict[str, Any]) -> bool:
+        """Laad (of ontlaad) een model op één host."""
         try:
             response = self.session.post(
-                url, 
+                f"{endpoint.url}/api/chat",
                 json=payload,
                 headers={"Content-Type": "application/json"},
-                timeout=60
+                timeout=300
             )
             response.raise_for_status()
+            self.endpoints.mark_resident(endpoint, payload["model"], payload.get("keep_alive") != 0)
+            return True
             
-            # Verwerk streaming response indien nodig
-            if "stream" in kwargs.get("stream", False):
-                full_response = ""
-                for line in response.iter_lines():
-                    if line:
-                        chunk = json.loads(line.decode("utf-8"))
-                        if "message" in chunk and "content" in chunk["message"]:
-                            full_response += chunk["message"]["content"]
-                return full_response
-            else:
-                return response.json().get("message", {}).get("content", "[GEEN ANTWOORD]")
-                
         except requests.exceptions.RequestException as e:
-            print(f"Fout bij het ophalen van LLM antwoord: {e}")
-            return f"[FOUT: {str(e)}]"
+            print(f"Fout bij het laden van model {payload['model']} op {endpoint.url}: {e}")
+            return False
+    
+    async def awarm_up(
+        self,
+        model: Optional[str] = None,
+        keep_alive: Optional[Union[str, float]] = None
+    ) -> bool:
+        """
+        Asynchrone variant van warm_up.
+        
+        Args:
+            model: Te laden model (standaard het model van deze client)
+            keep_alive: Hoe lang het model geladen blijft (standaard die van de client)
+            
+        Returns:
+            True als het model op alle hosts geladen is
+        """
+        payload = self._warm_up_payload(model, keep_alive)
+        results = await asyncio.gather(*(self._awarm_up_on(endpoint, payload) for endpoint in self.endpoints))
+        return all(results)
+    
+    async def _awarm_up_on(self, endpoint: Endpoint, payload: Dict[str, Any]) -> bool:
+        """Asynchrone variant van _warm_up_on."""
+        try:
+            session = self._get_async_session()
+            async with session.post(
+                f"{endpoint.url}/api/chat",
+                json=payload,
+                timeout=aiohttp.ClientTimeout(total=300)
+            ) as response:
+                response.raise_for_status()
+            self.endpoints.mark_resident(endpoint, payload["model"], payload.get("keep_alive") != 0)
+            return True
+                
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            print(f"Fout bij het laden van model {payload['model']} op {endpoint.url}: {e}")
+            return False
+    
+    def unload(self, model: Optional[str] = None) -> bool:
+        """
+        Haal een model direct uit het geheugen van Ollama (keep_alive = 0).
+        
+        Args:
+            model: Te ontladen model (standaard het model van deze client)
+            
+        Returns:
+            True als het verzoek is geaccepteerd
+        """
+        return self.warm_up(model, keep_alive=0)
+    
+    def running_models(self) -> List[Dict[str, Any]]:
+        """
+        Vraag op welke modellen Ollama op dit moment geladen heeft (/api/ps).
+        
+        Bij meerdere hosts worden alle hosts bevraagd; de routering van de pool
+        wordt meteen bijgewerkt met de gevonden modellen.
+        
+        Returns:
+            Lijst van modelbeschrijvingen met o.a. "name", "size_vram", "expires_at" en
+            "endpoint" (de host); hosts die niet bereikbaar zijn ontbreken
+        """
+        models = []
+        for endpoint in self.endpoints:
+            try:
+                response = self.session.get(f"{endpoint.url}/api/ps", timeout=10)
+                response.raise_for_status()
+                found = response.json().get("models", [])
+                
+            except (requests.exceptions.RequestException, ValueError) as e:
+                print(f"Fout bij het opvragen van geladen modellen op {endpoint.url}: {e}")
+                continue
+            
+            self.endpoints.update_residency(
+                endpoint, [info.get("name") or info.get("model", "") for info in found]
+            )
+            models.extend({**info, "endpoint": endpoint.url} for info in found)
+        return models
+    
+    def is_resident(self, model: Optional[str] = None) -> bool:
+        """
+        Controleer of een model op dit moment in het geheugen van (een van de) Ollama-hosts staat.
+        
+        Een naam zonder tag wordt als ":latest" geïnterpreteerd, net als in Ollama zelf.
+        
+        Args:
+            model: Te controleren model (standaard het model van deze client)
+            
+        Returns:
+            True als het model geladen is
+        """
+        wanted = normalize_model_name(model or self.model)
+        return any(
+            normalize_model_name(info.get("name") or info.get("model", "")) == wanted
+            for info in self.running_models()
+        )
+    
+    async def aclose(self) -> None:
+        """Sluit de asynchrone verbindingen van deze client."""
+        if self._async_session is not None and not self._async_session.closed:
+            await self._async_session.close()
+        self._async_session = None
+        self._async_loop = None
+    
+    def close(self) -> None:
+        """Sluit de synchrone verbindingen van deze client."""
+        if self._hedge_executor is not None:
+            self._hedge_executor.shutdown(wait=False)
+            self._hedge_executor = None
+        self.session.close()
+    
+    async def __aenter__(self) -> "OllamaClient":
+        return self
+    
+    async def __aexit__(self, *exc_info) -> None:
+        await self.aclose()
     
     def __call__(self, *args, **kwargs):
         """Maak directe aanroep mogelijk: llm("Hoe gaat het?") -> str"""
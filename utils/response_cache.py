@@ -0,0 +1,184 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+
+def make_cache_key(model: str, messages: List[Dict[str, Any]], options: Dict[str, Any]) -> str:
+    """
+    Maak een stabiele sleutel voor een LLM-aanroep.
+
+    Alleen rol en inhoud van de berichten tellen mee, zodat metadata zoals
+    tijdstempels twee verder identieke prompts niet van elkaar onderscheidt.
+
+    Args:
+        model: Naam van het LLM-model
+        messages: De berichten die naar het model gaan
+        options: Modelopties (temperature, num_predict, ...)
+
+    Returns:
+        Hexadecimale SHA-256 digest van de gecanoniseerde aanroep
+    """
+    canonical = json.dumps(
+        [
+            model,
+            [[msg.get("role"), msg.get("content")] for msg in messages],
+            options,
+        ],
+        sort_keys=True,
+        separators=(",", ":"),
+        ensure_ascii=False,
+        default=str,
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """
+    Exact-match cache voor LLM-antwoorden met LRU/TTL-verwijdering.
+
+    Het geheugen-niveau is begrensd op max_entries (least recently used gaat eerst).
+    Optioneel wordt elk antwoord ook in een SQLite-bestand bewaard, zodat de cache
+    een herstart overleeft; treffers op schijf worden naar het geheugen gepromoveerd.
+    Standaard worden alleen deterministische aanroepen (temperature 0) gecachet;
+    een gesampled antwoord komt alleen in de cache met use_cache=True.
+
+    Gebruik:
+    ```python
+    cache = ResponseCache(max_entries=1000, ttl_seconds=3600, disk_path="llm_cache.db")
+    llm = OllamaClient(model="llama3", cache=cache)
+    llm.generate_response(messages, temperature=0.0)              # miss -> Ollama
+    llm.generate_response(messages, temperature=0.0)              # hit -> direct
+    llm.generate_response(messages, temperature=0.7)              # gesampled -> altijd naar Ollama
+    llm.generate_response(messages, temperature=0.7, use_cache=True)  # toch cachen
+    llm.generate_response(messages, use_cache=False)              # altijd naar Ollama
+    ```
+    """
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        ttl_seconds: Optional[float] = 3600,
+        disk_path: Optional[str] = None,
+        max_temperature: Optional[float] = 0.0
+    ):
+        """
+        Initialiseer de cache.
+
+        Args:
+            max_entries: Maximum aantal antwoorden in het geheugen
+            ttl_seconds: Levensduur van een antwoord in seconden (None = onbeperkt)
+            disk_path: Optioneel pad naar een SQLite-bestand voor het schijfniveau
+            max_temperature: Hoogste temperature die standaard gecachet wordt
+                (standaard 0.0, None = elke temperature); hogere waarden gaan naar
+                de LLM, tenzij de aanroeper use_cache=True meegeeft
+        """
+        if max_entries < 1:
+            raise ValueError("max_entries moet minimaal 1 zijn")
+
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.max_temperature = max_temperature
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, Tuple[Optional[float], str]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+
+        if disk_path:
+            self._db = sqlite3.connect(disk_path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS response_cache ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL)"
+            )
+            self._db.commit()
+
+    def accepts(self, temperature: Optional[float]) -> bool:
+        """Controleer of een aanroep met deze temperature standaard gecachet mag worden."""
+        if self.max_temperature is None or temperature is None:
+            return True
+        return temperature <= self.max_temperature
+
+    def _expiry(self) -> Optional[float]:
+        return None if self.ttl_seconds is None else time.time() + self.ttl_seconds
+
+    def get(self, key: str) -> Optional[str]:
+        """Haal een antwoord op; retourneert None bij een miss of verlopen antwoord."""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at is None or expires_at > now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+
+            if self._db is not None:
+                row = self._db.execute(
+                    "SELECT value, expires_at FROM response_cache WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None:
+                    value, expires_at = row
+                    if expires_at is None or expires_at > now:
+                        self._store_in_memory(key, expires_at, value)
+                        self.hits += 1
+                        return value
+                    self._db.execute("DELETE FROM response_cache WHERE key = ?", (key,))
+                    self._db.commit()
+
+            self.misses += 1
+            return None
+
+    def set(self, key: str, value: str) -> None:
+        """Sla een antwoord op in de cache."""
+        expires_at = self._expiry()
+        with self._lock:
+            self._store_in_memory(key, expires_at, value)
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO response_cache (key, value, expires_at) VALUES (?, ?, ?)",
+                    (key, value, expires_at)
+                )
+                self._db.commit()
+
+    def _store_in_memory(self, key: str, expires_at: Optional[float], value: str) -> None:
+        """Voeg een antwoord toe aan het geheugen-niveau en verwijder zo nodig het oudste."""
+        self._entries[key] = (expires_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """Leeg beide niveaus van de cache en zet de tellers terug."""
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+            if self._db is not None:
+                self._db.execute("DELETE FROM response_cache")
+                self._db.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        """Geef hit/miss-tellers en de huidige grootte van de cache terug."""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+                "size": len(self._entries),
+            }
+
+    def close(self) -> None:
+        """Sluit het schijfniveau."""
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -0,0 +1,101 @@
+import random
+import time
+from typing import Optional, Union
+
+
+class Deadline:
+    """
+    Absoluut tijdstip waarop een aanroep klaar moet zijn.
+
+    Eén deadline wordt bij respond aangemaakt en doorgegeven tot aan de
+    HTTP-aanroep, zodat promptopbouw, wachttijd tussen pogingen en de aanroepen
+    zelf samen binnen hetzelfde budget blijven.
+
+    Gebruik:
+    ```python
+    deadline = Deadline(10.0)
+    response = llm.generate_response(messages, deadline=deadline)
+    ```
+    """
+    def __init__(self, seconds: float):
+        """
+        Initialiseer de deadline.
+
+        Args:
+            seconds: Aantal seconden vanaf nu
+        """
+        self.expires_at = time.monotonic() + seconds
+
+    @classmethod
+    def coerce(cls, value: Union["Deadline", float, None]) -> Optional["Deadline"]:
+        """Maak van een aantal seconden een Deadline; een Deadline of None blijft ongewijzigd."""
+        if value is None or isinstance(value, Deadline):
+            return value
+        return cls(value)
+
+    def remaining(self) -> float:
+        """Resterende tijd in seconden (nooit negatief)."""
+        return max(0.0, self.expires_at - time.monotonic())
+
+    @property
+    def expired(self) -> bool:
+        return time.monotonic() >= self.expires_at
+
+    def timeout(self, cap: Optional[float] = None) -> float:
+        """Time-out voor één aanroep: de resterende tijd, begrensd door cap."""
+        remaining = self.remaining()
+        return remaining if cap is None else min(cap, remaining)
+
+    def __repr__(self) -> str:
+        return f"Deadline(remaining={self.remaining():.3f}s)"
+
+
+class RetryPolicy:
+    """
+    Aantal pogingen en wachttijd tussen pogingen bij tijdelijke fouten.
+
+    De wachttijd groeit exponentieel (base_delay * 2^n, begrensd door max_delay)
+    met "full jitter": er wordt willekeurig tussen 0 en die grens gewacht, zodat
+    clients die tegelijk een fout zagen niet tegelijk opnieuw aankloppen.
+
+    Gebruik:
+    ```python
+    llm = OllamaClient(retry=RetryPolicy(max_attempts=4, base_delay=0.5))
+    ```
+    """
+    def __init__(
+        self,
+        max_attempts: int = 3,
+        base_delay: float = 0.25,
+        max_delay: float = 4.0,
+        jitter: bool = True
+    ):
+        """
+        Initialiseer het beleid.
+
+        Args:
+            max_attempts: Totaal aantal pogingen (1 = niet opnieuw proberen)
+            base_delay: Wachttijd vóór de eerste herhaling in seconden
+            max_delay: Maximale wachttijd tussen twee pogingen in seconden
+            jitter: Kies de wachttijd willekeurig tussen 0 en de exponentiële grens
+        """
+        if max_attempts < 1:
+            raise ValueError("max_attempts moet minimaal 1 zijn")
+
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.jitter = jitter
+
+    def backoff(self, attempt: int) -> float:
+        """
+        Wachttijd na de gegeven mislukte poging.
+
+        Args:
+            attempt: Nummer van de mislukte poging (1 = eerste poging)
+
+        Returns:
+            Aantal seconden om te wachten
+        """
+        delay = min(self.max_delay, self.base_delay * (2 ** (attempt - 1)))
+        return random.uniform(0, delay) if self.jitter else delay
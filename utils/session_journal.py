@@ -0,0 +1,219 @@
+import json
+import os
+import threading
+from datetime import datetime
+from typing import Any, Dict, Optional, Type
+
+from utils.conversation_memory import Message, Session
+from utils.session_store import SessionStore
+from utils.shared_sessions import restore_message
+
+
+class SessionJournal(SessionStore):
+    """
+    Append-only journal voor de sessies van een SessionManager.
+
+    In plaats van bij elke opslag alle sessies opnieuw als JSON weg te schrijven,
+    wordt elke wijziging (create, bericht, context, samenvatting, verwijdering)
+    als één compacte regel toegevoegd. De kosten van duurzaamheid schalen daardoor
+    met het aantal wijzigingen. Periodiek wordt het journal gecompacteerd tot een snapshot
+    (hetzelfde formaat als SessionManager.save_to_file); bij het laden wordt eerst
+    de snapshot ingelezen en daarna het journal opnieuw afgespeeld.
+
+    Gebruik:
+    ```python
+    manager = SessionManager(store=SessionJournal("sessions.journal"))
+    ```
+    """
+    def __init__(
+        self,
+        path: str,
+        snapshot_path: Optional[str] = None,
+        compact_every: Optional[int] = 10000,
+        fsync: bool = False
+    ):
+        """
+        Initialiseer het journal.
+
+        Args:
+            path: Pad naar het journalbestand (één JSON-record per regel)
+            snapshot_path: Pad naar de snapshot (standaard path + ".snapshot")
+            compact_every: Compacteer automatisch na dit aantal records (None = nooit)
+            fsync: Forceer na elk record een fsync naar schijf
+        """
+        self.path = path
+        self.snapshot_path = snapshot_path or f"{path}.snapshot"
+        self.compact_every = compact_every
+        self.fsync = fsync
+        self.records = 0
+        self._manager = None
+        self._lock = threading.RLock()
+        self._file = None
+
+    def attach(self, manager) -> None:
+        """
+        Speel snapshot en journal af in de manager en log vanaf nu zijn wijzigingen.
+
+        Args:
+            manager: De SessionManager die door dit journal wordt bijgehouden
+        """
+        sessions = self._replay(manager.session_class)
+        for session in sessions.values():
+            if not session.is_expired():
+                manager._register(session)
+
+        self._manager = manager
+        self._file = open(self.path, "a", encoding="utf-8")
+
+    def _replay(self, session_class: Type[Session] = Session) -> Dict[str, Session]:
+        """Lees de snapshot (als sessies van session_class) en pas daarna alle journalrecords toe."""
+        sessions: Dict[str, Session] = {}
+
+        if os.path.exists(self.snapshot_path):
+            with open(self.snapshot_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            for session_data in data.get("sessions", {}).values():
+                session = session_class.from_dict(session_data)
+                sessions[session.session_id] = session
+
+        self.records = 0
+        if os.path.exists(self.path):
+            with open(self.path, "r", encoding="utf-8") as f:
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        # Een half weggeschreven laatste regel na een crash wordt overgeslagen
+                        continue
+                    self._apply(sessions, record)
+                    self.records += 1
+
+        return sessions
+
+    @staticmethod
+    def _apply(sessions: Dict[str, Session], record: Dict[str, Any]) -> None:
+        """Pas één journalrecord toe op de sessies."""
+        op = record["op"]
+        session_id = record["id"]
+
+        if op == "create":
+            session = Session(
+                session_id=session_id,
+                max_history=record["max"],
+                ttl_hours=record["ttl"]
+            )
+            session.created_at = datetime.fromtimestamp(record["t"])
+            session._touched = record["t"]
+            sessions[session_id] = session
+            return
+
+        if op == "del":
+            sessions.pop(session_id, None)
+            return
+
+        session = sessions.get(session_id)
+        if session is None:
+            return
+
+        if op == "msg":
+            session.history.append(restore_message(record["r"], record["c"], record["t"], record.get("s")))
+        elif op == "ctx":
+            session.context[record["k"]] = record["v"]
+        elif op == "sum":
+            while session.history and session.history[0].created <= record["upto"]:
+                session.history.popleft()
+            session.summary = record["s"]
+        session._touched = record["t"]
+
+    def _append(self, record: Dict[str, Any]) -> None:
+        """Schrijf één record naar het journal en compacteer zo nodig."""
+        line = json.dumps(record, ensure_ascii=False, separators=(",", ":"), default=str)
+        with self._lock:
+            if self._file is None:
+                return
+            self._file.write(line + "\n")
+            self._file.flush()
+            if self.fsync:
+                os.fsync(self._file.fileno())
+            self.records += 1
+
+            if self.compact_every and self.records >= self.compact_every:
+                self.compact()
+
+    def record_create(self, session: Session) -> None:
+        """Log het aanmaken van een sessie."""
+        self._append({
+            "op": "create",
+            "id": session.session_id,
+            "t": session.created_at.timestamp(),
+            "max": session.max_history,
+            "ttl": session.ttl.total_seconds() / 3600
+        })
+
+    def record_message(self, session: Session, message: Message) -> None:
+        """Log een nieuw bericht in een sessie (met spreker, als die er is)."""
+        record = {
+            "op": "msg",
+            "id": session.session_id,
+            "r": message.role,
+            "c": message.content,
+            "t": message.created
+        }
+        speaker = getattr(message, "speaker", None)
+        if speaker is not None:
+            record["s"] = speaker
+        self._append(record)
+
+    def record_context(self, session: Session, key: str, value: Any) -> None:
+        """Log een contextwijziging in een sessie."""
+        self._append({
+            "op": "ctx",
+            "id": session.session_id,
+            "k": key,
+            "v": value,
+            "t": session._touched
+        })
+
+    def record_summary(self, session: Session, folded_until: float) -> None:
+        """Log een nieuwe samenvatting en tot welk bericht de geschiedenis is gevouwen."""
+        self._append({
+            "op": "sum",
+            "id": session.session_id,
+            "s": session.summary,
+            "upto": folded_until,
+            "t": session._touched
+        })
+
+    def record_delete(self, session_id: str) -> None:
+        """Log het verlopen of verwijderen van een sessie."""
+        self._append({"op": "del", "id": session_id})
+
+    def compact(self) -> None:
+        """
+        Schrijf de huidige toestand als snapshot weg en begin een leeg journal.
+
+        De snapshot wordt eerst naar een tijdelijk bestand geschreven en daarna
+        atomair op zijn plaats gezet, zodat een crash nooit een halve snapshot achterlaat.
+        """
+        with self._lock:
+            if self._manager is None:
+                return
+
+            tmp_path = f"{self.snapshot_path}.tmp"
+            self._manager.save_to_file(tmp_path)
+            os.replace(tmp_path, self.snapshot_path)
+
+            if self._file is not None:
+                self._file.close()
+            self._file = open(self.path, "w", encoding="utf-8")
+            self.records = 0
+
+    def close(self) -> None:
+        """Sluit het journalbestand."""
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
@@ -0,0 +1,95 @@
+import hashlib
+import json
+from typing import Any, Dict, List, Optional
+
+# 128 bits: botsingen zijn pas bij ~10^19 gesprekken waarschijnlijk
+DIGEST_SIZE = 16
+
+
+def stable_digest(*parts: str, digest_size: int = DIGEST_SIZE) -> str:
+    """
+    Stabiele hexadecimale BLAKE2b-digest over een of meer tekstdelen.
+
+    In tegenstelling tot hash() is de uitkomst gelijk in elk proces en na elke
+    herstart (geen hash-randomisatie). De delen worden met hun lengte
+    voorafgegaan, zodat ("ab", "c") en ("a", "bc") verschillende digests geven.
+
+    Args:
+        *parts: De te hashen tekstdelen
+        digest_size: Lengte van de digest in bytes (1..64)
+
+    Returns:
+        De digest als hexadecimale string (2 * digest_size tekens)
+    """
+    h = hashlib.blake2b(digest_size=digest_size)
+    for part in parts:
+        data = part.encode("utf-8")
+        h.update(len(data).to_bytes(8, "big"))
+        h.update(data)
+    return h.hexdigest()
+
+
+def content_session_id(conversation: List[Dict[str, Any]], scope: Optional[str] = None) -> str:
+    """
+    Leid een deterministisch sessie-ID af uit de inhoud van een gesprek.
+
+    Het eerste gebruikersbericht bepaalt de sleutel, zodat hetzelfde gesprek met
+    extra beurten bij dezelfde sessie uitkomt. Gesprekken met een identieke
+    openingsvraag delen daardoor een sessie; geef een scope (bijv. de gebruiker)
+    mee of gebruik caller_session_id als dat ongewenst is.
+
+    Args:
+        conversation: Lijst van berichten in het formaat [{"role": "user", "content": "..."}, ...]
+        scope: Optionele naamruimte, bijv. het ID van de aanroeper
+
+    Returns:
+        "user_<digest>" op basis van het eerste gebruikersbericht, of
+        "session_<digest>" op basis van het hele gesprek als er geen is
+    """
+    prefix = (scope,) if scope is not None else ()
+    for message in conversation:
+        if message.get("role") == "user":
+            return f"user_{stable_digest(*prefix, message.get('content', ''))}"
+
+    canonical = json.dumps(
+        [[message.get("role"), message.get("content")] for message in conversation],
+        separators=(",", ":"),
+        ensure_ascii=False,
+        default=str,
+    )
+    return f"session_{stable_digest(*prefix, canonical)}"
+
+
+def caller_session_id(caller_id: str, conversation_id: Optional[str] = None) -> str:
+    """
+    Sessie-ID per aanroeper (en optioneel per gesprek van die aanroeper).
+
+    Args:
+        caller_id: Identiteit van de aanroeper (gebruiker, API-sleutel, tenant)
+        conversation_id: Optioneel gesprek binnen die aanroeper
+
+    Returns:
+        "caller_<digest>", stabiel over processen en herstarts
+    """
+    parts = (caller_id,) if conversation_id is None else (caller_id, conversation_id)
+    return f"caller_{stable_digest(*parts)}"
+
+
+def session_slot(session_id: str, slots: int) -> int:
+    """
+    Stabiele verdeling van sessies over een vast aantal slots (bijv. workers).
+
+    Elk proces kiest voor hetzelfde sessie-ID hetzelfde slot, zodat een gesprek
+    steeds bij dezelfde worker (en diens cache) uitkomt.
+
+    Args:
+        session_id: Het sessie-ID
+        slots: Aantal slots
+
+    Returns:
+        Een slotnummer in [0, slots)
+    """
+    if slots < 1:
+        raise ValueError("slots moet minimaal 1 zijn")
+    digest = hashlib.blake2b(session_id.encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "big") % slots
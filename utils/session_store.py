@@ -0,0 +1,273 @@
+import json
+import sqlite3
+import threading
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from utils.conversation_memory import Message, Session
+from utils.shared_sessions import restore_message
+
+
+class SessionStore:
+    """
+    Basisklasse voor opslag-backends van een SessionManager.
+
+    De manager meldt elke wijziging via de record_*-methodes; een backend kan
+    sessies bij het opstarten inladen (attach) of pas bij het eerste gebruik
+    (load_session). Alle methodes doen standaard niets, zodat een backend alleen
+    implementeert wat hij nodig heeft.
+    """
+    # True als load_session sessies kan teruglezen die uit het geheugen zijn verwijderd
+    lazy = False
+
+    def attach(self, manager) -> None:
+        """Koppel de store aan een manager en laad eventueel bestaande sessies in."""
+
+    def load_session(self, session_id: str) -> Optional[Session]:
+        """Laad een sessie die niet in het geheugen staat (lazy loading)."""
+        return None
+
+    def record_create(self, session: Session) -> None:
+        """Leg het aanmaken van een sessie vast."""
+
+    def record_message(self, session: Session, message: Message) -> None:
+        """Leg een nieuw bericht in een sessie vast."""
+
+    def record_context(self, session: Session, key: str, value: Any) -> None:
+        """Leg een contextwijziging in een sessie vast."""
+
+    def record_summary(self, session: Session, folded_until: float) -> None:
+        """Leg een nieuwe samenvatting vast; berichten t/m folded_until zijn erin opgegaan."""
+
+    def record_delete(self, session_id: str) -> None:
+        """Leg het verlopen of verwijderen van een sessie vast."""
+
+    def delete_expired(self, now: float) -> int:
+        """Verwijder verlopen sessies die niet in het geheugen staan; retourneert het aantal."""
+        return 0
+
+    def flush(self) -> None:
+        """Schrijf openstaande wijzigingen weg."""
+
+    def compact(self) -> None:
+        """Comprimeer de opslag, indien de backend dat ondersteunt."""
+
+    def close(self) -> None:
+        """Schrijf openstaande wijzigingen weg en sluit de opslag."""
+
+
+class SQLiteSessionStore(SessionStore):
+    """
+    SQLite-backend met lazy loading per sessie.
+
+    Sessies en berichten staan in geïndexeerde tabellen. Een sessie wordt pas uit
+    de database gelezen wanneer get_session haar opvraagt, zodat opstarten niet
+    afhangt van de totale hoeveelheid geschiedenis. Wijzigingen worden gebufferd en
+    in één transactie weggeschreven zodra batch_size bereikt is (of bij flush).
+    Verlopen sessies worden met een geïndexeerde DELETE opgeruimd.
+
+    Gebruik:
+    ```python
+    manager = SessionManager(store=SQLiteSessionStore("sessions.db"), max_resident=10000)
+    ```
+    """
+    lazy = True
+
+    SCHEMA = (
+        "CREATE TABLE IF NOT EXISTS sessions ("
+        " id TEXT PRIMARY KEY,"
+        " created_at REAL NOT NULL,"
+        " last_accessed REAL NOT NULL,"
+        " expires_at REAL NOT NULL,"
+        " max_history INTEGER NOT NULL,"
+        " ttl_hours REAL NOT NULL,"
+        " context TEXT NOT NULL DEFAULT '{}',"
+        " summary TEXT NOT NULL DEFAULT '')",
+        "CREATE INDEX IF NOT EXISTS idx_sessions_expires_at ON sessions (expires_at)",
+        "CREATE TABLE IF NOT EXISTS messages ("
+        " seq INTEGER PRIMARY KEY AUTOINCREMENT,"
+        " session_id TEXT NOT NULL,"
+        " role TEXT NOT NULL,"
+        " content TEXT NOT NULL,"
+        " created REAL NOT NULL,"
+        " speaker TEXT)",
+        "CREATE INDEX IF NOT EXISTS idx_messages_session ON messages (session_id, seq)",
+    )
+
+    def __init__(self, path: str, batch_size: int = 100):
+        """
+        Initialiseer de SQLite-store.
+
+        Args:
+            path: Pad naar het databasebestand (":memory:" voor een tijdelijke database)
+            batch_size: Aantal gebufferde wijzigingen waarna automatisch wordt weggeschreven
+        """
+        self.path = path
+        self.batch_size = batch_size
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        for statement in self.SCHEMA:
+            self._db.execute(statement)
+        columns = {row[1] for row in self._db.execute("PRAGMA table_info(sessions)")}
+        if "summary" not in columns:
+            self._db.execute("ALTER TABLE sessions ADD COLUMN summary TEXT NOT NULL DEFAULT ''")
+        columns = {row[1] for row in self._db.execute("PRAGMA table_info(messages)")}
+        if "speaker" not in columns:
+            self._db.execute("ALTER TABLE messages ADD COLUMN speaker TEXT")
+        self._db.commit()
+
+        self._lock = threading.RLock()
+        # Geordende schrijfacties (aanmaken, berichten, verwijderen)
+        self._pending: List[Tuple[str, Tuple[Any, ...]]] = []
+        # Samengevoegde rij-updates: per sessie alleen de laatste toestand
+        self._dirty: Dict[str, Session] = {}
+        self._dirty_context: Dict[str, Session] = {}
+        self._dirty_summary: Dict[str, Session] = {}
+
+    def load_session(self, session_id: str) -> Optional[Session]:
+        """Lees één sessie met haar meest recente berichten uit de database."""
+        with self._lock:
+            self._flush_locked()
+            row = self._db.execute(
+                "SELECT created_at, last_accessed, max_history, ttl_hours, context, summary"
+                " FROM sessions WHERE id = ?",
+                (session_id,)
+            ).fetchone()
+            if row is None:
+                return None
+
+            created_at, last_accessed, max_history, ttl_hours, context, summary = row
+            messages = self._db.execute(
+                "SELECT role, content, created, speaker FROM messages WHERE session_id = ?"
+                " ORDER BY seq DESC LIMIT ?",
+                (session_id, max_history)
+            ).fetchall()
+
+        session = Session(session_id=session_id, max_history=max_history, ttl_hours=ttl_hours)
+        session.created_at = datetime.fromtimestamp(created_at)
+        session._touched = last_accessed
+        session.context = json.loads(context)
+        session.summary = summary
+        session.history.extend(restore_message(*row) for row in reversed(messages))
+        return session
+
+    def _queue(self, sql: str, params: Tuple[Any, ...]) -> None:
+        self._pending.append((sql, params))
+        if len(self._pending) + len(self._dirty) >= self.batch_size:
+            self._flush_locked()
+
+    def record_create(self, session: Session) -> None:
+        with self._lock:
+            self._queue(
+                "INSERT OR REPLACE INTO sessions"
+                " (id, created_at, last_accessed, expires_at, max_history, ttl_hours, context)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    session.session_id,
+                    session.created_at.timestamp(),
+                    session._touched,
+                    session.expires_at,
+                    session.max_history,
+                    session.ttl.total_seconds() / 3600,
+                    json.dumps(session.context, ensure_ascii=False, default=str),
+                )
+            )
+
+    def record_message(self, session: Session, message: Message) -> None:
+        with self._lock:
+            self._dirty[session.session_id] = session
+            self._queue(
+                "INSERT INTO messages (session_id, role, content, created, speaker) VALUES (?, ?, ?, ?, ?)",
+                (session.session_id, message.role, message.content, message.created, getattr(message, "speaker", None))
+            )
+
+    def record_context(self, session: Session, key: str, value: Any) -> None:
+        with self._lock:
+            self._dirty[session.session_id] = session
+            self._dirty_context[session.session_id] = session
+            if len(self._pending) + len(self._dirty) >= self.batch_size:
+                self._flush_locked()
+
+    def record_summary(self, session: Session, folded_until: float) -> None:
+        with self._lock:
+            self._dirty[session.session_id] = session
+            self._dirty_summary[session.session_id] = session
+            self._queue(
+                "DELETE FROM messages WHERE session_id = ? AND created <= ?",
+                (session.session_id, folded_until)
+            )
+
+    def record_delete(self, session_id: str) -> None:
+        with self._lock:
+            self._dirty.pop(session_id, None)
+            self._dirty_context.pop(session_id, None)
+            self._dirty_summary.pop(session_id, None)
+            self._queue("DELETE FROM messages WHERE session_id = ?", (session_id,))
+            self._queue("DELETE FROM sessions WHERE id = ?", (session_id,))
+
+    def _flush_locked(self) -> None:
+        """Schrijf alle gebufferde wijzigingen in één transactie weg (lock moet vastgehouden worden)."""
+        if not self._pending and not self._dirty:
+            return
+
+        with self._db:
+            for sql, params in self._pending:
+                self._db.execute(sql, params)
+
+            self._db.executemany(
+                "UPDATE sessions SET last_accessed = ?, expires_at = ? WHERE id = ?",
+                [(s._touched, s.expires_at, sid) for sid, s in self._dirty.items()]
+            )
+            self._db.executemany(
+                "UPDATE sessions SET context = ? WHERE id = ?",
+                [
+                    (json.dumps(s.context, ensure_ascii=False, default=str), sid)
+                    for sid, s in self._dirty_context.items()
+                ]
+            )
+            self._db.executemany(
+                "UPDATE sessions SET summary = ? WHERE id = ?",
+                [(s.summary, sid) for sid, s in self._dirty_summary.items()]
+            )
+            # Houd per sessie niet meer berichten bij dan max_history
+            self._db.executemany(
+                "DELETE FROM messages WHERE session_id = ? AND seq <= ("
+                " SELECT seq FROM messages WHERE session_id = ? ORDER BY seq DESC LIMIT 1 OFFSET ?)",
+                [(sid, sid, s.max_history) for sid, s in self._dirty.items()]
+            )
+
+        self._pending.clear()
+        self._dirty.clear()
+        self._dirty_context.clear()
+        self._dirty_summary.clear()
+
+    def flush(self) -> None:
+        with self._lock:
+            self._flush_locked()
+
+    def delete_expired(self, now: float) -> int:
+        with self._lock:
+            self._flush_locked()
+            with self._db:
+                self._db.execute(
+                    "DELETE FROM messages WHERE session_id IN"
+                    " (SELECT id FROM sessions WHERE expires_at < ?)",
+                    (now,)
+                )
+                return self._db.execute("DELETE FROM sessions WHERE expires_at < ?", (now,)).rowcount
+
+    def count(self) -> int:
+        """Aantal sessies in de database (inclusief niet-geladen sessies)."""
+        with self._lock:
+            self._flush_locked()
+            return self._db.execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+
+    def compact(self) -> None:
+        with self._lock:
+            self._flush_locked()
+            self._db.execute("VACUUM")
+
+    def close(self) -> None:
+        with self._lock:
+            self._flush_locked()
+            self._db.close()
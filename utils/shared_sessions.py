@@ -0,0 +1,327 @@
+from contextlib import contextmanager
+from typing import Any, Deque, Dict, Iterator, List, Optional, Tuple
+from datetime import datetime
+import contextvars
+import time
+
+from utils.conversation_memory import Message, Session, SessionManager
+
+
+class SharedMessage(Message):
+    """
+    Bericht in een gedeeld gesprek, met de naam van de spreker.
+
+    Het bericht wordt één keer opgeslagen en per agent anders weergegeven:
+    de eigen beurten van een agent zijn "assistant", die van de gebruiker
+    "user" en die van andere agents "user" met de naam van de spreker ervoor.
+    """
+    __slots__ = ("speaker",)
+
+    def __init__(self, role: str, content: str, created: Optional[float] = None, speaker: Optional[str] = None):
+        super().__init__(role, content, created)
+        self.speaker = speaker
+
+    def __repr__(self) -> str:
+        return f"SharedMessage(speaker={self.speaker!r}, role={self.role!r}, content={self.content!r})"
+
+    def to_prompt(self, viewer: Optional[str] = None) -> Dict[str, str]:
+        if self.speaker is None or viewer is None:
+            return {"role": self.role, "content": self.content}
+        if self.speaker == viewer:
+            return {"role": "assistant", "content": self.content}
+        return {"role": "user", "content": f"{self.speaker}: {self.content}"}
+
+    def to_dict(self) -> Dict[str, str]:
+        data = super().to_dict()
+        if self.speaker is not None:
+            data["speaker"] = self.speaker
+        return data
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'SharedMessage':
+        message = super().from_dict(data)
+        message.speaker = data.get("speaker")
+        return message
+
+
+def restore_message(role: str, content: str, created: Optional[float] = None, speaker: Optional[str] = None) -> Message:
+    """Bouw een opgeslagen bericht terug: met spreker als SharedMessage, anders als gewone Message."""
+    if speaker is None:
+        return Message(role, content, created)
+    return SharedMessage(role, content, created, speaker)
+
+
+class TeamTurn:
+    """
+    Eén gebruikersbeurt waarop meerdere agents van een team antwoorden.
+
+    De eerste agent die zijn beurt vastlegt, schrijft de vraag in het gedeelde
+    log en noteert het volgnummer; de andere agents van dezelfde teambeurt
+    slaan precies dat bericht over. Buiten een teambeurt wordt elke
+    gebruikersbeurt gewoon opgeslagen, ook als de tekst gelijk is.
+    """
+    __slots__ = ("session_id", "content", "index")
+
+    def __init__(self, session_id: str, content: str):
+        self.session_id = session_id
+        self.content = content
+        # Volgnummer van de vraag in het gedeelde log (None tot hij is vastgelegd)
+        self.index: Optional[int] = None
+
+
+# De teambeurt waarbinnen de huidige agent antwoordt (None = losse beurt)
+current_turn: contextvars.ContextVar[Optional[TeamTurn]] = contextvars.ContextVar("team_turn", default=None)
+
+
+@contextmanager
+def team_turn(session_id: str, content: str) -> Iterator[TeamTurn]:
+    """
+    Laat alle agents binnen dit blok op dezelfde gebruikersbeurt antwoorden.
+
+    Threads nemen de teambeurt alleen mee via contextvars.copy_context();
+    asyncio-taken erven hem vanzelf. Herstelt bij het verlaten de vorige
+    waarde, zodat het blok ook veilig is rond (async) generators.
+
+    Args:
+        session_id: Het gedeelde gesprek
+        content: De vraag van de gebruiker
+    """
+    turn = TeamTurn(session_id, content)
+    previous = current_turn.get()
+    current_turn.set(turn)
+    try:
+        yield turn
+    finally:
+        current_turn.set(previous)
+
+
+class SharedSession(Session):
+    """
+    Eén canoniek berichtenlog per gesprek, gedeeld door alle agents van een team.
+
+    Agents schrijven niet rechtstreeks in deze sessie maar via een SessionView,
+    die hun eigen beurten van een spreker voorziet en binnen een teambeurt
+    (zie team_turn) de vraag van de gebruiker maar één keer opslaat.
+    """
+    message_class = SharedMessage
+
+    def __init__(self, session_id: str = None, max_history: int = 20, ttl_hours: int = 24):
+        super().__init__(session_id=session_id, max_history=max_history, ttl_hours=ttl_hours)
+        # Volgnummer van het laatst toegevoegde bericht
+        self.appended = 0
+        # Eén lichte view per agent, zodat views met de sessie meeleven en verdwijnen
+        self.views: Dict[str, "SessionView"] = {}
+
+    @classmethod
+    def from_session(cls, session: Session) -> 'SharedSession':
+        """Maak een gedeelde sessie van een gewone (bijv. uit een store geladen) sessie."""
+        shared = cls(session_id=session.session_id, max_history=session.max_history)
+        shared.ttl = session.ttl
+        shared.created_at = session.created_at
+        shared._touched = session._touched
+        shared.history.extend(
+            message if isinstance(message, SharedMessage)
+            else SharedMessage(message.role, message.content, message.created)
+            for message in session.history
+        )
+        shared.context = session.context
+        shared.summary = session.summary
+        shared.appended = len(shared.history)
+        return shared
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'SharedSession':
+        session = super().from_dict(data)
+        session.appended = len(session.history)
+        return session
+
+    def add_message(self, role: str, content: str, speaker: Optional[str] = None) -> int:
+        """
+        Voeg een bericht toe aan het gedeelde log.
+
+        Args:
+            role: Rol van de afzender ('user' of 'assistant')
+            content: Inhoud van het bericht
+            speaker: Naam van de agent die spreekt (None voor de gebruiker)
+
+        Returns:
+            Het volgnummer van het bericht
+        """
+        with self.lock:
+            now = time.time()
+            message = SharedMessage(role, content, now, speaker)
+            self.history.append(message)
+            self.appended += 1
+            self._touched = now
+            if self._observer is not None:
+                self._observer.record_message(self, message)
+            return self.appended
+
+    def view(self, agent_name: str) -> "SessionView":
+        """De view van een agent op dit gesprek (wordt aangemaakt bij eerste gebruik)."""
+        view = self.views.get(agent_name)
+        if view is None:
+            with self.lock:
+                view = self.views.setdefault(agent_name, SessionView(self, agent_name))
+        return view
+
+
+class SessionView:
+    """
+    Per-agent view op een SharedSession.
+
+    Gedraagt zich voor BaseAgent als een gewone Session: geschiedenis, samenvatting
+    en lock zijn die van het gedeelde gesprek, alleen de context is per agent
+    (met terugval op de gedeelde context). De view kopieert geen berichten.
+    De context van een agent staat in de gedeelde context onder de sleutel
+    "@<agent>/<sleutel>", zodat een store hem net als de rest bewaart.
+    """
+    __slots__ = ("shared", "agent_name", "_prefix")
+
+    def __init__(self, shared: SharedSession, agent_name: str):
+        self.shared = shared
+        self.agent_name = agent_name
+        self._prefix = f"@{agent_name}/"
+
+    @property
+    def session_id(self) -> str:
+        return self.shared.session_id
+
+    @property
+    def history(self) -> Deque[Message]:
+        return self.shared.history
+
+    @property
+    def summary(self) -> str:
+        return self.shared.summary
+
+    @property
+    def context(self) -> Dict[str, Any]:
+        """Kopie van de context van deze agent (zonder de gedeelde sleutels)."""
+        prefix = self._prefix
+        with self.shared.lock:
+            return {key[len(prefix):]: value for key, value in self.shared.context.items() if key.startswith(prefix)}
+
+    @property
+    def lock(self):
+        return self.shared.lock
+
+    @property
+    def max_history(self) -> int:
+        return self.shared.max_history
+
+    @property
+    def last_accessed(self) -> datetime:
+        return self.shared.last_accessed
+
+    @property
+    def expires_at(self) -> float:
+        return self.shared.expires_at
+
+    def is_expired(self, now: Optional[float] = None) -> bool:
+        return self.shared.is_expired(now)
+
+    def add_message(self, role: str, content: str) -> None:
+        """
+        Voeg een beurt van deze agent (of de gebruikersbeurt waarop hij antwoordt) toe.
+
+        Alleen de vraag van de lopende teambeurt (zie team_turn) wordt niet
+        opnieuw opgeslagen als een andere agent hem al heeft vastgelegd; elke
+        andere gebruikersbeurt komt in het log, ook met dezelfde tekst.
+        """
+        shared = self.shared
+        with shared.lock:
+            if role != "user":
+                shared.add_message(role, content, speaker=self.agent_name)
+                return
+            turn = current_turn.get()
+            if turn is None or turn.session_id != shared.session_id or turn.content != content:
+                shared.add_message(role, content)
+            elif turn.index is None:
+                turn.index = shared.add_message(role, content)
+            else:
+                shared._touched = time.time()
+
+    def get_recent_history(self, max_messages: Optional[int] = None) -> Tuple[Message, ...]:
+        return self.shared.get_recent_history(max_messages)
+
+    def get_context(self, key: str, default: Any = None) -> Any:
+        """Haal een waarde op uit de context van de agent, anders uit de gedeelde context."""
+        context = self.shared.context
+        scoped = self._prefix + key
+        if scoped in context:
+            return context[scoped]
+        return self.shared.get_context(key, default)
+
+    def update_context(self, key: str, value: Any) -> None:
+        """Werk de context van deze agent bij (de gedeelde sleutel zelf blijft ongemoeid)."""
+        self.shared.update_context(self._prefix + key, value)
+
+    def apply_summary(self, summary: str, folded: List[Message]) -> None:
+        self.shared.apply_summary(summary, folded)
+
+
+class SharedSessionManager(SessionManager):
+    """
+    SessionManager op teamniveau met één SharedSession per gesprek.
+
+    Alle agents van een team gebruiken dezelfde manager via for_agent; het
+    geheugen per gesprek groeit daardoor niet meer met het aantal agents, en
+    elke agent ziet de beurten van de anderen zonder lijsten te kopiëren.
+    Sharding, TTL's, de reaper en een eventuele store werken zoals bij
+    SessionManager; een store bewaart ook de spreker van elk bericht. Een
+    AgentTeam opent per fan-out een teambeurt (team_turn), zodat de vraag één
+    keer in het log komt; losse beurten van agents worden altijd opgeslagen.
+
+    Gebruik:
+    ```python
+    gedeeld = SharedSessionManager()
+    frontend = FrontendDeveloperAgent(llm=llm, session_manager=gedeeld.for_agent("Sarah"))
+    # of voor een heel team in één keer:
+    team = AgentTeam([frontend, backend, scrum], session_manager=gedeeld)
+    ```
+    """
+    session_class = SharedSession
+
+    def _register(self, session: Session) -> None:
+        # Sessies uit een store of bestand zijn gewone Sessions; sla een gedeelde kopie op
+        if not isinstance(session, SharedSession):
+            session = SharedSession.from_session(session)
+        super()._register(session)
+
+    def _get_locked(self, shard, session_id: str) -> Optional[SharedSession]:
+        session = super()._get_locked(shard, session_id)
+        if session is not None and not isinstance(session, SharedSession):
+            # Zojuist geladen: _register heeft de gedeelde kopie in de shard gezet
+            session = shard.sessions[session_id]
+        return session
+
+    def for_agent(self, agent_name: str) -> "AgentSessionManager":
+        """Een sessiebeheerder voor één agent die views op de gedeelde gesprekken teruggeeft."""
+        return AgentSessionManager(self, agent_name)
+
+
+class AgentSessionManager:
+    """
+    Sessiebeheer voor één agent bovenop een SharedSessionManager.
+
+    get_session en get_or_create_session geven de SessionView van deze agent
+    terug; overige methoden (cleanup_expired, flush, close, ...) gaan naar de
+    gedeelde manager.
+    """
+    def __init__(self, shared: SharedSessionManager, agent_name: str):
+        self.shared = shared
+        self.agent_name = agent_name
+
+    def get_session(self, session_id: str) -> Optional[SessionView]:
+        session = self.shared.get_session(session_id)
+        return None if session is None else session.view(self.agent_name)
+
+    def get_or_create_session(self, session_id: Optional[str] = None, **kwargs) -> SessionView:
+        return self.shared.get_or_create_session(session_id, **kwargs).view(self.agent_name)
+
+    def create_session(self, **kwargs) -> SessionView:
+        return self.shared.create_session(**kwargs).view(self.agent_name)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.shared, name)
@@ -0,0 +1,327 @@
+import asyncio
+import functools
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Iterator, List, Optional, Tuple, TypeVar
+
+from utils.errors import DeadlineExceededError
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """
+    Laat gelijktijdige, identieke aanroepen één onderliggende aanroep delen.
+
+    De eerste aanroeper met een sleutel voert de functie uit; wie met dezelfde
+    sleutel binnenkomt terwijl die nog loopt, wacht op hetzelfde resultaat (of
+    dezelfde exceptie). Alleen een DeadlineExceededError wordt niet gedeeld:
+    die hoort bij de deadline van de uitvoerder, dus een wachtende probeert het
+    dan opnieuw met zijn eigen functie. Zodra de aanroep klaar is, wordt de
+    sleutel vrijgegeven: er wordt niets bewaard, daarvoor is de ResponseCache.
+
+    Gebruik:
+    ```python
+    flight = SingleFlight()
+    antwoord, gedeeld = flight.do(sleutel, lambda: llm.generate_response(messages))
+    ```
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[str, Future] = {}
+        self.shared = 0
+
+    def do(self, key: str, fn: Callable[[], T], timeout: Optional[float] = None) -> Tuple[T, bool]:
+        """
+        Voer fn uit, of sluit aan bij een lopende aanroep met dezelfde sleutel.
+
+        Args:
+            key: Sleutel die identieke aanroepen herkent
+            fn: Functie die het resultaat berekent
+            timeout: Maximale wachttijd voor wie aansluit bij een lopende aanroep
+                (de uitvoerder zelf bewaakt zijn eigen tijd)
+
+        Returns:
+            Tuple van (resultaat, of het resultaat met een lopende aanroep is gedeeld)
+
+        Raises:
+            concurrent.futures.TimeoutError: Als de lopende aanroep niet binnen timeout klaar is
+        """
+        expires = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._lock:
+                future = self._calls.get(key)
+                if future is not None:
+                    self.shared += 1
+                    leader = False
+                else:
+                    future = self._calls[key] = Future()
+                    leader = True
+
+            if leader:
+                break
+            try:
+                return future.result(None if expires is None else max(expires - time.monotonic(), 0.0)), True
+            except DeadlineExceededError:
+                # De deadline van de uitvoerder is verstreken, niet die van deze aanroeper
+                continue
+
+        # Geef de sleutel vrij vóór de wachtenden wakker worden, zodat wie opnieuw
+        # probeert een nieuwe aanroep start in plaats van deze afgeronde terug te vinden
+        try:
+            result = fn()
+        except BaseException as e:
+            with self._lock:
+                del self._calls[key]
+            future.set_exception(e)
+            raise
+        with self._lock:
+            del self._calls[key]
+        future.set_result(result)
+        return result, False
+
+    def in_flight(self) -> int:
+        """Aantal sleutels waarvoor op dit moment een aanroep loopt."""
+        with self._lock:
+            return len(self._calls)
+
+
+class AsyncSingleFlight:
+    """
+    Asynchrone variant van SingleFlight.
+
+    De gedeelde aanroep draait als eigen taak; het annuleren van één wachtende
+    coroutine annuleert de aanroep voor de andere wachtenden niet. Net als bij
+    SingleFlight probeert een wachtende het na een DeadlineExceededError van de
+    gedeelde taak opnieuw met zijn eigen functie.
+    """
+    def __init__(self):
+        self._tasks: Dict[str, "asyncio.Task[Any]"] = {}
+        self.shared = 0
+
+    async def do(
+        self,
+        key: str,
+        fn: Callable[[], Awaitable[T]],
+        timeout: Optional[float] = None
+    ) -> Tuple[T, bool]:
+        """
+        Voer fn uit, of sluit aan bij een lopende aanroep met dezelfde sleutel.
+
+        Args:
+            key: Sleutel die identieke aanroepen herkent
+            fn: Functie die een awaitable met het resultaat teruggeeft
+            timeout: Maximale wachttijd van deze aanroeper; de gedeelde taak loopt door
+
+        Returns:
+            Tuple van (resultaat, of het resultaat met een lopende aanroep is gedeeld)
+
+        Raises:
+            asyncio.TimeoutError: Als het resultaat niet binnen timeout beschikbaar is
+        """
+        loop = asyncio.get_running_loop()
+        expires = None if timeout is None else loop.time() + timeout
+        while True:
+            task = self._tasks.get(key)
+            shared = task is not None
+            if shared:
+                self.shared += 1
+            else:
+                task = self._tasks[key] = asyncio.ensure_future(fn())
+                task.add_done_callback(functools.partial(self._forget, key))
+
+            try:
+                remaining = None if expires is None else max(expires - loop.time(), 0.0)
+                return await asyncio.wait_for(asyncio.shield(task), remaining), shared
+            except DeadlineExceededError:
+                if not shared:
+                    raise
+                # De deadline van de uitvoerder is verstreken, niet die van deze aanroeper
+                self._forget(key, task)
+
+    def _forget(self, key: str, task: "asyncio.Task[Any]") -> None:
+        if self._tasks.get(key) is task:
+            del self._tasks[key]
+
+    def in_flight(self) -> int:
+        """Aantal sleutels waarvoor op dit moment een aanroep loopt."""
+        return len(self._tasks)
+
+
+class _SharedStream:
+    """Buffer rond één upstream-iterator die door meerdere abonnees wordt gelezen."""
+    def __init__(self, upstream: Iterator[Any]):
+        self.upstream = upstream
+        self.buffer: List[Any] = []
+        self.error: Optional[BaseException] = None
+        self.done = False
+        self.subscribers = 0
+        self.lock = threading.Lock()
+
+
+class StreamSingleFlight:
+    """
+    Deelt één streaming aanroep tussen gelijktijdige, identieke verzoeken.
+
+    Elke abonnee krijgt alle fragmenten vanaf het begin, ook wie halverwege
+    aansluit. Het volgende fragment wordt opgehaald door de abonnee die het als
+    eerste nodig heeft, zodat de stroom niet afhangt van één bepaalde lezer.
+    Haken alle abonnees voortijdig af, dan wordt de upstream gesloten.
+
+    Gebruik:
+    ```python
+    flight = StreamSingleFlight()
+    for delta in flight.subscribe(sleutel, lambda: llm.stream_response(messages)):
+        print(delta, end="")
+    ```
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._streams: Dict[str, _SharedStream] = {}
+        self.shared = 0
+
+    def subscribe(self, key: str, factory: Callable[[], Iterator[T]]) -> Iterator[T]:
+        """
+        Lees de stroom voor een sleutel, en start deze als er nog geen loopt.
+
+        Args:
+            key: Sleutel die identieke aanroepen herkent
+            factory: Functie die de upstream-iterator aanmaakt
+
+        Yields:
+            Alle fragmenten van de gedeelde stroom, vanaf het begin
+        """
+        with self._lock:
+            stream = self._streams.get(key)
+            if stream is None:
+                stream = self._streams[key] = _SharedStream(factory())
+            else:
+                self.shared += 1
+            stream.subscribers += 1
+
+        index = 0
+        try:
+            while True:
+                with stream.lock:
+                    if index >= len(stream.buffer):
+                        if stream.error is not None:
+                            raise stream.error
+                        if stream.done:
+                            return
+                        try:
+                            stream.buffer.append(next(stream.upstream))
+                        except StopIteration:
+                            self._finish(key, stream)
+                            return
+                        except BaseException as e:
+                            stream.error = e
+                            self._finish(key, stream)
+                            raise
+                    item = stream.buffer[index]
+                index += 1
+                yield item
+        finally:
+            self._unsubscribe(key, stream)
+
+    def _finish(self, key: str, stream: _SharedStream) -> None:
+        """Markeer een stroom als afgerond en geef de sleutel vrij."""
+        stream.done = True
+        with self._lock:
+            if self._streams.get(key) is stream:
+                del self._streams[key]
+
+    def _unsubscribe(self, key: str, stream: _SharedStream) -> None:
+        """Meld een abonnee af; sluit de upstream als niemand meer leest."""
+        with self._lock:
+            stream.subscribers -= 1
+            abandoned = stream.subscribers == 0 and not stream.done
+            if abandoned and self._streams.get(key) is stream:
+                del self._streams[key]
+
+        if abandoned:
+            with stream.lock:
+                stream.done = True
+                close = getattr(stream.upstream, "close", None)
+                if close is not None:
+                    close()
+
+    def in_flight(self) -> int:
+        """Aantal sleutels waarvoor op dit moment een stroom loopt."""
+        with self._lock:
+            return len(self._streams)
+
+
+class _AsyncSharedStream:
+    """Asynchrone tegenhanger van _SharedStream."""
+    def __init__(self, upstream: AsyncIterator[Any]):
+        self.upstream = upstream
+        self.buffer: List[Any] = []
+        self.error: Optional[BaseException] = None
+        self.done = False
+        self.subscribers = 0
+        self.lock = asyncio.Lock()
+
+
+class AsyncStreamSingleFlight:
+    """Asynchrone variant van StreamSingleFlight."""
+    def __init__(self):
+        self._streams: Dict[str, _AsyncSharedStream] = {}
+        self.shared = 0
+
+    async def subscribe(self, key: str, factory: Callable[[], AsyncIterator[T]]) -> AsyncIterator[T]:
+        """
+        Lees de stroom voor een sleutel, en start deze als er nog geen loopt.
+
+        Args:
+            key: Sleutel die identieke aanroepen herkent
+            factory: Functie die de asynchrone upstream-iterator aanmaakt
+
+        Yields:
+            Alle fragmenten van de gedeelde stroom, vanaf het begin
+        """
+        stream = self._streams.get(key)
+        if stream is None:
+            stream = self._streams[key] = _AsyncSharedStream(factory())
+        else:
+            self.shared += 1
+        stream.subscribers += 1
+
+        index = 0
+        try:
+            while True:
+                async with stream.lock:
+                    if index >= len(stream.buffer):
+                        if stream.error is not None:
+                            raise stream.error
+                        if stream.done:
+                            return
+                        try:
+                            stream.buffer.append(await stream.upstream.__anext__())
+                        except StopAsyncIteration:
+                            self._finish(key, stream)
+                            return
+                        except BaseException as e:
+                            stream.error = e
+                            self._finish(key, stream)
+                            raise
+                    item = stream.buffer[index]
+                index += 1
+                yield item
+        finally:
+            stream.subscribers -= 1
+            if stream.subscribers == 0 and not stream.done:
+                self._finish(key, stream)
+                aclose = getattr(stream.upstream, "aclose", None)
+                if aclose is not None:
+                    await aclose()
+
+    def _finish(self, key: str, stream: _AsyncSharedStream) -> None:
+        """Markeer een stroom als afgerond en geef de sleutel vrij."""
+        stream.done = True
+        if self._streams.get(key) is stream:
+            del self._streams[key]
+
+    def in_flight(self) -> int:
+        """Aantal sleutels waarvoor op dit moment een stroom loopt."""
+        return len(self._streams)
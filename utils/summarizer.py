@@ -0,0 +1,159 @@
+import queue
+import threading
+from typing import List, Optional, Set
+
+from utils.conversation_memory import Message, Session
+
+
+class ConversationSummarizer:
+    """
+    Vouwt oudere beurten van een sessie in een lopende samenvatting.
+
+    Zodra een sessie threshold berichten bevat, worden alle berichten behalve de
+    laatste keep_recent samen met de bestaande samenvatting naar de LLM gestuurd.
+    Het resultaat vervangt die berichten in de sessie. Dit gebeurt standaard in een
+    achtergrondthread, zodat de gebruiker er in zijn beurt niet op hoeft te wachten.
+
+    Kies threshold kleiner dan Session.max_history, anders vallen berichten al uit
+    de ringbuffer voordat ze samengevat kunnen worden.
+
+    Gebruik:
+    ```python
+    summarizer = ConversationSummarizer(OllamaClient(model="llama3"), threshold=16, keep_recent=6)
+    agent = BackendDeveloperAgent(summarizer=summarizer)
+    ```
+    """
+    SYSTEM_PROMPT = (
+        "Je vat gesprekken beknopt samen in het Nederlands. Behoud namen, besluiten, "
+        "open vragen en technische details die later nodig kunnen zijn. "
+        "Antwoord alleen met de samenvatting."
+    )
+
+    def __init__(
+        self,
+        llm,
+        threshold: int = 16,
+        keep_recent: int = 6,
+        max_tokens: int = 300,
+        background: bool = True
+    ):
+        """
+        Initialiseer de samenvatter.
+
+        Args:
+            llm: Client met generate_response (bijv. OllamaClient)
+            threshold: Aantal berichten in een sessie waarna wordt samengevat
+            keep_recent: Aantal recente berichten dat letterlijk bewaard blijft
+            max_tokens: Maximale lengte van de samenvatting in tokens
+            background: Voer samenvattingen uit in een achtergrondthread
+        """
+        if keep_recent >= threshold:
+            raise ValueError("keep_recent moet kleiner zijn dan threshold")
+
+        self.llm = llm
+        self.threshold = threshold
+        self.keep_recent = keep_recent
+        self.max_tokens = max_tokens
+        self.background = background
+        self._queue: "queue.Queue[Optional[Session]]" = queue.Queue()
+        self._pending: Set[str] = set()
+        self._lock = threading.Lock()
+        self._worker: Optional[threading.Thread] = None
+
+    def needs_summary(self, session: Session) -> bool:
+        """Controleer of een sessie groot genoeg is om samen te vatten."""
+        return len(session.history) >= self.threshold
+
+    def maybe_schedule(self, session: Session) -> bool:
+        """
+        Plan een samenvatting in als de sessie over de drempel is.
+
+        Returns:
+            True als er een samenvatting is ingepland (of direct uitgevoerd)
+        """
+        if not self.needs_summary(session):
+            return False
+
+        if not self.background:
+            self.summarize(session)
+            return True
+
+        with self._lock:
+            if session.session_id in self._pending:
+                return False
+            self._pending.add(session.session_id)
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._run, name="summarizer", daemon=True)
+                self._worker.start()
+
+        self._queue.put(session)
+        return True
+
+    def _build_prompt(self, session: Session, folded: List[Message]) -> List[dict]:
+        """Stel de prompt samen met de bestaande samenvatting en de te vouwen beurten."""
+        transcript = "\n".join(f"{message.role}: {message.content}" for message in folded)
+        parts = []
+        if session.summary:
+            parts.append(f"Bestaande samenvatting:\n{session.summary}")
+        parts.append(f"Nieuwe beurten:\n{transcript}")
+        parts.append("Geef een bijgewerkte samenvatting van het hele gesprek tot nu toe.")
+        return [
+            {"role": "system", "content": self.SYSTEM_PROMPT},
+            {"role": "user", "content": "\n\n".join(parts)},
+        ]
+
+    def summarize(self, session: Session) -> bool:
+        """
+        Vat de oudere beurten van een sessie direct samen.
+
+        Returns:
+            True als de sessie is gecompacteerd
+        """
+        history = session.get_recent_history()
+        folded = list(history[:len(history) - self.keep_recent])
+        if not folded:
+            return False
+
+        try:
+            summary = self.llm.generate_response(
+                self._build_prompt(session, folded),
+                temperature=0.2,
+                max_tokens=self.max_tokens
+            )
+        except Exception as e:
+            # Een mislukte samenvatting laat de sessie ongemoeid; de volgende beurt probeert het opnieuw
+            print(f"Fout bij het samenvatten van sessie {session.session_id}: {e}")
+            return False
+
+        if not summary or not summary.strip():
+            return False
+
+        session.apply_summary(summary.strip(), folded)
+        return True
+
+    def _run(self) -> None:
+        """Verwerk ingeplande samenvattingen tot close() wordt aangeroepen."""
+        while True:
+            session = self._queue.get()
+            try:
+                if session is None:
+                    return
+                self.summarize(session)
+            finally:
+                if session is not None:
+                    with self._lock:
+                        self._pending.discard(session.session_id)
+                self._queue.task_done()
+
+    def join(self) -> None:
+        """Wacht tot alle ingeplande samenvattingen zijn verwerkt."""
+        self._queue.join()
+
+    def close(self) -> None:
+        """Verwerk de resterende samenvattingen en stop de achtergrondthread."""
+        with self._lock:
+            worker = self._worker
+            self._worker = None
+        if worker is not None and worker.is_alive():
+            self._queue.put(None)
+            worker.join()
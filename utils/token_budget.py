@@ -0,0 +1,91 @@
+from typing import Callable, List, Mapping, Sequence
+
+# Een estimator schat het aantal tokens van een tekst
+TokenEstimator = Callable[[str], int]
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Snelle, afhankelijkheidsvrije schatting van het aantal tokens.
+
+    Gaat uit van gemiddeld ~4 tekens per token, wat voor Nederlandse en Engelse
+    tekst met de gangbare BPE-tokenizers een redelijke bovengrens geeft.
+    """
+    return max(1, (len(text) + 3) // 4)
+
+
+class TokenBudget:
+    """
+    Selecteert zoveel mogelijk recente geschiedenis binnen een tokenbudget.
+
+    In plaats van een vast aantal berichten mee te sturen, wordt de geschiedenis
+    van nieuw naar oud gevuld tot het budget op is. Zo blijft de promptgrootte (en
+    daarmee de prefill-tijd bij Ollama) voorspelbaar: een paar lange code-antwoorden
+    blazen de prompt niet op en korte berichten laten geen ruimte onbenut.
+    Tokenaantallen van Message-records worden per record gecachet.
+
+    Gebruik:
+    ```python
+    agent = BackendDeveloperAgent(token_budget=TokenBudget(2048))
+    ```
+    """
+    def __init__(
+        self,
+        max_tokens: int,
+        estimator: TokenEstimator = estimate_tokens,
+        per_message_overhead: int = 4
+    ):
+        """
+        Initialiseer het budget.
+
+        Args:
+            max_tokens: Maximum aantal prompttokens (systeemprompt + geschiedenis)
+            estimator: Functie die het aantal tokens van een tekst schat
+            per_message_overhead: Extra tokens per bericht voor rol- en opmaakmarkering
+        """
+        if max_tokens < 1:
+            raise ValueError("max_tokens moet minimaal 1 zijn")
+
+        self.max_tokens = max_tokens
+        self.estimator = estimator
+        self.per_message_overhead = per_message_overhead
+
+    def count_text(self, text: str) -> int:
+        """Aantal tokens van een losse tekst, inclusief berichtoverhead."""
+        return self.estimator(text) + self.per_message_overhead
+
+    def count(self, message: Mapping[str, str]) -> int:
+        """Aantal tokens van een bericht; gecachet op Message-records."""
+        cached = getattr(message, "token_count", None)
+        if cached is not None:
+            return cached(self.estimator) + self.per_message_overhead
+        return self.count_text(message["content"])
+
+    def fit(
+        self,
+        messages: Sequence[Mapping[str, str]],
+        reserved_tokens: int = 0,
+        keep_last: int = 1
+    ) -> List[Mapping[str, str]]:
+        """
+        Geef de langste reeks recente berichten die binnen het budget past.
+
+        Args:
+            messages: Berichten van oud naar nieuw
+            reserved_tokens: Tokens die al vastliggen (bijv. systeemprompt)
+            keep_last: Aantal nieuwste berichten dat altijd wordt meegestuurd,
+                ook als het budget daarvoor niet toereikend is
+
+        Returns:
+            De geselecteerde berichten, van oud naar nieuw
+        """
+        remaining = self.max_tokens - reserved_tokens
+        start = len(messages)
+
+        for index in range(len(messages) - 1, -1, -1):
+            remaining -= self.count(messages[index])
+            if remaining < 0 and len(messages) - index > keep_last:
+                break
+            start = index
+
+        return list(messages[start:])
@@ -0,0 +1,279 @@
+import asyncio
+import contextvars
+import functools
+import json
+import os
+import random
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Optional, Sequence, TypeVar
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+
+class Span:
+    """
+    Eén getimede stap binnen een trace.
+
+    Attributes:
+        name: Naam van de stap (bijv. "agent.respond", "llm.http")
+        trace_id: ID dat alle spans van één verzoek verbindt
+        span_id: ID van deze span
+        parent_id: span_id van de omringende span (None voor de wortel)
+        start: Starttijd (epoch, seconden)
+        duration: Duur in seconden (None zolang de span loopt)
+        attributes: Extra gegevens zoals agent, sessie-ID of host
+        error: Omschrijving van de exceptie waarmee de span eindigde
+    """
+    __slots__ = ("name", "trace_id", "span_id", "parent_id", "start", "duration", "attributes", "error", "_t0")
+
+    def __init__(self, name: str, trace_id: str, parent_id: Optional[str], attributes: Dict[str, Any]):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = f"{random.getrandbits(64):016x}"
+        self.parent_id = parent_id
+        self.start = time.time()
+        self.duration: Optional[float] = None
+        self.attributes = attributes
+        self.error: Optional[str] = None
+        self._t0 = time.perf_counter()
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        """Voeg een attribuut toe of overschrijf het."""
+        self.attributes[key] = value
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "start": self.start,
+            "duration": self.duration,
+            "attributes": self.attributes,
+            "error": self.error,
+        }
+
+    def __repr__(self) -> str:
+        return f"Span({self.name!r}, duration={self.duration}, trace_id={self.trace_id!r})"
+
+
+class _NoopSpan:
+    """Span die niets vastlegt; wordt gebruikt als de trace niet gesampled is."""
+    __slots__ = ()
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        pass
+
+
+NOOP_SPAN = _NoopSpan()
+
+# De span die op dit moment loopt (of NOOP_SPAN binnen een niet-gesamplede trace)
+_current_span: contextvars.ContextVar[Any] = contextvars.ContextVar("current_span", default=None)
+
+
+def current_span() -> Any:
+    """De span die op dit moment loopt, of NOOP_SPAN als er niets wordt vastgelegd."""
+    span = _current_span.get()
+    return NOOP_SPAN if span is None else span
+
+
+class RingBufferExporter:
+    """Bewaart de laatste capacity afgeronde spans in het geheugen."""
+    def __init__(self, capacity: int = 2048):
+        self._spans: Deque[Span] = deque(maxlen=capacity)
+        self._lock = threading.Lock()
+
+    def export(self, span: Span) -> None:
+        with self._lock:
+            self._spans.append(span)
+
+    def spans(self, name: Optional[str] = None) -> List[Span]:
+        """Afgeronde spans, oudste eerst; optioneel alleen die met een bepaalde naam."""
+        with self._lock:
+            spans = list(self._spans)
+        return spans if name is None else [span for span in spans if span.name == name]
+
+    def traces(self) -> Dict[str, List[Span]]:
+        """Spans gegroepeerd per trace_id, in volgorde van starttijd."""
+        grouped: Dict[str, List[Span]] = {}
+        for span in self.spans():
+            grouped.setdefault(span.trace_id, []).append(span)
+        for spans in grouped.values():
+            spans.sort(key=lambda span: span.start)
+        return grouped
+
+    def clear(self) -> None:
+        with self._lock:
+            self._spans.clear()
+
+
+class JsonLinesExporter:
+    """Schrijft elke afgeronde span als één JSON-regel naar een bestand."""
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._file = open(path, "a", encoding="utf-8")
+
+    def export(self, span: Span) -> None:
+        line = json.dumps(span.to_dict(), ensure_ascii=False, default=str)
+        with self._lock:
+            self._file.write(line + "\n")
+            self._file.flush()
+
+    def close(self) -> None:
+        with self._lock:
+            self._file.close()
+
+
+class _SpanScope:
+    """Context manager die een span opent, als huidige span zet en bij het verlaten exporteert."""
+    __slots__ = ("tracer", "name", "attributes", "span", "previous")
+
+    def __init__(self, tracer: "Tracer", name: str, attributes: Dict[str, Any]):
+        self.tracer = tracer
+        self.name = name
+        self.attributes = attributes
+
+    def __enter__(self):
+        self.previous = parent = _current_span.get()
+        if parent is NOOP_SPAN:
+            self.span = NOOP_SPAN
+            return NOOP_SPAN
+        if parent is None:
+            if not self.tracer.should_sample():
+                self.span = NOOP_SPAN
+                _current_span.set(NOOP_SPAN)
+                return NOOP_SPAN
+            span = Span(self.name, f"{random.getrandbits(128):032x}", None, self.attributes)
+        else:
+            span = Span(self.name, parent.trace_id, parent.span_id, self.attributes)
+        self.span = span
+        _current_span.set(span)
+        return span
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        # Vorige waarde terugzetten (geen token-reset): veilig rond generators
+        _current_span.set(self.previous)
+        span = self.span
+        if span is NOOP_SPAN:
+            return
+        span.duration = time.perf_counter() - span._t0
+        if exc is not None and not isinstance(exc, GeneratorExit):
+            span.error = f"{type(exc).__name__}: {exc}"
+        self.tracer._export(span)
+
+
+class Tracer:
+    """
+    Maakt geneste spans voor de hot path van agents, sessies en de LLM-client.
+
+    De sampling-beslissing valt bij de wortelspan: een niet-gesamplede trace kost
+    per span alleen een contextvar-lookup, zodat tracing in productie aan kan
+    blijven met een lage sample_rate. Kindspans volgen de beslissing van hun ouder.
+
+    Gebruik:
+    ```python
+    ring = RingBufferExporter()
+    configure(sample_rate=0.05, exporters=[ring, JsonLinesExporter("traces.jsonl")])
+
+    with get_tracer().span("mijn.stap", sessie="s1") as span:
+        span.set_attribute("aantal", 3)
+    ```
+    """
+    def __init__(self, sample_rate: float = 1.0, exporters: Optional[Sequence[Any]] = None):
+        """
+        Initialiseer de tracer.
+
+        Args:
+            sample_rate: Fractie (0..1) van de traces die wordt vastgelegd
+            exporters: Objecten met een export(span)-methode (standaard een RingBufferExporter)
+        """
+        if not 0.0 <= sample_rate <= 1.0:
+            raise ValueError("sample_rate moet tussen 0 en 1 liggen")
+        self.sample_rate = sample_rate
+        self.exporters = list(exporters) if exporters is not None else [RingBufferExporter()]
+
+    def should_sample(self) -> bool:
+        """Beslis of een nieuwe trace wordt vastgelegd."""
+        rate = self.sample_rate
+        return rate >= 1.0 or (rate > 0.0 and random.random() < rate)
+
+    def span(self, name: str, **attributes: Any) -> _SpanScope:
+        """
+        Open een span als context manager.
+
+        Args:
+            name: Naam van de stap
+            **attributes: Attributen van de span
+
+        Returns:
+            Context manager die de Span (of NOOP_SPAN) oplevert
+        """
+        return _SpanScope(self, name, attributes)
+
+    def _export(self, span: Span) -> None:
+        for exporter in self.exporters:
+            try:
+                exporter.export(span)
+            except Exception as e:
+                print(f"Fout bij het exporteren van span {span.name}: {e}")
+
+    def close(self) -> None:
+        """Sluit exporters die een close-methode hebben (bijv. bestanden)."""
+        for exporter in self.exporters:
+            close = getattr(exporter, "close", None)
+            if close is not None:
+                close()
+
+
+# Standaard uit; zet TRACE_SAMPLE_RATE (en eventueel TRACE_FILE) of roep configure aan
+_tracer = Tracer(
+    sample_rate=float(os.getenv("TRACE_SAMPLE_RATE", "0")),
+    exporters=[RingBufferExporter()] + (
+        [JsonLinesExporter(os.environ["TRACE_FILE"])] if os.getenv("TRACE_FILE") else []
+    )
+)
+
+
+def get_tracer() -> Tracer:
+    """De proceswijde tracer die de agents, sessies en de LLM-client gebruiken."""
+    return _tracer
+
+
+def set_tracer(tracer: Tracer) -> Tracer:
+    """Vervang de proceswijde tracer en geef de vorige terug."""
+    global _tracer
+    previous, _tracer = _tracer, tracer
+    return previous
+
+
+def configure(sample_rate: float = 1.0, exporters: Optional[Sequence[Any]] = None) -> Tracer:
+    """Maak een nieuwe proceswijde tracer en geef die terug."""
+    tracer = Tracer(sample_rate=sample_rate, exporters=exporters)
+    set_tracer(tracer)
+    return tracer
+
+
+def span(name: str, **attributes: Any) -> _SpanScope:
+    """Open een span op de proceswijde tracer (kortere schrijfwijze van get_tracer().span)."""
+    return _tracer.span(name, **attributes)
+
+
+def traced(name: str) -> Callable[[F], F]:
+    """Decorator die elke aanroep van een (async) functie in een span met de gegeven naam uitvoert."""
+    def decorator(func: F) -> F:
+        if asyncio.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with _tracer.span(name):
+                    return await func(*args, **kwargs)
+            return async_wrapper  # type: ignore[return-value]
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with _tracer.span(name):
+                return func(*args, **kwargs)
+        return wrapper  # type: ignore[return-value]
+    return decorator